@@ -51,6 +51,7 @@ install_require = [
     'aodhclient',
     'gnocchiclient>=7.0.5,<8.0.0',
     'pika>=1.1.0,<2.0.0',
+    'PyMySQL',
     'python-barbicanclient>=4.0.1,<5.0.0',
     'python-cloudkittyclient',
     'python-designateclient>=1.5,<3.0.0',
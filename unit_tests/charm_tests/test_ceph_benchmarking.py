@@ -0,0 +1,150 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import mock
+import sys
+import unittest
+
+import unit_tests.utils as ut_utils
+import zaza.openstack.charm_tests.ceph.benchmarking.utils as bench_utils
+
+RADOS_BENCH_OUTPUT = """hints = 1
+Maintaining 16 concurrent writes of 4194304 bytes to objects of size 4194304
+  sec Cur ops   started  finished  avg MB/s  cur MB/s last lat(s)  avg lat(s)
+    0       0         0         0         0         0           -           0
+    1      16        40        24   95.9862        96    0.520612    0.432447
+Total time run:         10.2353
+Total writes made:      372
+Write size:             4194304
+Object size:            4194304
+Bandwidth (MB/sec):     145.379
+Stddev Bandwidth:       22.9428
+Average IOPS:           36
+Stddev IOPS:            5.73571
+Average Latency(s):     0.438234
+Max latency(s):         1.18731
+"""
+
+RBD_BENCH_OUTPUT = """bench  type write io_size 4096 io_threads 16
+  SEC       OPS   OPS/SEC   BYTES/SEC
+    1      5184   5200.84    20 MiB/s
+elapsed: 12   ops: 65536   ops/sec: 5276.49   bytes/sec: 20 MiB/s
+"""
+
+
+def _result(workload='rados_write', **metrics):
+    return bench_utils.BenchResult(
+        workload, {'block_size': 4096, 'concurrency': 16}, {}, metrics)
+
+
+class TestCephBenchmarkUtils(ut_utils.BaseTestCase):
+
+    def test_parse_rados_bench(self):
+        summary = bench_utils.parse_rados_bench(RADOS_BENCH_OUTPUT)
+        self.assertEqual(summary['Write size'], '4194304')
+        self.assertEqual(bench_utils.rados_metrics(summary), {
+            'bandwidth_mb_s': 145.379, 'iops': 36.0,
+            'latency_avg_s': 0.438234, 'latency_max_s': 1.18731,
+            'seconds': 10.2353})
+        self.assertEqual(bench_utils.rados_metrics({}), {})
+
+    def test_parse_rbd_bench(self):
+        self.assertEqual(bench_utils.parse_rbd_bench(RBD_BENCH_OUTPUT), {
+            'seconds': 12.0, 'iops': 5276.49, 'bandwidth_mb_s': 20.0})
+        self.assertEqual(
+            bench_utils.parse_rbd_bench(
+                'elapsed: 2  ops: 10  ops/sec: 5.0  bytes/sec: 2097152.00'),
+            {'seconds': 2.0, 'iops': 5.0, 'bandwidth_mb_s': 2.0})
+        self.assertEqual(bench_utils.parse_rbd_bench('failed'), {})
+
+    def test_aggregate(self):
+        self.assertEqual(
+            bench_utils.aggregate([
+                {'bandwidth_mb_s': 10, 'iops': 2, 'latency_avg_s': 0.1,
+                 'latency_max_s': 1, 'seconds': 10},
+                {'bandwidth_mb_s': 20, 'iops': 4, 'latency_avg_s': 0.3,
+                 'latency_max_s': 2, 'seconds': 11}]),
+            {'bandwidth_mb_s': 30, 'iops': 6, 'latency_avg_s': 0.2,
+             'latency_max_s': 2, 'seconds': 11})
+
+    def test_rados_bench_command(self):
+        self.assertEqual(
+            bench_utils.rados_bench_command(
+                'pool', 30, 'write', block_size=4096, concurrency=16,
+                max_objects=100, run_name='run'),
+            'rados bench -p pool 30 write -b 4096 --max-objects 100 '
+            '--no-cleanup -t 16 --run-name run')
+        self.assertEqual(
+            bench_utils.rados_bench_command(
+                'pool', 30, 'seq', block_size=4096, run_name='run'),
+            'rados bench -p pool 30 seq --run-name run')
+
+    def test_rbd_bench_command(self):
+        self.assertEqual(
+            bench_utils.rbd_bench_command(
+                'pool/image', 'read', 4096, 16, '256M', 'rand'),
+            'rbd bench --io-type read --io-size 4096 --io-threads 16 '
+            '--io-total 256M --io-pattern rand pool/image')
+
+    def test_run_rados_bench(self):
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+        self.patch_object(
+            bench_utils.zaza.model, 'async_run_on_unit',
+            new=mock.AsyncMock(return_value={
+                'Code': '0', 'Stdout': RADOS_BENCH_OUTPUT}))
+        result = bench_utils.run_rados_bench(
+            ['ceph-mon/0', 'ceph-mon/1'], 'pool', 10, 'write',
+            block_size=4096)
+        self.assertEqual(result.workload, 'rados_write')
+        self.assertEqual(sorted(result.clients), ['ceph-mon/0', 'ceph-mon/1'])
+        self.assertEqual(result.metrics['iops'], 72)
+        self.async_run_on_unit.assert_any_call(
+            'ceph-mon/1',
+            'rados bench -p pool 10 write -b 4096 --no-cleanup '
+            '--run-name zaza_bench_ceph-mon_1',
+            model_name=None, timeout=130)
+        self.assertEqual(
+            bench_utils.bench_key(result),
+            'rados_write/block_size=4096/clients=2/concurrency=None/'
+            'max_objects=None')
+
+    def test_run_on_clients_failure(self):
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+        self.patch_object(
+            bench_utils.zaza.model, 'async_run_on_unit',
+            new=mock.AsyncMock(return_value={'Code': '1', 'Stderr': 'no'}))
+        with self.assertRaises(bench_utils.zaza.model.CommandRunFailed):
+            asyncio.get_event_loop().run_until_complete(
+                bench_utils.async_run_on_clients(
+                    ['ceph-mon/0'], lambda client: 'false'))
+
+    def test_compare_results(self):
+        baseline = bench_utils.results_to_json([_result(
+            bandwidth_mb_s=100.0, latency_avg_s=0.5, seconds=10)])
+        self.assertEqual(baseline[0]['key'],
+                         'rados_write/block_size=4096/concurrency=16')
+        comparison = bench_utils.compare_results(
+            [_result(bandwidth_mb_s=90.0, latency_avg_s=0.4, seconds=12),
+             _result('rados_seq', bandwidth_mb_s=1.0)],
+            baseline)
+        self.assertEqual(
+            [(key, metric, base, value, round(change, 3))
+             for key, metric, base, value, change in comparison],
+            [('rados_write/block_size=4096/concurrency=16',
+              'bandwidth_mb_s', 100.0, 90.0, -0.1),
+             ('rados_write/block_size=4096/concurrency=16',
+              'latency_avg_s', 0.5, 0.4, 0.2)])
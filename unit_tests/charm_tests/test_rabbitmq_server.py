@@ -38,3 +38,143 @@ class TestRabbitUtils(unittest.TestCase):
             'rabbitmq-server',
             'complete-cluster-series-upgrade',
             action_params={})
+
+    def test_percentile(self):
+        self.assertIsNone(rabbit_utils.percentile([], 50))
+        samples = list(range(100, 0, -1))
+        self.assertEqual(rabbit_utils.percentile(samples, 50), 50)
+        self.assertEqual(rabbit_utils.percentile(samples, 99), 99)
+        self.assertEqual(rabbit_utils.percentile(samples, 0), 1)
+        self.assertEqual(rabbit_utils.percentile([3], 99), 3)
+
+    def test_declare_benchmark_queue(self):
+        channel = mock.MagicMock()
+        rabbit_utils.declare_benchmark_queue(channel, 'q', 'quorum')
+        channel.queue_declare.assert_called_once_with(
+            queue='q', durable=True, auto_delete=False,
+            arguments={'x-queue-type': 'quorum'})
+        channel.queue_purge.assert_called_once_with(queue='q')
+        channel.reset_mock()
+        rabbit_utils.declare_benchmark_queue(channel, 'q', 'mirrored')
+        channel.queue_declare.assert_called_once_with(
+            queue='q', durable=True, auto_delete=False, arguments=None)
+        with self.assertRaises(ValueError):
+            rabbit_utils.declare_benchmark_queue(channel, 'q', 'stream')
+
+    @mock.patch.object(rabbit_utils.time, 'sleep')
+    @mock.patch.object(rabbit_utils.time, 'monotonic')
+    def test_publish_and_consume_benchmark_messages(self, monotonic, sleep):
+        monotonic.return_value = 100.0
+        channel = mock.MagicMock()
+        self.assertEqual(
+            rabbit_utils.publish_benchmark_messages(
+                channel, 'q', 3, 100, rate=4),
+            3)
+        self.assertEqual(channel.basic_publish.call_count, 3)
+        bodies = [c[1]['body'] for c in channel.basic_publish.call_args_list]
+        self.assertEqual([len(b) for b in bodies], [100, 100, 100])
+        sleep.assert_has_calls([mock.call(0.25), mock.call(0.5)])
+
+        monotonic.return_value = 100.5
+        methods = [mock.MagicMock(delivery_tag=i) for i in range(3)]
+        channel.consume.return_value = iter(
+            [(m, None, b) for m, b in zip(methods, bodies)])
+        self.assertEqual(
+            rabbit_utils.consume_benchmark_messages(channel, 'q', 3),
+            [0.5, 0.5, 0.5])
+        channel.basic_ack.assert_has_calls(
+            [mock.call(0), mock.call(1), mock.call(2)])
+        channel.cancel.assert_called_once_with()
+
+        channel.consume.return_value = iter(
+            [(methods[0], None, bodies[0]), (None, None, None)])
+        self.assertEqual(
+            rabbit_utils.consume_benchmark_messages(channel, 'q', 3), [0.5])
+
+    @mock.patch.object(rabbit_utils, 'consume_benchmark_messages')
+    @mock.patch.object(rabbit_utils, 'publish_benchmark_messages')
+    @mock.patch.object(rabbit_utils, 'connect_amqp_by_unit')
+    def test_run_amqp_benchmark(self, connect_amqp_by_unit,
+                                publish_benchmark_messages,
+                                consume_benchmark_messages):
+        units = [mock.MagicMock(entity_id='rabbitmq-server/0'),
+                 mock.MagicMock(entity_id='rabbitmq-server/1')]
+        opened = []
+
+        def _connect(*args, **kwargs):
+            opened.append(mock.MagicMock())
+            return opened[-1]
+
+        connect_amqp_by_unit.side_effect = _connect
+        publish_benchmark_messages.return_value = 4
+        consume_benchmark_messages.return_value = [0.1, 0.4, 0.2, 0.3]
+        with rabbit_utils.AmqpBenchmarkConnections(units) as connections:
+            self.assertEqual(connect_amqp_by_unit.call_count, 4)
+            connect_amqp_by_unit.assert_called_with(
+                units[1], ssl=False, port=None, username='testuser1',
+                password='changeme', heartbeat=0)
+            result = rabbit_utils.run_amqp_benchmark(
+                connections, 'rabbitmq-server/0', 'rabbitmq-server/1',
+                'classic', 4, 64)
+        queue = 'zaza-benchmark.classic.rabbitmq-server-0.rabbitmq-server-1'
+        publisher = connections.publishers['rabbitmq-server/0']
+        publisher.confirm_delivery.assert_called_once_with()
+        publish_benchmark_messages.assert_called_once_with(
+            publisher, queue, 4, 64, None)
+        consume_benchmark_messages.assert_called_once_with(
+            connections.consumers['rabbitmq-server/1'], queue, 4, 60)
+        publisher.queue_delete.assert_called_once_with(queue=queue)
+        self.assertEqual(result.received, 4)
+        self.assertEqual(result.p50, 0.2)
+        self.assertEqual(result.p99, 0.4)
+        self.assertFalse(result.ssl)
+        for connection in opened:
+            connection.close.assert_called_once_with()
+
+    @mock.patch.object(rabbit_utils, 'connect_amqp_by_unit')
+    def test_amqp_connection_pool(self, connect_amqp_by_unit):
+        opened = []
+
+        def _connect(*args, **kwargs):
+            opened.append(mock.MagicMock())
+            return opened[-1]
+
+        connect_amqp_by_unit.side_effect = _connect
+        unit = mock.MagicMock(entity_id='rabbitmq-server/0')
+        with rabbit_utils.AmqpConnectionPool() as pool:
+            channel = pool.channel(unit)
+            self.assertIs(pool.channel(unit), channel)
+            self.assertEqual(len(opened), 1)
+            channel.confirm_delivery.assert_called_once_with()
+            connect_amqp_by_unit.assert_called_once_with(
+                unit, ssl=False, port=None, username='testuser1',
+                password='changeme', heartbeat=0)
+            self.assertIsNot(pool.channel(unit, ssl=True, port=5671),
+                             channel)
+            self.assertEqual(len(opened), 2)
+
+            channel.is_open = False
+            reopened = pool.channel(unit)
+            self.assertIsNot(reopened, channel)
+            opened[0].close.assert_called_once_with()
+
+            self.assertEqual(pool.publish(unit, ['a', 'b']), 2)
+            reopened.queue_declare.assert_called_once_with(
+                queue='test', auto_delete=False, durable=True)
+            reopened.basic_publish.assert_has_calls([
+                mock.call(exchange='', routing_key='test', body='a'),
+                mock.call(exchange='', routing_key='test', body='b')])
+
+            method = mock.MagicMock()
+            reopened.consume.return_value = iter(
+                [(method, None, b'a'), (method, None, b'b'),
+                 (None, None, None)])
+            self.assertEqual(pool.consume(unit, 3), ['a', 'b'])
+            reopened.basic_qos.assert_called_once_with(prefetch_count=3)
+            reopened.consume.assert_called_once_with(
+                'test', inactivity_timeout=10)
+            reopened.basic_ack.assert_called_once_with(
+                delivery_tag=0, multiple=True)
+            reopened.cancel.assert_called_once_with()
+        for connection in opened[1:]:
+            connection.close.assert_called_once_with()
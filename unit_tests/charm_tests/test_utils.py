@@ -58,35 +58,26 @@ class TestBaseCharmTest(ut_utils.BaseTestCase):
         self.patch_target('config_current')
         self.config_current.return_value = default_config
         self.patch_object(test_utils.model, 'set_application_config')
-        self.patch_object(test_utils.model, 'wait_for_agent_status')
-        self.patch_object(test_utils.model, 'wait_for_application_states')
-        self.patch_object(test_utils.model, 'block_until_all_units_idle')
+        self.patch_object(test_utils.generic_utils,
+                          'block_until_applications_settled')
         with self.target.config_change(
                 default_config, alterna_config, application_name='anApp'):
             self.set_application_config.assert_called_once_with(
                 'anApp', alterna_config, model_name='aModel')
-            self.wait_for_agent_status.assert_called_once_with(
-                model_name='aModel')
-            self.wait_for_application_states.assert_called_once_with(
-                model_name='aModel', states={})
-            self.block_until_all_units_idle.assert_called_once_with()
+            self.block_until_applications_settled.assert_called_once_with(
+                ['anApp'], model_name='aModel', states={})
         # after yield we will have different calls than the above, measure both
         self.set_application_config.assert_has_calls([
             mock.call('anApp', alterna_config, model_name='aModel'),
             mock.call('anApp', default_config, model_name='aModel'),
         ])
-        self.wait_for_application_states.assert_has_calls([
-            mock.call(model_name='aModel', states={}),
-            mock.call(model_name='aModel', states={}),
-        ])
-        self.block_until_all_units_idle.assert_has_calls([
-            mock.call(),
-            mock.call(),
+        self.block_until_applications_settled.assert_has_calls([
+            mock.call(['anApp'], model_name='aModel', states={}),
+            mock.call(['anApp'], model_name='aModel', states={}),
         ])
         # confirm operation with `reset_to_charm_default`
         self.set_application_config.reset_mock()
-        self.wait_for_agent_status.reset_mock()
-        self.wait_for_application_states.reset_mock()
+        self.block_until_applications_settled.reset_mock()
         self.patch_object(test_utils.model, 'reset_application_config')
         with self.target.config_change(
                 default_config, alterna_config, application_name='anApp',
@@ -98,19 +89,14 @@ class TestBaseCharmTest(ut_utils.BaseTestCase):
         self.assertFalse(self.set_application_config.called)
         self.reset_application_config.assert_called_once_with(
             'anApp', list(alterna_config.keys()), model_name='aModel')
-        self.wait_for_application_states.assert_has_calls([
-            mock.call(model_name='aModel', states={}),
-            mock.call(model_name='aModel', states={}),
-        ])
-        self.block_until_all_units_idle.assert_has_calls([
-            mock.call(),
-            mock.call(),
+        self.block_until_applications_settled.assert_has_calls([
+            mock.call(['anApp'], model_name='aModel', states={}),
+            mock.call(['anApp'], model_name='aModel', states={}),
         ])
         # confirm operation where both default and alternate config passed in
         # are the same. This is used to set config and not change it back.
         self.set_application_config.reset_mock()
-        self.wait_for_agent_status.reset_mock()
-        self.wait_for_application_states.reset_mock()
+        self.block_until_applications_settled.reset_mock()
         self.reset_application_config.reset_mock()
         with self.target.config_change(
                 alterna_config, alterna_config, application_name='anApp'):
@@ -118,12 +104,326 @@ class TestBaseCharmTest(ut_utils.BaseTestCase):
                 'anApp', alterna_config, model_name='aModel')
             # we want to assert these not to be called after yield
             self.set_application_config.reset_mock()
-            self.wait_for_agent_status.reset_mock()
-            self.wait_for_application_states.reset_mock()
+            self.block_until_applications_settled.reset_mock()
         self.assertFalse(self.set_application_config.called)
         self.assertFalse(self.reset_application_config.called)
-        self.assertFalse(self.wait_for_agent_status.called)
-        self.assertFalse(self.wait_for_application_states.called)
+        self.assertFalse(self.block_until_applications_settled.called)
+
+    def test_config_changes(self):
+        self.target.model_name = 'aModel'
+        self.target.test_config = {}
+        self.patch_target('config_current')
+        self.config_current.side_effect = lambda app, keys: {
+            'app1': {'debug': 'False'},
+            'app2': {'verbose': 'True'},
+            'app3': {'debug': 'False'}}[app]
+        self.patch_object(test_utils.model, 'set_application_config')
+        self.patch_object(test_utils.generic_utils,
+                          'block_until_applications_settled')
+        changes = {
+            'app1': ({'debug': 'False'}, {'debug': 'True'}),
+            # already applied, and restored on completion
+            'app2': ({'verbose': 'False'}, {'verbose': 'True'}),
+            # applied and not restored
+            'app3': ({'debug': 'True'}, {'debug': 'True'}),
+        }
+        with self.target.config_changes(changes):
+            self.set_application_config.assert_has_calls([
+                mock.call('app1', {'debug': 'True'}, model_name='aModel'),
+                mock.call('app3', {'debug': 'True'}, model_name='aModel'),
+            ])
+            self.assertEqual(self.set_application_config.call_count, 2)
+            self.block_until_applications_settled.assert_called_once_with(
+                ['app1', 'app3'], model_name='aModel', states={})
+            self.set_application_config.reset_mock()
+            self.block_until_applications_settled.reset_mock()
+        self.set_application_config.assert_has_calls([
+            mock.call('app1', {'debug': 'False'}, model_name='aModel'),
+            mock.call('app2', {'verbose': 'False'}, model_name='aModel'),
+        ])
+        self.assertEqual(self.set_application_config.call_count, 2)
+        self.block_until_applications_settled.assert_called_once_with(
+            ['app1', 'app2'], model_name='aModel', states={})
+
+    def test_pause_resume_units(self):
+        self.target.model_name = 'aModel'
+        self.target.application_name = 'app'
+        units = [mock.MagicMock(entity_id='app/0'),
+                 mock.MagicMock(entity_id='app/1')]
+        self.patch_object(test_utils.model, 'get_units')
+        self.get_units.return_value = units
+        self.patch_object(test_utils.zaza.events,
+                          'get_global_event_logger_instance',
+                          return_value=mock.MagicMock())
+        self.patch_object(test_utils.generic_utils,
+                          'block_until_service_status_on_units')
+        self.patch_object(test_utils.generic_utils, 'run_action_on_all_units')
+        self.patch_object(test_utils.model, 'block_until_unit_wl_status')
+        self.patch_object(test_utils.model, 'block_until_all_units_idle')
+        self.run_action_on_all_units.side_effect = [
+            {'app/0': 1.0, 'app/1': 2.0},
+            {'app/0': 3.0, 'app/1': 4.0},
+        ]
+        with self.target.pause_resume_units(['svc']):
+            self.block_until_unit_wl_status.assert_has_calls([
+                mock.call('app/0', 'active', model_name='aModel'),
+                mock.call('app/1', 'active', model_name='aModel')])
+            self.run_action_on_all_units.assert_called_once_with(
+                ['app/0', 'app/1'], 'pause', 'maintenance',
+                model_name='aModel')
+            self.block_until_service_status_on_units.assert_has_calls([
+                mock.call(['app/0', 'app/1'], ['svc'], 'running',
+                          model_name='aModel', pgrep_full=False),
+                mock.call(['app/0', 'app/1'], ['svc'], 'stopped',
+                          model_name='aModel', pgrep_full=False),
+            ])
+        self.run_action_on_all_units.assert_called_with(
+            ['app/0', 'app/1'], 'resume', 'active', model_name='aModel')
+        self.block_until_service_status_on_units.assert_called_with(
+            ['app/0', 'app/1'], ['svc'], 'running',
+            model_name='aModel', pgrep_full=False)
+        self.get_units.assert_called_once_with('app', model_name='aModel')
+        self.assertEqual(self.target.pause_resume_latency, {
+            'app/0': {'pause': 1.0, 'resume': 3.0},
+            'app/1': {'pause': 2.0, 'resume': 4.0},
+        })
+        self.assertEqual(
+            self.get_global_event_logger_instance.return_value.log.call_count,
+            4)
+
+        # Units are resumed when the body fails
+        self.run_action_on_all_units.reset_mock()
+        self.run_action_on_all_units.side_effect = [
+            {'app/0': 1.0, 'app/1': 2.0},
+            {'app/0': 3.0, 'app/1': 4.0},
+        ]
+        with self.assertRaises(ValueError):
+            with self.target.pause_resume_units(['svc']):
+                raise ValueError()
+        self.run_action_on_all_units.assert_called_with(
+            ['app/0', 'app/1'], 'resume', 'active', model_name='aModel')
+        self.block_until_service_status_on_units.assert_called_with(
+            ['app/0', 'app/1'], ['svc'], 'running',
+            model_name='aModel', pgrep_full=False)
+
+    def test_pause_resume(self):
+        self.target.lead_unit = 'app/1'
+        self.patch_object(test_utils.BaseCharmTest, 'pause_resume_units',
+                          return_value=mock.MagicMock())
+        with self.target.pause_resume(['svc'], pgrep_full=True):
+            self.pause_resume_units.assert_called_once_with(
+                ['svc'], unit_names=['app/1'], pgrep_full=True)
+            self.pause_resume_units.return_value.__exit__.assert_not_called()
+        self.pause_resume_units.return_value.__exit__.assert_called_once()
+
+    def test_run_security_checklist(self):
+        self.target.model_name = 'aModel'
+        self.target.application_name = 'app'
+        self.patch_object(test_utils.model, 'get_units')
+        self.get_units.side_effect = lambda app, model_name: [
+            mock.MagicMock(entity_id='{}/0'.format(app))]
+        self.patch_object(test_utils.generic_utils, 'collect_action_results')
+        passed = mock.MagicMock(data={
+            'status': 'completed',
+            'results': {'check-a': 'PASS', 'check-b': 'FAIL: no'}})
+        failed = mock.MagicMock(data={
+            'status': 'failed',
+            'results': {'check-a': 'FAIL: yes', 'check-b': 'PASS'}})
+        self.collect_action_results.return_value = {
+            'app/0': (passed, 1.0)}
+        report = self.target.run_security_checklist(
+            ['check-a'], ['check-b'], expected_to_pass=True)
+        self.assertEqual(report, {'app/0': {
+            'status': 'completed',
+            'results': {'check-a': 'PASS', 'check-b': 'FAIL: no'},
+            'duration': 1.0,
+            'failures': []}})
+        self.assertIs(self.target.security_checklist_report, report)
+        self.collect_action_results.assert_called_once_with(
+            ['app/0'], 'security-checklist', model_name='aModel',
+            action_params={})
+
+        # Every unexpected outcome of every unit is reported at once
+        self.collect_action_results.return_value = {
+            'app/0': (passed, 1.0), 'other/0': (failed, 2.0)}
+        with self.assertRaises(AssertionError) as context:
+            self.target.run_security_checklist(
+                ['check-a'], ['check-b'], expected_to_pass=True,
+                application_names=['app', 'other'])
+        self.assertEqual(str(context.exception), '\n'.join([
+            'other/0: Security check is expected to pass by default',
+            'other/0: Unexpected failure: check-a',
+            'other/0: Unexpected test pass: check-b']))
+
+    def test_restart_on_changed(self):
+        self.target.model_name = 'aModel'
+        self.target.application_name = 'app'
+        self.target.lead_unit = 'app/0'
+        self.patch_target('config_change', return_value=mock.MagicMock())
+        self.patch_object(test_utils.model, 'get_unit_time',
+                          return_value=42)
+        self.patch_object(test_utils.model, 'get_units',
+                          return_value=[mock.MagicMock(entity_id='app/0')])
+        self.patch_object(test_utils.model,
+                          'block_until_oslo_config_entries_match')
+        self.patch_object(test_utils.model, 'block_until_services_restarted')
+        self.patch_object(test_utils.generic_utils, 'get_restart_baseline')
+        self.patch_object(test_utils.generic_utils, 'wait_for_restart')
+        self.get_restart_baseline.return_value = {
+            'app/0': {'hash': 'a', 'services': {'svc1': 1, 'svc2': None}}}
+        self.wait_for_restart.return_value = {
+            'app/0': {'hash': 'b', 'services': {'svc1': 2, 'svc2': None},
+                      'done': True}}
+        self.target.restart_on_changed(
+            '/etc/app.conf', {'debug': False}, {'debug': True},
+            {'DEFAULT': {'debug': ['False']}},
+            {'DEFAULT': {'debug': ['True']}},
+            ['svc1', 'svc2'])
+        self.get_restart_baseline.assert_called_once_with(
+            ['app/0'], '/etc/app.conf', ['svc1', 'svc2'],
+            model_name='aModel')
+        self.wait_for_restart.assert_called_once_with(
+            self.get_restart_baseline.return_value, '/etc/app.conf',
+            ['svc1', 'svc2'], model_name='aModel')
+        self.block_until_services_restarted.assert_called_once_with(
+            'app', 42, ['svc2'], model_name='aModel', pgrep_full=False)
+        self.block_until_oslo_config_entries_match.assert_has_calls([
+            mock.call('app', '/etc/app.conf',
+                      {'DEFAULT': {'debug': ['True']}}, model_name='aModel'),
+            mock.call('app', '/etc/app.conf',
+                      {'DEFAULT': {'debug': ['False']}}, model_name='aModel'),
+        ])
+        self.wait_for_restart.return_value['app/0']['done'] = False
+        with self.assertRaises(AssertionError):
+            self.target.restart_on_changed(
+                '/etc/app.conf', {'debug': False}, {'debug': True},
+                {'DEFAULT': {'debug': ['False']}},
+                {'DEFAULT': {'debug': ['True']}},
+                ['svc1', 'svc2'])
+
+    def test_run_timing(self):
+
+        class FakeTest(test_utils.BaseCharmTest):
+
+            def test_foo(self):
+                pass
+
+        self.patch_object(test_utils.timing, 'record')
+        self.patch_object(test_utils.timing, 'span',
+                          return_value=mock.MagicMock())
+        self.patch_object(test_utils.timing, 'write_report')
+        self.patch_object(test_utils.timing, 'uninstrument')
+        self.patch_object(test_utils.retry_policy, 'deadline',
+                          return_value=mock.MagicMock())
+        self.patch_object(test_utils.retry_policy, 'report',
+                          return_value={'ping': {'retries': 2, 'slept': 3}})
+        FakeTest._timing_start = 1.0
+        FakeTest('test_foo').run()
+        FakeTest.retry_deadline = 600
+        FakeTest('test_foo').run()
+        self.record.assert_called_once_with('setUpClass', 1.0)
+        self.span.assert_has_calls([mock.call('test_foo')])
+        self.deadline.assert_has_calls([mock.call(None), mock.call(600)],
+                                       any_order=True)
+        FakeTest._report()
+        self.report.assert_called_once_with(reset=True)
+        self.write_report.assert_called_once_with(
+            'unit_tests.charm_tests.test_utils.FakeTest',
+            extra={'retry_policies': {'ping': {'retries': 2, 'slept': 3}}})
+        self.uninstrument.assert_called_once_with()
+
+    def test_benchmark_regressions(self):
+
+        class FakeTest(test_utils.BaseCharmTest):
+
+            def test_foo(self):
+                pass
+
+        store = mock.MagicMock()
+        store.regressions.return_value = [test_utils.benchmark.Regression(
+            'rados', 'iops', 10.0, 5.0, -0.5)]
+        self.patch_object(test_utils.benchmark, 'get_store',
+                          return_value=store)
+        target = FakeTest('test_foo')
+        target.record_benchmark('rados', {'iops': 5.0})
+        store.record.assert_called_once_with(
+            'rados', {'iops': 5.0},
+            test=target.id())
+        with self.assertRaises(AssertionError) as context:
+            target.assert_no_benchmark_regressions(tolerance=0.2)
+        self.assertIn('rados iops: 10.0 -> 5.0 (-50.0%)',
+                      str(context.exception))
+        store.regressions.assert_called_once_with(
+            tolerance=0.2,
+            test_prefix=target.id()[:-len('test_foo')])
+        self.get_store.return_value = None
+        target.record_benchmark('rados', {'iops': 5.0})
+        target.assert_no_benchmark_regressions()
+
+    def test_setUpClass_registers_report(self):
+        self.patch_object(test_utils.model, 'get_juju_model_aliases')
+        self.patch_object(test_utils.model, 'get_juju_model')
+        self.patch_object(test_utils.model, 'get_lead_unit_name')
+        self.patch_object(test_utils.lifecycle_utils, 'get_charm_config',
+                          return_value={'tests_options': {
+                              'unit_tests.charm_tests.test_utils.FakeTest.'
+                              'run_tearDown': False}})
+        # Forget the test config read by other tests
+        test_config = mock.patch.object(test_utils, '_test_config', None)
+        test_config.start()
+        self.addCleanup(test_config.stop)
+
+        class FakeTest(test_utils.BaseCharmTest):
+
+            @classmethod
+            def tearDownClass(cls):
+                pass
+
+        with mock.patch.object(FakeTest, 'addClassCleanup') as cleanup:
+            FakeTest.setUpClass('app')
+            FakeTest.setUpClass('app')
+        cleanup.assert_called_once_with(FakeTest._report)
+        # The test config is read once per process
+        self.get_charm_config.assert_called_once_with(fatal=False)
+        self.assertEqual(dict(FakeTest.tests_options), {'run_tearDown': False})
+
+    def test_get_test_config_copies(self):
+        self.patch_object(test_utils.lifecycle_utils, 'get_charm_config',
+                          return_value={'target_deploy_status': {
+                              'app': {'workload-status': 'active'}}})
+        test_config = mock.patch.object(test_utils, '_test_config', None)
+        test_config.start()
+        self.addCleanup(test_config.stop)
+        config = test_utils.get_test_config()
+        config['target_deploy_status'].update(
+            {'app': {'workload-status': 'blocked'}})
+        self.assertEqual(
+            test_utils.get_test_config()['target_deploy_status'],
+            {'app': {'workload-status': 'active'}})
+        self.get_charm_config.assert_called_once_with(fatal=False)
+
+    def test_tests_options(self):
+        options = test_utils.TestsOptions({
+            'a.B.test_foo.key': True, 'a.B.key': 1, 'a.BC.key': 2})
+        self.assertEqual(len(options), 3)
+        self.assertEqual(options['a.B.key'], 1)
+        self.assertEqual(dict(options.with_prefix('a.B')),
+                         {'test_foo.key': True, 'key': 1})
+        self.assertIs(options.with_prefix('a.B'), options.with_prefix('a.B'))
+        with self.assertRaises(TypeError):
+            options.with_prefix('a.B')['key'] = 3
+
+    def test_get_test_config(self):
+        self.patch_object(test_utils.lifecycle_utils, 'get_charm_config',
+                          return_value={'charm_name': 'app'})
+        # Forget the test config read by other tests
+        test_config = mock.patch.object(test_utils, '_test_config', None)
+        test_config.start()
+        self.addCleanup(test_config.stop)
+        config = test_utils.get_test_config()
+        config['charm_name'] = 'changed'
+        self.assertEqual(test_utils.get_test_config(), {'charm_name': 'app'})
+        self.get_charm_config.assert_called_once_with(fatal=False)
 
     def test_separate_non_string_config(self):
         intended_cfg_keys = ['foo2', 'foo3', 'foo4', 'foo5']
@@ -402,3 +702,27 @@ class TestOpenStackBaseTest(ut_utils.BaseTestCase):
 
         MyTestClass.setUpClass('foo', 'bar')
         self.setUpClass.assert_called_with('foo', 'bar')
+
+    def test_launch_guest_reclaims_floating_ip(self):
+        self.patch_object(test_utils.configure_guest, 'launch_instance')
+        self.patch_object(test_utils.openstack_utils, 'delete_resource')
+        self.patch_object(test_utils.retry_policy, 'retrying',
+                          return_value=mock.MagicMock())
+
+        class MyTestClass(test_utils.OpenStackBaseTest):
+            RESOURCE_PREFIX = 'zaza'
+
+        target = MyTestClass()
+        target.nova_client = mock.MagicMock()
+        target.keystone_session = mock.MagicMock()
+        failed = mock.MagicMock(id='vm1')
+        target.nova_client.servers.find.side_effect = [None, failed]
+        self.launch_instance.side_effect = Exception('no ping')
+        pool = mock.MagicMock()
+        with self.assertRaises(Exception):
+            target._launch_guest_attempt(
+                'jammy', 'zaza-ins-1', floating_ip_pool=pool)
+        pool.reclaim.assert_called_once_with('vm1')
+        self.launch_instance.assert_called_once_with(
+            'jammy', vm_name='zaza-ins-1', floating_ip_pool=pool)
+        self.delete_resource.assert_not_called()
@@ -0,0 +1,117 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import mock
+import unittest
+import sys
+
+import zaza.openstack.charm_tests.vault.utils as vault_utils
+
+
+class TestVaultUtils(unittest.TestCase):
+    """Test class to encapsulate testing vault test utils."""
+
+    def setUp(self):
+        super(TestVaultUtils, self).setUp()
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+        patcher = mock.patch.object(vault_utils, 'POLL_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_async(self, coroutine):
+        return asyncio.get_event_loop().run_until_complete(coroutine)
+
+    def client(self, addr, sealed=False):
+        hvac_client = mock.MagicMock()
+        hvac_client.is_sealed.return_value = sealed
+        return vault_utils.CharmVaultClient(addr, hvac_client, False)
+
+    def test_async_wait_for_all(self):
+        clients = [self.client('10.0.0.1'), self.client('10.0.0.2')]
+        checks = {'10.0.0.1': [False, ValueError('down'), True],
+                  '10.0.0.2': [True]}
+
+        def check(client):
+            result = checks[client.addr].pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.run_async(vault_utils.async_wait_for_all(
+            clients, check, 'something'))
+        self.assertEqual(checks, {'10.0.0.1': [], '10.0.0.2': []})
+
+    def test_async_wait_for_all_timeout(self):
+        clients = [self.client('10.0.0.1'), self.client('10.0.0.2')]
+
+        def check(client):
+            if client.addr == '10.0.0.2':
+                raise ValueError('down')
+            return True
+
+        with self.assertRaises(AssertionError) as context:
+            self.run_async(vault_utils.async_wait_for_all(
+                clients, check, 'something', timeout=0))
+        self.assertEqual(
+            str(context.exception),
+            'Timeout waiting for something on 10.0.0.2 (down)')
+
+    def test_is_ha_settled(self):
+        client = self.client('10.0.0.1')
+        client.hvac_client.ha_status = {'ha_enabled': False}
+        self.assertTrue(vault_utils._is_ha_settled(client))
+        client.hvac_client.ha_status = {'ha_enabled': True}
+        self.assertFalse(vault_utils._is_ha_settled(client))
+        client.hvac_client.ha_status = {'ha_enabled': True,
+                                        'leader_address': '10.0.0.2'}
+        self.assertTrue(vault_utils._is_ha_settled(client))
+
+    def test_async_unseal_and_settle(self):
+        clients = [self.client('10.0.0.1', sealed=True),
+                   self.client('10.0.0.2')]
+        for client in clients:
+            client.hvac_client.ha_status = {'ha_enabled': True,
+                                            'leader_address': '10.0.0.1'}
+        self.run_async(vault_utils.async_unseal_and_settle(
+            clients, 'key', unseal_client=clients[0]))
+        clients[0].hvac_client.unseal.assert_called_with('key')
+        clients[1].hvac_client.unseal.assert_not_called()
+        for client in clients:
+            client.hvac_client.is_initialized.assert_called_once_with()
+
+    @mock.patch.object(vault_utils, 'zaza')
+    def test_async_authorize(self, zaza):
+        zaza.model.async_run_action_on_leader = mock.AsyncMock()
+        clients = [self.client('10.0.0.1'), self.client('10.0.0.2')]
+        for client in clients:
+            client.hvac_client.ha_status = {'ha_enabled': False}
+        self.run_async(vault_utils.async_authorize(clients, 'token'))
+        self.assertEqual([c.hvac_client.token for c in clients],
+                         ['token', 'token'])
+        zaza.model.async_run_action_on_leader.assert_called_once_with(
+            'vault', 'authorize-charm', action_params={'token': 'token'})
+
+    @mock.patch.object(vault_utils, 'zaza')
+    def test_async_run_update_status(self, zaza):
+        units = [mock.MagicMock(), mock.MagicMock()]
+        units[0].name = 'vault/0'
+        units[1].name = 'vault/1'
+        zaza.model.async_get_units = mock.AsyncMock(return_value=units)
+        zaza.model.async_run_on_unit = mock.AsyncMock()
+        self.run_async(vault_utils.async_run_update_status())
+        zaza.model.async_run_on_unit.assert_has_calls([
+            mock.call('vault/0', './hooks/update-status'),
+            mock.call('vault/1', './hooks/update-status')])
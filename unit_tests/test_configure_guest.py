@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
 import unit_tests.utils as ut_utils
 
 import zaza.openstack.configure.guest as guest
@@ -78,3 +80,72 @@ packages:
         """Test get_default_userdata with packages=None."""
         result = guest.get_default_userdata(packages=None)
         self.assertEqual(result, self.EXPECTED_NO_PACKAGES)
+
+
+class TestLaunchInstance(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.patch_object(guest, 'openstack_utils')
+        self.patch_object(guest, 'get_default_userdata',
+                          return_value='userdata')
+        self.nova_client = mock.MagicMock()
+        self.neutron_client = mock.MagicMock()
+        self.openstack_utils.resolve_network.return_value = {'id': 'net-id'}
+        self.openstack_utils.get_ports_from_device_id.return_value = [
+            {'fixed_ips': [{'ip_address': '10.0.0.10'}]}]
+
+    def test_launch_instance_prebuilt_clients(self):
+        guest.launch_instance(
+            'cirros',
+            vm_name='vm1',
+            attach_to_external_network=True,
+            perform_connectivity_check=False,
+            nova_client=self.nova_client,
+            neutron_client=self.neutron_client)
+        self.openstack_utils.get_overcloud_keystone_session.assert_not_called()
+        self.openstack_utils.get_nova_session_client.assert_not_called()
+        self.openstack_utils.get_neutron_session_client.assert_not_called()
+        self.openstack_utils.resolve_image.assert_called_once_with(
+            self.nova_client, guest.boot_tests['cirros']['image_name'])
+        self.openstack_utils.resolve_flavor.assert_called_once_with(
+            self.nova_client, 'm1.tiny')
+        self.openstack_utils.resolve_network.assert_called_once_with(
+            self.neutron_client, self.openstack_utils.EXT_NET)
+        self.nova_client.servers.create.assert_called_once_with(
+            name='vm1',
+            image=self.openstack_utils.resolve_image.return_value,
+            block_device_mapping_v2=None,
+            flavor=self.openstack_utils.resolve_flavor.return_value,
+            key_name=guest.nova_utils.KEYPAIR_NAME,
+            meta={},
+            nics=[{'net-id': 'net-id'}],
+            userdata='userdata',
+            host=None)
+
+    def test_launch_instance_builds_missing_clients(self):
+        guest.launch_instance(
+            'cirros',
+            vm_name='vm1',
+            attach_to_external_network=True,
+            perform_connectivity_check=False,
+            nova_client=self.nova_client)
+        self.openstack_utils.get_nova_session_client.assert_not_called()
+        (self.openstack_utils.get_neutron_session_client
+            .assert_called_once_with(
+                self.openstack_utils.get_overcloud_keystone_session
+                .return_value))
+
+    def test_launch_instance_floating_ip_pool(self):
+        pool = mock.MagicMock()
+        pool.assign.return_value = {'floating_ip_address': '10.5.0.10'}
+        guest.launch_instance(
+            'cirros',
+            vm_name='vm1',
+            perform_connectivity_check=False,
+            nova_client=self.nova_client,
+            neutron_client=self.neutron_client,
+            floating_ip_pool=pool)
+        pool.assign.assert_called_once_with(
+            {'fixed_ips': [{'ip_address': '10.0.0.10'}]})
+        self.openstack_utils.create_floating_ip.assert_not_called()
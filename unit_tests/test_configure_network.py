@@ -0,0 +1,124 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+import unit_tests.utils as ut_utils
+
+import zaza.openstack.configure.network as network
+
+
+class TestNetworkTopology(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.neutron_client = mock.MagicMock()
+        self.neutron_client.list_networks.return_value = {
+            'networks': [{'id': 'net1', 'name': 'ext_net'}]}
+        self.neutron_client.list_subnets.return_value = {'subnets': []}
+        self.calls = []
+
+    def _step(self, key, requires=(), collection=None, name=None):
+        def _apply(required):
+            self.calls.append((key, sorted(required)))
+            return key
+        return network.TopologyStep(key, requires, _apply, collection, name)
+
+    def test_desired_and_missing_resources(self):
+        topology = network.NetworkTopology(self.neutron_client, [
+            self._step('ext_network', collection='networks', name='ext_net'),
+            self._step('ext_subnet', ('ext_network',), 'subnets',
+                       'ext_subnet'),
+            self._step('dns', ('ext_subnet',)),
+        ])
+        self.assertEqual(
+            topology.desired_resources(),
+            {'networks': ['ext_net'], 'subnets': ['ext_subnet']})
+        self.assertEqual(
+            topology.missing_resources(),
+            {'networks': [], 'subnets': ['ext_subnet']})
+        self.neutron_client.list_networks.assert_called_once_with(
+            name=['ext_net'])
+        self.neutron_client.list_subnets.assert_called_once_with(
+            name=['ext_subnet'])
+
+    def test_apply(self):
+        topology = network.NetworkTopology(self.neutron_client, [
+            self._step('ext_network', collection='networks', name='ext_net'),
+            self._step('ext_subnet', ('ext_network',), 'subnets',
+                       'ext_subnet'),
+            self._step('router'),
+            self._step('gateway', ('router', 'ext_subnet')),
+        ])
+        results = topology.apply()
+        self.assertEqual(results['ext_network'],
+                         {'id': 'net1', 'name': 'ext_net'})
+        self.assertEqual(results['gateway'], 'gateway')
+        # Existing resources are not created again.
+        self.assertNotIn('ext_network', [key for key, _ in self.calls])
+        # Dependencies are applied before their dependants.
+        keys = [key for key, _ in self.calls]
+        self.assertLess(keys.index('ext_subnet'), keys.index('gateway'))
+        self.assertLess(keys.index('router'), keys.index('gateway'))
+        self.assertIn(('ext_subnet', ['ext_network']), self.calls)
+
+    def test_apply_unresolvable(self):
+        topology = network.NetworkTopology(self.neutron_client, [
+            self._step('gateway', ('router',)),
+        ])
+        with self.assertRaises(ValueError):
+            topology.apply()
+
+    def test_sdn_topology(self):
+        network_config = {
+            "network_type": "gre",
+            "router_name": "provider-router",
+            "external_net_name": "ext_net",
+            "external_subnet_name": "ext_net_subnet",
+            "default_gateway": "10.5.0.1",
+            "external_net_cidr": "10.5.0.0/16",
+            "start_floating_ip": "10.5.150.0",
+            "end_floating_ip": "10.5.150.254",
+            "external_dns": "10.5.0.2",
+            "private_net_cidr": "192.168.21.0/24",
+        }
+        topology = network.sdn_topology(
+            self.neutron_client, 'project', network_config)
+        self.assertEqual(
+            topology.desired_resources(),
+            {'networks': ['ext_net', 'private'],
+             'subnets': ['ext_net_subnet', 'private_subnet'],
+             'routers': ['provider-router']})
+        network_config.update({
+            "subnetpool_prefix": "192.168.0.0/16",
+            "subnetpool_name": "pooled_subnets",
+            "address_scope": "public",
+            "fip_service_subnet_name": "fip_subnet",
+            "fip_service_subnet_cidr": "100.64.0.0/24",
+        })
+        topology = network.sdn_topology(
+            self.neutron_client, 'project', network_config)
+        self.assertEqual(
+            topology.desired_resources(),
+            {'networks': ['ext_net', 'private'],
+             'subnets': ['ext_net_subnet', 'private_subnet', 'fip_subnet'],
+             'routers': ['provider-router'],
+             'address_scopes': ['public'],
+             'subnetpools': ['pooled_subnets']})
+        steps = {step.key: step for step in topology.steps}
+        self.assertEqual(steps['router_gateway'].requires,
+                         ('provider_router', 'ext_network', 'ext_subnet',
+                          'fip_service_subnet'))
+        self.assertEqual(steps['project_subnet'].requires,
+                         ('project_network', 'subnetpool'))
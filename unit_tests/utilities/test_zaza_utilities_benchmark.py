@@ -0,0 +1,143 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import mock
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import unit_tests.utils as ut_utils
+import zaza.openstack.utilities.benchmark as benchmark
+
+
+def _context(run='run1', bundle='focal', hardware='hw'):
+    return benchmark.BenchmarkContext(
+        run=run, bundle=bundle, charms={'ceph-osd': 'ch:ceph-osd:1'},
+        hardware=hardware)
+
+
+class TestBenchmark(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super(TestBenchmark, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        benchmark._stores.clear()
+        super(TestBenchmark, self).tearDown()
+
+    def test_lower_is_better(self):
+        for metric in ('latency_avg_s', 'p99', 'failover_time', 'seconds'):
+            self.assertTrue(benchmark.lower_is_better(metric), metric)
+        for metric in ('iops', 'bandwidth_mb_s', 'throughput', 'peak'):
+            self.assertFalse(benchmark.lower_is_better(metric), metric)
+
+    def test_hardware_fingerprint(self):
+        fingerprint = benchmark.hardware_fingerprint(
+            ['arch=amd64 cores=4 mem=8192M', 'arch=amd64 cores=2 mem=4096M'])
+        self.assertEqual(len(fingerprint), 16)
+        self.assertEqual(
+            benchmark.hardware_fingerprint([
+                'arch=amd64 cores=2 mem=4096M availability-zone=nova',
+                'arch=amd64 cores=4 mem=8192M availability-zone=az2']),
+            fingerprint)
+        self.assertNotEqual(
+            benchmark.hardware_fingerprint(['arch=amd64 cores=4 mem=8192M']),
+            fingerprint)
+
+    def test_get_context(self):
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+        status = mock.MagicMock()
+        status.applications = {
+            'ceph-osd': mock.MagicMock(charm='ch:ceph-osd', charm_rev=5),
+            'ceph-mon': mock.MagicMock(charm='ch:ceph-mon', charm_rev=7)}
+        status.machines = {'0': mock.MagicMock(hardware='cores=4')}
+        self.patch_object(benchmark.zaza.model, 'async_get_status',
+                          new=mock.AsyncMock(return_value=status))
+        self.patch_object(benchmark.os, 'environ', new={})
+        context = asyncio.get_event_loop().run_until_complete(
+            benchmark.async_get_context())
+        self.assertEqual(context.bundle, 'ceph-mon,ceph-osd')
+        self.assertEqual(context.charms, {'ceph-osd': 'ch:ceph-osd:5',
+                                          'ceph-mon': 'ch:ceph-mon:7'})
+        self.assertEqual(context.hardware,
+                         benchmark.hardware_fingerprint(['cores=4']))
+        benchmark.os.environ[benchmark.BUNDLE_ENV] = 'jammy-ceph'
+        context = asyncio.get_event_loop().run_until_complete(
+            benchmark.async_get_context())
+        self.assertEqual(context.bundle, 'jammy-ceph')
+
+    def test_store(self):
+        first = benchmark.BenchmarkStore(self.path, _context())
+        self.assertEqual(first.entries(), [])
+        first.record('rados', {'iops': 100.0, 'latency_avg_s': 0.5},
+                     test='a.B.test_1')
+        first.record('rados', {'iops': 10.0}, test='a.B.test_1')
+        benchmark.BenchmarkStore(self.path, _context(hardware='other')).record(
+            'rados', {'iops': 1000.0})
+        self.assertEqual(len(first.entries()), 3)
+        entry = first.entries()[0]
+        self.assertEqual(entry['charms'], {'ceph-osd': 'ch:ceph-osd:1'})
+        self.assertEqual(entry['test'], 'a.B.test_1')
+        # Results of the same run are no baseline
+        self.assertIsNone(first.baseline('rados'))
+        self.assertEqual(first.regressions(), [])
+
+        second = benchmark.BenchmarkStore(self.path, _context(run='run2'))
+        self.assertEqual(second.baseline('rados')['metrics'], {'iops': 10.0})
+        self.assertIsNone(second.baseline('rbd'))
+        second.record('rados', {'iops': 9.5}, test='a.B.test_1')
+        second.record('rados', {'iops': 5.0}, test='a.C.test_1')
+        self.assertEqual(second.regressions(tolerance=0.1), [
+            benchmark.Regression('rados', 'iops', 10.0, 5.0, -0.5)])
+        self.assertEqual(
+            second.regressions(tolerance=0.1, test_prefix='a.B.'), [])
+        self.assertEqual(
+            second.compare('rados', {'iops': 20.0, 'p99': None}),
+            [benchmark.Regression('rados', 'iops', 10.0, 20.0, 1.0)])
+        with open(self.path) as f:
+            self.assertEqual(json.loads(f.readlines()[-1])['run'], 'run2')
+
+    def test_compare_lower_is_better(self):
+        benchmark.BenchmarkStore(self.path, _context()).record(
+            'load', {'failover_time': 10.0})
+        store = benchmark.BenchmarkStore(self.path, _context(run='run2'))
+        store.record('load', {'failover_time': 12.0})
+        self.assertEqual(
+            [(r.metric, round(r.change, 2)) for r in store.regressions()],
+            [('failover_time', -0.2)])
+        self.assertEqual(store.regressions(tolerance=0.25), [])
+        self.assertEqual(
+            benchmark.format_regressions(store.regressions()),
+            'load failover_time: 10.0 -> 12.0 (-20.0%)')
+
+    def test_get_store(self):
+        self.patch_object(benchmark.os, 'environ', new={})
+        self.patch_object(benchmark, 'get_context', return_value=_context())
+        self.assertIsNone(benchmark.get_store())
+        benchmark.os.environ[benchmark.STORE_ENV] = self.path
+        store = benchmark.get_store()
+        self.assertEqual(store.path, self.path)
+        self.assertIs(benchmark.get_store(), store)
+        self.get_context.assert_called_once_with(model_name=None)
+        self.assertEqual(benchmark.tolerance(), 0.1)
+        benchmark.os.environ[benchmark.TOLERANCE_ENV] = '0.25'
+        self.assertEqual(benchmark.tolerance(), 0.25)
@@ -1,3 +1,7 @@
+import json
+import shlex
+import subprocess
+
 import unit_tests.utils as ut_utils
 import zaza.model as model
 import zaza.openstack.utilities.ceph as ceph_utils
@@ -102,6 +106,98 @@ class TestCephUtils(ut_utils.BaseTestCase):
         actual = ceph_utils.get_ceph_pools('ceph-mon/0')
         self.assertEqual(expected, actual)
 
+    def _snapshot(self, objects=3, osd_status='up', health='HEALTH_OK',
+                  extra_pool=False):
+        pools = [{'pool': 1, 'pool_name': 'cinder-ceph', 'size': 3}]
+        df = {'pools': [
+            {'name': 'cinder-ceph', 'id': 1,
+             'stats': {'objects': objects, 'kb_used': objects * 8}}]}
+        if extra_pool:
+            pools.append({'pool': 2, 'pool_name': 'glance', 'size': 3})
+        tree = {'nodes': [
+            {'id': -1, 'name': 'default', 'type': 'root'},
+            {'id': 0, 'name': 'osd.0', 'type': 'osd', 'status': 'up'},
+            {'id': 1, 'name': 'osd.1', 'type': 'osd', 'status': osd_status}]}
+        status = {'health': {'status': health}}
+        return {'df': df, 'pools': pools, 'tree': tree, 'status': status}
+
+    def test_get_ceph_snapshot(self):
+        self.patch_object(ceph_utils.zaza_model, 'run_on_leader')
+        self.patch_object(ceph_utils.zaza_model, 'run_on_unit')
+        self.run_on_leader.return_value = {
+            'Code': '0', 'Stdout': json.dumps(self._snapshot())}
+        snapshot = ceph_utils.get_ceph_snapshot(model_name='amodel')
+        cmd = self.run_on_leader.call_args[0][1]
+        self.assertEqual(self.run_on_leader.call_args[0][0], 'ceph-mon')
+        for command in ceph_utils.SNAPSHOT_COMMANDS.values():
+            self.assertIn(command, cmd)
+        self.run_on_unit.assert_not_called()
+        self.assertEqual(snapshot.pools, {'cinder-ceph': 1})
+        self.assertEqual(snapshot.pool_name(1), 'cinder-ceph')
+        self.assertEqual(snapshot.pool_detail('cinder-ceph')['size'], 3)
+        self.assertEqual(snapshot.pool_detail(1)['size'], 3)
+        self.assertEqual(snapshot.pool_stats('cinder-ceph')['objects'], 3)
+        self.assertEqual(snapshot.pool_sample(1), ('cinder-ceph', 3, 24))
+        self.assertEqual(sorted(snapshot.osds), [0, 1])
+        self.assertEqual(snapshot.health, 'HEALTH_OK')
+
+        self.run_on_unit.return_value = {
+            'Code': '1', 'Stdout': '', 'Stderr': 'error'}
+        with self.assertRaises(model.CommandRunFailed):
+            ceph_utils.get_ceph_snapshot('ceph-mon/1')
+
+    def test_ceph_snapshot_shell_output(self):
+        self.patch_object(ceph_utils.zaza_model, 'run_on_leader')
+        self.run_on_leader.return_value = {'Code': '0', 'Stdout': '{}'}
+        with self.assertRaises(TypeError):
+            ceph_utils.get_ceph_snapshot()
+        cmd = self.run_on_leader.call_args[0][1]
+        script = shlex.split(cmd)[-1]
+        for key, command in ceph_utils.SNAPSHOT_COMMANDS.items():
+            script = script.replace(
+                command, "printf '{}'".format(json.dumps({key: 0})))
+        output = subprocess.check_output(['sh', '-ec', script])
+        self.assertEqual(
+            sorted(json.loads(output)), sorted(ceph_utils.SNAPSHOT_COMMANDS))
+
+    def test_ceph_snapshot_diff(self):
+        before = ceph_utils.CephClusterSnapshot(**self._snapshot())
+        after = ceph_utils.CephClusterSnapshot(**self._snapshot(
+            objects=5, osd_status='down', health='HEALTH_WARN',
+            extra_pool=True))
+        self.assertEqual(before.diff(after), {
+            'pools_added': ['glance'],
+            'pools_removed': [],
+            'pools': {'cinder-ceph': {'objects': 2, 'kb_used': 16}},
+            'osds': {1: ('up', 'down')},
+            'health': ('HEALTH_OK', 'HEALTH_WARN')})
+        self.assertEqual(before.diff(before), {
+            'pools_added': [], 'pools_removed': [], 'pools': {}, 'osds': {},
+            'health': None})
+
+    def test_helpers_use_snapshot(self):
+        self.patch_object(ceph_utils.zaza_model, 'run_on_unit')
+        snapshot = ceph_utils.CephClusterSnapshot(**self._snapshot())
+        self.assertEqual(
+            ceph_utils.get_ceph_pools('ceph-mon/0', snapshot=snapshot),
+            {'cinder-ceph': 1})
+        self.assertEqual(
+            ceph_utils.get_ceph_pool_details(snapshot=snapshot),
+            snapshot.pool_details)
+        self.assertEqual(
+            ceph_utils.get_ceph_pool_sample(
+                'ceph-mon/0', 1, snapshot=snapshot),
+            ('cinder-ceph', 3, 24))
+        self.run_on_unit.assert_not_called()
+
+    def test_get_ceph_pool_sample(self):
+        self.patch_object(ceph_utils, 'get_ceph_df')
+        self.get_ceph_df.return_value = self._snapshot()['df']
+        self.assertEqual(
+            ceph_utils.get_ceph_pool_sample('ceph-mon/0', 1),
+            ('cinder-ceph', 3, 24))
+        self.get_ceph_df.assert_called_once_with('ceph-mon/0', None)
+
     def test_get_rbd_hash(self):
         self.patch_object(ceph_utils.zaza_model, 'run_on_unit')
         self.run_on_unit.return_value = {'Stdout': 'output\n', 'Code': '0'}
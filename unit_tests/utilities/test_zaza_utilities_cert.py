@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import mock
+import os
+import tempfile
 
 import unit_tests.utils as ut_utils
 import zaza.openstack.utilities.cert as cert
@@ -290,3 +292,57 @@ class TestUtilitiesCert(ut_utils.BaseTestCase):
     def test_is_keys_valid_invalid(self):
         self.assertFalse(
             cert.is_keys_valid(TEST_SSH_PUB_KEY_INVALID, TEST_SSH_PRIVATE_KEY))
+
+    def test_generate_cert_ecdsa(self):
+        key, crt = cert.generate_cert('unit_test.ci.local', key_type='ecdsa')
+        self.assertIsInstance(
+            cert.serialization.load_pem_private_key(key, password=None),
+            cert.ec.EllipticCurvePrivateKey)
+        with self.assertRaises(ValueError):
+            cert.generate_cert('unit_test.ci.local', key_type='dsa')
+
+    def test_generate_cert_private_key(self):
+        private_key = cert.generate_private_key('ecdsa')
+        key, crt = cert.generate_cert('unit_test.ci.local',
+                                      private_key=private_key)
+        self.assertEqual(key, private_key)
+
+    def test_cert_factory(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        factory = cert.CertFactory(cache_dir=tmpdir.name, key_type='ecdsa',
+                                   processes=2)
+        cakey, cacert = factory.ca('DivineAuthority')
+        self.assertEqual(factory.ca('DivineAuthority'), (cakey, cacert))
+        certs = factory.issue_all(
+            [('test.com', ['10.0.0.1']), ('test.com', ['10.0.0.2'])],
+            issuer_name='DivineAuthority', signing_key=cakey)
+        self.assertEqual(len(set(certs)), 2)
+        self.assertEqual(len(os.listdir(tmpdir.name)), 3)
+        for path in os.listdir(tmpdir.name):
+            self.assertEqual(
+                os.stat(os.path.join(tmpdir.name, path)).st_mode & 0o777,
+                0o600)
+
+        self.patch_object(factory, 'generate_keys')
+        self.assertEqual(
+            factory.issue('test.com', ['10.0.0.2'],
+                          issuer_name='DivineAuthority', signing_key=cakey),
+            certs[1])
+        self.generate_keys.assert_not_called()
+
+        # Certificates about to expire are issued again.
+        factory.min_validity = 31
+        self.generate_keys.return_value = [cert.generate_private_key('ecdsa')]
+        self.assertNotEqual(
+            factory.issue('test.com', ['10.0.0.2'],
+                          issuer_name='DivineAuthority', signing_key=cakey),
+            certs[1])
+        self.generate_keys.assert_called_once_with(1)
+
+    def test_cert_factory_without_cache(self):
+        factory = cert.CertFactory(key_type='ecdsa')
+        self.assertNotEqual(factory.ca('DivineAuthority'),
+                            factory.ca('DivineAuthority'))
+        with self.assertRaises(ValueError):
+            cert.CertFactory(key_type='dsa')
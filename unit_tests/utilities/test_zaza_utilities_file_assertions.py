@@ -62,3 +62,59 @@ class TestFileAssertionUtils(ut_utils.BaseTestCase):
         message = file_assertions._error_message(
             "Owner", "test/0", "root")
         self.assertEqual(message, "Owner is incorrect on test/0: root")
+
+    def test_stat_script(self):
+        self.assertEqual(
+            file_assertions._stat_script(['/etc/app/**', '/etc/my app']),
+            "bash -c 'shopt -s -q globstar\n"
+            "stat -c \"0 %n %U %G %a\" /etc/app/** 2>/dev/null || "
+            "echo \"0 !missing\"\n"
+            "stat -c \"1 %n %U %G %a\" '\"'\"'/etc/my app'\"'\"' "
+            "2>/dev/null || echo \"1 !missing\"'")
+
+    def test_get_file_mismatches(self):
+        outputs = {
+            'app/0': '\n'.join([
+                '0 /etc/app/a.conf root app 640',
+                '0 /etc/app/b.conf app app 640',
+                '0 /etc/app/secret root app 600',
+                '1 /etc/app/secret root app 600',
+                '2 !missing']),
+            'app/1': '\n'.join([
+                '0 /etc/app/a.conf root app 644',
+                '0 /etc/app/b.conf root app 644',
+                '1 /etc/app/a.conf root app 644']),
+        }
+
+        async def _run_on_unit(unit, command, model_name=None):
+            return {'Stdout': outputs[unit]}
+
+        self.patch_object(file_assertions.model, 'async_run_on_unit')
+        self.async_run_on_unit.side_effect = _run_on_unit
+        glob = {'path': '/etc/app/*', 'group': 'app', 'mode': '640'}
+        mismatches = file_assertions.get_file_mismatches([
+            ('app/0', glob),
+            ('app/0', {'path': '/etc/app/secret', 'group': 'app'}),
+            ('app/0', {'path': '/etc/app/missing'}),
+            ('app/1', glob),
+            ('app/1', {'path': '/etc/app/a.conf', 'owner': None,
+                       'group': None, 'mode': '644'}),
+        ], model_name='aModel')
+        self.assertEqual(mismatches, [
+            'Owner is incorrect for /etc/app/b.conf on app/0: app',
+            'No file matches /etc/app/missing on app/0',
+            'Mode is incorrect for /etc/app/b.conf on app/1: 644'])
+        self.assertEqual(self.async_run_on_unit.call_count, 2)
+        self.assertEqual(
+            self.async_run_on_unit.call_args_list[0][1],
+            {'model_name': 'aModel'})
+
+    def test_assert_files(self):
+        self.patch_object(file_assertions, 'get_file_mismatches')
+        self.get_file_mismatches.return_value = ['one', 'two']
+        file_assertions.assert_files(self._assert, [('app/0', {'path': 'a'})])
+        self._assert.fail.assert_called_once_with('one\ntwo')
+        self.get_file_mismatches.return_value = []
+        self._assert.fail.reset_mock()
+        file_assertions.assert_files(self._assert, [('app/0', {'path': 'a'})])
+        self._assert.fail.assert_not_called()
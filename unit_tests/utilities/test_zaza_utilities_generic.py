@@ -38,6 +38,10 @@ FAKE_STATUS = {
                                    'charm': 'local:trusty/hacluster-0'}}}}}
 
 
+class FakeModelTimeout(Exception):
+    pass
+
+
 class TestGenericUtils(ut_utils.BaseTestCase):
 
     def setUp(self):
@@ -563,3 +567,304 @@ class TestGenericUtils(ut_utils.BaseTestCase):
         with self.assertRaises(AssertionError):
             generic_utils.systemctl(
                 _unit.entity_id, _service, command=_command)
+
+    def _settle_model(self):
+        def _unit(status='active', message='Unit is ready'):
+            unit = mock.MagicMock()
+            unit.workload_status = status
+            unit.workload_status_message = message
+            unit.data = {'agent-status': {'current': 'idle'}}
+            return unit
+
+        def _endpoint(name):
+            endpoint = mock.MagicMock()
+            endpoint.application_name = name
+            return endpoint
+
+        relation = mock.MagicMock()
+        relation.endpoints = [_endpoint('app'), _endpoint('app-hacluster')]
+        app = mock.MagicMock()
+        app.relations = [relation]
+        app.units = [_unit(), _unit()]
+        hacluster = mock.MagicMock()
+        hacluster.relations = [relation]
+        hacluster.units = [_unit(message='Unit is ready and clustered')]
+        other = mock.MagicMock()
+        other.units = [_unit(status='blocked')]
+        juju_model = mock.MagicMock()
+        juju_model.applications = {
+            'app': app, 'app-hacluster': hacluster, 'other': other}
+        return juju_model
+
+    def test_get_settle_scope(self):
+        juju_model = self._settle_model()
+        self.assertEqual(
+            generic_utils.get_settle_scope(juju_model, 'app'),
+            {'app', 'app-hacluster'})
+
+    def test_application_settled(self):
+        self.model.UnitError = Exception
+        self.model.is_unit_idle.return_value = True
+        juju_model = self._settle_model()
+        self.assertTrue(
+            generic_utils._application_settled(juju_model, 'app', {}))
+        self.assertFalse(
+            generic_utils._application_settled(juju_model, 'other', {}))
+        self.assertTrue(
+            generic_utils._application_settled(
+                juju_model, 'other', {'other': {
+                    'workload-status': 'blocked',
+                    'workload-status-message-regex': '^Unit'}}))
+        self.model.is_unit_idle.return_value = False
+        self.assertFalse(
+            generic_utils._application_settled(juju_model, 'app', {}))
+        juju_model.applications['app'].units[0].workload_status = 'error'
+        with self.assertRaises(Exception):
+            generic_utils._application_settled(juju_model, 'app', {})
+
+    def test_block_until_application_settled(self):
+        self.model.UnitError = Exception
+        self.model.ModelTimeout = FakeModelTimeout
+        self.model.is_unit_idle.return_value = True
+        juju_model = self._settle_model()
+        juju_model.applications['app'].units[0].data = {
+            'agent-status': {'current': 'executing'}}
+
+        async def _get_model(model_name):
+            return juju_model
+
+        results = []
+
+        async def _block(*conditions, model=None, timeout=None):
+            results.append(all(c() for c in conditions))
+            if not results[-1]:
+                raise asyncio.TimeoutError()
+
+        self.model.get_model.side_effect = _get_model
+        self.model.block_until_auto_reconnect_model.side_effect = _block
+        generic_utils.block_until_application_settled('app')
+        self.assertEqual(results, [True, True])
+
+        # Not seeing a hook execute is fatal, unless not waiting for one
+        juju_model.applications['app'].units[0].data = {}
+        results.clear()
+        with self.assertRaises(FakeModelTimeout):
+            generic_utils.block_until_application_settled('app')
+        self.assertEqual(results, [False])
+        results.clear()
+        generic_utils.block_until_application_settled(
+            'app', wait_for_hooks=False)
+        self.assertEqual(results, [True])
+
+        juju_model.applications['app'].units[1].workload_status = (
+            'maintenance')
+        with self.assertRaises(FakeModelTimeout):
+            generic_utils.block_until_application_settled(
+                'app', model_name='aModel')
+
+    def test_get_service_status_on_units(self):
+        async def _run_on_unit(unit_name, command, model_name=None,
+                               timeout=None):
+            return {
+                'app/0': {'Stdout': 'svc1 running\nsvc2 stopped\n'},
+                'app/1': {'Stdout': 'svc1 running\nsvc2 running\n'},
+            }[unit_name]
+
+        self.model.async_run_on_unit.side_effect = _run_on_unit
+        self.assertEqual(
+            generic_utils.get_service_status_on_units(
+                ['app/0', 'app/1'], ['svc1', 'svc2'], model_name='aModel'),
+            {'app/0': {'svc1': 'running', 'svc2': 'stopped'},
+             'app/1': {'svc1': 'running', 'svc2': 'running'}})
+        command = self.model.async_run_on_unit.call_args[0][1]
+        self.assertIn("'svc1' 'svc2'", command)
+        self.assertIn('pidof -x', command)
+        self.assertIn(
+            'pgrep -f',
+            generic_utils._service_probe_command(['svc1'], pgrep_full=True))
+
+    def test_block_until_service_status_on_units(self):
+        self.patch_object(generic_utils, 'async_get_service_status_on_units')
+        status = {'app/0': {'svc': 'stopped'}}
+
+        async def _get_status(*args, **kwargs):
+            return status
+
+        async def _block_until(*conditions, timeout=None):
+            for condition in conditions:
+                self.assertFalse(await condition())
+                status['app/0']['svc'] = 'running'
+                self.assertTrue(await condition())
+
+        self.async_get_service_status_on_units.side_effect = _get_status
+        self.model.async_block_until.side_effect = _block_until
+        generic_utils.block_until_service_status_on_units(
+            ['app/0'], ['svc'], 'running', model_name='aModel')
+        self.async_get_service_status_on_units.assert_called_with(
+            ['app/0'], ['svc'], model_name='aModel', pgrep_full=False,
+            timeout=2700)
+
+    def test_run_action_on_all_units(self):
+        self.patch_object(generic_utils, 'time')
+        self.time.monotonic.side_effect = [0, 1.5, 10, 12.5]
+        action = mock.MagicMock(status='completed')
+
+        async def _run_action(*args, **kwargs):
+            return action
+
+        async def _wl_status(*args, **kwargs):
+            pass
+
+        self.model.async_run_action.side_effect = _run_action
+        self.model.async_block_until_unit_wl_status.side_effect = _wl_status
+        self.assertEqual(
+            generic_utils.run_action_on_all_units(
+                ['app/0', 'app/1'], 'pause', 'maintenance',
+                model_name='aModel'),
+            {'app/0': 1.5, 'app/1': 2.5})
+        self.model.async_run_action.assert_has_calls([
+            mock.call('app/0', 'pause', model_name='aModel',
+                      action_params=None),
+            mock.call('app/1', 'pause', model_name='aModel',
+                      action_params=None),
+        ])
+        self.model.async_block_until_unit_wl_status.assert_called_with(
+            'app/1', 'maintenance', model_name='aModel', timeout=2700)
+
+    def test_collect_action_results(self):
+        self.patch_object(generic_utils, 'time')
+        self.time.monotonic.side_effect = [0, 1.5, 10, 12.5]
+        actions = {'app/0': mock.MagicMock(status='completed'),
+                   'app/1': mock.MagicMock(status='failed')}
+
+        async def _run_action(unit_name, *args, **kwargs):
+            return actions[unit_name]
+
+        self.model.async_run_action.side_effect = _run_action
+        self.assertEqual(
+            generic_utils.collect_action_results(
+                ['app/0', 'app/1'], 'security-checklist',
+                model_name='aModel', action_params={}),
+            {'app/0': (actions['app/0'], 1.5),
+             'app/1': (actions['app/1'], 2.5)})
+        self.model.async_run_action.assert_called_with(
+            'app/1', 'security-checklist', model_name='aModel',
+            action_params={})
+
+    def test_restart_watcher(self):
+        calls = []
+
+        async def _run_on_unit(unit_name, command, model_name=None,
+                               timeout=None):
+            calls.append((unit_name, command, timeout))
+            return {'Stdout': '{"hash": "h", "services": {"svc": 1}}\n'}
+
+        self.model.async_run_on_unit.side_effect = _run_on_unit
+        baseline = generic_utils.get_restart_baseline(
+            ['app/0', 'app/1'], '/etc/app.conf', ['svc'], model_name='m')
+        self.assertEqual(baseline, {
+            'app/0': {'hash': 'h', 'services': {'svc': 1}},
+            'app/1': {'hash': 'h', 'services': {'svc': 1}}})
+        self.assertEqual([c[0] for c in calls], ['app/0', 'app/1'])
+        self.assertIn("python3 /tmp/zaza-restart-watcher.py "
+                      "'/etc/app.conf' '[\"svc\"]' '600'", calls[0][1])
+        calls.clear()
+        generic_utils.wait_for_restart(
+            baseline, '/etc/app.conf', ['svc'], model_name='m', timeout=30)
+        self.assertTrue(calls[0][1].endswith(
+            """'30' '{"hash": "h", "services": {"svc": 1}}'"""))
+        self.assertEqual(calls[0][2], 90)
+
+    def _deferred_events_model(self):
+        units = []
+        for i in range(2):
+            unit = mock.MagicMock()
+            unit.entity_id = 'app/{}'.format(i)
+            unit.workload_status = 'active'
+            unit.workload_status_message = 'Services queued for restart: svc'
+            units.append(unit)
+        juju_model = mock.MagicMock()
+        juju_model.applications = {'app': mock.MagicMock(units=units)}
+
+        async def _get_model(model_name):
+            return juju_model
+
+        async def _run_action(unit_name, action_name, model_name=None,
+                              raise_on_failure=False):
+            action = mock.MagicMock()
+            action.data = {'results': {'output': (
+                "hooks: []\nrestarts:\n- 1624443123 svc Package update\n")}}
+            return action
+
+        async def _run_on_unit(unit_name, command, model_name=None):
+            return {'Stdout': (
+                'svc Wed 2021-06-23 10:12:03 UTC\nother \n')}
+
+        self.model.get_model.side_effect = _get_model
+        self.model.async_run_action.side_effect = _run_action
+        self.model.async_run_on_unit.side_effect = _run_on_unit
+        return juju_model
+
+    def test_get_deferred_events_state(self):
+        self._deferred_events_model()
+        state = generic_utils.get_deferred_events_state(
+            'app', services=['svc', 'other'], model_name='m')
+        self.assertEqual(sorted(state), ['app/0', 'app/1'])
+        self.assertEqual(state['app/0'], {
+            'restarts': ['1624443123 svc Package update'],
+            'hooks': [],
+            'timestamps': {
+                'svc': generic_utils.datetime.datetime(
+                    2021, 6, 23, 10, 12, 3),
+                'other': None},
+            'workload-status': 'active',
+            'workload-status-message': 'Services queued for restart: svc'})
+        command = self.model.async_run_on_unit.call_args[0][1]
+        self.assertIn('systemctl show -p ActiveEnterTimestamp svc', command)
+        self.assertIn('systemctl show -p ActiveEnterTimestamp other', command)
+
+        self.model.async_run_action.reset_mock()
+        self.model.async_run_on_unit.reset_mock()
+        state = generic_utils.get_deferred_events_state(
+            'app', unit_names=['app/1'], show_events=False)
+        self.assertEqual(list(state), ['app/1'])
+        self.assertEqual(state['app/1']['restarts'], [])
+        self.assertEqual(state['app/1']['timestamps'], {})
+        self.assertFalse(self.model.async_run_action.called)
+        self.assertFalse(self.model.async_run_on_unit.called)
+
+    def test_block_until_deferred_events_state(self):
+        self.model.ModelTimeout = FakeModelTimeout
+        juju_model = self._deferred_events_model()
+        juju_model.applications['app'].units[0].workload_status_message = (
+            'Unit is ready')
+        probed = []
+
+        async def _block_until(condition, timeout=None, wait_period=None):
+            self.assertFalse(await condition())
+            probed.append(
+                self.model.async_run_action.call_args[0][0])
+            juju_model.applications['app'].units[1] \
+                .workload_status_message = 'Unit is ready'
+            self.assertTrue(await condition())
+            probed.append(
+                self.model.async_run_action.call_args[0][0])
+
+        self.model.async_block_until.side_effect = _block_until
+        state = generic_utils.block_until_deferred_events_state(
+            'app',
+            lambda state: state['workload-status-message'] == (
+                'Unit is ready'),
+            show_events=True)
+        self.assertEqual(sorted(state), ['app/0', 'app/1'])
+        # app/0 passed the first probe and is not probed again
+        self.assertEqual(probed, ['app/1', 'app/1'])
+        self.assertEqual(self.model.async_run_action.call_count, 3)
+
+        async def _time_out(condition, timeout=None, wait_period=None):
+            raise asyncio.TimeoutError()
+
+        self.model.async_block_until.side_effect = _time_out
+        with self.assertRaises(FakeModelTimeout):
+            generic_utils.block_until_deferred_events_state(
+                'app', lambda state: False)
@@ -0,0 +1,401 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import gzip
+import hashlib
+import json
+import mock
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import unit_tests.utils as ut_utils
+import zaza.openstack.utilities.mysql as mysql_utils
+
+
+def _unit(address, message, subordinates=None):
+    unit = mock.MagicMock()
+    unit.public_address = address
+    unit.workload_status.info = message
+    unit.subordinates = subordinates or {}
+    return unit
+
+
+class TestMySQLClusterProbe(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super(TestMySQLClusterProbe, self).setUp()
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+        router = mock.MagicMock()
+        router.workload_status.status = 'blocked'
+        status = mock.MagicMock()
+        status.applications = {
+            'mysql-innodb-cluster': mock.MagicMock(units={
+                'mysql-innodb-cluster/0': _unit('10.0.0.10', 'Mode: R/O'),
+                'mysql-innodb-cluster/1': _unit('10.0.0.11', 'Mode: R/W'),
+            }),
+            'keystone': mock.MagicMock(units={
+                'keystone/0': _unit('10.0.0.20', 'ready', subordinates={
+                    'keystone-mysql-router/0': router}),
+            }),
+        }
+        self.patch_object(mysql_utils.zaza.model, 'async_get_status',
+                          new=mock.AsyncMock(return_value=status))
+        self.patch_object(
+            mysql_utils.zaza.model, 'async_run_on_leader',
+            new=mock.AsyncMock(return_value={'Stdout': 'secret\n'}))
+        action = mock.MagicMock()
+        action.data = {'results': {'cluster-status': '{"status": "OK"}'}}
+        self.patch_object(
+            mysql_utils.zaza.model, 'async_run_action_on_leader',
+            new=mock.AsyncMock(return_value=action))
+        self.members = {
+            'mysql-innodb-cluster/0': {
+                'Code': '0',
+                'Stdout': ('10.0.0.10\tONLINE\tSECONDARY\n'
+                           '10.0.0.11\tONLINE\tPRIMARY\n')},
+            'mysql-innodb-cluster/1': {'Code': '1', 'Stdout': ''},
+        }
+
+        async def _run_on_unit(unit_name, cmd, model_name=None):
+            return self.members[unit_name]
+
+        self.patch_object(mysql_utils.zaza.model, 'async_run_on_unit',
+                          new=mock.AsyncMock(side_effect=_run_on_unit))
+        self.patch_object(mysql_utils.time, 'monotonic', return_value=100)
+        self.probe = mysql_utils.MySQLClusterProbe()
+
+    def run_async(self, coroutine):
+        return asyncio.get_event_loop().run_until_complete(coroutine)
+
+    def test_async_get_state(self):
+        state = self.run_async(self.probe.async_get_state())
+        self.assertEqual(state.cluster_status, {'status': 'OK'})
+        self.assertEqual(
+            state.members,
+            {'mysql-innodb-cluster/0': [
+                mysql_utils.ClusterMember('10.0.0.10', 'ONLINE', 'SECONDARY'),
+                mysql_utils.ClusterMember('10.0.0.11', 'ONLINE', 'PRIMARY')],
+             'mysql-innodb-cluster/1': None})
+        self.assertEqual(state.online_members(), {'10.0.0.10', '10.0.0.11'})
+        self.assertEqual(state.rw_primary(), 'mysql-innodb-cluster/1')
+        self.assertEqual(state.blocked_routers(), ['keystone-mysql-router/0'])
+        self.assertTrue(mysql_utils.has_rw_primary(state))
+        self.assertTrue(mysql_utils.members_online(2)(state))
+        self.assertFalse(mysql_utils.members_online(3)(state))
+        cmd = self.async_run_on_unit.call_args_list[0][0][1]
+        self.assertIn('-psecret ', cmd)
+        self.assertIn('performance_schema.replication_group_members', cmd)
+
+    def test_async_get_state_cached(self):
+        state = self.run_async(self.probe.async_get_state())
+        self.assertIs(self.run_async(self.probe.async_get_state()), state)
+        self.monotonic.return_value = 106
+        self.assertIsNot(self.run_async(self.probe.async_get_state()), state)
+        self.assertEqual(self.async_get_status.call_count, 2)
+        self.async_run_on_leader.assert_called_once_with(
+            'mysql-innodb-cluster', 'leader-get mysql.passwd',
+            model_name=None)
+
+    def test_rw_primary_from_status_message(self):
+        self.members['mysql-innodb-cluster/0'] = {'Code': '1', 'Stdout': ''}
+        self.async_run_action_on_leader.return_value.data = {}
+        state = self.run_async(self.probe.async_get_state())
+        self.assertIsNone(state.cluster_status)
+        self.assertEqual(state.online_members(), set())
+        self.assertEqual(state.rw_primary(), 'mysql-innodb-cluster/1')
+
+    def test_async_wait_for(self):
+        async def _sleep(seconds):
+            # A third member joins while waiting.
+            self.members['mysql-innodb-cluster/1'] = {
+                'Code': '0',
+                'Stdout': ('10.0.0.10\tONLINE\tSECONDARY\n'
+                           '10.0.0.11\tONLINE\tPRIMARY\n'
+                           '10.0.0.12\tONLINE\tSECONDARY\n')}
+
+        self.patch_object(mysql_utils.asyncio, 'sleep',
+                          new=mock.AsyncMock(side_effect=_sleep))
+        self.assertTrue(self.run_async(self.probe.async_wait_for(
+            mysql_utils.members_online(2))))
+        self.sleep.assert_not_called()
+        with self.assertRaises(mysql_utils.zaza.model.ModelTimeout):
+            self.run_async(self.probe.async_wait_for(
+                mysql_utils.members_online(3), timeout=5))
+        state = self.run_async(self.probe.async_wait_for(
+            mysql_utils.members_online(3), timeout=20))
+        self.assertEqual(len(state.online_members()), 3)
+        self.sleep.assert_called_once_with(10)
+
+    def test_async_wait_for_rows(self):
+        self.patch_object(mysql_utils.asyncio, 'sleep',
+                          new=mock.AsyncMock())
+        counts = {'mysql-innodb-cluster/0': ['100', '100'],
+                  'mysql-innodb-cluster/1': ['100', '50']}
+
+        async def _run_on_unit(unit_name, cmd, model_name=None):
+            return {'Code': '0', 'Stdout': '\t'.join(counts[unit_name])}
+
+        async def _sleep(seconds):
+            # The secondary catches up
+            counts['mysql-innodb-cluster/1'] = ['100', '100']
+
+        self.async_run_on_unit.side_effect = _run_on_unit
+        self.sleep.side_effect = _sleep
+        units = ['mysql-innodb-cluster/0', 'mysql-innodb-cluster/1']
+        self.run_async(self.probe.async_wait_for_rows(
+            ['db1', 'db2'], 100, unit_names=units))
+        self.assertEqual(self.async_run_on_unit.call_count, 3)
+        self.async_run_on_unit.assert_called_with(
+            'mysql-innodb-cluster/1', mock.ANY, model_name=None)
+        self.assertIn('SELECT (SELECT COUNT(*) FROM db1.seed), '
+                      '(SELECT COUNT(*) FROM db2.seed);',
+                      self.async_run_on_unit.call_args[0][1])
+        self.sleep.assert_called_once_with(2)
+
+        counts['mysql-innodb-cluster/1'] = ['100', '50']
+        self.sleep.side_effect = None
+        with self.assertRaises(mysql_utils.zaza.model.ModelTimeout):
+            self.run_async(self.probe.async_wait_for_rows(
+                ['db1', 'db2'], 100, unit_names=units, timeout=1))
+
+    def test_async_wait_for_skips_probes(self):
+        self.run_async(self.probe.async_wait_for(
+            mysql_utils.members_online(2)))
+        self.async_run_action_on_leader.assert_not_called()
+        self.assertEqual(self.async_run_on_unit.call_count, 2)
+        state = self.run_async(self.probe.async_wait_for(
+            mysql_utils.has_rw_primary, probes=()))
+        self.assertEqual(state.rw_primary(), 'mysql-innodb-cluster/1')
+        self.assertEqual(state.members, {})
+        self.assertEqual(self.async_run_on_unit.call_count, 2)
+        self.async_run_action_on_leader.assert_not_called()
+        # A cached state lacking a probe is not reused
+        self.assertEqual(
+            self.run_async(self.probe.async_get_state()).cluster_status,
+            {'status': 'OK'})
+        self.async_run_action_on_leader.assert_called_once()
+
+    def test_async_wait_for_hung_probe(self):
+        async def _hang(*args, **kwargs):
+            await asyncio.sleep(60)
+
+        self.async_run_action_on_leader.side_effect = _hang
+        self.monotonic.side_effect = time.perf_counter
+        with self.assertRaises(mysql_utils.zaza.model.ModelTimeout):
+            self.run_async(self.probe.async_wait_for(
+                lambda state: True, timeout=0.1))
+
+    def test_async_run_sql(self):
+        self.members['mysql-innodb-cluster/1'] = {'Code': '0', 'Stdout': 'x'}
+        self.assertEqual(
+            self.run_async(self.probe.async_run_sql('SELECT 1')), 'x')
+        self.async_run_on_unit.assert_called_with(
+            'mysql-innodb-cluster/1',
+            "mysql -uroot -psecret --batch --skip-column-names "
+            "-e 'SELECT 1'", model_name=None)
+        with self.assertRaises(mysql_utils.zaza.model.CommandRunFailed):
+            self.members['mysql-innodb-cluster/0'] = {'Code': '1'}
+            self.run_async(self.probe.async_run_sql(
+                'SELECT 1', unit_name='mysql-innodb-cluster/0'))
+
+
+def _sample(started, ok, latency=1, kind='write'):
+    return mysql_utils.LoadSample(kind, started, latency, ok, None)
+
+
+class TestMySQLLoad(ut_utils.BaseTestCase):
+
+    def test_load_user_sql(self):
+        self.assertEqual(
+            mysql_utils.load_user_sql('zaza_load', 'pw'),
+            "CREATE DATABASE IF NOT EXISTS zaza_load; "
+            "CREATE USER IF NOT EXISTS 'zaza_load'@'%' IDENTIFIED BY 'pw'; "
+            "ALTER USER 'zaza_load'@'%' IDENTIFIED BY 'pw'; "
+            "GRANT ALL PRIVILEGES ON zaza_load.* TO 'zaza_load'@'%';")
+
+    def test_outages(self):
+        self.assertEqual(mysql_utils._outages([]), [])
+        self.assertEqual(
+            mysql_utils._outages([
+                _sample(0, True), _sample(4, False), _sample(2, False),
+                _sample(6, True), _sample(8, True), _sample(10, False)]),
+            [(1, 7), (9, None)])
+
+    def test_connect(self):
+        connections = {}
+
+        def _connect(host, **kwargs):
+            if host == '10.0.0.1':
+                raise mysql_utils.pymysql.err.OperationalError('down')
+            connection = mock.MagicMock()
+            cursor = connection.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (int(host == '10.0.0.2'),)
+            connections[host] = connection
+            return connection
+
+        self.patch_object(mysql_utils.pymysql, 'connect',
+                          side_effect=_connect)
+        load = mysql_utils.MySQLLoadGenerator(
+            [('10.0.0.1', 3306), ('10.0.0.2', 3306), ('10.0.0.3', 3306)],
+            'user', 'pw')
+        connection, endpoint = load._connect(writable=True)
+        self.assertEqual(endpoint, ('10.0.0.3', 3306))
+        self.assertIs(connection, connections['10.0.0.3'])
+        connections['10.0.0.2'].close.assert_called_once_with()
+        self.assertEqual(load._writable, 2)
+        self.connect.assert_called_with(
+            host='10.0.0.3', port=3306, user='user', password='pw',
+            database='zaza_load', connect_timeout=2, read_timeout=2,
+            write_timeout=2, autocommit=True)
+        _, endpoint = load._connect(writable=False, offset=1)
+        self.assertEqual(endpoint, ('10.0.0.2', 3306))
+        self.connect.side_effect = mysql_utils.pymysql.err.OperationalError
+        with self.assertRaises(mysql_utils.pymysql.MySQLError):
+            load._connect(writable=True)
+
+    def test_report(self):
+        load = mysql_utils.MySQLLoadGenerator([], 'user', 'pw')
+        load.marks = [(100, 'before'), (110, 'during'), (130, 'after'),
+                      (140, 'stopped')]
+        load.samples = [
+            _sample(101, True), _sample(102, True, kind='read'),
+            _sample(111, False), _sample(115, False, kind='read'),
+            _sample(121, True), _sample(131, True)]
+        report = load.report()
+        self.assertEqual(list(report['phases']), ['before', 'during', 'after'])
+        self.assertEqual(report['phases']['before'], {
+            'start': 0, 'seconds': 10,
+            'writes': 1, 'write_errors': 0, 'writes_per_second': 0.1,
+            'reads': 1, 'read_errors': 0, 'reads_per_second': 0.1})
+        self.assertEqual(report['phases']['during']['write_errors'], 1)
+        self.assertEqual(report['phases']['during']['read_errors'], 1)
+        self.assertEqual(report['write_outages'], [(2, 22)])
+        self.assertEqual(report['failover_time'], 20)
+        self.assertTrue(report['recovered'])
+
+    def test_start_stop(self):
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (0,)
+        self.patch_object(mysql_utils.pymysql, 'connect',
+                          return_value=connection)
+        load = mysql_utils.MySQLLoadGenerator(
+            [('10.0.0.1', 3306)], 'user', 'pw', writers=1, readers=1,
+            interval=0.01)
+        with load:
+            while len(load.samples) < 4:
+                time.sleep(0.01)
+        self.assertEqual({s.kind for s in load.samples}, {'write', 'read'})
+        self.assertTrue(all(s.ok for s in load.samples))
+        self.assertEqual([phase for _, phase in load.marks],
+                         ['before', 'stopped'])
+        cursor.execute.assert_any_call(mysql_utils.LOAD_SELECT)
+
+
+class TestMySQLDump(ut_utils.BaseTestCase):
+
+    def write_dump(self, rows, per_insert=3):
+        """Write a gzipped dump laid out as mysqldump does."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'mysqldump-db.sql.gz')
+        values = ["({},'{}')".format(
+            n, hashlib.sha256(str(n).encode()).hexdigest())
+            for n in range(1, rows + 1)]
+        with gzip.open(path, 'wt') as dump:
+            dump.write('-- MySQL dump\n')
+            dump.write('INSERT INTO `other` VALUES (1,2),(3,4);\n')
+            for i in range(0, rows, per_insert):
+                dump.write('INSERT INTO `seed` VALUES {};\n'.format(
+                    ','.join(values[i:i + per_insert])))
+        return path
+
+    def test_seed_sql(self):
+        sql = mysql_utils.seed_sql('db', 5)
+        self.assertTrue(sql.startswith(
+            'DROP DATABASE IF EXISTS db; CREATE DATABASE db; '
+            'CREATE TABLE db.seed '))
+        self.assertIn("INSERT INTO db.seed VALUES (1, SHA2('1', 256));",
+                      sql)
+        self.assertEqual(sql.count('INSERT INTO db.seed SELECT'), 3)
+        self.assertTrue(sql.endswith(
+            'INSERT INTO db.seed SELECT id + 4, SHA2(id + 4, 256) '
+            'FROM db.seed WHERE id + 4 <= 5;'))
+
+    def test_digest_script(self):
+        path = self.write_dump(7)
+        output = subprocess.check_output(
+            [sys.executable, '-c', mysql_utils.DUMP_DIGEST_SCRIPT, path,
+             'seed'])
+        digest = json.loads(output.decode())
+        with gzip.open(path, 'rb') as dump:
+            content = dump.read()
+        self.assertEqual(digest['size'], len(content))
+        self.assertEqual(digest['sha256'],
+                         hashlib.sha256(content).hexdigest())
+        self.assertEqual(digest['compressed_size'], os.path.getsize(path))
+        self.assertEqual(digest['rows'], 7)
+        self.assertEqual(digest['rows_sha256'],
+                         mysql_utils.seed_checksum(7))
+        self.assertNotEqual(digest['rows_sha256'],
+                            mysql_utils.seed_checksum(6))
+
+    def test_dump_throughput(self):
+        result = mysql_utils.DumpResult(
+            'db', 'mysql/0', 'f', 2.0, 5000000, 1, 'x', 0, 'y')
+        self.assertEqual(mysql_utils.dump_throughput(result), 2.5)
+        self.assertEqual(
+            mysql_utils.dump_throughput(result._replace(seconds=0)), 0.0)
+
+    def test_async_benchmark_mysqldump(self):
+        if sys.version_info < (3, 6, 0):
+            raise unittest.SkipTest("Can't AsyncMock in py35")
+
+        async def _run_action(unit_name, action_name, model_name=None,
+                              action_params=None, raise_on_failure=False):
+            action = mock.MagicMock()
+            action.data = {'results': {
+                'mysqldump-file': '/var/backups/mysql/mysqldump-{}.gz'.format(
+                    action_params['databases'])}}
+            return action
+
+        self.patch_object(mysql_utils.zaza.model, 'async_run_action',
+                          new=mock.AsyncMock(side_effect=_run_action))
+        digest = {'size': 10, 'compressed_size': 5, 'sha256': 'x',
+                  'rows': 0, 'rows_sha256': 'y'}
+        self.patch_object(
+            mysql_utils.zaza.model, 'async_run_on_unit',
+            new=mock.AsyncMock(return_value={
+                'Code': '0', 'Stdout': json.dumps(digest)}))
+        results = asyncio.get_event_loop().run_until_complete(
+            mysql_utils.async_benchmark_mysqldump(
+                ['mysql/0', 'mysql/1'], ['a', 'b', 'c']))
+        self.assertEqual([(r.database, r.unit) for r in results],
+                         [('a', 'mysql/0'), ('b', 'mysql/1'),
+                          ('c', 'mysql/0')])
+        self.assertEqual(results[1].file, '/var/backups/mysql/mysqldump-b.gz')
+        self.assertEqual(results[1].size, 10)
+        self.async_run_action.assert_any_call(
+            'mysql/1', 'mysqldump', model_name=None,
+            action_params={'databases': 'b'}, raise_on_failure=True)
+        cmd = self.async_run_on_unit.call_args_list[0][0][1]
+        self.assertTrue(cmd.startswith('python3 -c '))
+        self.assertTrue(cmd.endswith(
+            ' /var/backups/mysql/mysqldump-a.gz seed'))
@@ -140,6 +140,209 @@ class TestOpenStackUtils(ut_utils.BaseTestCase):
         self.neutronclient.create_floatingip.assert_called_once_with(
             self.floatingip)
 
+    def test_create_ports(self):
+        self.patch_object(openstack_utils, "get_net_uuid")
+        self.get_net_uuid.return_value = self.net_uuid
+        self.neutronclient.list_ports.return_value = [
+            {"ports": [{"id": "port1", "name": "port1"}]}]
+        self.neutronclient.create_port.return_value = {
+            "ports": [{"id": "port2", "name": "port2"},
+                      {"id": "port3", "name": "port3"}]}
+        ports = openstack_utils.create_ports(
+            self.neutronclient, ["port1", "port2", "port3"],
+            self.private_net,
+            attributes={"admin_state_up": True},
+            port_attributes={"port3": {"binding:host_id": "host3"}})
+        self.assertEqual([p["id"] for p in ports],
+                         ["port1", "port2", "port3"])
+        self.neutronclient.list_ports.assert_called_once_with(
+            retrieve_all=False, name=["port1", "port2", "port3"],
+            network_id=self.net_uuid)
+        self.neutronclient.create_port.assert_called_once_with(
+            {"ports": [
+                {"name": "port2", "network_id": self.net_uuid,
+                 "admin_state_up": True},
+                {"name": "port3", "network_id": self.net_uuid,
+                 "admin_state_up": True, "binding:host_id": "host3"}]})
+
+        # All exist
+        self.get_net_uuid.reset_mock()
+        self.neutronclient.create_port.reset_mock()
+        self.neutronclient.list_ports.return_value = [
+            {"ports": [{"id": "port1", "name": "port1"}]}]
+        ports = openstack_utils.create_ports(
+            self.neutronclient, ["port1"], network_id="net1")
+        self.assertEqual(ports, [{"id": "port1", "name": "port1"}])
+        self.neutronclient.create_port.assert_not_called()
+        self.get_net_uuid.assert_not_called()
+
+    def test_create_additional_port_for_machines(self):
+        self.patch_object(openstack_utils, "create_ports")
+        nova = mock.MagicMock()
+        servers = {uuid: mock.MagicMock(id=uuid) for uuid in ("a", "b")}
+        for uuid, server in servers.items():
+            server.name = "server-{}".format(uuid)
+        nova.servers.get.side_effect = servers.get
+        self.neutronclient.list_ports.side_effect = [
+            {"ports": [{"name": "server-a_ext-port"}]},
+            {"ports": []},
+            {"ports": [{"name": "server-b_ext-port",
+                        "mac_address": "fa:16:3e:00:00:01"}]}]
+        self.create_ports.return_value = [{"id": "port-b"}]
+        self.assertEqual(
+            openstack_utils.create_additional_port_for_machines(
+                nova, self.neutronclient, "net1", ["a", "b"]),
+            ["fa:16:3e:00:00:01"])
+        self.create_ports.assert_called_once_with(
+            self.neutronclient, ["server-b_ext-port"], network_id="net1",
+            attributes={"admin_state_up": True,
+                        "port_security_enabled": False,
+                        "fixed_ips": []})
+        servers["a"].interface_attach.assert_not_called()
+        servers["b"].interface_attach.assert_called_once_with(
+            port_id="port-b", net_id=None, fixed_ip=None)
+
+    def test_floating_ip_pool(self):
+        self.patch_object(openstack_utils, "get_net_uuid")
+        self.get_net_uuid.return_value = self.net_uuid
+        fips = [{"id": "fip{}".format(i),
+                 "floating_ip_address": "10.5.0.{}".format(i)}
+                for i in range(3)]
+        self.neutronclient.create_floatingip.side_effect = [
+            {"floatingip": fip} for fip in fips]
+        self.neutronclient.update_floatingip.side_effect = (
+            lambda fip_id, body: {"floatingip": {
+                "id": fip_id, "floating_ip_address": "10.5.0.1",
+                "port_id": body["floatingip"]["port_id"]}})
+        pool = openstack_utils.FloatingIPPool(self.neutronclient, self.ext_net)
+        self.assertEqual(
+            sorted(fip["id"] for fip in pool.fill(2)), ["fip0", "fip1"])
+        self.assertEqual(pool.fill(2), [])
+        self.assertEqual(len(pool), 2)
+        # One request per floating IP, Neutron has no bulk create for them.
+        self.neutronclient.create_floatingip.assert_has_calls([
+            mock.call({"floatingip": {"floating_network_id": self.net_uuid}}),
+            mock.call({"floatingip": {"floating_network_id": self.net_uuid}}),
+        ])
+        self.assertEqual(
+            pool.assign({"id": "port1", "device_id": "vm1"})["port_id"],
+            "port1")
+        pool.assign({"id": "port2", "device_id": "vm2"})
+        # Empty pool is topped up on demand
+        self.assertEqual(
+            pool.assign({"id": "port3", "device_id": "vm3"}),
+            {"id": "fip2", "floating_ip_address": "10.5.0.1",
+             "port_id": "port3"})
+        self.assertEqual(self.neutronclient.create_floatingip.call_count, 3)
+        self.neutronclient.update_floatingip.assert_called_with(
+            "fip2", {"floatingip": {"port_id": "port3"}})
+
+        # Floating IPs of a failed guest go back to the pool
+        reclaimed = pool.reclaim("vm3")
+        self.assertEqual([fip["id"] for fip in reclaimed], ["fip2"])
+        self.neutronclient.update_floatingip.assert_called_with(
+            "fip2", {"floatingip": {"port_id": None}})
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.reclaim("vm3"), [])
+
+    def test_floating_ip_pool_release(self):
+        self.patch_object(openstack_utils, "get_net_uuid")
+        self.neutronclient.create_floatingip.side_effect = [
+            {"floatingip": {"id": "fip0", "floating_ip_address": "10.5.0.0"}},
+            {"floatingip": {"id": "fip1", "floating_ip_address": "10.5.0.1"}}]
+        pool = openstack_utils.FloatingIPPool(self.neutronclient)
+        pool.fill(2)
+        pool.release()
+        self.assertEqual(len(pool), 0)
+        self.neutronclient.delete_floatingip.assert_has_calls(
+            [mock.call("fip0"), mock.call("fip1")], any_order=True)
+
+    def test_get_secgroup_rules(self):
+        rules = openstack_utils.get_secgroup_rules(
+            custom_rules=[{'protocol': 'tcp', 'port_range_min': '80',
+                           'port_range_max': '80'}],
+            ethertypes=('IPv4', 'IPv6'))
+        self.assertEqual(
+            [(r['ethertype'], r['protocol'], r.get('port_range_min'))
+             for r in rules],
+            [('IPv4', 'tcp', 22), ('IPv4', 'icmp', None),
+             ('IPv4', 'tcp', '80'),
+             ('IPv6', 'tcp', 22), ('IPv6', 'ipv6-icmp', None),
+             ('IPv6', 'tcp', '80')])
+
+    def test_get_secgroup_rules_fixed_ethertype(self):
+        rules = openstack_utils.get_secgroup_rules(
+            custom_rules=[
+                {'protocol': 'tcp', 'port_range_min': '80',
+                 'port_range_max': '80', 'remote_ip_prefix': '10.0.0.0/8'},
+                {'protocol': 'tcp', 'port_range_min': '443',
+                 'port_range_max': '443', 'remote_ip_prefix': 'fd00::/8'},
+                {'protocol': 'udp', 'port_range_min': '53',
+                 'port_range_max': '53', 'ethertype': 'IPv6'}],
+            ethertypes=('IPv4', 'IPv6'))
+        self.assertEqual(
+            [(r['ethertype'], r['protocol'], r.get('port_range_min'))
+             for r in rules],
+            [('IPv4', 'tcp', 22), ('IPv4', 'icmp', None),
+             ('IPv4', 'tcp', '80'),
+             ('IPv6', 'tcp', 22), ('IPv6', 'ipv6-icmp', None),
+             ('IPv6', 'tcp', '443'), ('IPv6', 'udp', '53')])
+        rules = openstack_utils.get_secgroup_rules(
+            custom_rules=[{'protocol': 'tcp', 'port_range_min': '443',
+                           'port_range_max': '443',
+                           'remote_ip_prefix': 'fd00::/8'}])
+        self.assertEqual(
+            [(r['ethertype'], r['protocol']) for r in rules],
+            [('IPv4', 'tcp'), ('IPv4', 'icmp'), ('IPv6', 'tcp')])
+
+    def test_add_neutron_secgroup_rules(self):
+        self.neutronclient.list_security_groups.return_value = {
+            'security_groups': [
+                {'id': 'other', 'name': 'default', 'project_id': 'p2',
+                 'security_group_rules': []},
+                {'id': 'sg1', 'name': 'default',
+                 'tenant_id': self.project_id,
+                 'security_group_rules': [
+                     {'direction': 'egress', 'ethertype': 'IPv4',
+                      'protocol': None},
+                     {'direction': 'ingress', 'ethertype': 'IPv4',
+                      'protocol': 'tcp', 'port_range_min': 22,
+                      'port_range_max': 22,
+                      'remote_ip_prefix': '0.0.0.0/0'}]}]}
+        self.neutronclient.create_security_group_rule.side_effect = (
+            lambda body: body)
+        openstack_utils.add_neutron_secgroup_rules(
+            self.neutronclient, self.project_id,
+            [{'protocol': 'tcp', 'port_range_min': '80',
+              'port_range_max': '80', 'direction': 'ingress'}])
+        self.neutronclient.list_security_groups.assert_called_once_with(
+            name='default')
+        self.neutronclient.create_security_group_rule.assert_called_once_with(
+            {'security_group_rules': [
+                {'protocol': 'icmp', 'direction': 'ingress',
+                 'ethertype': 'IPv4', 'security_group_id': 'sg1'},
+                {'protocol': 'tcp', 'port_range_min': '80',
+                 'port_range_max': '80', 'direction': 'ingress',
+                 'ethertype': 'IPv4', 'security_group_id': 'sg1'}]})
+
+    def test_add_neutron_secgroup_rules_all_present(self):
+        rules = openstack_utils.get_secgroup_rules()
+        self.neutronclient.list_security_groups.return_value = {
+            'security_groups': [
+                {'id': 'sg1', 'name': 'default',
+                 'project_id': self.project_id,
+                 'security_group_rules': rules}]}
+        openstack_utils.add_neutron_secgroup_rules(
+            self.neutronclient, self.project_id)
+        self.neutronclient.create_security_group_rule.assert_not_called()
+
+    def test_add_neutron_secgroup_rules_no_group(self):
+        self.neutronclient.list_security_groups.return_value = {
+            'security_groups': []}
+        with self.assertRaises(Exception):
+            openstack_utils.add_neutron_secgroup_rules(
+                self.neutronclient, self.project_id)
+
     def test_create_address_scope(self):
         self.patch_object(openstack_utils, "get_net_uuid")
         self.get_net_uuid.return_value = self.net_uuid
@@ -340,6 +543,8 @@ class TestOpenStackUtils(ut_utils.BaseTestCase):
         self.assertEqual(
             openstack_utils.get_images_by_name(glance_client, 'bob'),
             [image_mock1])
+        glance_client.images.list.assert_called_with(
+            filters={'name': 'bob'})
         self.assertEqual(
             openstack_utils.get_images_by_name(glance_client, 'frank'),
             [])
@@ -354,6 +559,8 @@ class TestOpenStackUtils(ut_utils.BaseTestCase):
         self.assertEqual(
             openstack_utils.get_volumes_by_name(cinder_client, 'bob'),
             [volume_mock1])
+        cinder_client.volumes.list.assert_called_with(
+            search_opts={'name': 'bob'})
         self.assertEqual(
             openstack_utils.get_volumes_by_name(cinder_client, 'frank'),
             [])
@@ -846,22 +1053,147 @@ class TestOpenStackUtils(ut_utils.BaseTestCase):
         self.get_public_key.assert_called_once_with(nova_mock, 'mykeys')
         self.get_private_key.assert_called_once_with('mykeys')
 
+    def test_lookup_index(self):
+        lookup = mock.MagicMock()
+        lookup.side_effect = lambda client, name: [name]
+        index = openstack_utils.LookupIndex(lookup)
+        client = mock.MagicMock()
+        client.httpclient.get_project_id.return_value = 'admin-project'
+        client.httpclient.get_endpoint.return_value = 'http://neutron'
+        self.assertEqual(index(client, 'bob'), ['bob'])
+        self.assertEqual(index(client, 'bob'), ['bob'])
+        lookup.assert_called_once_with(client, 'bob')
+        index.invalidate('bob')
+        index(client, 'bob')
+        self.assertEqual(lookup.call_count, 2)
+        index(client, 'frank')
+        index.invalidate()
+        index(client, 'bob')
+        index(client, 'frank')
+        self.assertEqual(lookup.call_count, 5)
+
+    def test_lookup_index_unscoped_client(self):
+        lookup = mock.MagicMock()
+        index = openstack_utils.LookupIndex(lookup)
+        index('client', 'bob')
+        index('client', 'bob')
+        self.assertEqual(lookup.call_count, 2)
+        client = mock.MagicMock()
+        client.httpclient.get_project_id.side_effect = (
+            openstack_utils.ksa_exceptions.MissingAuthPlugin())
+        index(client, 'bob')
+        index(client, 'bob')
+        self.assertEqual(lookup.call_count, 4)
+
+    def test_invalidate_flavor_and_network(self):
+        openstack_utils.invalidate_resolved_resources()
+        self.addCleanup(openstack_utils.invalidate_resolved_resources)
+        nova_mock = mock.MagicMock()
+        nova_mock.client.get_project_id.return_value = 'admin-project'
+        nova_mock.client.get_endpoint.return_value = 'http://nova'
+        neutron_mock = mock.MagicMock()
+        neutron_mock.httpclient.get_project_id.return_value = 'admin-project'
+        neutron_mock.httpclient.get_endpoint.return_value = 'http://neutron'
+        openstack_utils.resolve_flavor(nova_mock, 'm1.small')
+        openstack_utils.resolve_network(neutron_mock, 'private')
+        openstack_utils.resolve_flavor(nova_mock, 'm1.small')
+        openstack_utils.resolve_network(neutron_mock, 'private')
+        self.assertEqual(nova_mock.flavors.find.call_count, 1)
+        self.assertEqual(neutron_mock.find_resource.call_count, 1)
+        openstack_utils.invalidate_flavor('m1.small')
+        openstack_utils.invalidate_network()
+        openstack_utils.resolve_flavor(nova_mock, 'm1.small')
+        openstack_utils.resolve_network(neutron_mock, 'private')
+        self.assertEqual(nova_mock.flavors.find.call_count, 2)
+        self.assertEqual(neutron_mock.find_resource.call_count, 2)
+        neutron_mock.list_networks.return_value = {'networks': []}
+        neutron_mock.create_network.return_value = {'network': {'id': 'x'}}
+        openstack_utils.create_project_network(
+            neutron_mock, 'project', net_name='private')
+        openstack_utils.resolve_network(neutron_mock, 'private')
+        self.assertEqual(neutron_mock.find_resource.call_count, 3)
+
+    def test_lookup_index_per_project(self):
+        lookup = mock.MagicMock()
+        index = openstack_utils.LookupIndex(lookup)
+        admin = mock.MagicMock()
+        admin.httpclient.get_project_id.return_value = 'admin-project'
+        admin.httpclient.get_endpoint.return_value = 'http://neutron'
+        admin_again = mock.MagicMock()
+        admin_again.httpclient.get_project_id.return_value = 'admin-project'
+        admin_again.httpclient.get_endpoint.return_value = 'http://neutron'
+        demo = mock.MagicMock()
+        demo.httpclient.get_project_id.return_value = 'demo-project'
+        demo.httpclient.get_endpoint.return_value = 'http://neutron'
+        index(admin, 'private')
+        index(admin_again, 'private')
+        self.assertEqual(lookup.call_count, 1)
+        index(demo, 'private')
+        lookup.assert_called_with(demo, 'private')
+        self.assertEqual(lookup.call_count, 2)
+        index.invalidate('private')
+        index(admin, 'private')
+        index(demo, 'private')
+        self.assertEqual(lookup.call_count, 4)
+
+    def test_resolve_image(self):
+        openstack_utils.invalidate_resolved_resources()
+        self.addCleanup(openstack_utils.invalidate_resolved_resources)
+        self.patch_object(openstack_utils, "delete_resource")
+        nova_mock = mock.MagicMock()
+        nova_mock.glance.find_image.return_value = 'cirros-image'
+        self.assertEqual(
+            openstack_utils.resolve_image(nova_mock, 'cirros'),
+            'cirros-image')
+        openstack_utils.resolve_image(nova_mock, 'cirros')
+        nova_mock.glance.find_image.assert_called_once_with('cirros')
+        openstack_utils.delete_image(mock.MagicMock(), 'b46c2d83')
+        openstack_utils.resolve_image(nova_mock, 'cirros')
+        self.assertEqual(nova_mock.glance.find_image.call_count, 2)
+
+    def test_resolve_flavor_and_network(self):
+        openstack_utils.invalidate_resolved_resources()
+        self.addCleanup(openstack_utils.invalidate_resolved_resources)
+        nova_mock = mock.MagicMock()
+        neutron_mock = mock.MagicMock()
+        for _ in range(2):
+            openstack_utils.resolve_flavor(nova_mock, 'm1.tiny')
+            openstack_utils.resolve_network(neutron_mock, 'private')
+        nova_mock.flavors.find.assert_called_once_with(name='m1.tiny')
+        neutron_mock.find_resource.assert_called_once_with(
+            'network', 'private')
+        openstack_utils.invalidate_resolved_resources()
+        openstack_utils.resolve_flavor(nova_mock, 'm1.tiny')
+        self.assertEqual(nova_mock.flavors.find.call_count, 2)
+
+    def test_iter_ports(self):
+        neutron_mock = mock.MagicMock()
+        neutron_mock.list_ports.return_value = iter([
+            {'ports': [{'id': 'p1'}, {'id': 'p2'}]},
+            {'ports': [{'id': 'p3'}]}])
+        ports = openstack_utils.iter_ports(neutron_mock, network_id='net1')
+        self.assertEqual(next(ports), {'id': 'p1'})
+        neutron_mock.list_ports.assert_called_once_with(
+            retrieve_all=False, network_id='net1')
+        self.assertEqual(list(ports), [{'id': 'p2'}, {'id': 'p3'}])
+
     def test_get_ports_from_device_id(self):
         port_mock = {'device_id': 'dev1'}
         neutron_mock = mock.MagicMock()
-        neutron_mock.list_ports.return_value = {
-            'ports': [port_mock]}
+        neutron_mock.list_ports.return_value = [{
+            'ports': [port_mock]}]
         self.assertEqual(
             openstack_utils.get_ports_from_device_id(
                 neutron_mock,
                 'dev1'),
             [port_mock])
+        neutron_mock.list_ports.assert_called_once_with(
+            retrieve_all=False, device_id='dev1')
 
     def test_get_ports_from_device_id_no_match(self):
-        port_mock = {'device_id': 'dev2'}
         neutron_mock = mock.MagicMock()
-        neutron_mock.list_ports.return_value = {
-            'ports': [port_mock]}
+        neutron_mock.list_ports.return_value = [{
+            'ports': []}]
         self.assertEqual(
             openstack_utils.get_ports_from_device_id(
                 neutron_mock,
@@ -0,0 +1,175 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+import mock
+import tenacity
+
+import unit_tests.utils as ut_utils
+import zaza.openstack.utilities.retry_policy as retry_policy
+
+
+class TestRetryPolicy(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super(TestRetryPolicy, self).setUp()
+        self.patch_object(retry_policy, '_stats', new={})
+        self.patch_object(retry_policy, '_policies', new={})
+        self.policy = retry_policy.register_policy(
+            'test', attempts=4, wait_max=60)
+
+    def retry_state(self, attempt_number, start_time=0):
+        retry_state = mock.MagicMock()
+        retry_state.attempt_number = attempt_number
+        retry_state.start_time = start_time
+        retry_state.seconds_since_start = 0
+        return retry_state
+
+    def test_register_policy(self):
+        self.assertEqual(retry_policy.get_policy('test'), self.policy)
+        with self.assertRaises(ValueError):
+            retry_policy.register_policy('forever')
+        with self.assertRaises(KeyError):
+            retry_policy.get_policy('forever')
+
+    def test_wait(self):
+        self.assertEqual(
+            [self.policy.wait(n) for n in range(1, 9)],
+            [1, 2, 4, 8, 16, 32, 60, 60])
+        policy = self.policy._replace(wait_min=5, multiplier=0.5)
+        self.assertEqual(policy.wait(1), 5)
+
+    def test_stop(self):
+        stop = self.policy.stop()
+        self.assertFalse(stop(self.retry_state(3)))
+        self.assertTrue(stop(self.retry_state(4)))
+        stop = self.policy._replace(attempts=None, delay=10).stop()
+        retry_state = self.retry_state(100)
+        self.assertFalse(stop(retry_state))
+        retry_state.seconds_since_start = 10
+        self.assertTrue(stop(retry_state))
+
+    def test_stop_without_sleeping(self):
+        calls = []
+
+        @retry_policy.retry('test', reraise=True)
+        def fail():
+            calls.append(1)
+            raise ValueError()
+
+        fail.retry.wait = tenacity.wait_none()
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(len(calls), 4)
+
+    def test_wait_adaptive(self):
+        wait = retry_policy.wait_adaptive(self.policy)
+        self.assertEqual(wait(self.retry_state(6)), 32)
+        retry_policy._get_stats('test')['latencies'].extend([20, 40, 400])
+        self.assertEqual(wait(self.retry_state(6)), 10)
+        self.assertEqual(wait(self.retry_state(1)), 1)
+        retry_policy._get_stats('test')['latencies'].extend([0.1] * 10)
+        self.assertEqual(wait(self.retry_state(6)),
+                         retry_policy.ADAPTIVE_WAIT_FLOOR)
+        wait = retry_policy.wait_adaptive(self.policy._replace(adaptive=False))
+        self.assertEqual(wait(self.retry_state(6)), 32)
+
+    def test_deadline(self):
+        self.patch_object(retry_policy.time, 'monotonic', return_value=100)
+        stop = retry_policy.stop_at_deadline()
+        wait = retry_policy.wait_adaptive(self.policy)
+        self.assertFalse(stop(self.retry_state(1)))
+        with retry_policy.deadline(30):
+            self.assertEqual(wait(self.retry_state(6)), 30)
+            with retry_policy.deadline(60):
+                self.assertEqual(retry_policy._deadline.get(), 130)
+            with retry_policy.deadline(10):
+                self.assertEqual(retry_policy._deadline.get(), 110)
+            with retry_policy.deadline(None):
+                self.assertEqual(retry_policy._deadline.get(), 130)
+            self.monotonic.return_value = 130
+            self.assertTrue(stop(self.retry_state(1)))
+            self.assertEqual(wait(self.retry_state(6)), 0)
+        self.assertIsNone(retry_policy._deadline.get())
+        self.assertFalse(stop(self.retry_state(1)))
+
+    def test_deadline_per_thread(self):
+        self.patch_object(retry_policy.time, 'monotonic', return_value=100)
+        entered = threading.Event()
+        release = threading.Event()
+        seen = []
+
+        def _other():
+            with retry_policy.deadline(10):
+                entered.set()
+                release.wait(5)
+                seen.append(retry_policy._deadline.get())
+
+        thread = threading.Thread(target=_other)
+        thread.start()
+        entered.wait(5)
+        with retry_policy.deadline(60):
+            release.set()
+            thread.join(5)
+            self.assertEqual(retry_policy._deadline.get(), 160)
+        self.assertEqual(seen, [110])
+        self.assertIsNone(retry_policy._deadline.get())
+
+    def test_budget(self):
+        self.patch_object(retry_policy.time, 'monotonic', return_value=100)
+        retry_policy.register_policy('outer', attempts=3, delay=50)
+        with retry_policy.budget('outer'):
+            self.assertEqual(retry_policy._deadline.get(), 150)
+        with retry_policy.budget('test'):
+            self.assertIsNone(retry_policy._deadline.get())
+
+    def test_retrying_report(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ValueError()
+            return 'ok'
+
+        retryer = retry_policy.retrying(
+            'test', attempts=5, key='thing', wait=tenacity.wait_fixed(0.5),
+            sleep=mock.MagicMock())
+        self.assertEqual(retryer(flaky), 'ok')
+        self.assertEqual(retryer.policy_name, 'test:thing')
+        self.assertIsNotNone(retry_policy.readiness_latency('test:thing'))
+        self.assertIsNone(retry_policy.readiness_latency('test'))
+        report = retry_policy.report(reset=True)
+        self.assertEqual(report['test:thing']['calls'], 1)
+        self.assertEqual(report['test:thing']['retries'], 2)
+        self.assertEqual(report['test:thing']['slept'], 1.0)
+        report = retry_policy.report()
+        self.assertEqual(report['test:thing']['retries'], 0)
+        self.assertIsNotNone(report['test:thing']['latency'])
+
+    def test_retry_decorator(self):
+        calls = []
+
+        @retry_policy.retry('test', reraise=True, sleep=mock.MagicMock())
+        def fail():
+            calls.append(1)
+            raise ValueError()
+
+        self.assertIsInstance(fail.retry, retry_policy.PolicyRetrying)
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(retry_policy.report()['test']['retries'], 3)
+        self.assertEqual(retry_policy.report()['test']['calls'], 0)
@@ -0,0 +1,146 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+import tenacity
+
+import unit_tests.utils as ut_utils
+import zaza.openstack.utilities.timing as timing
+
+
+class TestTiming(ut_utils.BaseTestCase):
+
+    def setUp(self):
+        super(TestTiming, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.patch_object(timing.os, 'environ',
+                          new={timing.TIMING_DIR_ENV: self.tmpdir})
+        self.patch_object(timing.time, 'monotonic')
+        self.monotonic.side_effect = range(100)
+        timing.collect()
+
+    def tearDown(self):
+        timing.uninstrument()
+        timing.collect()
+        shutil.rmtree(self.tmpdir)
+        super(TestTiming, self).tearDown()
+
+    def test_span_disabled(self):
+        timing.os.environ.clear()
+        with timing.span('test') as current:
+            self.assertIsNone(current)
+        timing.record('test', 0)
+        self.assertEqual(timing.collect(), ([], {}))
+
+    def test_span(self):
+        with timing.span('test') as outer:
+            with timing.span('inner') as inner:
+                timing.add_bytes(10)
+                timing.add_retry('fn')
+            self.assertIs(timing.current_span(), outer)
+        self.assertIsNone(timing.current_span())
+        spans, retries = timing.collect()
+        self.assertEqual(spans, [inner, outer])
+        self.assertEqual(inner.as_dict(), {
+            'name': 'inner', 'path': ['test', 'inner'], 'duration': 1,
+            'retries': 1, 'bytes': 10})
+        self.assertEqual(outer.duration, 3)
+        self.assertEqual(retries, {'fn': 1})
+
+    def test_folded_stacks(self):
+        with timing.span('test'):
+            with timing.span('a'):
+                pass
+            with timing.span('a'):
+                pass
+        spans, _ = timing.collect()
+        self.assertEqual(timing.folded_stacks(spans), {
+            'test': 3000000,
+            'test;a': 2000000})
+
+    def test_write_report(self):
+        with timing.span('test'):
+            with timing.span('a'):
+                pass
+        paths = timing.write_report('aClass', extra={'policies': {}})
+        self.assertEqual(paths, [
+            os.path.join(self.tmpdir, 'aClass.json'),
+            os.path.join(self.tmpdir, 'aClass.folded')])
+        with open(paths[0]) as f:
+            report = json.load(f)
+        self.assertEqual(report['totals'], {
+            'test': {'count': 1, 'duration': 3, 'retries': 0, 'bytes': 0},
+            'a': {'count': 1, 'duration': 1, 'retries': 0, 'bytes': 0}})
+        self.assertEqual([s['name'] for s in report['spans']], ['test', 'a'])
+        self.assertEqual(report['policies'], {})
+        with open(paths[1]) as f:
+            self.assertEqual(f.read(), 'test 2000000\ntest;a 1000000\n')
+        self.assertEqual(timing.collect(), ([], {}))
+
+    def test_request_name(self):
+        self.assertEqual(
+            timing._request_name(
+                '/servers/0a1b2c3d-0000-4000-8000-000000000000/action',
+                {'method': 'POST',
+                 'endpoint_filter': {'service_type': 'compute'}}),
+            'compute POST /servers/{id}/action')
+        self.assertEqual(
+            timing._request_name(
+                'http://10.0.0.1:5000/v3/auth/tokens?nocatalog',
+                {'method': 'GET'}),
+            'openstack GET /v3/auth/tokens')
+
+    def test_instrument(self):
+        original = timing.model.async_get_status
+        self.patch_object(timing.ks_session.Session, 'request',
+                          name='session_request',
+                          return_value=mock.MagicMock())
+        self.session_request.return_value.headers = {'Content-Length': '42'}
+        timing.instrument()
+        timing.instrument()
+        self.assertIs(timing.model.async_get_status.__wrapped__, original)
+        self.assertFalse(hasattr(timing.model.is_unit_idle, '__wrapped__'))
+
+        calls = []
+
+        @tenacity.retry(stop=tenacity.stop_after_attempt(3),
+                        wait=tenacity.wait_none())
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ValueError()
+
+        session = mock.MagicMock()
+        with timing.span('test') as current:
+            flaky()
+            timing.ks_session.Session.request(
+                session, '/servers', 'GET',
+                endpoint_filter={'service_type': 'compute'})
+        self.session_request.assert_called_once_with(
+            session, '/servers', 'GET',
+            endpoint_filter={'service_type': 'compute'})
+        self.assertEqual(current.retries, 2)
+        spans, retries = timing.collect()
+        self.assertEqual(spans[0].path, ('test', 'compute GET /servers'))
+        self.assertEqual(spans[0].bytes, 42)
+        self.assertEqual(list(retries.values()), [2])
+
+        timing.uninstrument()
+        self.assertIs(timing.model.async_get_status, original)
+        self.assertIs(timing.ks_session.Session.request, self.session_request)
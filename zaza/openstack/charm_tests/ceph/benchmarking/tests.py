@@ -14,67 +14,50 @@
 
 """Ceph Benchmark Tests."""
 
+import itertools
+import json
 import logging
-import re
-import unittest
 
 import zaza.model
-
-
-class BenchmarkTests(unittest.TestCase):
-    """Ceph Bencharmk Tests."""
+import zaza.openstack.charm_tests.ceph.benchmarking.utils as bench_utils
+import zaza.openstack.charm_tests.test_utils as test_utils
+
+
+class BenchmarkTests(test_utils.BaseCharmTest):
+    """Ceph Benchmark Tests.
+
+    rados bench and rbd bench run at once from every unit of the client
+    applications, over a matrix of block sizes, queue depths and, for rados,
+    object counts. S3 workloads run against ceph-radosgw, if deployed. The
+    benchmarks are configured with tests_options, e.g.::
+
+        tests_options:
+          zaza.openstack.charm_tests.ceph.benchmarking.tests.BenchmarkTests:
+            seconds: 30
+            clients: [ceph-mon]
+            block_sizes: [4096, 4194304]
+            queue_depths: [16, 64]
+            object_counts: [null, 1000]
+            rbd_io_total: 256M
+            s3_object_count: 100
+            results_file: ceph-bench.json
+            baseline_file: ceph-bench-baseline.json
+    """
 
     @classmethod
     def setUpClass(cls):
         """Run class setup for running ceph benchmark tests."""
-        super().setUpClass()
-        cls.results_match = "^[A-Z].*"
+        super().setUpClass(application_name='ceph-mon')
         cls.pool = "zaza_benchmarks"
-        cls.test_results = {}
-        cls.time_in_secs = 30
-
-    def parse_bench_results(self, results_string):
-        """Parse bench results from string.
-
-        :param results string: Output from rados bench command.
-                               With newlines due to juju run's output.
-        :type results_string: string
-        :returns: Dictionary of results summary
-        :rtype: dict
-        """
-        _results = {}
-        _lines = results_string.split("\n")
-        for _line in _lines:
-            _line = _line.strip()
-            if re.match(self.results_match, _line):
-                _keyvalues = _line.split(":")
-                try:
-                    _results[_keyvalues[0].strip()] = _keyvalues[1].strip()
-                except IndexError:
-                    # Skipping detailed output for summary details
-                    pass
-        return _results
-
-    def run_rados_bench(self, action, params=None):
-        """Run rados bench.
-
-        :param action: String rados bench command i.e. write, rand, seq
-        :type action: string
-        :param params: List of string extra parameters to rados bench command
-        :type params: List[strings]
-        :returns: Unit run dict result
-        :rtype: dict
-        """
-        _cmd = "rados bench -p {} {} {}".format(
-            self.pool, self.time_in_secs, action)
-        if params:
-            _cmd += " "
-            _cmd += " ".join(params)
-        logging.info(
-            "Running '{}' for {} seconds ...".format(_cmd, self.time_in_secs))
-        _result = zaza.model.run_on_leader(
-            "ceph-mon", _cmd, timeout=self.time_in_secs + 60)
-        return _result
+        cls.time_in_secs = cls.tests_options.get('seconds', 30)
+        cls.clients = sorted(
+            unit.entity_id
+            for application in cls.tests_options.get('clients', ['ceph-mon'])
+            for unit in zaza.model.get_units(application))
+        cls.block_sizes = cls.tests_options.get('block_sizes', [4194304])
+        cls.queue_depths = cls.tests_options.get('queue_depths', [16])
+        cls.object_counts = cls.tests_options.get('object_counts', [None])
+        cls.test_results = []
 
     def test_001_create_pool(self):
         """Create ceph pool."""
@@ -88,37 +71,89 @@ class BenchmarkTests(unittest.TestCase):
             else:
                 logging.error("Ceph osd pool create failed")
                 raise Exception(_result.get("Stderr", ""))
-
-    def test_100_rados_bench_write(self):
-        """Rados bench write test."""
-        _result = self.run_rados_bench("write", params=["--no-cleanup"])
-        self.test_results["write"] = (
-            self.parse_bench_results(_result.get("Stdout", "")))
-
-    def test_200_rados_bench_read_seq(self):
-        """Rados bench read sequential test."""
-        _result = self.run_rados_bench("seq")
-        self.test_results["read_seq"] = (
-            self.parse_bench_results(_result.get("Stdout", "")))
-
-    def test_300_rados_bench_read_rand(self):
-        """Rados bench read random test."""
-        _result = self.run_rados_bench("rand")
-        self.test_results["read_rand"] = (
-            self.parse_bench_results(_result.get("Stdout", "")))
+        zaza.model.run_on_leader(
+            "ceph-mon",
+            "ceph osd pool application enable {} rbd".format(self.pool))
+
+    def test_100_rados_bench(self):
+        """Rados bench write, read sequential and read random tests."""
+        for block_size, queue_depth, objects in itertools.product(
+                self.block_sizes, self.queue_depths, self.object_counts):
+            for mode in ("write", "seq", "rand"):
+                self.test_results.append(bench_utils.run_rados_bench(
+                    self.clients, self.pool, self.time_in_secs, mode,
+                    block_size=block_size, concurrency=queue_depth,
+                    max_objects=objects, model_name=self.model_name))
+            bench_utils.cleanup_rados_bench(
+                self.clients, self.pool, model_name=self.model_name)
+
+    def test_200_rbd_bench(self):
+        """Rbd bench sequential and random, write and read tests."""
+        io_total = self.tests_options.get('rbd_io_total', '256M')
+        bench_utils.create_rbd_images(
+            self.clients, self.pool, model_name=self.model_name)
+        for block_size, queue_depth in itertools.product(
+                self.tests_options.get('rbd_block_sizes', [4096]),
+                self.queue_depths):
+            for pattern, io_type in itertools.product(
+                    ("seq", "rand"), ("write", "read")):
+                self.test_results.append(bench_utils.run_rbd_bench(
+                    self.clients, self.pool, io_type, block_size,
+                    queue_depth, io_total, pattern,
+                    model_name=self.model_name))
+
+    def test_300_rgw_s3_bench(self):
+        """RGW S3 put and get tests."""
+        try:
+            rgw_unit = zaza.model.get_units("ceph-radosgw")[0].entity_id
+        except (KeyError, IndexError):
+            self.skipTest("ceph-radosgw is not deployed")
+        endpoint = bench_utils.get_rgw_endpoint(rgw_unit)
+        access_key, secret_key = bench_utils.get_rgw_keys(rgw_unit)
+        for object_size, queue_depth in itertools.product(
+                self.tests_options.get('s3_object_sizes', [1048576]),
+                self.queue_depths):
+            self.test_results.extend(bench_utils.run_s3_bench(
+                endpoint, access_key, secret_key, "zaza-benchmarks",
+                object_size,
+                self.tests_options.get('s3_object_count', 100),
+                queue_depth))
 
     def test_998_rados_cleanup(self):
-        """Cleanup rados bench data."""
-        _cmd = "rados -p {} cleanup".format(self.pool)
-        _result = zaza.model.run_on_leader("ceph-mon", _cmd)
-        if _result.get("Code") and not _result.get("Code").startswith('0'):
-            logging.warning("rados cleanup failed")
+        """Cleanup rados and rbd bench data."""
+        for cleanup in (bench_utils.cleanup_rados_bench,
+                        bench_utils.remove_rbd_images):
+            try:
+                cleanup(self.clients, self.pool, model_name=self.model_name)
+            except zaza.model.CommandRunFailed as e:
+                logging.warning("Benchmark cleanup failed: {}".format(e))
 
     def test_999_print_rados_bench_results(self):
-        """Print rados bench results."""
+        """Report the results and check for regressions.
+
+        The results are compared with the baseline_file if any, and with
+        the benchmark store if TEST_BENCHMARK_STORE is set.
+        """
+        results = bench_utils.results_to_json(self.test_results)
+        for result in results:
+            # The duration of rados bench is set, not measured
+            self.record_benchmark(
+                result['key'], {metric: value for metric, value
+                                in result['metrics'].items()
+                                if metric != 'seconds'})
         print("######## Begin Ceph Results ########")
-        for test, results in self.test_results.items():
-            print("##### {} ######".format(test))
-            for key, value in results.items():
-                print("{}: {}".format(key, value))
+        print(json.dumps(results, indent=2))
         print("######## End Ceph Results ########")
+        results_file = self.tests_options.get('results_file')
+        if results_file:
+            with open(results_file, 'w') as f:
+                json.dump(results, f, indent=2)
+        baseline_file = self.tests_options.get('baseline_file')
+        if baseline_file:
+            with open(baseline_file) as f:
+                baseline = json.load(f)
+            for key, metric, base, value, change in (
+                    bench_utils.compare_results(self.test_results, baseline)):
+                logging.info("{} {}: {:.2f} -> {:.2f} ({:+.1%})".format(
+                    key, metric, base, value, change))
+        self.assert_no_benchmark_regressions()
@@ -0,0 +1,522 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module of functions for benchmarking ceph.
+
+Each benchmark runs at once from several client units, to saturate the
+OSDs, and is summarised as a BenchResult: the metrics of every client and
+their aggregate, bandwidth in MiB/s, IOPS and latencies in seconds.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import time
+
+import boto3
+
+import zaza.model
+import zaza.openstack.utilities.benchmark as benchmark
+import zaza.utilities.networking as network_utils
+from zaza import sync_wrapper
+
+BenchResult = collections.namedtuple(
+    'BenchResult', ['workload', 'params', 'clients', 'metrics'])
+
+RADOS_METRICS = {
+    'Bandwidth (MB/sec)': 'bandwidth_mb_s',
+    'Average IOPS': 'iops',
+    'Average Latency(s)': 'latency_avg_s',
+    'Max latency(s)': 'latency_max_s',
+    'Total time run': 'seconds',
+}
+
+RBD_SUMMARY = re.compile(
+    r'elapsed:\s*(?P<seconds>[\d.]+)\s+ops:\s*(?P<ops>\d+)\s+'
+    r'ops/sec:\s*(?P<iops>[\d.]+)\s+bytes/sec:\s*(?P<bytes>[\d.]+)'
+    r'(?:\s*(?P<unit>[KMGT]i?B/s|B/s))?')
+
+BYTE_UNITS = {'B/s': 1, 'KiB/s': 2 ** 10, 'MiB/s': 2 ** 20, 'GiB/s': 2 ** 30,
+              'TiB/s': 2 ** 40}
+
+
+def bench_key(result):
+    """Return the key identifying a benchmark across runs.
+
+    :param result: Result of a benchmark
+    :type result: BenchResult
+    :rtype: str
+    """
+    return '/'.join([result.workload] + [
+        '{}={}'.format(key, value)
+        for key, value in sorted(result.params.items())])
+
+
+def parse_rados_bench(output):
+    """Parse the summary of rados bench.
+
+    :param output: Output of rados bench
+    :type output: str
+    :returns: Summary, e.g. {'Average IOPS': '122'}
+    :rtype: Dict[str, str]
+    """
+    summary = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if re.match('^[A-Z].*', line):
+            key, sep, value = line.partition(':')
+            if sep:
+                summary[key.strip()] = value.strip()
+    return summary
+
+
+def rados_metrics(summary):
+    """Return the metrics of a rados bench summary.
+
+    :param summary: Summary returned by parse_rados_bench()
+    :type summary: Dict[str, str]
+    :rtype: Dict[str, float]
+    """
+    metrics = {}
+    for key, metric in RADOS_METRICS.items():
+        try:
+            metrics[metric] = float(summary[key])
+        except (KeyError, ValueError):
+            pass
+    return metrics
+
+
+def parse_rbd_bench(output):
+    """Return the metrics of the output of rbd bench.
+
+    :param output: Output of rbd bench, ending with its summary line
+    :type output: str
+    :rtype: Dict[str, float]
+    """
+    matches = list(RBD_SUMMARY.finditer(output))
+    if not matches:
+        return {}
+    summary = matches[-1]
+    bandwidth = float(summary.group('bytes')) * BYTE_UNITS[
+        summary.group('unit') or 'B/s']
+    return {'seconds': float(summary.group('seconds')),
+            'iops': float(summary.group('iops')),
+            'bandwidth_mb_s': bandwidth / 2 ** 20}
+
+
+def aggregate(metrics):
+    """Aggregate the metrics of clients run at once.
+
+    Bandwidth and IOPS add up, the average latency is averaged and the
+    others are the maximum.
+
+    :param metrics: Metrics of each client
+    :type metrics: List[Dict[str, float]]
+    :rtype: Dict[str, float]
+    """
+    total = {}
+    for name in sorted({name for m in metrics for name in m}):
+        values = [m[name] for m in metrics if name in m]
+        if name in ('bandwidth_mb_s', 'iops'):
+            total[name] = sum(values)
+        elif name == 'latency_avg_s':
+            total[name] = sum(values) / len(values)
+        else:
+            total[name] = max(values)
+    return total
+
+
+def rados_bench_command(pool, seconds, mode, block_size=None,
+                        concurrency=None, max_objects=None, run_name=None):
+    """Return a rados bench command.
+
+    Objects written are kept, for seq and rand to read them back.
+
+    :param pool: Name of the pool
+    :type pool: str
+    :param seconds: Duration of the benchmark
+    :type seconds: int
+    :param mode: write, seq or rand
+    :type mode: str
+    :param block_size: Bytes per write
+    :type block_size: Optional[int]
+    :param concurrency: Number of concurrent operations
+    :type concurrency: Optional[int]
+    :param max_objects: Maximum number of objects written
+    :type max_objects: Optional[int]
+    :param run_name: Name of the run, objects are shared within a run
+    :type run_name: Optional[str]
+    :rtype: str
+    """
+    cmd = ['rados', 'bench', '-p', pool, str(seconds), mode]
+    if mode == 'write':
+        if block_size:
+            cmd += ['-b', str(block_size)]
+        if max_objects:
+            cmd += ['--max-objects', str(max_objects)]
+        cmd.append('--no-cleanup')
+    if concurrency:
+        cmd += ['-t', str(concurrency)]
+    if run_name:
+        cmd += ['--run-name', run_name]
+    return ' '.join(cmd)
+
+
+def rbd_bench_command(image, io_type, io_size, io_threads, io_total,
+                      io_pattern):
+    """Return a rbd bench command.
+
+    :param image: Image, as <pool>/<name>
+    :type image: str
+    :param io_type: write or read
+    :type io_type: str
+    :param io_size: Bytes per operation
+    :type io_size: int
+    :param io_threads: Number of concurrent operations
+    :type io_threads: int
+    :param io_total: Total amount of data, e.g. 256M
+    :type io_total: str
+    :param io_pattern: seq or rand
+    :type io_pattern: str
+    :rtype: str
+    """
+    return ('rbd bench --io-type {} --io-size {} --io-threads {} '
+            '--io-total {} --io-pattern {} {}').format(
+                io_type, io_size, io_threads, io_total, io_pattern, image)
+
+
+def client_name(client):
+    """Return the name of the objects and images of a client unit.
+
+    :param client: Name of the unit
+    :type client: str
+    :rtype: str
+    """
+    return 'zaza_bench_{}'.format(client.replace('/', '_'))
+
+
+async def async_run_on_clients(clients, command, timeout=None,
+                               model_name=None):
+    """Run a command at once on client units.
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param command: Function returning the command of a unit
+    :type command: Callable[[str], str]
+    :param timeout: Seconds to wait for each command
+    :type timeout: Optional[float]
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :returns: Output of each unit
+    :rtype: Dict[str, str]
+    :raises: zaza.model.CommandRunFailed
+    """
+    async def _run(client):
+        cmd = command(client)
+        result = await zaza.model.async_run_on_unit(
+            client, cmd, model_name=model_name, timeout=timeout)
+        if str(result.get('Code', '0')) != '0':
+            raise zaza.model.CommandRunFailed(cmd, result)
+        return result.get('Stdout', '')
+
+    outputs = await asyncio.gather(*[_run(client) for client in clients])
+    return dict(zip(clients, outputs))
+
+
+run_on_clients = sync_wrapper(async_run_on_clients)
+
+
+def run_rados_bench(clients, pool, seconds, mode, block_size=None,
+                    concurrency=None, max_objects=None, model_name=None):
+    """Run rados bench at once from client units.
+
+    Each client reads back the objects it wrote, see client_name().
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param pool: Name of the pool
+    :type pool: str
+    :param seconds: Duration of the benchmark
+    :type seconds: int
+    :param mode: write, seq or rand
+    :type mode: str
+    :param block_size: Bytes per write
+    :type block_size: Optional[int]
+    :param concurrency: Number of concurrent operations per client
+    :type concurrency: Optional[int]
+    :param max_objects: Maximum number of objects written per client
+    :type max_objects: Optional[int]
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :rtype: BenchResult
+    """
+    logging.info('Running rados bench {} for {}s from {}'.format(
+        mode, seconds, ', '.join(clients)))
+    outputs = run_on_clients(
+        clients,
+        lambda client: rados_bench_command(
+            pool, seconds, mode, block_size=block_size,
+            concurrency=concurrency, max_objects=max_objects,
+            run_name=client_name(client)),
+        timeout=seconds + 120, model_name=model_name)
+    per_client = {client: rados_metrics(parse_rados_bench(output))
+                  for client, output in outputs.items()}
+    return BenchResult(
+        workload='rados_{}'.format(mode),
+        params={'block_size': block_size, 'concurrency': concurrency,
+                'max_objects': max_objects, 'clients': len(clients)},
+        clients=per_client,
+        metrics=aggregate(list(per_client.values())))
+
+
+def cleanup_rados_bench(clients, pool, model_name=None):
+    """Remove the objects written by rados bench from client units.
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param pool: Name of the pool
+    :type pool: str
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    """
+    run_on_clients(
+        clients,
+        lambda client: 'rados -p {} cleanup --run-name {}'.format(
+            pool, client_name(client)),
+        model_name=model_name)
+
+
+def create_rbd_images(clients, pool, size_mb=1024, model_name=None):
+    """Create an image per client unit, if missing.
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param pool: Name of the pool
+    :type pool: str
+    :param size_mb: Size of the images in MiB
+    :type size_mb: int
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    """
+    def _command(client):
+        image = '{}/{}'.format(pool, client_name(client))
+        return 'rbd info {0} || rbd create --size {1} {0}'.format(
+            image, size_mb)
+
+    run_on_clients(clients, _command, model_name=model_name)
+
+
+def remove_rbd_images(clients, pool, model_name=None):
+    """Remove the images of client units.
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param pool: Name of the pool
+    :type pool: str
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    """
+    run_on_clients(
+        clients,
+        lambda client: 'rbd rm {}/{}'.format(pool, client_name(client)),
+        model_name=model_name)
+
+
+def run_rbd_bench(clients, pool, io_type, io_size, io_threads, io_total,
+                  io_pattern, timeout=600, model_name=None):
+    """Run rbd bench at once from client units, each on its image.
+
+    :param clients: Names of the units
+    :type clients: List[str]
+    :param pool: Name of the pool
+    :type pool: str
+    :param io_type: write or read
+    :type io_type: str
+    :param io_size: Bytes per operation
+    :type io_size: int
+    :param io_threads: Number of concurrent operations per client
+    :type io_threads: int
+    :param io_total: Total amount of data per client, e.g. 256M
+    :type io_total: str
+    :param io_pattern: seq or rand
+    :type io_pattern: str
+    :param timeout: Seconds to wait for each client
+    :type timeout: float
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :rtype: BenchResult
+    """
+    logging.info('Running rbd bench {} {} from {}'.format(
+        io_pattern, io_type, ', '.join(clients)))
+    outputs = run_on_clients(
+        clients,
+        lambda client: rbd_bench_command(
+            '{}/{}'.format(pool, client_name(client)), io_type, io_size,
+            io_threads, io_total, io_pattern),
+        timeout=timeout, model_name=model_name)
+    per_client = {client: parse_rbd_bench(output)
+                  for client, output in outputs.items()}
+    return BenchResult(
+        workload='rbd_{}_{}'.format(io_pattern, io_type),
+        params={'block_size': io_size, 'concurrency': io_threads,
+                'io_total': io_total, 'clients': len(clients)},
+        clients=per_client,
+        metrics=aggregate(list(per_client.values())))
+
+
+def get_rgw_endpoint(unit_name):
+    """Return the S3 endpoint of a ceph-radosgw unit.
+
+    :param unit_name: Name of the unit
+    :type unit_name: str
+    :rtype: str
+    """
+    address = network_utils.format_addr(zaza.model.run_on_unit(
+        unit_name, 'network-get public --bind-address')['Stdout'].strip())
+    try:
+        zaza.model.get_application('vault')
+        return 'https://{}:443'.format(address)
+    except KeyError:
+        return 'http://{}:80'.format(address)
+
+
+def get_rgw_keys(unit_name, user='zaza-bench'):
+    """Return the S3 keys of a radosgw user, created if missing.
+
+    :param unit_name: Name of a ceph-radosgw unit
+    :type unit_name: str
+    :param user: Name of the user
+    :type user: str
+    :returns: Access and secret keys
+    :rtype: Tuple[str, str]
+    """
+    hostname = zaza.model.run_on_unit(unit_name, 'hostname')['Stdout'].strip()
+    cmd = 'radosgw-admin --id=rgw.{} '.format(hostname)
+    result = zaza.model.run_on_unit(
+        unit_name, cmd + 'user info --uid={}'.format(user))
+    if str(result.get('Code', '0')) != '0':
+        result = zaza.model.run_on_unit(
+            unit_name, cmd + 'user create --uid={0} --display-name={0}'
+            .format(user))
+    keys = json.loads(result['Stdout'])['keys'][0]
+    return keys['access_key'], keys['secret_key']
+
+
+def run_s3_bench(endpoint, access_key, secret_key, bucket, object_size,
+                 object_count, concurrency):
+    """PUT then GET objects concurrently through the S3 API.
+
+    :param endpoint: URL of the S3 endpoint
+    :type endpoint: str
+    :param access_key: S3 access key
+    :type access_key: str
+    :param secret_key: S3 secret key
+    :type secret_key: str
+    :param bucket: Name of the bucket, created if missing
+    :type bucket: str
+    :param object_size: Bytes per object
+    :type object_size: int
+    :param object_count: Number of objects
+    :type object_count: int
+    :param concurrency: Number of concurrent requests
+    :type concurrency: int
+    :returns: Results of the PUTs and the GETs
+    :rtype: Tuple[BenchResult, BenchResult]
+    """
+    s3 = boto3.client(
+        's3', verify=False, endpoint_url=endpoint,
+        aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+    try:
+        s3.create_bucket(Bucket=bucket)
+    except s3.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    body = os.urandom(object_size)
+    keys = ['{}-{}'.format(object_size, i) for i in range(object_count)]
+
+    def _put(key):
+        start = time.monotonic()
+        s3.put_object(Bucket=bucket, Key=key, Body=body)
+        return time.monotonic() - start
+
+    def _get(key):
+        start = time.monotonic()
+        s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        return time.monotonic() - start
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        for name, operation in (('put', _put), ('get', _get)):
+            logging.info('Running S3 {} of {} objects of {} bytes'.format(
+                name, object_count, object_size))
+            start = time.monotonic()
+            latencies = list(executor.map(operation, keys))
+            seconds = time.monotonic() - start
+            metrics = {
+                'seconds': seconds,
+                'iops': object_count / seconds,
+                'bandwidth_mb_s': object_count * object_size / seconds /
+                2 ** 20,
+                'latency_avg_s': sum(latencies) / len(latencies),
+                'latency_max_s': max(latencies)}
+            results.append(BenchResult(
+                workload='rgw_s3_{}'.format(name),
+                params={'block_size': object_size,
+                        'concurrency': concurrency,
+                        'objects': object_count},
+                clients={endpoint: metrics},
+                metrics=metrics))
+    for key in keys:
+        s3.delete_object(Bucket=bucket, Key=key)
+    return tuple(results)
+
+
+def results_to_json(results):
+    """Return benchmark results as JSON serialisable dicts.
+
+    :param results: Results of benchmarks
+    :type results: List[BenchResult]
+    :rtype: List[Dict[str, Any]]
+    """
+    return [dict(result._asdict(), key=bench_key(result))
+            for result in results]
+
+
+def compare_results(results, baseline):
+    """Compare benchmark results with a baseline.
+
+    :param results: Results of benchmarks
+    :type results: List[BenchResult]
+    :param baseline: Baseline results, as returned by results_to_json()
+    :type baseline: List[Dict[str, Any]]
+    :returns: key, metric, baseline value, value and relative change of the
+              metrics in both, the change is positive when better
+    :rtype: List[Tuple[str, str, float, float, float]]
+    """
+    baseline = {entry['key']: entry['metrics'] for entry in baseline}
+    comparison = []
+    for result in results:
+        key = bench_key(result)
+        for metric, value in sorted(result.metrics.items()):
+            base = baseline.get(key, {}).get(metric)
+            if not base or metric == 'seconds':
+                continue
+            change = (value - base) / base
+            if benchmark.lower_is_better(metric):
+                change = -change
+            comparison.append((key, metric, base, value, change))
+    return comparison
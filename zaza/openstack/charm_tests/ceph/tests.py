@@ -187,7 +187,7 @@ class CephTest(test_utils.BaseCharmTest):
 
         # Check for presence of expected pools on each unit
         logging.debug('Expected pools: {}'.format(expected_pools))
-        pools = zaza_ceph.get_ceph_pools(unit_name)
+        pools = zaza_ceph.get_ceph_snapshot(unit_name).pools
         results.append(pools)
 
         for expected_pool in expected_pools:
@@ -1696,14 +1696,16 @@ class BlueStoreCompressionCharmOperation(test_utils.BaseCharmTest):
                               self.current_release >= self.bionic_rocky))
         self.mimic_or_newer = self.current_release >= self.bionic_rocky
 
-    def _assert_pools_properties(self, pools, pools_detail,
+    def _assert_pools_properties(self, pools, snapshot,
                                  expected_properties, log_func=logging.info):
         """Check properties on a set of pools.
 
+        Pools missing from the snapshot are skipped.
+
         :param pools: List of pool names to check.
         :type pools: List[str]
-        :param pools_detail: List of dictionaries with pool detail
-        :type pools_detail List[Dict[str,any]]
+        :param snapshot: Snapshot of the cluster holding the pool details
+        :type snapshot: zaza_ceph.CephClusterSnapshot
         :param expected_properties: Properties to check and their expected
                                     values.
         :type expected_properties: Dict[str,any]
@@ -1711,17 +1713,19 @@ class BlueStoreCompressionCharmOperation(test_utils.BaseCharmTest):
         :raises: AssertionError
         """
         for pool in pools:
-            for pd in pools_detail:
-                if pd['pool_name'] == pool:
-                    if 'options' in expected_properties:
-                        for k, v in expected_properties['options'].items():
-                            self.assertEqual(pd['options'][k], v)
-                            log_func("['options']['{}'] == {}".format(k, v))
-                    for k, v in expected_properties.items():
-                        if k == 'options':
-                            continue
-                        self.assertEqual(pd[k], v)
-                        log_func("{} == {}".format(k, v))
+            try:
+                pd = snapshot.pool_detail(pool)
+            except KeyError:
+                continue
+            if 'options' in expected_properties:
+                for k, v in expected_properties['options'].items():
+                    self.assertEqual(pd['options'][k], v)
+                    log_func("['options']['{}'] == {}".format(k, v))
+            for k, v in expected_properties.items():
+                if k == 'options':
+                    continue
+                self.assertEqual(pd[k], v)
+                log_func("{} == {}".format(k, v))
 
     def test_configure_compression(self):
         """Enable compression and validate properties flush through to pool."""
@@ -1748,14 +1752,13 @@ class BlueStoreCompressionCharmOperation(test_utils.BaseCharmTest):
                 if 'metadata' not in pool
             ]
 
-        ceph_pools_detail = zaza_ceph.get_ceph_pool_details(
-            model_name=self.model_name)
+        snapshot = zaza_ceph.get_ceph_snapshot(model_name=self.model_name)
 
-        logging.debug('BEFORE: {}'.format(ceph_pools_detail))
+        logging.debug('BEFORE: {}'.format(snapshot.pool_details))
         try:
             logging.info('Checking Ceph pool compression_mode prior to change')
             self._assert_pools_properties(
-                app_pools, ceph_pools_detail,
+                app_pools, snapshot,
                 {'options': {'compression_mode': 'none'}})
         except KeyError:
             logging.info('property does not exist on pool, which is OK.')
@@ -1778,14 +1781,13 @@ class BlueStoreCompressionCharmOperation(test_utils.BaseCharmTest):
         retry=tenacity.retry_if_exception_type(AssertionError)
     )
     def _check_pool_compression_mode(self, app_pools, mode):
-        ceph_pools_detail = zaza_ceph.get_ceph_pool_details(
-            model_name=self.model_name)
-        logging.debug('ceph_pools_details: %s', ceph_pools_detail)
+        snapshot = zaza_ceph.get_ceph_snapshot(model_name=self.model_name)
+        logging.debug('ceph_pools_details: %s', snapshot.pool_details)
         logging.debug(juju_utils.get_relation_from_unit(
             'ceph-mon', self.application_name, None,
             model_name=self.model_name))
         self._assert_pools_properties(
-            app_pools, ceph_pools_detail,
+            app_pools, snapshot,
             {'options': {'compression_mode': mode}})
 
     def test_invalid_compression_configuration(self):
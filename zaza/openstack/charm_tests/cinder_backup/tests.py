@@ -77,14 +77,15 @@ class CinderBackupTest(test_utils.OpenStackBaseTest):
         unit_name = zaza.model.get_lead_unit_name('ceph-mon')
         obj_count_samples = []
         pool_size_samples = []
-        pools = ceph_utils.get_ceph_pools(unit_name)
+        original_snapshot = ceph_utils.get_ceph_snapshot(
+            unit_name, model_name=self.model_name)
         expected_pool = 'cinder-ceph'
-        cinder_ceph_pool = pools[expected_pool]
+        cinder_ceph_pool = original_snapshot.pools[expected_pool]
 
         # Check ceph cinder pool object count, disk space usage and pool name
         logging.info('Checking ceph cinder pool original samples...')
-        pool_name, obj_count, kb_used = ceph_utils.get_ceph_pool_sample(
-            unit_name, cinder_ceph_pool)
+        pool_name, obj_count, kb_used = original_snapshot.pool_sample(
+            cinder_ceph_pool)
 
         obj_count_samples.append(obj_count)
         pool_size_samples.append(kb_used)
@@ -154,8 +155,12 @@ class CinderBackupTest(test_utils.OpenStackBaseTest):
         # Re-check ceph cinder pool object count and disk usage
         logging.info('Checking ceph cinder pool samples '
                      'after volume create...')
-        pool_name, obj_count, kb_used = ceph_utils.get_ceph_pool_sample(
-            unit_name, cinder_ceph_pool, self.model_name)
+        created_snapshot = ceph_utils.get_ceph_snapshot(
+            unit_name, model_name=self.model_name)
+        logging.info('Ceph changes after volume create: {}'.format(
+            original_snapshot.diff(created_snapshot)))
+        pool_name, obj_count, kb_used = created_snapshot.pool_sample(
+            cinder_ceph_pool)
 
         obj_count_samples.append(obj_count)
         pool_size_samples.append(kb_used)
@@ -193,8 +198,12 @@ class CinderBackupTest(test_utils.OpenStackBaseTest):
                         reraise=True, stop=tenacity.stop_after_attempt(10),
                         retry=tenacity.retry_if_exception_type(AssertionError))
         def _check_get_ceph_pool_sample(obj_count_samples, pool_size_samples):
-            pool_name, obj_count, kb_used = ceph_utils.get_ceph_pool_sample(
-                unit_name, cinder_ceph_pool, self.model_name)
+            deleted_snapshot = ceph_utils.get_ceph_snapshot(
+                unit_name, model_name=self.model_name)
+            logging.info('Ceph changes after volume delete: {}'.format(
+                created_snapshot.diff(deleted_snapshot)))
+            pool_name, obj_count, kb_used = deleted_snapshot.pool_sample(
+                cinder_ceph_pool)
 
             _obj_count_samples = copy.deepcopy(obj_count_samples)
             _pool_size_samples = copy.deepcopy(pool_size_samples)
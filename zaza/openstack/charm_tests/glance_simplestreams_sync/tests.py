@@ -20,6 +20,7 @@ import tenacity
 
 import zaza.model as zaza_model
 import zaza.openstack.charm_tests.test_utils as test_utils
+import zaza.openstack.utilities.file_assertions as file_assertions
 import zaza.openstack.utilities.openstack as openstack_utils
 
 
@@ -77,15 +78,11 @@ class GlanceSimpleStreamsSyncTest(test_utils.OpenStackBaseTest):
         expected_perms = '640'
 
         application = 'glance-simplestreams-sync'
-        for unit in zaza_model.get_units(application):
-            for file_path in file_paths:
-                cmd = 'stat -c %a {}'.format(file_path)
-                result = zaza_model.run_on_unit(unit.name, cmd, timeout=30)
-                # {'Code': '', 'Stderr': '', 'Stdout': '644\n'}
-                perms = result.get('Stdout', '').strip()
-                self.assertEqual(perms, expected_perms)
-                logging.debug(
-                    'Permissions on {}: {}'.format(file_path, perms))
+        file_assertions.assert_files(self, [
+            (unit.name, {'path': file_path, 'owner': None, 'group': None,
+                         'mode': expected_perms})
+            for unit in zaza_model.get_units(application)
+            for file_path in file_paths])
 
     def test_110_local_product_stream(self):
         """Verify that the local product stream is accessible and has data."""
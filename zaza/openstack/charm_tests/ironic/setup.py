@@ -181,4 +181,5 @@ def create_bm_flavors(nova_client=None):
                 vcpus=FLAVORS[flavor]['vcpus'],
                 disk=FLAVORS[flavor]['disk'],
                 flavorid=FLAVORS[flavor]['flavorid'])
+            openstack_utils.invalidate_flavor(flavor)
             bm_flavor.set_keys(properties)
@@ -27,7 +27,6 @@ import zaza.openstack.utilities.exceptions as zaza_exceptions
 import zaza.utilities.juju as juju_utils
 import zaza.openstack.utilities.openstack as openstack_utils
 import zaza.charm_lifecycle.utils as lifecycle_utils
-import zaza.openstack.charm_tests.test_utils as test_utils
 import zaza.openstack.charm_tests.tempest.tests as tempest_tests
 
 from zaza.openstack.charm_tests.keystone import (
@@ -463,16 +462,11 @@ class SecurityTests(BaseKeystoneTest):
             'validate-file-permissions',
         ]
 
-        logging.info('Running `security-checklist` action'
-                     ' on Keystone leader unit')
-        test_utils.audit_assertions(
-            zaza.model.run_action_on_leader(
-                'keystone',
-                'security-checklist',
-                action_params={}),
+        self.run_security_checklist(
             expected_passes,
             expected_failures,
-            expected_to_pass=True)
+            expected_to_pass=True,
+            application_names=['keystone'])
 
 
 class LdapTests(BaseKeystoneTest):
@@ -15,12 +15,14 @@
 """MySQL/Percona Cluster Testing."""
 
 import configparser
+import contextlib
 import json
 import logging
 import os
 import re
 import tempfile
 import tenacity
+import time
 import yaml
 
 import zaza.charm_lifecycle.utils as lifecycle_utils
@@ -29,13 +31,28 @@ import zaza.openstack.charm_tests.test_utils as test_utils
 import zaza.openstack.utilities.juju as juju_utils
 import zaza.openstack.utilities.openstack as openstack_utils
 import zaza.openstack.utilities.generic as generic_utils
+import zaza.openstack.utilities.mysql as mysql_utils
 
 
 PXC_SEEDED_FILE = "/var/lib/percona-xtradb-cluster/seeded"
 
 
 class MySQLBaseTest(test_utils.OpenStackBaseTest):
-    """Base for mysql charm tests."""
+    """Base for mysql charm tests.
+
+    The disruptive tests can run a background load through the cluster, to
+    measure how long writes are unavailable and the throughput before,
+    during and after the disruption. The load is enabled with tests_options,
+    e.g.::
+
+        tests_options:
+          zaza.openstack.charm_tests.mysql.tests.MySQLInnoDBClusterScaleTest:
+            load: true
+            # Defaults to port 3306 of the units of the application, use the
+            # mysql-router endpoints when they listen on a reachable address.
+            load_endpoints: ['10.5.0.20:3306', '10.5.0.21:3306']
+            load_settle: 10
+    """
 
     @classmethod
     def setUpClass(cls, application_name=None):
@@ -56,6 +73,90 @@ class MySQLBaseTest(test_utils.OpenStackBaseTest):
             self.application,
             "leader-get mysql.passwd")["Stdout"].strip()
 
+    @property
+    def cluster_probe(self):
+        """Return the probe of the cluster state, shared by the class.
+
+        :rtype: mysql_utils.MySQLClusterProbe
+        """
+        probe = type(self).__dict__.get('_cluster_probe')
+        if probe is None or probe.application_name != self.application:
+            probe = mysql_utils.MySQLClusterProbe(
+                application_name=self.application,
+                model_name=self.model_name)
+            type(self)._cluster_probe = probe
+        return probe
+
+    def get_sql_unit(self):
+        """Return the unit to run SQL as root on.
+
+        :returns: Unit name, None for the R/W primary of the cluster
+        :rtype: Optional[str]
+        """
+        return None
+
+    def get_cluster_state(self, refresh=False):
+        """Get the state of the cluster, probed from all units at once.
+
+        :param refresh: Probe again even if the cached state is recent
+        :type refresh: bool
+        :returns: State of the cluster
+        :rtype: mysql_utils.MySQLClusterState
+        """
+        return self.cluster_probe.get_state(refresh=refresh)
+
+    @contextlib.contextmanager
+    def mysql_load(self, name):
+        """Run a background load through the cluster, if enabled.
+
+        The load runs for load_settle seconds before the body of the block
+        and after it, which marks the 'during' and 'after' phases of the
+        disruption with mark(). Its report is logged and kept in the
+        load_reports of the class.
+
+        :param name: Name of the report
+        :type name: str
+        :returns: Load generator, started only if enabled
+        :rtype: Iterator[mysql_utils.MySQLLoadGenerator]
+        """
+        password = os.urandom(16).hex()
+        if not self.tests_options.get('load', False):
+            yield mysql_utils.MySQLLoadGenerator(
+                [], mysql_utils.LOAD_DATABASE, password)
+            return
+        endpoints = []
+        for endpoint in self.tests_options.get('load_endpoints', []):
+            host, port = endpoint.rsplit(':', 1)
+            endpoints.append((host, int(port)))
+        if not endpoints:
+            endpoints = [
+                (zaza.model.get_unit_public_address(unit), 3306)
+                for unit in zaza.model.get_units(self.application)]
+        load = mysql_utils.MySQLLoadGenerator(
+            endpoints, mysql_utils.LOAD_DATABASE, password)
+        settle = self.tests_options.get('load_settle', 10)
+        self.cluster_probe.run_sql(
+            mysql_utils.load_user_sql(mysql_utils.LOAD_DATABASE, password),
+            unit_name=self.get_sql_unit())
+        load.setup()
+        load.start()
+        try:
+            time.sleep(settle)
+            yield load
+            time.sleep(settle)
+        finally:
+            report = load.stop()
+            logging.info('MySQL load report of {}: {}'.format(
+                name, json.dumps(report, indent=2)))
+            type(self).load_reports = dict(
+                getattr(type(self), 'load_reports', {}), **{name: report})
+        metrics = {'failover_time': report['failover_time']}
+        for phase, stats in report['phases'].items():
+            metrics['writes_per_second_{}'.format(phase)] = (
+                stats['writes_per_second'])
+        self.record_benchmark('mysql_load/{}'.format(name), metrics)
+        self.assert_no_benchmark_regressions()
+
     def get_cluster_status(self):
         """Get cluster status.
 
@@ -65,18 +166,10 @@ class MySQLBaseTest(test_utils.OpenStackBaseTest):
         :returns: Dictionary of cluster status
         :rtype: dict
         """
-        logging.info("Running cluster-status action")
-        action = zaza.model.run_action_on_leader(
-            self.application,
-            "cluster-status",
-            action_params={})
-        assert action.data.get("results") is not None, (
-            "Cluster status action failed: No results: {}"
-            .format(action.data))
-        assert action.data["results"].get("cluster-status") is not None, (
-            "Cluster status action failed: No cluster-status: {}"
-            .format(action.data))
-        return json.loads(action.data["results"]["cluster-status"])
+        logging.info("Getting cluster status")
+        cluster_status = self.get_cluster_state().cluster_status
+        assert cluster_status is not None, "Cluster status action failed"
+        return cluster_status
 
     def get_rw_primary_node(self):
         """Get RW primary node.
@@ -86,14 +179,9 @@ class MySQLBaseTest(test_utils.OpenStackBaseTest):
         :returns: Unit object of primary node
         :rtype: Union[Unit, None]
         """
-        _status = self.get_cluster_status()
-        _primary_ip = _status['groupInformationSourceMember']
-        if ":" in _primary_ip:
-            _primary_ip = _primary_ip.split(':')[0]
-        units = zaza.model.get_units(self.application_name)
-        for unit in units:
-            if _primary_ip in zaza.model.get_unit_public_address(unit):
-                return unit
+        primary = self.get_cluster_state().rw_primary()
+        if primary:
+            return zaza.model.get_unit_from_name(primary)
 
     def get_blocked_mysql_routers(self):
         """Get blocked mysql routers.
@@ -110,24 +198,7 @@ class MySQLBaseTest(test_utils.OpenStackBaseTest):
                 mysql_router_units.append(unit.entity_id)
         self.run_update_status_hooks(mysql_router_units)
 
-        # Get up to date status
-        status = zaza.model.get_status().applications
-        blocked_mysql_routers = []
-        # Check if the units are blocked
-        for application in self.get_applications_with_substring_in_name(
-                "mysql-router"):
-            # Subordinate dance with primary
-            # There is no satus[applicatoin]["units"] for subordinates
-            _subordinate_to = status[application].subordinate_to[0]
-            for appunit in status[_subordinate_to].units:
-                for subunit in (
-                        status[_subordinate_to].
-                        units[appunit].subordinates.keys()):
-                    if "blocked" in (
-                            status[_subordinate_to].units[appunit].
-                            subordinates[subunit].workload_status.status):
-                        blocked_mysql_routers.append(subunit)
-        return blocked_mysql_routers
+        return self.get_cluster_state(refresh=True).blocked_routers()
 
     def restart_blocked_mysql_routers(self):
         """Restart blocked mysql routers.
@@ -152,25 +223,71 @@ class MySQLCommonTests(MySQLBaseTest):
     def test_110_mysqldump(self):
         """Backup mysql.
 
-        Run the mysqldump action.
+        Run the mysqldump action on several databases concurrently, seeded
+        with a known dataset, validate the dumps and report their
+        throughput. The dataset is configured with tests_options, e.g.::
+
+            tests_options:
+              zaza.openstack.charm_tests.mysql.tests.MySQLInnoDBClusterTests:
+                dump_databases: 3
+                dump_rows: 10000
         """
         _db = "keystone"
-        _file_key = "mysqldump-file"
+        dump_rows = self.tests_options.get('dump_rows', 10000)
+        seeded = ['zaza_dump_{}'.format(i) for i in range(
+            self.tests_options.get('dump_databases', 3))]
+        units = sorted(u.entity_id
+                       for u in zaza.model.get_units(self.application))
+        sql_unit = self.get_sql_unit()
+        logging.info("Seed {} databases with {} rows".format(
+            len(seeded), dump_rows))
+        for database in seeded:
+            self.cluster_probe.run_sql(
+                mysql_utils.seed_sql(database, dump_rows), unit_name=sql_unit)
+            self.addCleanup(
+                self.cluster_probe.run_sql,
+                'DROP DATABASE IF EXISTS {};'.format(database),
+                unit_name=sql_unit)
+        # Dumps run on every unit, which must all have applied the seed
+        self.cluster_probe.wait_for_rows(seeded, dump_rows, unit_names=units)
+
         logging.info("Execute mysqldump action")
         # Need to change strict mode to be able to dump database
         if self.application_name == "percona-cluster":
-            action = zaza.model.run_action_on_leader(
-                self.application_name,
-                "set-pxc-strict-mode",
-                action_params={"mode": "MASTER"})
-
-        action = zaza.model.run_action_on_leader(
-            self.application,
-            "mysqldump",
-            action_params={"databases": _db})
-        _results = action.data["results"]
-        assert _db in _results[_file_key], (
-            "Mysqldump action failed: {}".format(action.data))
+            for unit in units:
+                zaza.model.run_action(
+                    unit,
+                    "set-pxc-strict-mode",
+                    action_params={"mode": "MASTER"})
+
+        results = mysql_utils.benchmark_mysqldump(
+            units, [_db] + seeded, model_name=self.model_name)
+        for result in results:
+            logging.info(
+                "mysqldump of {} on {}: {:.1f} MB in {:.1f}s, {:.2f} MB/s, "
+                "sha256 {}".format(
+                    result.database, result.unit, result.size / 1e6,
+                    result.seconds, mysql_utils.dump_throughput(result),
+                    result.sha256))
+            assert result.database in result.file, (
+                "Mysqldump action failed: {}".format(result))
+        expected = mysql_utils.seed_checksum(dump_rows)
+        for result in results[1:]:
+            self.assertEqual(result.rows, dump_rows)
+            self.assertEqual(result.rows_sha256, expected,
+                             "Dump of {} differs from the seeded dataset"
+                             .format(result.database))
+        type(self).dump_results = results
+        if seeded:
+            # The dumps run at once, the slowest one bounds their throughput
+            seconds = max(r.seconds for r in results[1:])
+            self.record_benchmark(
+                'mysqldump/databases={}/rows={}'.format(
+                    len(seeded), dump_rows),
+                {'throughput_mb_s': (
+                    sum(r.size for r in results[1:]) / seconds / 1e6),
+                 'seconds': seconds})
+            self.assert_no_benchmark_regressions()
         logging.info("Passed mysqldump action test.")
 
     def test_910_restart_on_config_change(self):
@@ -228,6 +345,19 @@ class PerconaClusterBaseTest(MySQLBaseTest):
         # Config file affected by juju set config change
         cls.conf_file = "/etc/mysql/percona-xtradb-cluster.conf.d/mysqld.cnf"
 
+    def get_sql_unit(self):
+        """Return the unit to run SQL as root on.
+
+        Every node of a Galera cluster accepts writes, while the R/W primary
+        the probe looks for only exists in group replication, so the leader
+        is used.
+
+        :returns: Unit name
+        :rtype: str
+        """
+        return zaza.model.get_lead_unit_name(
+            self.application, model_name=self.model_name)
+
     def get_wsrep_value(self, attr):
         """Get wsrrep value from the DB.
 
@@ -383,6 +513,23 @@ class PerconaClusterColdStartTest(PerconaClusterBaseTest):
         # Avoid hitting an update-status hook
         logging.info("Wait till model is idle ...")
         zaza.model.block_until_all_units_idle()
+        with self.mysql_load('cold_start') as load:
+            load.mark('during')
+            self._cold_start(_machines)
+            load.mark('after')
+        logging.info("Wait for application states ...")
+        for unit in zaza.model.get_units(self.application):
+            zaza.model.run_on_unit(unit.entity_id, "hooks/update-status")
+        test_config = lifecycle_utils.get_charm_config(fatal=False)
+        zaza.model.wait_for_application_states(
+            states=test_config.get("target_deploy_status", {}))
+
+    def _cold_start(self, _machines):
+        """Stop and start the machines, then reboot the cluster.
+
+        :param _machines: UUIDs of the machines of the application
+        :type _machines: List[str]
+        """
         logging.info("Stopping instances: {}".format(_machines))
         for uuid in _machines:
             self.nova_client.servers.stop(uuid)
@@ -452,12 +599,6 @@ class PerconaClusterColdStartTest(PerconaClusterBaseTest):
             self.application,
             "notify-bootstrapped",
             action_params={})
-        logging.info("Wait for application states ...")
-        for unit in zaza.model.get_units(self.application):
-            zaza.model.run_on_unit(unit.entity_id, "hooks/update-status")
-        test_config = lifecycle_utils.get_charm_config(fatal=False)
-        zaza.model.wait_for_application_states(
-            states=test_config.get("target_deploy_status", {}))
 
 
 @tenacity.retry(
@@ -714,6 +855,23 @@ class MySQLInnoDBClusterColdStartTest(MySQLBaseTest):
         # Avoid hitting an update-status hook
         logging.info("Wait till model is idle ...")
         zaza.model.block_until_all_units_idle()
+        with self.mysql_load('cold_start') as load:
+            load.mark('during')
+            self._cold_start(_machines)
+            load.mark('after')
+        logging.info("Wait for application states ...")
+        for unit in zaza.model.get_units(self.application):
+            zaza.model.run_on_unit(unit.entity_id, "hooks/update-status")
+        test_config = lifecycle_utils.get_charm_config(fatal=False)
+        zaza.model.wait_for_application_states(
+            states=test_config.get("target_deploy_status", {}))
+
+    def _cold_start(self, _machines):
+        """Stop and start the machines, then reboot the cluster.
+
+        :param _machines: UUIDs of the machines of the application
+        :type _machines: List[str]
+        """
         logging.info("Stopping instances: {}".format(_machines))
         for uuid in _machines:
             self.nova_client.servers.stop(uuid)
@@ -783,12 +941,8 @@ class MySQLInnoDBClusterColdStartTest(MySQLBaseTest):
         assert "Success" in action.data["results"]["outcome"], (
             "Reboot cluster from complete outage action failed: {}"
             .format(action.data))
-        logging.info("Wait for application states ...")
-        for unit in zaza.model.get_units(self.application):
-            zaza.model.run_on_unit(unit.entity_id, "hooks/update-status")
-        test_config = lifecycle_utils.get_charm_config(fatal=False)
-        zaza.model.wait_for_application_states(
-            states=test_config.get("target_deploy_status", {}))
+        logging.info("Wait for a R/W primary ...")
+        self.cluster_probe.wait_for(mysql_utils.has_rw_primary)
 
 
 class MySQL8MigrationTests(MySQLBaseTest):
@@ -918,7 +1072,6 @@ class MySQLInnoDBClusterScaleTest(MySQLBaseTest):
         """Run class setup for running mysql-innodb-cluster scale tests."""
         super().setUpClass()
         cls.application = "mysql-innodb-cluster"
-        cls.test_config = lifecycle_utils.get_charm_config(fatal=False)
         cls.states = cls.test_config.get("target_deploy_status", {})
 
     def test_800_remove_leader(self):
@@ -937,14 +1090,17 @@ class MySQLInnoDBClusterScaleTest(MySQLBaseTest):
         # update-status hooks
         logging.info("Wait till model is idle ...")
         zaza.model.block_until_all_units_idle()
-        zaza.model.destroy_unit(self.application_name, leader)
+        with self.mysql_load('remove_leader') as load:
+            load.mark('during')
+            zaza.model.destroy_unit(self.application_name, leader)
 
-        logging.info("Wait until all only 2 units ...")
-        zaza.model.block_until_unit_count(self.application, 2)
+            logging.info("Wait until all only 2 units ...")
+            zaza.model.block_until_unit_count(self.application, 2)
 
-        logging.info("Wait until all units are cluster incomplete ...")
-        zaza.model.block_until_wl_status_info_starts_with(
-            self.application, "'cluster' incomplete")
+            logging.info("Wait until all units are cluster incomplete ...")
+            zaza.model.block_until_wl_status_info_starts_with(
+                self.application, "'cluster' incomplete")
+            load.mark('after')
 
         # Show status
         logging.info(self.get_cluster_status())
@@ -980,6 +1136,9 @@ class MySQLInnoDBClusterScaleTest(MySQLBaseTest):
         logging.info("Wait for application states ...")
         zaza.model.wait_for_application_states(states=self.states)
 
+        logging.info("Wait until 3 members are ONLINE ...")
+        self.cluster_probe.wait_for(mysql_utils.members_online(3))
+
     def test_802_add_unit(self):
         """Add another mysql-innodb-cluster node.
 
@@ -998,6 +1157,9 @@ class MySQLInnoDBClusterScaleTest(MySQLBaseTest):
         logging.info("Wait for application states ...")
         zaza.model.wait_for_application_states(states=self.states)
 
+        logging.info("Wait until 4 members are ONLINE ...")
+        self.cluster_probe.wait_for(mysql_utils.members_online(4))
+
     def test_803_remove_fourth(self):
         """Remove mysql-innodb-cluster node.
 
@@ -1052,57 +1214,64 @@ class MySQLInnoDBClusterPartitionTest(MySQLBaseTest):
         logging.info("Wait till model is idle ...")
         zaza.model.block_until_all_units_idle()
 
-        # Block all traffic across mysql instances: 0<-1, 1<-2 and 2<-0
-        mysql_units = [unit for unit in zaza.model.get_units(self.application)]
-        no_of_units = len(mysql_units)
-        for index, unit in enumerate(mysql_units):
-            next_unit = mysql_units[(index+1) % no_of_units]
-            ip_address = zaza.model.get_unit_public_address(next_unit)
-            cmd = "sudo iptables -A INPUT -s {} -j DROP".format(ip_address)
-            zaza.model.async_run_on_unit(unit, cmd)
+        with self.mysql_load('force_quorum') as load:
+            load.mark('during')
+            # Block all traffic across mysql instances: 0<-1, 1<-2 and 2<-0
+            mysql_units = [
+                unit for unit in zaza.model.get_units(self.application)]
+            no_of_units = len(mysql_units)
+            for index, unit in enumerate(mysql_units):
+                next_unit = mysql_units[(index+1) % no_of_units]
+                ip_address = zaza.model.get_unit_public_address(next_unit)
+                cmd = "sudo iptables -A INPUT -s {} -j DROP".format(
+                    ip_address)
+                zaza.model.async_run_on_unit(unit, cmd)
+
+            logging.info(
+                "Wait till all {} units are in state 'blocked' ..."
+                .format(self.application))
+            for unit in zaza.model.get_units(self.application):
+                zaza.model.block_until_unit_wl_status(
+                    unit.entity_id,
+                    'blocked',
+                    negate_match=True)
 
-        logging.info(
-            "Wait till all {} units are in state 'blocked' ..."
-            .format(self.application))
-        for unit in zaza.model.get_units(self.application):
-            zaza.model.block_until_unit_wl_status(
-                unit.entity_id,
-                'blocked',
-                negate_match=True)
-
-        logging.info("Wait till model is idle ...")
-        zaza.model.block_until_all_units_idle()
-
-        logging.info("Execute force-quorum-using-partition-of action ...")
+            logging.info("Wait till model is idle ...")
+            zaza.model.block_until_all_units_idle()
 
-        # Select "quorum leader" unit
-        leader_unit = mysql_units[0]
-        action = zaza.model.run_action(
-            leader_unit.entity_id,
-            "force-quorum-using-partition-of",
-            action_params={
-                "address": zaza.model.get_unit_public_address(leader_unit),
-                'i-really-mean-it': True
-            })
+            logging.info(
+                "Execute force-quorum-using-partition-of action ...")
 
-        assert action.data.get("results") is not None, (
-            "Force quorum using partition of action failed: {}"
-            .format(action.data))
-        logging.debug(
-            "Results from running 'force-quorum' command ...\n{}".format(
-                action.data))
+            # Select "quorum leader" unit
+            leader_unit = mysql_units[0]
+            action = zaza.model.run_action(
+                leader_unit.entity_id,
+                "force-quorum-using-partition-of",
+                action_params={
+                    "address": zaza.model.get_unit_public_address(
+                        leader_unit),
+                    'i-really-mean-it': True
+                })
+
+            assert action.data.get("results") is not None, (
+                "Force quorum using partition of action failed: {}"
+                .format(action.data))
+            logging.debug(
+                "Results from running 'force-quorum' command ...\n{}"
+                .format(action.data))
 
-        logging.info("Wait till model is idle ...")
-        try:
-            zaza.model.block_until_all_units_idle()
-        except zaza.model.UnitError:
-            self.resolve_update_status_errors()
-            zaza.model.block_until_all_units_idle()
+            logging.info("Wait till model is idle ...")
+            try:
+                zaza.model.block_until_all_units_idle()
+            except zaza.model.UnitError:
+                self.resolve_update_status_errors()
+                zaza.model.block_until_all_units_idle()
 
-        # Unblock all traffic across mysql instances
-        for unit in zaza.model.get_units(self.application):
-            cmd = "sudo iptables -F"
-            zaza.model.async_run_on_unit(unit, cmd)
+            # Unblock all traffic across mysql instances
+            for unit in zaza.model.get_units(self.application):
+                cmd = "sudo iptables -F"
+                zaza.model.async_run_on_unit(unit, cmd)
+            load.mark('after')
 
         logging.info("Wait for application states ...")
         for unit in zaza.model.get_units(self.application):
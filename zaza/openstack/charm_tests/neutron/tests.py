@@ -431,10 +431,12 @@ class NeutronCreateNetworkTest(test_utils.OpenStackBaseTest):
         logging.info('Creating neutron network...')
         network = {'name': self._TEST_NET_NAME}
         self.neutron_client.create_network({'network': network})
+        openstack_utils.invalidate_network(self._TEST_NET_NAME)
 
     def _delete_test_network(self, net_id):
         logging.info('Deleting neutron network...')
         self.neutron_client.delete_network(net_id)
+        openstack_utils.invalidate_network()
 
     def _assert_test_network_exists_and_return_id(self):
         logging.debug('Confirming new neutron network...')
@@ -544,19 +546,10 @@ class SecurityTest(test_utils.OpenStackBaseTest):
 
             expected_to_pass = False
 
-        for unit in zaza.model.get_units(self.application_name,
-                                         model_name=self.model_name):
-            logging.info('Running `security-checklist` action'
-                         ' on  unit {}'.format(unit.entity_id))
-            test_utils.audit_assertions(
-                zaza.model.run_action(
-                    unit.entity_id,
-                    'security-checklist',
-                    model_name=self.model_name,
-                    action_params={}),
-                expected_passes,
-                expected_failures,
-                expected_to_pass=expected_to_pass)
+        self.run_security_checklist(
+            expected_passes,
+            expected_failures,
+            expected_to_pass=expected_to_pass)
 
 
 class NeutronOpenvSwitchTest(NeutronPluginApiSharedTests):
@@ -663,17 +656,15 @@ class NeutronOpenvSwitchTest(NeutronPluginApiSharedTests):
         else:
             conf_file = "/etc/neutron/plugins/ml2/ml2_conf.ini"
 
-        with self.config_change(
-                {'neutron-security-groups': False},
-                {'neutron-security-groups': True},
-                application_name='neutron-api'):
-            with self.config_change(
-                    {'disable-security-groups': False},
-                    {'disable-security-groups': True}):
-                zaza.model.block_until_oslo_config_entries_match(
-                    self.application_name,
-                    conf_file,
-                    {'securitygroup': {'enable_security_group': ['False']}})
+        with self.config_changes({
+                'neutron-api': ({'neutron-security-groups': False},
+                                {'neutron-security-groups': True}),
+                self.application_name: ({'disable-security-groups': False},
+                                        {'disable-security-groups': True})}):
+            zaza.model.block_until_oslo_config_entries_match(
+                self.application_name,
+                conf_file,
+                {'securitygroup': {'enable_security_group': ['False']}})
 
     def test_401_restart_on_config_change(self):
         """Verify that the specified services are restarted.
@@ -36,6 +36,7 @@ def overlay_network():
     resp = neutron_client.create_network(
         {'network': {'name': 'zaza-neutron-openvswitch-network'}})
     network = resp['network']
+    openstack_utils.invalidate_network(network['name'])
     logging.info('created network {}'.format(pprint.pformat(network)))
 
     # make rfc4193 Unique Local IPv6 Unicast Addresses from network UUID
@@ -66,20 +67,20 @@ def overlay_network():
     logging.info('created subnets {}'
                  .format(pprint.pformat(resp['subnets'])))
 
-    for unit in zaza.model.get_units('neutron-openvswitch'):
+    units = zaza.model.get_units('neutron-openvswitch')
+    hostnames = []
+    for unit in units:
         result = zaza.model.run_on_unit(unit.entity_id, 'hostname')
         hostname = result['Stdout'].rstrip()
         logging.info('hostname: "{}"'.format(hostname))
-        resp = neutron_client.create_port(
-            {
-                'port': {
-                    'binding:host_id': hostname,
-                    'device_owner': 'Zaza:neutron-openvswitch-test',
-                    'name': hostname,
-                    'network_id': network['id'],
-                },
-            })
-        port = resp['port']
+        hostnames.append(hostname)
+    ports = openstack_utils.create_ports(
+        neutron_client, hostnames, network_id=network['id'],
+        attributes={'device_owner': 'Zaza:neutron-openvswitch-test'},
+        port_attributes={hostname: {'binding:host_id': hostname}
+                         for hostname in hostnames})
+
+    for unit, port in zip(units, ports):
         logging.info('created port {}'
                      .format(pprint.pformat(port)))
         result = zaza.model.run_on_unit(
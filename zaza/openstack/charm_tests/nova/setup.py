@@ -54,6 +54,7 @@ def create_flavors(nova_client=None):
                 vcpus=nova_utils.FLAVORS[flavor]['vcpus'],
                 disk=nova_utils.FLAVORS[flavor]['disk'],
                 flavorid=nova_utils.FLAVORS[flavor]['flavorid'])
+            openstack_utils.invalidate_flavor(flavor)
             if 'extra-specs' in nova_utils.FLAVORS[flavor]:
                 nova_flavor.set_keys(nova_utils.FLAVORS[flavor]['extra-specs'])
 
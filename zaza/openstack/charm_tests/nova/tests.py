@@ -797,6 +797,7 @@ class NovaComputeNvidiaVgpuWithHardwareTest(test_utils.OpenStackBaseTest):
             self.keystone_session)
         nova_client.flavors.create(name=flavor_name, ram=2048, vcpus=1,
                                    disk=20, flavorid=self.flavor_id)
+        openstack_utils.invalidate_flavor(flavor_name)
 
     def _cleanup_vgpu_flavor(self):
         logging.info('Cleaning up created flavor...')
@@ -807,6 +808,7 @@ class NovaComputeNvidiaVgpuWithHardwareTest(test_utils.OpenStackBaseTest):
         except novaclient.exceptions.NotFound:
             return
         nova_client.flavors.delete(flavor)
+        openstack_utils.invalidate_flavor(flavor.name)
 
     def _assign_vgpu_trait_to_flavor(self, flavor_name):
         logging.info('Assigning trait {} to flavor {} ...'.format(
@@ -1214,19 +1216,10 @@ class SecurityTests(test_utils.OpenStackBaseTest):
         else:
             expected_failures.extend(tls_checks)
 
-        for unit in zaza.model.get_units(self.application_name,
-                                         model_name=self.model_name):
-            logging.info('Running `security-checklist` action'
-                         ' on  unit {}'.format(unit.entity_id))
-            test_utils.audit_assertions(
-                zaza.model.run_action(
-                    unit.entity_id,
-                    'security-checklist',
-                    model_name=self.model_name,
-                    action_params={}),
-                expected_passes,
-                expected_failures,
-                expected_to_pass=not len(expected_failures))
+        self.run_security_checklist(
+            expected_passes,
+            expected_failures,
+            expected_to_pass=not len(expected_failures))
 
 
 class NovaTempestTestK8S(tempest_tests.TempestTestScaleK8SBase):
@@ -200,6 +200,7 @@ def centralized_fip_network():
     resp = neutron_client.create_network(
         {'network': {'name': 'private_lb_fip_network'}})
     network = resp['network']
+    openstack.invalidate_network(network['name'])
     resp = neutron_client.create_subnet(
         {
             'subnets': [
@@ -499,10 +499,15 @@ class LBAASv2Test(test_utils.OpenStackBaseTest):
             vip_subnet_id = resp['networks'][0]['subnets'][0]
         else:
             vip_subnet_id = subnet_id
-        for provider in self.get_lb_providers(self.octavia_client).keys():
-            if ensure_volume_backed and provider != 'amphora':
-                continue
-
+        providers = [
+            provider
+            for provider in self.get_lb_providers(self.octavia_client).keys()
+            if not ensure_volume_backed or provider == 'amphora']
+        floating_ip_pool = openstack_utils.FloatingIPPool(
+            self.neutron_client, openstack_utils.EXT_NET)
+        self.fips.extend(
+            fip['id'] for fip in floating_ip_pool.fill(len(providers)))
+        for provider in providers:
             logging.info('Creating loadbalancer with provider {}'
                          .format(provider))
             final_exc = None
@@ -525,10 +530,7 @@ class LBAASv2Test(test_utils.OpenStackBaseTest):
             else:
                 raise final_exc
 
-            lb_fp = openstack_utils.create_floating_ip(
-                self.neutron_client,
-                openstack_utils.EXT_NET,
-                port={'id': lb['vip_port_id']})
+            lb_fp = floating_ip_pool.assign({'id': lb['vip_port_id']})
 
             snippet = 'This is the default welcome page'
             assert snippet in self._get_payload(lb_fp['floating_ip_address'])
@@ -601,14 +601,7 @@ class SecurityTests(test_utils.OpenStackBaseTest,
             'validate-file-permissions'
         ]
 
-        logging.info('Running `security-checklist` action'
-                     ' on {} leader'.format(self.application_name))
-        test_utils.audit_assertions(
-            zaza_model.run_action_on_leader(
-                self.application_name,
-                'security-checklist',
-                model_name=self.model_name,
-                action_params={}),
+        self.run_security_checklist(
             expected_passes,
             expected_failures,
             expected_to_pass=False)
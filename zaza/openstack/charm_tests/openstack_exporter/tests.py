@@ -17,7 +17,6 @@
 """Encapsulate Openstack Exporter testing."""
 
 import requests
-import zaza.charm_lifecycle.utils as lifecycle_utils
 import zaza.model
 import zaza.openstack.charm_tests.test_utils as test_utils
 
@@ -29,7 +28,7 @@ class OpenstackExporterTest(test_utils.OpenStackBaseTest):
     def setUpClass(cls):
         """Run class setup for running hacluster tests."""
         cls.model_name = zaza.model.get_juju_model()
-        cls.test_config = lifecycle_utils.get_charm_config(fatal=False)
+        cls.test_config = test_utils.get_test_config()
 
     @staticmethod
     def get_internal_ips(application, model_name):
@@ -63,47 +63,50 @@ class RmqTests(test_utils.OpenStackBaseTest):
                                                   ssl=ssl,
                                                   port=port)
 
-    def _search_for_message(self, amqp_msg, check_unit, ssl, port,
-                            amqp_msg_counter):
-        """Search for message in message queue.
+    def _search_for_messages(self, pool, amqp_msgs, check_unit, ssl, port):
+        """Search for messages in message queue.
 
-        WARNING: This will consume messages until it finds the target message.
+        WARNING: This will consume messages until it finds the target messages.
 
-        :param amqp_msg: Message to search for
-        :type amqp_msg: string
+        :param pool: Connections to consume over
+        :type pool: rmq_utils.AmqpConnectionPool
+        :param amqp_msgs: Messages to search for
+        :type amqp_msgs: List[str]
         :param check_unit: Unit to retrieve messages from
         :type check_unit: juju.unit.Unit
         :param ssl: Whether to use SSL when connecting to rabbit
         :type ssl: bool
         :param port: Port to use when connecting to rabbit
         :type port: Union[int, None]
-        :param amqp_msg_counter: Number in test sequence of this message.
-        :type amqp_msg: int
         :raises: RmqNoMessageException
         """
-        for i in range(100):
-            amqp_msg_rcvd = self._retry_get_amqp_message(
-                check_unit,
-                ssl=ssl,
-                port=port)
-            if amqp_msg == amqp_msg_rcvd:
-                logging.info(
-                    'Message {} received OK.'.format(amqp_msg_counter))
-                break
-            else:
-                logging.info('Expected: {}'.format(amqp_msg))
-                logging.info('Actual:   {}'.format(amqp_msg_rcvd))
-        else:
-            msg = 'Message {} not found.'.format(amqp_msg_counter)
-            raise RmqNoMessageException(msg)
+        missing = set(amqp_msgs)
+        # Allow for as many unexpected messages as expected ones, left over
+        # from earlier tests.
+        for attempt in range(2):
+            for amqp_msg_rcvd in pool.consume(check_unit, 2 * len(missing),
+                                              ssl=ssl, port=port):
+                if amqp_msg_rcvd in missing:
+                    missing.remove(amqp_msg_rcvd)
+                else:
+                    logging.info('Unexpected: {}'.format(amqp_msg_rcvd))
+            if not missing:
+                logging.info('{} messages received OK.'.format(
+                    len(amqp_msgs)))
+                return
+        raise RmqNoMessageException(
+            '{} of {} messages not found, e.g. {}'.format(
+                len(missing), len(amqp_msgs), sorted(missing)[0]))
 
     def _test_rmq_amqp_messages_all_units(self, units,
-                                          ssl=False, port=None):
+                                          ssl=False, port=None,
+                                          batch_size=20):
         """Reusable test to send/check amqp messages to every listed rmq unit.
 
         Reusable test to send amqp messages to every listed rmq
         unit. Checks every listed rmq unit for messages.
         :param units: list of units
+        :param batch_size: number of messages sent to each pair of units
         :returns: None if successful.  Raise on error.
 
         """
@@ -122,53 +125,52 @@ class RmqTests(test_utils.OpenStackBaseTest):
 
         amqp_msg_counter = 1
         host_names = generic_utils.get_unit_hostnames(units)
-
-        for dest_unit in units:
-            dest_unit_name = dest_unit.entity_id
-            dest_unit_host = zaza.model.get_unit_public_address(dest_unit)
-            dest_unit_host_name = host_names[dest_unit_name]
-
-            for check_unit in units:
-                check_unit_name = check_unit.entity_id
-                if dest_unit_name == check_unit_name:
-                    logging.info("Skipping check for this unit to itself.")
-                    continue
-                check_unit_host = zaza.model.get_unit_public_address(
-                    check_unit)
-                check_unit_host_name = host_names[check_unit_name]
-
-                amqp_msg_stamp = self._get_uuid_epoch_stamp()
-                amqp_msg = ('Message {}@{} {}'.format(amqp_msg_counter,
-                                                      dest_unit_host,
-                                                      amqp_msg_stamp)).upper()
-                # Publish amqp message
-                logging.info('Publish message to: {} '
-                             '({} {})'.format(dest_unit_host,
-                                              dest_unit_name,
-                                              dest_unit_host_name))
-
-                rmq_utils.publish_amqp_message_by_unit(dest_unit,
-                                                       amqp_msg, ssl=ssl,
-                                                       port=port)
-
-                # Get amqp message
-                logging.info('Get messages from:   {} '
-                             '({} {})'.format(check_unit_host,
-                                              check_unit_name,
-                                              check_unit_host_name))
-
-                try:
-                    self._search_for_message(
-                        amqp_msg,
-                        check_unit,
-                        ssl,
-                        port,
-                        amqp_msg_counter)
-                except RmqNoMessageException:
-                    msg = 'Failed to retrieve message {}.'.format(
-                        amqp_msg_counter)
-                    raise Exception(msg)
-                amqp_msg_counter += 1
+        hosts = {u.entity_id: zaza.model.get_unit_public_address(u)
+                 for u in units}
+
+        # The ssl configuration above restarts rabbitmq, so connect after it
+        # and reuse the connections for every check.
+        with rmq_utils.AmqpConnectionPool() as pool:
+            for dest_unit in units:
+                dest_unit_name = dest_unit.entity_id
+                dest_unit_host = hosts[dest_unit_name]
+                dest_unit_host_name = host_names[dest_unit_name]
+
+                for check_unit in units:
+                    check_unit_name = check_unit.entity_id
+                    if dest_unit_name == check_unit_name:
+                        logging.info("Skipping check for this unit to itself.")
+                        continue
+                    check_unit_host = hosts[check_unit_name]
+                    check_unit_host_name = host_names[check_unit_name]
+
+                    amqp_msg_stamp = self._get_uuid_epoch_stamp()
+                    amqp_msgs = [
+                        ('Message {}.{}@{} {}'.format(
+                            amqp_msg_counter, i, dest_unit_host,
+                            amqp_msg_stamp)).upper()
+                        for i in range(batch_size)]
+                    # Publish amqp messages
+                    logging.info('Publish messages to: {} '
+                                 '({} {})'.format(dest_unit_host,
+                                                  dest_unit_name,
+                                                  dest_unit_host_name))
+                    pool.publish(dest_unit, amqp_msgs, ssl=ssl, port=port)
+
+                    # Get amqp messages
+                    logging.info('Get messages from:   {} '
+                                 '({} {})'.format(check_unit_host,
+                                                  check_unit_name,
+                                                  check_unit_host_name))
+
+                    try:
+                        self._search_for_messages(
+                            pool, amqp_msgs, check_unit, ssl, port)
+                    except RmqNoMessageException as e:
+                        msg = 'Failed to retrieve messages {}: {}'.format(
+                            amqp_msg_counter, e)
+                        raise Exception(msg)
+                    amqp_msg_counter += 1
 
         # Delete the test user
         rmq_utils.delete_user(units)
@@ -475,6 +477,102 @@ class RmqTests(test_utils.OpenStackBaseTest):
         logging.info('OK')
 
 
+class RmqBenchmarkTest(test_utils.BaseCharmTest):
+    """Throughput and latency benchmarks of a rabbitmq cluster.
+
+    Each unit publishes to a queue consumed from the next unit, over long
+    lived connections. The benchmarks are configured with tests_options, e.g.::
+
+        tests_options:
+          zaza.openstack.charm_tests.rabbitmq_server.tests.RmqBenchmarkTest:
+            message_count: 1000
+            message_sizes: [64, 4096, 65536]
+            rate: 500
+            queue_types: [classic, mirrored, quorum]
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Run class setup for running rabbitmq benchmarks."""
+        super(RmqBenchmarkTest, cls).setUpClass(
+            application_name='rabbitmq-server')
+        cls.units = zaza.model.get_units(cls.application_name)
+        cls.message_count = cls.tests_options.get('message_count', 1000)
+        cls.message_sizes = cls.tests_options.get(
+            'message_sizes', [64, 4096, 65536])
+        cls.rate = cls.tests_options.get('rate')
+        queue_types = cls.tests_options.get(
+            'queue_types', list(rmq_utils.BENCHMARK_QUEUE_TYPES))
+        if ('quorum' in queue_types and
+                not rmq_utils.is_rabbitmq_version_ge_382(cls.units[0])):
+            logging.info('Skipping quorum queues, not supported by this '
+                         'version of rabbitmq')
+            queue_types = [t for t in queue_types if t != 'quorum']
+        cls.queue_types = queue_types
+        cls.benchmark_results = []
+        rmq_utils.add_user(cls.units)
+        cls.addClassCleanup(rmq_utils.delete_user, cls.units)
+        if 'mirrored' in queue_types:
+            rmq_utils.set_benchmark_mirroring_policy(cls.units)
+            cls.addClassCleanup(
+                rmq_utils.clear_benchmark_mirroring_policy, cls.units)
+
+    def _benchmark(self, ssl=False, port=None):
+        """Benchmark every unit with every queue type and message size.
+
+        :param ssl: Whether to connect over SSL
+        :type ssl: bool
+        :param port: amqp port, use defaults if None
+        :type port: Optional[int]
+        """
+        names = [u.entity_id for u in self.units]
+        pairs = list(zip(names, names[1:] + names[:1]))
+        with rmq_utils.AmqpBenchmarkConnections(
+                self.units, ssl=ssl, port=port) as connections:
+            for queue_type in self.queue_types:
+                for size in self.message_sizes:
+                    for index, (publish_unit, consume_unit) in enumerate(
+                            pairs):
+                        result = rmq_utils.run_amqp_benchmark(
+                            connections, publish_unit, consume_unit,
+                            queue_type, self.message_count, size,
+                            rate=self.rate)
+                        self.benchmark_results.append(result)
+                        self.record_benchmark(
+                            'amqp/queue_type={}/ssl={}/message_size={}/'
+                            'pair={}'.format(queue_type, ssl, size, index),
+                            {'throughput': result.throughput,
+                             'p50': result.p50, 'p99': result.p99})
+                        self.assertEqual(
+                            result.received, result.published,
+                            '{} of {} messages published to {} received '
+                            'from {}'.format(result.received,
+                                             result.published, publish_unit,
+                                             consume_unit))
+
+    def test_100_benchmark_ssl_off(self):
+        """Benchmark the cluster without ssl."""
+        rmq_utils.configure_ssl_off(self.units)
+        self._benchmark(ssl=False)
+
+    def test_200_benchmark_ssl_on(self):
+        """Benchmark the cluster with ssl."""
+        # http://pad.lv/1625044
+        if CompareHostReleases(get_series(self.units[0])) <= 'trusty':
+            raise unittest.SkipTest('SSL not supported by the client')
+        rmq_utils.configure_ssl_on(self.units, port=5671)
+        try:
+            self._benchmark(ssl=True, port=5671)
+        finally:
+            rmq_utils.configure_ssl_off(self.units)
+
+    def test_999_log_benchmark_results(self):
+        """Log the results of the benchmarks and check for regressions."""
+        for result in self.benchmark_results:
+            logging.info(json.dumps(result._asdict()))
+        self.assert_no_benchmark_regressions()
+
+
 class RmqRotateServiceUserPasswordTests(test_utils.OpenStackBaseTest):
     """RMQ service user password rotation tests."""
 
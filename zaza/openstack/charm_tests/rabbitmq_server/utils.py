@@ -14,8 +14,13 @@
 
 """RabbitMQ Testing utility functions."""
 
+import collections
+import concurrent.futures
 import json
 import logging
+import math
+import struct
+import time
 
 import pika
 import tenacity
@@ -393,7 +398,8 @@ def is_ssl_enabled_on_unit(unit, port=None):
 
 def connect_amqp_by_unit(unit, ssl=False,
                          port=None, fatal=True,
-                         username="testuser1", password="changeme"):
+                         username="testuser1", password="changeme",
+                         heartbeat=None):
     """Establish and return a pika amqp connection to the rabbitmq service.
 
     Establish and return a pika amqp connection to the rabbitmq service
@@ -404,6 +410,8 @@ def connect_amqp_by_unit(unit, ssl=False,
     :param fatal: boolean, default to True (raises on connect error)
     :param username: amqp user name, default to testuser1
     :param password: amqp user password
+    :param heartbeat: heartbeat timeout in seconds, 0 to disable heartbeats,
+                      None to accept the server's timeout
     :returns: pika amqp connection pointer or None if failed and non-fatal
     """
     host = zaza.model.get_unit_public_address(unit)
@@ -441,7 +449,8 @@ def connect_amqp_by_unit(unit, ssl=False,
                                                        ssl_options=ssl_options,
                                                        connection_attempts=3,
                                                        retry_delay=5,
-                                                       socket_timeout=1)
+                                                       socket_timeout=1,
+                                                       heartbeat=heartbeat)
                 connection = pika.BlockingConnection(parameters)
                 assert connection.is_open is True
                 logging.debug('Connect OK')
@@ -528,6 +537,138 @@ def get_amqp_message_by_unit(unit, queue="test",
         raise RmqNoMessageException(msg)
 
 
+class AmqpConnectionPool(object):
+    """Channels to rabbitmq units, opened once and kept open for reuse.
+
+    Channels are in confirm mode, so a publish returns once the broker has
+    taken responsibility for the message. Heartbeats are disabled so that
+    idle channels are not dropped between uses.
+
+    Example usage::
+
+        with AmqpConnectionPool() as pool:
+            pool.publish(unit0, ['one', 'two'])
+            pool.consume(unit1, 2)
+    """
+
+    def __init__(self, username="testuser1", password="changeme"):
+        """Create an empty pool.
+
+        :param username: amqp user name
+        :type username: str
+        :param password: amqp user password
+        :type password: str
+        """
+        self.username = username
+        self.password = password
+        self._channels = {}
+
+    def channel(self, unit, ssl=False, port=None, name=None):
+        """Return an open channel to a unit, connecting if needed.
+
+        :param unit: Unit to connect to
+        :type unit: juju.unit.Unit
+        :param ssl: Whether to connect over SSL
+        :type ssl: bool
+        :param port: amqp port, use defaults if None
+        :type port: Optional[int]
+        :param name: Name of the channel, for separate connections to the
+                     same unit, e.g. to use from different threads
+        :type name: Optional[str]
+        :rtype: pika.adapters.blocking_connection.BlockingChannel
+        """
+        key = (unit.entity_id, ssl, port, name)
+        connection, channel = self._channels.get(key, (None, None))
+        if channel is None or not channel.is_open:
+            if connection is not None and connection.is_open:
+                connection.close()
+            connection = connect_amqp_by_unit(
+                unit, ssl=ssl, port=port, username=self.username,
+                password=self.password, heartbeat=0)
+            channel = connection.channel()
+            channel.confirm_delivery()
+            self._channels[key] = (connection, channel)
+        return channel
+
+    def publish(self, unit, messages, queue="test", ssl=False, port=None):
+        """Publish messages to a durable queue of a unit.
+
+        :param unit: Unit to publish to
+        :type unit: juju.unit.Unit
+        :param messages: Message strings
+        :type messages: Iterable[str]
+        :param queue: Name of the queue
+        :type queue: str
+        :param ssl: Whether to connect over SSL
+        :type ssl: bool
+        :param port: amqp port, use defaults if None
+        :type port: Optional[int]
+        :returns: Number of messages published
+        :rtype: int
+        """
+        channel = self.channel(unit, ssl=ssl, port=port)
+        channel.queue_declare(queue=queue, auto_delete=False, durable=True)
+        count = 0
+        for message in messages:
+            channel.basic_publish(exchange='', routing_key=queue,
+                                  body=message)
+            count += 1
+        logging.debug('Published {} messages to {} queue on {}'.format(
+            count, queue, unit.entity_id))
+        return count
+
+    def consume(self, unit, count, queue="test", ssl=False, port=None,
+                timeout=10):
+        """Consume and acknowledge messages from a queue of a unit.
+
+        :param unit: Unit to consume from
+        :type unit: juju.unit.Unit
+        :param count: Maximum number of messages
+        :type count: int
+        :param queue: Name of the queue
+        :type queue: str
+        :param ssl: Whether to connect over SSL
+        :type ssl: bool
+        :param port: amqp port, use defaults if None
+        :type port: Optional[int]
+        :param timeout: Seconds to wait for a message before giving up
+        :type timeout: float
+        :returns: Message strings, fewer than count if the queue ran dry
+        :rtype: List[str]
+        """
+        channel = self.channel(unit, ssl=ssl, port=port)
+        channel.basic_qos(prefetch_count=count)
+        messages = []
+        for method, _, body in channel.consume(
+                queue, inactivity_timeout=timeout):
+            if method is None:
+                break
+            messages.append(body.decode())
+            if len(messages) >= count:
+                break
+        if messages:
+            channel.basic_ack(delivery_tag=0, multiple=True)
+        channel.cancel()
+        logging.debug('Consumed {} messages from {} queue on {}'.format(
+            len(messages), queue, unit.entity_id))
+        return messages
+
+    def close(self):
+        """Close all connections."""
+        for connection, _ in self._channels.values():
+            if connection.is_open:
+                connection.close()
+        self._channels = {}
+
+    def __enter__(self):
+        """Return the pool."""
+        return self
+
+    def __exit__(self, *args):
+        """Close all connections."""
+        self.close()
+
+
 def check_unit_cluster_nodes(unit, unit_node_names):
     """Check if unit exists in list of Rmq cluster node names.
 
@@ -606,3 +747,271 @@ async def complete_cluster_series_upgrade():
         'rabbitmq-server',
         'complete-cluster-series-upgrade',
         action_params={})
+
+
+BENCHMARK_QUEUE_PREFIX = 'zaza-benchmark'
+BENCHMARK_QUEUE_TYPES = ('classic', 'mirrored', 'quorum')
+# Messages start with the monotonic time they were published at, from which
+# the consumer works out their latency.
+_BENCHMARK_TIMESTAMP = struct.Struct('!d')
+
+AmqpBenchmarkResult = collections.namedtuple(
+    'AmqpBenchmarkResult',
+    ['publish_unit', 'consume_unit', 'queue_type', 'ssl', 'message_size',
+     'published', 'received', 'seconds', 'throughput', 'p50', 'p99'])
+
+
+def percentile(samples, percent):
+    """Return the nearest rank percentile of samples.
+
+    :param samples: Samples to get the percentile of
+    :type samples: Iterable[float]
+    :param percent: Percentile, from 0 to 100
+    :type percent: float
+    :returns: The percentile, None if there are no samples
+    :rtype: Optional[float]
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = math.ceil(percent / 100.0 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def set_benchmark_mirroring_policy(units):
+    """Mirror the 'mirrored' benchmark queues on all cluster nodes.
+
+    :param units: Units of the cluster
+    :type units: List[juju.unit.Unit]
+    """
+    cmd = ("rabbitmqctl set_policy --apply-to queues --priority 1 {0} "
+           "'^{0}\\.mirrored\\.' "
+           "'{{\"ha-mode\":\"all\",\"ha-sync-mode\":\"automatic\"}}'"
+           .format(BENCHMARK_QUEUE_PREFIX))
+    generic_utils.assertRemoteRunOK(
+        zaza.model.run_on_unit(units[0].entity_id, cmd))
+
+
+def clear_benchmark_mirroring_policy(units):
+    """Remove the policy set by set_benchmark_mirroring_policy.
+
+    :param units: Units of the cluster
+    :type units: List[juju.unit.Unit]
+    """
+    zaza.model.run_on_unit(
+        units[0].entity_id,
+        'rabbitmqctl clear_policy {}'.format(BENCHMARK_QUEUE_PREFIX))
+
+
+def benchmark_queue_name(queue_type, publish_unit, consume_unit):
+    """Return the name of the queue benchmarking a pair of units.
+
+    :param queue_type: One of BENCHMARK_QUEUE_TYPES
+    :type queue_type: str
+    :param publish_unit: Name of the unit messages are published to
+    :type publish_unit: str
+    :param consume_unit: Name of the unit messages are consumed from
+    :type consume_unit: str
+    :rtype: str
+    """
+    return '{}.{}.{}.{}'.format(
+        BENCHMARK_QUEUE_PREFIX, queue_type,
+        publish_unit.replace('/', '-'), consume_unit.replace('/', '-'))
+
+
+def declare_benchmark_queue(channel, queue, queue_type):
+    """Declare an empty, durable benchmark queue.
+
+    Queues of type 'mirrored' are classic queues, mirrored by the policy set
+    with set_benchmark_mirroring_policy.
+
+    :param channel: Channel to declare the queue on
+    :type channel: pika.adapters.blocking_connection.BlockingChannel
+    :param queue: Name of the queue
+    :type queue: str
+    :param queue_type: One of BENCHMARK_QUEUE_TYPES
+    :type queue_type: str
+    :raises: ValueError if the queue type is unknown
+    """
+    if queue_type not in BENCHMARK_QUEUE_TYPES:
+        raise ValueError('Unknown queue type {}'.format(queue_type))
+    arguments = None
+    if queue_type == 'quorum':
+        arguments = {'x-queue-type': 'quorum'}
+    channel.queue_declare(queue=queue, durable=True, auto_delete=False,
+                          arguments=arguments)
+    channel.queue_purge(queue=queue)
+
+
+def publish_benchmark_messages(channel, queue, count, size, rate=None):
+    """Publish persistent, timestamped messages, at a steady rate.
+
+    The channel must be in confirm mode, so that each publish returns once
+    the broker has taken responsibility for the message.
+
+    :param channel: Channel to publish on
+    :type channel: pika.adapters.blocking_connection.BlockingChannel
+    :param queue: Name of the queue
+    :type queue: str
+    :param count: Number of messages
+    :type count: int
+    :param size: Size of the messages in bytes, at least 8
+    :type size: int
+    :param rate: Messages per second, None to publish as fast as possible
+    :type rate: Optional[float]
+    :returns: Number of messages published
+    :rtype: int
+    """
+    padding = b'\0' * max(size - _BENCHMARK_TIMESTAMP.size, 0)
+    properties = pika.BasicProperties(delivery_mode=2)
+    start = time.monotonic()
+    for i in range(count):
+        if rate:
+            delay = start + i / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        body = _BENCHMARK_TIMESTAMP.pack(time.monotonic()) + padding
+        channel.basic_publish(exchange='', routing_key=queue, body=body,
+                              properties=properties)
+    return count
+
+
+def consume_benchmark_messages(channel, queue, count, timeout=60):
+    """Consume benchmark messages and return their latencies.
+
+    :param channel: Channel to consume on
+    :type channel: pika.adapters.blocking_connection.BlockingChannel
+    :param queue: Name of the queue
+    :type queue: str
+    :param count: Number of messages to consume
+    :type count: int
+    :param timeout: Seconds to wait for a message before giving up
+    :type timeout: float
+    :returns: Seconds from publish to delivery of each message received
+    :rtype: List[float]
+    """
+    latencies = []
+    for method, _, body in channel.consume(queue, inactivity_timeout=timeout):
+        if method is None:
+            logging.warning('Timed out consuming from {} after {} of {} '
+                            'messages'.format(queue, len(latencies), count))
+            break
+        latencies.append(
+            time.monotonic() - _BENCHMARK_TIMESTAMP.unpack_from(body)[0])
+        channel.basic_ack(method.delivery_tag)
+        if len(latencies) >= count:
+            break
+    channel.cancel()
+    return latencies
+
+
+class AmqpBenchmarkConnections(object):
+    """Long lived publisher and consumer channels to each unit of a cluster.
+
+    Each channel has a connection of its own, so that publishers and
+    consumers can run in separate threads.
+    """
+
+    # Unacknowledged messages delivered to a consumer at once.
+    prefetch_count = 100
+
+    def __init__(self, units, ssl=False, port=None, username="testuser1",
+                 password="changeme"):
+        """Open the connections.
+
+        :param units: Units of the cluster
+        :type units: List[juju.unit.Unit]
+        :param ssl: Whether to connect over SSL
+        :type ssl: bool
+        :param port: amqp port, use defaults if None
+        :type port: Optional[int]
+        :param username: amqp user name
+        :type username: str
+        :param password: amqp user password
+        :type password: str
+        """
+        self.ssl = ssl
+        self.pool = AmqpConnectionPool(username=username, password=password)
+        self.publishers = {}
+        self.consumers = {}
+        try:
+            for unit in units:
+                self.publishers[unit.entity_id] = self.pool.channel(
+                    unit, ssl=ssl, port=port, name='publisher')
+                self.consumers[unit.entity_id] = self.pool.channel(
+                    unit, ssl=ssl, port=port, name='consumer')
+                self.consumers[unit.entity_id].basic_qos(
+                    prefetch_count=self.prefetch_count)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Close all connections."""
+        self.pool.close()
+
+    def __enter__(self):
+        """Return the connections."""
+        return self
+
+    def __exit__(self, *args):
+        """Close all connections."""
+        self.close()
+
+
+def run_amqp_benchmark(connections, publish_unit, consume_unit, queue_type,
+                       count, size, rate=None, timeout=60):
+    """Publish messages to one unit while consuming them from another.
+
+    :param connections: Connections to the units
+    :type connections: AmqpBenchmarkConnections
+    :param publish_unit: Name of the unit to publish to
+    :type publish_unit: str
+    :param consume_unit: Name of the unit to consume from
+    :type consume_unit: str
+    :param queue_type: One of BENCHMARK_QUEUE_TYPES
+    :type queue_type: str
+    :param count: Number of messages
+    :type count: int
+    :param size: Size of the messages in bytes
+    :type size: int
+    :param rate: Messages per second, None to publish as fast as possible
+    :type rate: Optional[float]
+    :param timeout: Seconds to wait for a message before giving up
+    :type timeout: float
+    :rtype: AmqpBenchmarkResult
+    """
+    queue = benchmark_queue_name(queue_type, publish_unit, consume_unit)
+    publisher = connections.publishers[publish_unit]
+    declare_benchmark_queue(publisher, queue, queue_type)
+    start = time.monotonic()
+    # The channels belong to different connections, so each is used by a
+    # single thread.
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        consumed = executor.submit(
+            consume_benchmark_messages, connections.consumers[consume_unit],
+            queue, count, timeout)
+        published = executor.submit(
+            publish_benchmark_messages, publisher, queue, count, size, rate)
+        latencies = consumed.result()
+        published = published.result()
+    seconds = time.monotonic() - start
+    publisher.queue_delete(queue=queue)
+    result = AmqpBenchmarkResult(
+        publish_unit=publish_unit,
+        consume_unit=consume_unit,
+        queue_type=queue_type,
+        ssl=connections.ssl,
+        message_size=size,
+        published=published,
+        received=len(latencies),
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else None,
+        p50=percentile(latencies, 50),
+        p99=percentile(latencies, 99))
+    logging.info('{} -> {} {} ({} bytes, ssl {}): {:.1f} msg/s, p50 {} s, '
+                 'p99 {} s'.format(publish_unit, consume_unit, queue_type,
+                                   size, connections.ssl,
+                                   result.throughput or 0, result.p50,
+                                   result.p99))
+    return result
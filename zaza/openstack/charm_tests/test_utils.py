@@ -12,21 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Module containing base class for implementing charm tests."""
+import collections.abc
 import contextlib
+import copy
 import logging
 import subprocess
 import sys
 import tenacity
+import time
+import types
 import unittest
 import yaml
 
 import novaclient
 
+import zaza.events
 import zaza.model as model
 import zaza.charm_lifecycle.utils as lifecycle_utils
 import zaza.openstack.configure.guest as configure_guest
 import zaza.openstack.utilities.openstack as openstack_utils
+import zaza.openstack.utilities.benchmark as benchmark
 import zaza.openstack.utilities.generic as generic_utils
+import zaza.openstack.utilities.retry_policy as retry_policy
+import zaza.openstack.utilities.timing as timing
 import zaza.openstack.charm_tests.glance.setup as glance_setup
 import zaza.utilities.machine_os
 
@@ -123,21 +131,111 @@ def audit_assertions(action,
     :type expected_failures: List[str]
     :raises: AssertionError if the assertion fails.
     """
+    failures = audit_failures(action, expected_passes, expected_failures,
+                              expected_to_pass)
+    assert not failures, failures[0]
+
+
+def audit_failures(action,
+                   expected_passes,
+                   expected_failures=None,
+                   expected_to_pass=True):
+    """Return the unexpected outcomes of a security-checklist action.
+
+    :param action: Action object from running the security-checklist action
+    :type action: juju.action.Action
+    :param expected_passes: List of test names that are expected to pass
+    :type expected_passes: List[str]
+    :param expected_failures: List of test names that are expected to fail
+    :type expected_failures: List[str]
+    :returns: Messages describing each unexpected outcome
+    :rtype: List[str]
+    """
     if expected_failures is None:
         expected_failures = []
+    failures = []
     if expected_to_pass:
-        assert action.data["status"] == "completed", \
-            "Security check is expected to pass by default"
+        if action.data["status"] != "completed":
+            failures.append("Security check is expected to pass by default")
     else:
-        assert action.data["status"] == "failed", \
-            "Security check is not expected to pass by default"
+        if action.data["status"] != "failed":
+            failures.append(
+                "Security check is not expected to pass by default")
 
-    results = action.data['results']
+    results = action.data.get('results', {})
     for key, value in results.items():
-        if key in expected_failures:
-            assert "FAIL" in value, "Unexpected test pass: {}".format(key)
-        if key in expected_passes:
-            assert value == "PASS", "Unexpected failure: {}".format(key)
+        if key in expected_failures and "FAIL" not in value:
+            failures.append("Unexpected test pass: {}".format(key))
+        if key in expected_passes and value != "PASS":
+            failures.append("Unexpected failure: {}".format(key))
+    return failures
+
+
+_test_config = None
+
+
+def get_test_config():
+    """Return the charm test config, read once per process.
+
+    Each call returns a deep copy, so that a test class may change its own
+    config, at any depth, without affecting other classes.
+
+    :returns: Config dictionary
+    :rtype: dict
+    """
+    global _test_config
+    if _test_config is None:
+        _test_config = lifecycle_utils.get_charm_config(fatal=False)
+    return copy.deepcopy(_test_config)
+
+
+class TestsOptions(collections.abc.Mapping):
+    """Read only view of tests_options, with lookup by dotted prefix.
+
+    Example usage::
+
+        options = TestsOptions({'a.B.test_foo.key': True, 'a.B.key': 1})
+        options.with_prefix('a.B')
+        {'test_foo.key': True, 'key': 1}
+    """
+
+    def __init__(self, options=None):
+        """Index tests_options.
+
+        :param options: tests_options of the charm test config
+        :type options: Optional[Dict[str, Any]]
+        """
+        self._options = types.MappingProxyType(dict(options or {}))
+        self._prefixes = {}
+
+    def __getitem__(self, key):
+        """Return the option of a dotted key."""
+        return self._options[key]
+
+    def __iter__(self):
+        """Iterate over the dotted keys."""
+        return iter(self._options)
+
+    def __len__(self):
+        """Return the number of options."""
+        return len(self._options)
+
+    def with_prefix(self, prefix):
+        """Return the options under a dotted prefix, without the prefix.
+
+        The options of each prefix are gathered once.
+
+        :param prefix: Dotted prefix, e.g. a module and class name
+        :type prefix: str
+        :rtype: Mapping[str, Any]
+        """
+        if prefix not in self._prefixes:
+            start = prefix + '.'
+            self._prefixes[prefix] = types.MappingProxyType({
+                key[len(start):]: value
+                for key, value in self._options.items()
+                if key.startswith(start)})
+        return self._prefixes[prefix]
 
 
 class BaseCharmTest(unittest.TestCase):
@@ -163,6 +261,46 @@ class BaseCharmTest(unittest.TestCase):
             logging.info('Running resource cleanup')
             self.resource_cleanup()
 
+    # Seconds after which every retry made by a test method stops, see
+    # zaza.openstack.utilities.retry_policy. Falls back to the retry_deadline
+    # of tests_options, if set.
+    retry_deadline = None
+
+    def run(self, result=None):
+        """Run the test, timing it when TEST_TIMING_DIR is set."""
+        # setUpClass, including that of derived classes, is over by the time
+        # the first test runs.
+        start = getattr(type(self), '_timing_start', None)
+        if start is not None:
+            type(self)._timing_start = None
+            timing.record('setUpClass', start)
+        seconds = self.retry_deadline
+        if seconds is None:
+            seconds = self.get_tests_options().get('retry_deadline')
+        with retry_policy.deadline(seconds), \
+                timing.span(self._testMethodName):
+            return super().run(result)
+
+    @classmethod
+    def _report(cls):
+        """Report the retries and timing of the test class.
+
+        Registered as a class cleanup by setUpClass, so that it runs after
+        tearDownClass even when a derived class overrides tearDownClass
+        without calling it. The patches made by timing.instrument in
+        setUpClass are undone.
+        """
+        cls._report_pending = False
+        name = '{}.{}'.format(cls.__module__, cls.__name__)
+        retries = retry_policy.report(reset=True)
+        for policy, stats in sorted(retries.items()):
+            if stats['retries']:
+                logging.info(
+                    '{}: {} retries of {} slept {:.1f}s'.format(
+                        name, stats['retries'], policy, stats['slept']))
+        timing.write_report(name, extra={'retry_policies': retries})
+        timing.uninstrument()
+
     @classmethod
     def setUpClass(cls, application_name=None, model_alias=None):
         """Run setup for test class to create common resources.
@@ -182,12 +320,23 @@ class BaseCharmTest(unittest.TestCase):
         :param model_alias: the alias to use if needed.
         :type model_alias: Optional[str]
         """
+        if not cls.__dict__.get('_report_pending'):
+            cls._report_pending = True
+            cls.addClassCleanup(cls._report)
+        if timing.enabled():
+            timing.instrument()
+            # Drop anything recorded outside of a test class.
+            timing.collect()
+            cls._timing_start = time.monotonic()
         cls.model_aliases = model.get_juju_model_aliases()
         if model_alias:
             cls.model_name = cls.model_aliases[model_alias]
         else:
             cls.model_name = model.get_juju_model()
-        cls.test_config = lifecycle_utils.get_charm_config(fatal=False)
+        cls.test_config = get_test_config()
+        cls.tests_options = cls._index_tests_options(
+            cls.test_config).with_prefix(
+                '{}.{}'.format(cls.__module__, cls.__name__))
 
         if application_name:
             cls.application_name = application_name
@@ -337,75 +486,102 @@ class BaseCharmTest(unittest.TestCase):
         if not application_name:
             application_name = self.application_name
 
-        # we need to compare config values to what is already applied before
-        # attempting to set them.  otherwise the model will behave differently
-        # than we would expect while waiting for completion of the change
-        app_config = self.config_current(
-            application_name, keys=alternate_config.keys()
-        )
-
-        if all(item in app_config.items()
-                for item in alternate_config.items()):
-            logging.debug('alternate_config equals what is already applied '
-                          'config')
+        with self.config_changes(
+                {application_name: (default_config, alternate_config)},
+                reset_to_charm_default=reset_to_charm_default):
             yield
-            if default_config == alternate_config:
-                logging.debug('default_config also equals what is already '
-                              'applied config')
-                return
-            logging.debug('alternate_config already set, and default_config '
-                          'needs to be applied before return')
-        else:
-            logging.debug('Changing charm setting to {}'
-                          .format(alternate_config))
+
+    @contextlib.contextmanager
+    def config_changes(self, changes, reset_to_charm_default=False):
+        """Change the config of several applications at once.
+
+        Apply every alternate config with one Juju call per application, wait
+        once for all of them to settle, yield, then restore every default
+        config and wait once more before returning. Options that do not
+        depend on each other can be verified in the same settle window rather
+        than with a set, settle, restore, settle cycle each.
+
+        Example usage:
+            with self.config_changes({
+                    'keystone': ({'debug': 'False'}, {'debug': 'True'}),
+                    'glance': ({'debug': 'False'}, {'debug': 'True'})}):
+                do_something()
+
+        :param changes: Map of application name to a tuple of the config to
+                        set on completion and the config to change to, as
+                        for `config_change`.
+        :type changes: Dict[str, Tuple[dict, dict]]
+        :param reset_to_charm_default: When True we will ask Juju to reset each
+                                       configuration option mentioned in the
+                                       alternate configs back to the charm
+                                       default and ignore the default configs.
+        :type reset_to_charm_default: bool
+        """
+        states = self.test_config.get('target_deploy_status', {})
+        changed = []
+        for application_name, (_, alternate_config) in changes.items():
+            # we need to compare config values to what is already applied
+            # before attempting to set them.  otherwise the model will behave
+            # differently than we would expect while waiting for completion
+            # of the change
+            app_config = self.config_current(
+                application_name, keys=alternate_config.keys()
+            )
+            if all(item in app_config.items()
+                    for item in alternate_config.items()):
+                logging.debug('alternate_config for {} equals what is already '
+                              'applied config'.format(application_name))
+                continue
+            logging.debug('Changing charm setting on {} to {}'
+                          .format(application_name, alternate_config))
             model.set_application_config(
                 application_name,
                 self._stringed_value_config(alternate_config),
                 model_name=self.model_name)
+            changed.append(application_name)
 
+        if changed:
             logging.debug(
-                'Waiting for units to execute config-changed hook')
-            model.wait_for_agent_status(model_name=self.model_name)
-
-            logging.debug(
-                'Waiting for units to reach target states')
-            model.wait_for_application_states(
-                model_name=self.model_name,
-                states=self.test_config.get('target_deploy_status', {}))
-            # TODO: Optimize with a block on a specific application until idle.
-            model.block_until_all_units_idle()
+                'Waiting for units to execute config-changed hook and reach '
+                'target states')
+            with timing.span('config_change settle'):
+                generic_utils.block_until_applications_settled(
+                    changed, model_name=self.model_name, states=states)
 
-            yield
+        yield
 
-        if reset_to_charm_default:
-            logging.debug('Resetting these charm configuration options to the '
-                          'charm default: "{}"'
-                          .format(alternate_config.keys()))
-            model.reset_application_config(application_name,
-                                           list(alternate_config.keys()),
-                                           model_name=self.model_name)
-        elif default_config == alternate_config:
-            logging.debug('default_config == alternate_config, not attempting '
-                          ' to restore configuration')
-            return
-        else:
-            logging.debug('Restoring charm setting to {}'
-                          .format(default_config))
-            model.set_application_config(
-                application_name,
-                self._stringed_value_config(default_config),
-                model_name=self.model_name)
+        restored = []
+        for application_name, (default_config, alternate_config) in (
+                changes.items()):
+            if reset_to_charm_default:
+                logging.debug('Resetting these charm configuration options on '
+                              '{} to the charm default: "{}"'
+                              .format(application_name,
+                                      alternate_config.keys()))
+                model.reset_application_config(application_name,
+                                               list(alternate_config.keys()),
+                                               model_name=self.model_name)
+            elif default_config == alternate_config:
+                logging.debug('default_config == alternate_config for {}, not '
+                              'attempting to restore configuration'
+                              .format(application_name))
+                continue
+            else:
+                logging.debug('Restoring charm setting on {} to {}'
+                              .format(application_name, default_config))
+                model.set_application_config(
+                    application_name,
+                    self._stringed_value_config(default_config),
+                    model_name=self.model_name)
+            restored.append(application_name)
 
-        logging.debug(
-            'Waiting for units to execute config-changed hook')
-        model.wait_for_agent_status(model_name=self.model_name)
-        logging.debug(
-            'Waiting for units to reach target states')
-        model.wait_for_application_states(
-            model_name=self.model_name,
-            states=self.test_config.get('target_deploy_status', {}))
-        # TODO: Optimize with a block on a specific application until idle.
-        model.block_until_all_units_idle()
+        if restored:
+            logging.debug(
+                'Waiting for units to execute config-changed hook and reach '
+                'target states')
+            with timing.span('config_change restore settle'):
+                generic_utils.block_until_applications_settled(
+                    restored, model_name=self.model_name, states=states)
 
     def restart_on_changed_debug_oslo_config_file(self, config_file, services,
                                                   config_section='DEFAULT'):
@@ -479,31 +655,50 @@ class BaseCharmTest(unittest.TestCase):
             self.lead_unit,
             model_name=self.model_name)
         logging.debug('Remote unit timestamp {}'.format(mtime))
+        unit_names = [
+            unit.entity_id
+            for unit in model.get_units(self.application_name,
+                                        model_name=self.model_name)]
+        baseline = generic_utils.get_restart_baseline(
+            unit_names, config_file, services, model_name=self.model_name)
 
         with self.config_change(default_config, alternate_config):
+            logging.debug(
+                'Waiting for {} to change and services ({}) to be restarted'
+                .format(config_file, services))
+            for unit_name, state in generic_utils.wait_for_restart(
+                    baseline, config_file, services,
+                    model_name=self.model_name).items():
+                self.assertTrue(
+                    state['done'],
+                    '{} not updated or services not restarted on {}: {}'
+                    .format(config_file, unit_name, state))
+
             # If this is not an OSLO config file set default_config={}
             if alternate_entry:
-                logging.debug(
-                    'Waiting for updates to propagate to {}'
-                    .format(config_file))
                 model.block_until_oslo_config_entries_match(
                     self.application_name,
                     config_file,
                     alternate_entry,
                     model_name=self.model_name)
-            else:
-                model.block_until_all_units_idle(model_name=self.model_name)
 
-            # Config update has occured and hooks are idle. Any services should
-            # have been restarted by now:
-            logging.debug(
-                'Waiting for services ({}) to be restarted'.format(services))
-            model.block_until_services_restarted(
-                self.application_name,
-                mtime,
-                services,
-                model_name=self.model_name,
-                pgrep_full=pgrep_full)
+            # Services that are not systemd units of the same name can only
+            # be checked by their process start time.
+            untracked = sorted({
+                service
+                for state in baseline.values()
+                for service, since in state['services'].items()
+                if since is None})
+            if untracked:
+                logging.debug(
+                    'Waiting for services ({}) to be restarted'
+                    .format(untracked))
+                model.block_until_services_restarted(
+                    self.application_name,
+                    mtime,
+                    untracked,
+                    model_name=self.model_name,
+                    pgrep_full=pgrep_full)
 
         # If this is not an OSLO config file set default_config={}
         if default_entry:
@@ -531,47 +726,225 @@ class BaseCharmTest(unittest.TestCase):
                            a service.
         :type  pgrep_full: bool
         """
-        model.block_until_service_status(
-            self.lead_unit,
+        with self.pause_resume_units(services, unit_names=[self.lead_unit],
+                                     pgrep_full=pgrep_full):
+            yield
+
+    @contextlib.contextmanager
+    def pause_resume_units(self, services, application_names=None,
+                           unit_names=None, pgrep_full=False):
+        """Run Pause and resume tests on every unit of some applications.
+
+        Pause all the units at once, check that services are stopped on all
+        of them, yield, then resume them and check services are running
+        again. The time each unit took to pause and to resume is stored in
+        `self.pause_resume_latency` and logged as an event.
+
+        Example usage:
+            with self.pause_resume_units(['haproxy', 'apache2']):
+                do_something()
+
+        :param services: Services expected to be restarted when the units are
+                         paused/resumed.
+        :type services: list
+        :param application_names: Applications whose units are paused,
+                                  defaults to the object's application.
+        :type application_names: Optional[List[str]]
+        :param unit_names: Units to pause, rather than every unit of the
+                           applications.
+        :type unit_names: Optional[List[str]]
+        :param pgrep_full: Should pgrep be used rather than pidof to identify
+                           a service.
+        :type  pgrep_full: bool
+        """
+        if unit_names is None:
+            unit_names = [
+                unit.entity_id
+                for application_name in (application_names or
+                                         [self.application_name])
+                for unit in model.get_units(application_name,
+                                            model_name=self.model_name)]
+        events = zaza.events.get_global_event_logger_instance()
+        self.pause_resume_latency = {
+            unit_name: {} for unit_name in unit_names}
+
+        def _record(action_name, latencies):
+            for unit_name, latency in latencies.items():
+                self.pause_resume_latency[unit_name][action_name] = latency
+                logging.info('{} of {} took {:.2f}s'
+                             .format(action_name, unit_name, latency))
+                events.log(zaza.events.Events.COMMENT,
+                           item=unit_name,
+                           comment='{} took {:.2f}s'
+                           .format(action_name, latency))
+
+        generic_utils.block_until_service_status_on_units(
+            unit_names,
             services,
             'running',
             model_name=self.model_name,
             pgrep_full=pgrep_full)
-        model.block_until_unit_wl_status(
-            self.lead_unit,
-            'active',
-            model_name=self.model_name)
-        generic_utils.assertActionRanOK(model.run_action(
-            self.lead_unit,
-            'pause',
-            model_name=self.model_name))
-        model.block_until_unit_wl_status(
-            self.lead_unit,
-            'maintenance',
-            model_name=self.model_name)
-        model.block_until_all_units_idle(model_name=self.model_name)
-        model.block_until_service_status(
-            self.lead_unit,
-            services,
-            'stopped',
-            model_name=self.model_name,
-            pgrep_full=pgrep_full)
-        yield
-        generic_utils.assertActionRanOK(model.run_action(
-            self.lead_unit,
-            'resume',
-            model_name=self.model_name))
-        model.block_until_unit_wl_status(
-            self.lead_unit,
-            'active',
-            model_name=self.model_name)
-        model.block_until_all_units_idle(model_name=self.model_name)
-        model.block_until_service_status(
-            self.lead_unit,
-            services,
-            'running',
+        for unit_name in unit_names:
+            model.block_until_unit_wl_status(
+                unit_name,
+                'active',
+                model_name=self.model_name)
+        # Resume even if pausing or the body failed, or every unit of the
+        # applications would stay paused for the tests that follow.
+        try:
+            _record('pause', generic_utils.run_action_on_all_units(
+                unit_names,
+                'pause',
+                'maintenance',
+                model_name=self.model_name))
+            model.block_until_all_units_idle(model_name=self.model_name)
+            generic_utils.block_until_service_status_on_units(
+                unit_names,
+                services,
+                'stopped',
+                model_name=self.model_name,
+                pgrep_full=pgrep_full)
+            yield
+        finally:
+            _record('resume', generic_utils.run_action_on_all_units(
+                unit_names,
+                'resume',
+                'active',
+                model_name=self.model_name))
+            model.block_until_all_units_idle(model_name=self.model_name)
+            generic_utils.block_until_service_status_on_units(
+                unit_names,
+                services,
+                'running',
+                model_name=self.model_name,
+                pgrep_full=pgrep_full)
+
+    def run_security_checklist(self, expected_passes, expected_failures=None,
+                               expected_to_pass=True, application_names=None,
+                               action_name='security-checklist'):
+        """Run the security checklist on every unit of some applications.
+
+        The action runs on all the units at once. Its outcome on every unit is
+        checked with audit_failures, and the test fails once with all the
+        unexpected outcomes. The results are stored in
+        `self.security_checklist_report`, along with the time the action
+        took on each unit.
+
+        :param expected_passes: List of test names that are expected to pass
+        :type expected_passes: List[str]
+        :param expected_failures: List of test names that are expected to fail
+        :type expected_failures: Optional[List[str]]
+        :param expected_to_pass: Whether the action is expected to pass
+        :type expected_to_pass: bool
+        :param application_names: Applications whose units run the action,
+                                  defaults to the object's application.
+        :type application_names: Optional[List[str]]
+        :param action_name: Name of the checklist action
+        :type action_name: str
+        :returns: Map of unit name to 'status', 'results', 'duration' and
+                  'failures'
+        :rtype: Dict[str, dict]
+        """
+        unit_names = [
+            unit.entity_id
+            for application_name in (application_names or
+                                     [self.application_name])
+            for unit in model.get_units(application_name,
+                                        model_name=self.model_name)]
+        logging.info('Running `{}` action on {}'
+                     .format(action_name, ', '.join(unit_names)))
+        results = generic_utils.collect_action_results(
+            unit_names,
+            action_name,
             model_name=self.model_name,
-            pgrep_full=pgrep_full)
+            action_params={})
+        report = {}
+        for unit_name, (action, duration) in results.items():
+            failures = audit_failures(action, expected_passes,
+                                      expected_failures, expected_to_pass)
+            logging.info('`{}` on {} took {:.2f}s{}'.format(
+                action_name, unit_name, duration,
+                ', {} unexpected outcomes'.format(len(failures))
+                if failures else ''))
+            report[unit_name] = {
+                'status': action.data['status'],
+                'results': action.data.get('results', {}),
+                'duration': duration,
+                'failures': failures,
+            }
+        self.security_checklist_report = report
+        messages = ['{}: {}'.format(unit_name, failure)
+                    for unit_name, unit_report in report.items()
+                    for failure in unit_report['failures']]
+        if messages:
+            self.fail('\n'.join(messages))
+        return report
+
+    # Options of tests_options under the module and name of the test class,
+    # set by setUpClass.
+    tests_options = types.MappingProxyType({})
+
+    @classmethod
+    def _index_tests_options(cls, test_config):
+        """Return the indexed tests_options of a test config.
+
+        The index is built once for each tests_options.
+
+        :param test_config: Charm test config
+        :type test_config: Optional[dict]
+        :rtype: TestsOptions
+        """
+        options = (test_config or {}).get('tests_options') or {}
+        index = cls.__dict__.get('_tests_options_index')
+        if index is None or index[0] is not options:
+            index = (options, TestsOptions(options))
+            cls._tests_options_index = index
+        return index[1]
+
+    def get_tests_options(self):
+        """Return the indexed tests_options of the test config.
+
+        :rtype: TestsOptions
+        """
+        return self._index_tests_options(getattr(self, 'test_config', None))
+
+    def record_benchmark(self, key, metrics):
+        """Record the result of a benchmark, when TEST_BENCHMARK_STORE is set.
+
+        :param key: Key identifying the benchmark across runs
+        :type key: str
+        :param metrics: Metrics of the result, by name
+        :type metrics: Dict[str, float]
+        """
+        store = benchmark.get_store(
+            model_name=getattr(self, 'model_name', None))
+        if store is not None:
+            store.record(key, metrics, test=self.id())
+
+    def assert_no_benchmark_regressions(self, tolerance=None):
+        """Fail if a benchmark of the class regressed past its baseline.
+
+        :param tolerance: Fraction a metric may worsen by, defaults to the
+                          benchmark_tolerance of tests_options, then to
+                          TEST_BENCHMARK_TOLERANCE
+        :type tolerance: Optional[float]
+        :raises: AssertionError
+        """
+        store = benchmark.get_store(
+            model_name=getattr(self, 'model_name', None))
+        if store is None:
+            return
+        if tolerance is None:
+            tolerance = getattr(self, 'tests_options', {}).get(
+                'benchmark_tolerance', benchmark.tolerance())
+        regressions = store.regressions(
+            tolerance=tolerance,
+            test_prefix='{}.{}.'.format(type(self).__module__,
+                                        type(self).__qualname__))
+        self.assertFalse(
+            regressions,
+            'Benchmarks regressed by more than {:.0%}:\n{}'.format(
+                tolerance, benchmark.format_regressions(regressions)))
 
     def get_my_tests_options(self, key, default=None):
         """Retrieve tests_options for specific test.
@@ -594,28 +967,16 @@ class BaseCharmTest(unittest.TestCase):
         :returns: Value associated with key in tests_options.
         :rtype: any
         """
-        # note that we need to do this in-line otherwise we would get the path
-        # to ourself. I guess we could create a common method that would go two
-        # frames back, but that would be kind of useless for anyone else than
-        # this method.
-        caller_path = []
-
-        # get path to module
-        caller_path.append(sys.modules[
-            sys._getframe().f_back.f_globals['__name__']].__name__)
-
-        # attempt to get class name
-        try:
-            caller_path.append(
-                sys._getframe().f_back.f_locals['self'].__class__.__name__)
-        except KeyError:
-            pass
-
-        # get method or function name
-        caller_path.append(sys._getframe().f_back.f_code.co_name)
-
-        return self.test_config.get('tests_options', {}).get(
-            '.'.join(caller_path + [key]), default)
+        # The key is named after the caller, so look at its frame, once.
+        caller = sys._getframe(1)
+        caller_path = [caller.f_globals['__name__']]
+        caller_self = caller.f_locals.get('self')
+        if caller_self is not None:
+            caller_path.append(caller_self.__class__.__name__)
+        caller_path.append(caller.f_code.co_name)
+        del caller
+        return self.get_tests_options().with_prefix(
+            '.'.join(caller_path)).get(key, default)
 
     def get_applications_with_substring_in_name(self, substring):
         """Get applications with substring in name.
@@ -871,7 +1232,8 @@ class OpenStackBaseTest(BaseCharmTest):
     def launch_guest(self, guest_name, userdata=None, use_boot_volume=False,
                      instance_key=None, flavor_name=None,
                      attach_to_external_network=False,
-                     keystone_session=None, perform_connectivity_check=True):
+                     keystone_session=None, perform_connectivity_check=True,
+                     floating_ip_pool=None):
         """Launch one guest to use in tests.
 
         Note that it is up to the caller to have set the RESOURCE_PREFIX class
@@ -896,39 +1258,59 @@ class OpenStackBaseTest(BaseCharmTest):
                                            check.
         :type perform_connectivity_check: bool
         :type keystone_session: Optional[keystoneauth1.session.Session]
+        :param floating_ip_pool: Pool to take the guest floating IP from.
+        :type floating_ip_pool: Optional[openstack_utils.FloatingIPPool]
         :returns: Nova instance objects
         :rtype: Server
         """
         instance_key = instance_key or glance_setup.LTS_IMAGE_NAME
         instance_name = '{}-{}'.format(self.RESOURCE_PREFIX, guest_name)
-
-        for attempt in tenacity.Retrying(
-                stop=tenacity.stop_after_attempt(3),
-                wait=tenacity.wait_exponential(
-                    multiplier=1, min=2, max=10)):
-            with attempt:
-                old_instance_with_same_name = self.retrieve_guest(
-                    instance_name)
-                if old_instance_with_same_name:
-                    logging.info(
-                        'Removing already existing instance ({}) with '
-                        'requested name ({})'
-                        .format(old_instance_with_same_name.id, instance_name))
-                    openstack_utils.delete_resource(
-                        self.nova_client.servers,
-                        old_instance_with_same_name.id,
-                        msg="server")
-
-                return configure_guest.launch_instance(
-                    instance_key,
-                    vm_name=instance_name,
-                    use_boot_volume=use_boot_volume,
-                    userdata=userdata,
-                    flavor_name=flavor_name,
-                    attach_to_external_network=attach_to_external_network,
-                    keystone_session=keystone_session,
-                    perform_connectivity_check=perform_connectivity_check
-                )
+        # Reuse the class clients unless the caller asked for another session.
+        nova_client = None
+        if keystone_session is None:
+            keystone_session = self.keystone_session
+            nova_client = self.nova_client
+
+        # The retries of launch_instance share the time given to the guest.
+        with retry_policy.budget('launch-guest'):
+            for attempt in retry_policy.retrying('launch-guest'):
+                with attempt:
+                    return self._launch_guest_attempt(
+                        instance_key, instance_name,
+                        use_boot_volume=use_boot_volume,
+                        userdata=userdata,
+                        flavor_name=flavor_name,
+                        attach_to_external_network=attach_to_external_network,
+                        keystone_session=keystone_session,
+                        perform_connectivity_check=perform_connectivity_check,
+                        nova_client=nova_client,
+                        floating_ip_pool=floating_ip_pool)
+
+    def _launch_guest_attempt(self, instance_key, instance_name, **kwargs):
+        """Replace any instance of the same name and launch the guest.
+
+        If the launch fails, the floating IP the guest was given from
+        floating_ip_pool, if any, is returned to the pool.
+        """
+        old_instance_with_same_name = self.retrieve_guest(instance_name)
+        if old_instance_with_same_name:
+            logging.info(
+                'Removing already existing instance ({}) with '
+                'requested name ({})'
+                .format(old_instance_with_same_name.id, instance_name))
+            openstack_utils.delete_resource(
+                self.nova_client.servers,
+                old_instance_with_same_name.id,
+                msg="server")
+        try:
+            return configure_guest.launch_instance(
+                instance_key, vm_name=instance_name, **kwargs)
+        except Exception:
+            floating_ip_pool = kwargs.get('floating_ip_pool')
+            failed_instance = self.retrieve_guest(instance_name)
+            if floating_ip_pool is not None and failed_instance:
+                floating_ip_pool.reclaim(failed_instance.id)
+            raise
 
     def launch_guests(self, userdata=None, attach_to_external_network=False,
                       flavor_name=None):
@@ -945,14 +1327,26 @@ class OpenStackBaseTest(BaseCharmTest):
         :returns: List of launched Nova instance objects
         :rtype: List[Server]
         """
+        guest_count = 2
+        floating_ip_pool = None
+        if not attach_to_external_network:
+            floating_ip_pool = openstack_utils.FloatingIPPool(
+                openstack_utils.get_neutron_session_client(
+                    self.keystone_session))
+            floating_ip_pool.fill(guest_count)
         launched_instances = []
-        for guest_number in range(1, 2+1):
-            launched_instances.append(
-                self.launch_guest(
-                    guest_name='ins-{}'.format(guest_number),
-                    userdata=userdata,
-                    attach_to_external_network=attach_to_external_network,
-                    flavor_name=flavor_name))
+        try:
+            for guest_number in range(1, guest_count+1):
+                launched_instances.append(
+                    self.launch_guest(
+                        guest_name='ins-{}'.format(guest_number),
+                        userdata=userdata,
+                        attach_to_external_network=attach_to_external_network,
+                        flavor_name=flavor_name,
+                        floating_ip_pool=floating_ip_pool))
+        finally:
+            if floating_ip_pool is not None:
+                floating_ip_pool.release()
         return launched_instances
 
     def retrieve_guest(self, guest_name):
@@ -1027,10 +1421,11 @@ class BaseDeferredRestartTest(BaseCharmTest):
     def check_status_message_is_clear(self):
         """Check each units status message show no defeerred events."""
         # Check workload status no longer shows deferred restarts.
-        for unit in model.get_units(self.application_name):
-            model.block_until_unit_wl_message_match(
-                unit.entity_id,
-                'Unit is ready')
+        generic_utils.block_until_deferred_events_state(
+            self.application_name,
+            lambda state: (state['workload-status-message'] or '').startswith(
+                'Unit is ready'),
+            model_name=self.model_name)
         model.block_until_all_units_idle()
 
     def check_clear_restarts(self):
@@ -1040,14 +1435,15 @@ class BaseDeferredRestartTest(BaseCharmTest):
         for each unit.
         """
         # Use action to run any deferred restarts
-        for unit in model.get_units(self.application_name):
-            logging.info("Running restart-services on {}".format(
-                unit.entity_id))
-            model.run_action(
-                unit.entity_id,
-                'restart-services',
-                action_params={'deferred-only': True},
-                raise_on_failure=True)
+        unit_names = [unit.entity_id
+                      for unit in model.get_units(self.application_name)]
+        logging.info("Running restart-services on {}".format(unit_names))
+        generic_utils.run_action_on_all_units(
+            unit_names,
+            'restart-services',
+            'active',
+            model_name=self.model_name,
+            action_params={'deferred-only': True})
 
         # Check workload status no longer shows deferred restarts.
         self.check_status_message_is_clear()
@@ -1058,13 +1454,14 @@ class BaseDeferredRestartTest(BaseCharmTest):
         Run any deferred hooks.
         """
         # Use action to run any deferred restarts
-        for unit in model.get_units(self.application_name):
-            logging.info("Running run-deferred-hooks on {}".format(
-                unit.entity_id))
-            model.run_action(
-                unit.entity_id,
-                'run-deferred-hooks',
-                raise_on_failure=True)
+        unit_names = [unit.entity_id
+                      for unit in model.get_units(self.application_name)]
+        logging.info("Running run-deferred-hooks on {}".format(unit_names))
+        generic_utils.run_action_on_all_units(
+            unit_names,
+            'run-deferred-hooks',
+            'active',
+            model_name=self.model_name)
 
     def check_clear_hooks(self):
         """Clear deferred hooks and check status.
@@ -1090,7 +1487,8 @@ class BaseDeferredRestartTest(BaseCharmTest):
         return yaml.safe_load(action.data['results']['output'])
 
     def check_show_deferred_events_action_restart(self, test_service,
-                                                  restart_reason):
+                                                  restart_reason,
+                                                  restarts=None):
         """Check the output from the action to list deferred restarts.
 
         Run the action to list any deferred restarts and check it has entry for
@@ -1102,13 +1500,18 @@ class BaseDeferredRestartTest(BaseCharmTest):
                                service needing to be restarted. This can be a
                                substring.
         :type restart_reason: str
+        :param restarts: Deferred restarts already listed by the action, in
+                         which case it is not run again.
+        :type restarts: Optional[List[str]]
         """
         # Ensure that the deferred restart and cause are listed via action
         logging.info(
             ("Checking {} is marked as needing restart in "
              "show-deferred-events action").format(
                 test_service))
-        for event in self.run_show_deferred_events_action()['restarts']:
+        if restarts is None:
+            restarts = self.run_show_deferred_events_action()['restarts']
+        for event in restarts:
             logging.info("{} in {} and {} in {}".format(
                 test_service,
                 event,
@@ -1234,12 +1637,13 @@ class BaseDeferredRestartTest(BaseCharmTest):
         :rtype: Union[str, int, float]
         """
         new_debug_value = self.set_new_config()
-        for unit in model.get_units(self.application_name):
-            logging.info('Waiting for {} to show deferred hook'.format(
-                unit.entity_id))
-            model.block_until_unit_wl_message_match(
-                unit.entity_id,
-                status_pattern='.*{}.*'.format(deferred_hook))
+        logging.info('Waiting for units of {} to show deferred hook'.format(
+            self.application_name))
+        generic_utils.block_until_deferred_events_state(
+            self.application_name,
+            lambda state: deferred_hook in (
+                state['workload-status-message'] or ''),
+            model_name=self.model_name)
         logging.info("Waiting for units to be idle")
         model.block_until_all_units_idle()
         return new_debug_value
@@ -1307,12 +1711,13 @@ class BaseDeferredRestartTest(BaseCharmTest):
         :returns: A dict timestamps keyed on unit name.
         :rtype: dict
         """
-        timestamps = {}
-        for unit in model.get_units(self.application_name):
-            timestamps[unit.entity_id] = model.get_systemd_service_active_time(
-                unit.entity_id,
-                service)
-        return timestamps
+        return {
+            unit_name: state['timestamps'][service]
+            for unit_name, state in generic_utils.get_deferred_events_state(
+                self.application_name,
+                services=[service],
+                show_events=False,
+                model_name=self.model_name).items()}
 
     def run_package_change_test(self, restart_package, restart_package_svc):
         """Trigger a deferred restart by updating a package.
@@ -1329,8 +1734,13 @@ class BaseDeferredRestartTest(BaseCharmTest):
         pre_timestamps = self.get_service_timestamps(
             restart_package_svc)
         self.trigger_deferred_restart_via_package(restart_package)
-        post_timestamps = self.get_service_timestamps(
-            restart_package_svc)
+        post_state = generic_utils.get_deferred_events_state(
+            self.application_name,
+            services=[restart_package_svc],
+            model_name=self.model_name)
+        post_timestamps = {
+            unit_name: state['timestamps'][restart_package_svc]
+            for unit_name, state in post_state.items()}
         broken_units = []
         for unit_name in post_timestamps.keys():
             if pre_timestamps[unit_name] != post_timestamps[unit_name]:
@@ -1355,7 +1765,8 @@ class BaseDeferredRestartTest(BaseCharmTest):
         self.check_show_deferred_restarts_wlm(restart_package_svc)
         self.check_show_deferred_events_action_restart(
             restart_package_svc,
-            'Package update')
+            'Package update',
+            restarts=post_state[sorted(post_state)[0]]['restarts'])
         logging.info("Running restart action to clear deferred restarts")
         self.check_clear_restarts()
 
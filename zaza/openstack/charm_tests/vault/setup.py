@@ -75,8 +75,7 @@ def basic_setup_and_unseal(cacert=None):
     cacert = cacert or get_cacert_file()
     vault_svc = vault_utils.VaultFacade(cacert=cacert)
     vault_svc.unseal()
-    for unit in zaza.model.get_units('vault'):
-        zaza.model.run_on_unit(unit.name, './hooks/update-status')
+    vault_utils.run_update_status()
 
 
 async def mojo_or_default_unseal_by_unit():
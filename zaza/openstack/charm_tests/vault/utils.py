@@ -16,6 +16,7 @@
 
 """Module of functions for interfacing with vault and the vault charm."""
 
+import asyncio
 import base64
 import hvac
 import logging
@@ -30,9 +31,12 @@ import collections
 
 import zaza.model
 import zaza.openstack.utilities.openstack
+from zaza import sync_wrapper
 import zaza.utilities.networking as network_utils
 
 AUTH_FILE = "vault_tests.yaml"
+# Seconds between checks of each unit while waiting for all of them.
+POLL_INTERVAL = 5
 CharmVaultClient = collections.namedtuple(
     'CharmVaultClient', ['addr', 'hvac_client', 'vip_client'])
 
@@ -78,22 +82,27 @@ class VaultFacade:
             store_credentials(self.vault_creds)
             self.unseal_client = wait_and_get_initialized_client(self.clients)
 
-    def unseal(self):
-        """Unseal all the vaults clients."""
-        unseal_all([self.unseal_client], self.vault_creds['keys'][0])
-        wait_until_all_initialised(self.clients)
-        unseal_all(self.clients, self.vault_creds['keys'][0])
-        wait_for_ha_settled(self.clients)
+    def unseal(self, timeout=300):
+        """Unseal all the vaults clients.
 
-    def authorize(self):
+        :param timeout: Seconds to wait for all units to be unsealed and ha
+                        to settle
+        :type timeout: float
+        """
+        unseal_and_settle(self.clients, self.vault_creds['keys'][0],
+                          unseal_client=self.unseal_client, timeout=timeout)
+
+    def authorize(self, timeout=120):
         """Authorize charm to perfom certain actions.
 
         Run vault charm action to authorize the charm to perform a limited
         set of calls against the vault API.
+
+        :param timeout: Seconds to wait for ha to settle
+        :type timeout: float
         """
-        auth_all(self.clients, self.vault_creds['root_token'])
-        wait_for_ha_settled(self.clients)
-        run_charm_authorize(self.vault_creds['root_token'])
+        authorize(self.clients, self.vault_creds['root_token'],
+                  timeout=timeout)
 
 
 def get_unit_api_url(ip):
@@ -284,52 +293,96 @@ def ensure_secret_backend(client):
         pass
 
 
-def wait_for_ha_settled(clients):
+async def _async_call(func, *args):
+    """Run a blocking call in the default executor."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+async def async_wait_for_all(clients, check, description, timeout=120):
+    """Wait until a check passes for all clients, checking them concurrently.
+
+    A check that raises, e.g. as the unit is not reachable yet, counts as
+    not passing.
+
+    :param clients: Clients to use to talk to vault
+    :type clients: List[CharmVaultClient]
+    :param check: Blocking function of a client, returning whether it passed
+    :type check: Callable[[CharmVaultClient], bool]
+    :param description: What is being waited for, for the error message
+    :type description: str
+    :param timeout: Seconds to wait for all clients
+    :type timeout: float
+    :raises: AssertionError
+    """
+    deadline = time.monotonic() + timeout
+
+    async def _wait(client):
+        while True:
+            error = None
+            try:
+                if await _async_call(check, client):
+                    return
+            except Exception as e:
+                error = e
+            if time.monotonic() + POLL_INTERVAL > deadline:
+                raise AssertionError('Timeout waiting for {} on {}{}'.format(
+                    description, client.addr,
+                    ' ({})'.format(error) if error else ''))
+            await asyncio.sleep(POLL_INTERVAL)
+
+    await asyncio.gather(*[_wait(client) for client in clients])
+
+
+def _is_ha_settled(client):
+    """Return whether vault ha is settled for a client.
+
+    :param client: Client to use to talk to vault
+    :type client: CharmVaultClient
+    :rtype: bool
+    """
+    ha_status = client.hvac_client.ha_status
+    return bool(ha_status.get('leader_address') or
+                not ha_status.get('ha_enabled'))
+
+
+async def async_wait_for_ha_settled(clients, timeout=120):
     """Wait until vault ha is settled (for all passed clients).
 
-    Raise an AssertionError if any are not settled within 2 minutes.
+    Raise an AssertionError if any are not settled within the timeout.
     This function is effectively a no-op for non-ha vault.
     Requires all vault units to be unsealed.
 
     :param clients: Clients to use to talk to vault
     :type clients: List[CharmVaultClient]
+    :param timeout: Seconds to wait for all clients
+    :type timeout: float
     :raises: AssertionError
     """
-    for client in clients:
-        for attempt in tenacity.Retrying(
-            reraise=True,
-            wait=tenacity.wait_fixed(10),
-            stop=tenacity.stop_after_attempt(12),  # wait for max 2 minutes
-        ):
-            with attempt:
-                # ha_status could also raise other errors,
-                # eg. if unsealing still in progress.
-                # This is why we're using tenacity here;
-                # avoids needing to manually handle other exceptions.
-                ha_status = client.hvac_client.ha_status
-                if (
-                    not ha_status.get('leader_address') and
-                    ha_status.get('ha_enabled')
-                ):
-                    raise AssertionError('Timeout waiting for ha to settle')
-
-
-def wait_until_all_initialised(clients):
+    await async_wait_for_all(clients, _is_ha_settled, 'ha to settle',
+                             timeout=timeout)
+
+
+wait_for_ha_settled = sync_wrapper(async_wait_for_ha_settled)
+
+
+async def async_wait_until_all_initialised(clients, timeout=120):
     """Wait until vault is initialized (for all passed clients).
 
-    Raise an AssertionError if any are not initialized within 2 minutes.
+    Raise an AssertionError if any are not initialized within the timeout.
 
     :param clients: Clients to use to talk to vault
     :type clients: List[CharmVaultClient]
+    :param timeout: Seconds to wait for all clients
+    :type timeout: float
     :raises: AssertionError
     """
-    for client in clients:
-        for _ in range(12):
-            if is_initialized(client):
-                break
-            time.sleep(10)  # max 2 minutes (12 x 10s)
-        else:
-            raise AssertionError("Timeout waiting for vault to initialize")
+    await async_wait_for_all(
+        clients, lambda client: client.hvac_client.is_initialized(),
+        'vault to initialize', timeout=timeout)
+
+
+wait_until_all_initialised = sync_wrapper(async_wait_until_all_initialised)
 
 
 def wait_and_get_initialized_client(clients):
@@ -432,7 +485,19 @@ def write_credentials(auth_file, vault_creds):
         yaml.dump(vault_creds, outfile, default_flow_style=False)
 
 
-def unseal_all(clients, key):
+def _unseal(client, key):
+    """Unseal a vault with the provided key, if sealed.
+
+    :param client: Client to unseal
+    :type client: CharmVaultClient
+    :param key: key to unlock client
+    :type key: str
+    """
+    if client.hvac_client.is_sealed():
+        client.hvac_client.unseal(key)
+
+
+async def async_unseal_all(clients, key):
     """Unseal all the vaults with the given clients with the provided key.
 
     :param clients: List of clients
@@ -440,9 +505,39 @@ def unseal_all(clients, key):
     :param key: key to unlock clients
     :type key: str
     """
-    for client in clients:
-        if client.hvac_client.is_sealed():
-            client.hvac_client.unseal(key)
+    await asyncio.gather(*[
+        _async_call(_unseal, client, key) for client in clients])
+
+
+unseal_all = sync_wrapper(async_unseal_all)
+
+
+async def async_unseal_and_settle(clients, key, unseal_client=None,
+                                  timeout=300):
+    """Unseal all the vaults and wait for ha to settle.
+
+    :param clients: List of clients
+    :type clients: [CharmVaultClient, ...]
+    :param key: key to unlock clients
+    :type key: str
+    :param unseal_client: Client to unseal first, e.g. the one vault was
+                          initialized with, or the vip
+    :type unseal_client: Optional[CharmVaultClient]
+    :param timeout: Seconds to wait for all the steps together
+    :type timeout: float
+    :raises: AssertionError
+    """
+    deadline = time.monotonic() + timeout
+    if unseal_client is not None:
+        await async_unseal_all([unseal_client], key)
+    await async_wait_until_all_initialised(
+        clients, timeout=deadline - time.monotonic())
+    await async_unseal_all(clients, key)
+    await async_wait_for_ha_settled(
+        clients, timeout=deadline - time.monotonic())
+
+
+unseal_and_settle = sync_wrapper(async_unseal_and_settle)
 
 
 def auth_all(clients, token):
@@ -457,7 +552,7 @@ def auth_all(clients, token):
         client.hvac_client.token = token
 
 
-def run_charm_authorize(token):
+async def async_run_charm_authorize(token):
     """Authorize charm to perfom certain actions.
 
     Run vault charm action to authorize the charm to perform a limited
@@ -468,12 +563,49 @@ def run_charm_authorize(token):
     :returns: Action object
     :rtype: juju.action.Action
     """
-    return zaza.model.run_action_on_leader(
+    return await zaza.model.async_run_action_on_leader(
         'vault',
         'authorize-charm',
         action_params={'token': token})
 
 
+run_charm_authorize = sync_wrapper(async_run_charm_authorize)
+
+
+async def async_authorize(clients, token, timeout=120):
+    """Authenticate all clients and authorize the charm.
+
+    :param clients: List of clients
+    :type clients: [CharmVaultClient, ...]
+    :param token: Token to authorize clients and charm
+    :type token: str
+    :param timeout: Seconds to wait for ha to settle
+    :type timeout: float
+    :returns: Action object
+    :rtype: juju.action.Action
+    """
+    auth_all(clients, token)
+    await async_wait_for_ha_settled(clients, timeout=timeout)
+    return await async_run_charm_authorize(token)
+
+
+authorize = sync_wrapper(async_authorize)
+
+
+async def async_run_update_status(application_name='vault'):
+    """Run the update-status hook on all units at once.
+
+    :param application_name: The application name
+    :type application_name: str
+    """
+    await asyncio.gather(*[
+        zaza.model.async_run_on_unit(unit.name, './hooks/update-status')
+        for unit in await zaza.model.async_get_units(application_name)])
+
+
+run_update_status = sync_wrapper(async_run_update_status)
+
+
 def run_get_csr():
     """Retrieve CSR from vault.
 
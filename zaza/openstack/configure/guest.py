@@ -23,13 +23,14 @@ import time
 import zaza.openstack.utilities.openstack as openstack_utils
 import zaza.openstack.charm_tests.nova.utils as nova_utils
 import zaza.openstack.utilities.exceptions as openstack_exceptions
+import zaza.openstack.utilities.retry_policy as retry_policy
+import zaza.openstack.utilities.timing as timing
 import zaza.utilities.deployment_env as deployment_env
 
 from tenacity import (
     RetryError,
     Retrying,
     stop_after_attempt,
-    wait_exponential,
 )
 
 
@@ -97,14 +98,15 @@ def launch_instance_retryer(instance_key, **kwargs):
             msg="Waiting for the Nova VM {} to be deleted".format(vm.name))
 
     retryer = Retrying(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(3) | retry_policy.stop_at_deadline(),
         after=remove_vm_on_failure,
     )
-    instance = retryer(
-        launch_instance,
-        instance_key,
-        **kwargs
-    )
+    with retry_policy.budget('launch-guest'):
+        instance = retryer(
+            launch_instance,
+            instance_key,
+            **kwargs
+        )
     return instance
 
 
@@ -131,13 +133,48 @@ def get_default_userdata(packages=None):
         packages_section=packages_section)
 
 
+def check_connectivity(instance_key, ip, vm_name):
+    """Check that a guest answers ping and ssh.
+
+    :param instance_key: Key to collect associated config data with.
+    :type instance_key: str
+    :param ip: Address of the guest
+    :type ip: str
+    :param vm_name: Name of the guest
+    :type vm_name: str
+    :raises: openstack_exceptions.NovaGuestNoPingResponse
+    """
+    try:
+        for attempt in retry_policy.retrying('connectivity'):
+            with attempt:
+                try:
+                    openstack_utils.ping_response(ip)
+                except subprocess.CalledProcessError as e:
+                    logging.error('Pinging {} failed with {}'
+                                  .format(ip, e.returncode))
+                    logging.error('stdout: {}'.format(e.stdout))
+                    logging.error('stderr: {}'.format(e.stderr))
+                    raise
+    except RetryError:
+        raise openstack_exceptions.NovaGuestNoPingResponse()
+
+    # Check ssh'ing to instance.
+    logging.info('Testing ssh access.')
+    openstack_utils.ssh_test(
+        username=boot_tests[instance_key]['username'],
+        ip=ip,
+        vm_name=vm_name,
+        password=boot_tests[instance_key].get('password'),
+        privkey=openstack_utils.get_private_key(nova_utils.KEYPAIR_NAME))
+
+
 def launch_instance(instance_key, use_boot_volume=False, vm_name=None,
                     private_network_name=None, image_name=None,
                     flavor_name=None, external_network_name=None, meta=None,
                     userdata=None, attach_to_external_network=False,
                     keystone_session=None, perform_connectivity_check=True,
-                    host=None, nova_api_version=None
-                    ):
+                    host=None, nova_api_version=None, nova_client=None,
+                    neutron_client=None, floating_ip_pool=None):
     """Launch an instance.
 
     :param instance_key: Key to collect associated config data with.
@@ -169,29 +206,39 @@ def launch_instance(instance_key, use_boot_volume=False, vm_name=None,
     :type perform_connectivity_check: bool
     :param host: Requested host to create servers
     :type host: str
-    :param nova_api_version: Nova API version to use
+    :param nova_api_version: Nova API version to use, ignored if nova_client
+                             is passed.
     :type nova_api_version: str | None
+    :param nova_client: Authenticated nova client to use.
+    :type nova_client: Optional[novaclient.v2.client.Client]
+    :param neutron_client: Authenticated neutronclient to use.
+    :type neutron_client: Optional[neutronclient.Client]
+    :param floating_ip_pool: Pool to take the guest floating IP from rather
+                             than creating one.
+    :type floating_ip_pool: Optional[openstack_utils.FloatingIPPool]
     :returns: the created instance
     :rtype: novaclient.Server
     """
-    if not keystone_session:
+    if not (nova_client and neutron_client) and not keystone_session:
         keystone_session = openstack_utils.get_overcloud_keystone_session()
 
-    nova_client = openstack_utils.get_nova_session_client(
-        keystone_session,
-        version=nova_api_version,
-    )
-    neutron_client = openstack_utils.get_neutron_session_client(
-        keystone_session)
+    if not nova_client:
+        nova_client = openstack_utils.get_nova_session_client(
+            keystone_session,
+            version=nova_api_version,
+        )
+    if not neutron_client:
+        neutron_client = openstack_utils.get_neutron_session_client(
+            keystone_session)
 
     # Collect resource information.
     vm_name = vm_name or time.strftime("%Y%m%d%H%M%S")
 
     image_name = image_name or boot_tests[instance_key]['image_name']
-    image = nova_client.glance.find_image(image_name)
+    image = openstack_utils.resolve_image(nova_client, image_name)
 
     flavor_name = flavor_name or boot_tests[instance_key]['flavor_name']
-    flavor = nova_client.flavors.find(name=flavor_name)
+    flavor = openstack_utils.resolve_flavor(nova_client, flavor_name)
 
     private_network_name = private_network_name or openstack_utils.PRIVATE_NET
 
@@ -203,7 +250,8 @@ def launch_instance(instance_key, use_boot_volume=False, vm_name=None,
     else:
         instance_network_name = private_network_name
 
-    net = neutron_client.find_resource("network", instance_network_name)
+    net = openstack_utils.resolve_network(neutron_client,
+                                          instance_network_name)
     nics = [{'net-id': net.get('id')}]
 
     if use_boot_volume:
@@ -220,37 +268,36 @@ def launch_instance(instance_key, use_boot_volume=False, vm_name=None,
 
     # Launch instance.
     logging.info('Launching instance {}'.format(vm_name))
-    instance = nova_client.servers.create(
-        name=vm_name,
-        image=image,
-        block_device_mapping_v2=bdmv2,
-        flavor=flavor,
-        key_name=nova_utils.KEYPAIR_NAME,
-        meta=meta,
-        nics=nics,
-        userdata=userdata or get_default_userdata(),
-        host=host,
-    )
+    with timing.span('launch_instance create'):
+        instance = nova_client.servers.create(
+            name=vm_name,
+            image=image,
+            block_device_mapping_v2=bdmv2,
+            flavor=flavor,
+            key_name=nova_utils.KEYPAIR_NAME,
+            meta=meta,
+            nics=nics,
+            userdata=userdata or get_default_userdata(),
+            host=host,
+        )
 
     # Test Instance is ready.
     logging.info('Checking instance is active')
-    openstack_utils.resource_reaches_status(
-        nova_client.servers,
-        instance.id,
-        expected_status='ACTIVE',
-        # NOTE(lourot): in some models this may sometimes take more than 15
-        # minutes. See lp:1945991
-        wait_iteration_max_time=120,
-        stop_after_attempt=16,
-        stop_status='ERROR',
-        msg='instance',
-    )
-
-    logging.info('Checking cloud init is complete')
-    openstack_utils.cloud_init_complete(
-        nova_client,
-        instance.id,
-        boot_tests[instance_key]['bootstring'])
+    with timing.span('launch_instance active'):
+        openstack_utils.resource_reaches_status(
+            nova_client.servers,
+            instance.id,
+            expected_status='ACTIVE',
+            # NOTE(lourot): in some models this may sometimes take more than 15
+            # minutes. See lp:1945991
+            wait_iteration_max_time=120,
+            stop_after_attempt=16,
+            stop_status='ERROR',
+            msg='instance',
+        )
+
+    # The port exists once the instance is active, so address it while
+    # cloud init runs.
     port = openstack_utils.get_ports_from_device_id(
         neutron_client,
         instance.id)[0]
@@ -262,35 +309,24 @@ def launch_instance(instance_key, use_boot_volume=False, vm_name=None,
                      .format(ip, instance_network_name, vm_name))
     else:
         logging.info('Assigning floating ip.')
-        ip = openstack_utils.create_floating_ip(
-            neutron_client,
-            external_network_name,
-            port=port)['floating_ip_address']
+        if floating_ip_pool is not None:
+            floatingip = floating_ip_pool.assign(port)
+        else:
+            floatingip = openstack_utils.create_floating_ip(
+                neutron_client,
+                external_network_name,
+                port=port)
+        ip = floatingip['floating_ip_address']
         logging.info('Assigned floating IP {} to {}'.format(ip, vm_name))
 
+    logging.info('Checking cloud init is complete')
+    with timing.span('launch_instance cloud-init'):
+        openstack_utils.cloud_init_complete(
+            nova_client,
+            instance.id,
+            boot_tests[instance_key]['bootstring'])
+
     if perform_connectivity_check:
-        try:
-            for attempt in Retrying(
-                    stop=stop_after_attempt(8),
-                    wait=wait_exponential(multiplier=1, min=2, max=60)):
-                with attempt:
-                    try:
-                        openstack_utils.ping_response(ip)
-                    except subprocess.CalledProcessError as e:
-                        logging.error('Pinging {} failed with {}'
-                                      .format(ip, e.returncode))
-                        logging.error('stdout: {}'.format(e.stdout))
-                        logging.error('stderr: {}'.format(e.stderr))
-                        raise
-        except RetryError:
-            raise openstack_exceptions.NovaGuestNoPingResponse()
-
-        # Check ssh'ing to instance.
-        logging.info('Testing ssh access.')
-        openstack_utils.ssh_test(
-            username=boot_tests[instance_key]['username'],
-            ip=ip,
-            vm_name=vm_name,
-            password=boot_tests[instance_key].get('password'),
-            privkey=openstack_utils.get_private_key(nova_utils.KEYPAIR_NAME))
+        with timing.span('launch_instance connectivity'):
+            check_connectivity(instance_key, ip, vm_name)
     return instance
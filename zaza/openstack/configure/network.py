@@ -79,6 +79,8 @@ As a script from CLI with a YAML file of configuration:
 """
 
 import argparse
+import collections
+import concurrent.futures
 import logging
 import sys
 
@@ -92,6 +94,336 @@ import zaza.openstack.utilities.exceptions
 import zaza.utilities.juju as juju_utils
 
 
+# A step in building a network topology. ``apply`` is called with a dict of
+# the results of the steps listed in ``requires`` and its return value is
+# recorded under ``key``. Steps that create a neutron resource also name the
+# ``collection`` (e.g. 'networks') and ``name`` of the resource so that
+# existing resources can be found without running the step.
+TopologyStep = collections.namedtuple(
+    'TopologyStep', ['key', 'requires', 'apply', 'collection', 'name'])
+TopologyStep.__new__.__defaults__ = (None, None)
+
+
+class NetworkTopology(object):
+    """Declarative and idempotent builder for an overcloud network topology.
+
+    The topology is described as a set of steps with dependencies between
+    them. Applying the topology lists the existing resources once per
+    neutron collection, only creates the resources that are missing and runs
+    steps that do not depend on each other concurrently.
+    """
+
+    def __init__(self, neutron_client, steps, max_workers=8):
+        """Initialise the topology.
+
+        :param neutron_client: Authenticated neutronclient
+        :type neutron_client: neutronclient.Client object
+        :param steps: Steps that make up the topology
+        :type steps: List[TopologyStep]
+        :param max_workers: Maximum number of steps to run concurrently
+        :type max_workers: int
+        """
+        self.neutron_client = neutron_client
+        self.steps = steps
+        self.max_workers = max_workers
+
+    def desired_resources(self):
+        """Return the names of the resources in the topology.
+
+        :returns: Resource names keyed by neutron collection
+        :rtype: Dict[str, List[str]]
+        """
+        desired = collections.defaultdict(list)
+        for step in self.steps:
+            if step.collection:
+                desired[step.collection].append(step.name)
+        return dict(desired)
+
+    def existing_resources(self):
+        """List the resources of the topology that already exist.
+
+        One listing is made per neutron collection, filtered on the names of
+        the resources in the topology.
+
+        :returns: Resource objects keyed by collection and then name
+        :rtype: Dict[str, Dict[str, dict]]
+        """
+        existing = {}
+        for collection, names in self.desired_resources().items():
+            list_resources = getattr(self.neutron_client,
+                                     'list_{}'.format(collection))
+            existing[collection] = {
+                resource['name']: resource
+                for resource in list_resources(name=names)[collection]}
+        return existing
+
+    def missing_resources(self, existing=None):
+        """Return the resources of the topology that do not exist yet.
+
+        :param existing: Result of ``existing_resources``, listed if omitted
+        :type existing: Optional[Dict[str, Dict[str, dict]]]
+        :returns: Names of missing resources keyed by neutron collection
+        :rtype: Dict[str, List[str]]
+        """
+        if existing is None:
+            existing = self.existing_resources()
+        return {
+            collection: [name for name in names
+                         if name not in existing.get(collection, {})]
+            for collection, names in self.desired_resources().items()}
+
+    def apply(self):
+        """Create the missing resources and run the remaining steps.
+
+        :returns: Results of all steps keyed by step key
+        :rtype: Dict[str, Any]
+        :raises: ValueError if the steps have unresolvable dependencies
+        """
+        existing = self.existing_resources()
+        results = {}
+        for step in self.steps:
+            if step.collection and step.name in existing[step.collection]:
+                logging.info('{} {} already exists.'
+                             .format(step.collection, step.name))
+                results[step.key] = existing[step.collection][step.name]
+        pending = [step for step in self.steps if step.key not in results]
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers) as executor:
+            while pending:
+                ready = [step for step in pending
+                         if all(key in results for key in step.requires)]
+                if not ready:
+                    raise ValueError(
+                        'Unresolvable network topology steps: {}'
+                        .format(', '.join(step.key for step in pending)))
+                futures = {
+                    step.key: executor.submit(
+                        step.apply,
+                        {key: results[key] for key in step.requires})
+                    for step in ready}
+                for key, future in futures.items():
+                    results[key] = future.result()
+                pending = [step for step in pending if step not in ready]
+        return results
+
+
+def _plug_extnet_into_router(neutron_client, router, network):
+    """Set the router gateway unless it is already on the network."""
+    gateway = router.get('external_gateway_info') or {}
+    if gateway.get('network_id') == network['id']:
+        logging.warning('Router already connected')
+        return
+    openstack_utils.plug_extnet_into_router(neutron_client, router, network)
+
+
+def _update_subnet_dns(neutron_client, subnet, dns_servers):
+    """Update the subnet DNS servers unless they are already set."""
+    if subnet.get('dns_nameservers') == dns_servers.split(','):
+        logging.warning('Subnet dns_nameservers already set')
+        return
+    openstack_utils.update_subnet_dns(neutron_client, subnet, dns_servers)
+
+
+def sdn_topology(neutron_client, project_id, network_config):
+    """Describe the overcloud network topology for a network configuration.
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param project_id: Project ID
+    :type project_id: string
+    :param network_config: Network configuration settings dictionary
+    :type network_config: dict
+    :returns: Network topology
+    :rtype: NetworkTopology
+    """
+    ip_version = network_config.get("ip_version") or 4
+    subnetpools = bool(network_config.get("subnetpool_prefix"))
+    ext_subnets = ('ext_subnet',)
+    steps = [
+        TopologyStep(
+            'ext_network', (),
+            lambda r: openstack_utils.create_provider_network(
+                neutron_client,
+                project_id,
+                network_config["external_net_name"]),
+            'networks', network_config["external_net_name"]),
+        TopologyStep(
+            'ext_subnet', ('ext_network',),
+            lambda r: openstack_utils.create_provider_subnet(
+                neutron_client,
+                project_id,
+                r['ext_network'],
+                network_config["external_subnet_name"],
+                network_config["default_gateway"],
+                network_config["external_net_cidr"],
+                network_config["start_floating_ip"],
+                network_config["end_floating_ip"],
+                dhcp=True),
+            'subnets', network_config["external_subnet_name"]),
+        TopologyStep(
+            'provider_router', (),
+            lambda r: openstack_utils.create_provider_router(
+                neutron_client, project_id),
+            'routers', openstack_utils.PROVIDER_ROUTER),
+        TopologyStep(
+            'project_network', (),
+            lambda r: openstack_utils.create_project_network(
+                neutron_client,
+                project_id,
+                shared=False,
+                network_type=network_config["network_type"],
+                net_name=network_config.get("project_net_name", "private")),
+            'networks', network_config.get("project_net_name", "private")),
+        TopologyStep(
+            'project_subnet',
+            ('project_network', 'subnetpool') if subnetpools else
+            ('project_network',),
+            lambda r: openstack_utils.create_project_subnet(
+                neutron_client,
+                project_id,
+                r['project_network'],
+                network_config.get("private_net_cidr"),
+                subnetpool=r.get('subnetpool'),
+                ip_version=ip_version,
+                subnet_name=network_config.get("project_subnet_name",
+                                               "private_subnet")),
+            'subnets', network_config.get("project_subnet_name",
+                                          "private_subnet")),
+        TopologyStep(
+            'project_subnet_dns', ('project_subnet',),
+            lambda r: _update_subnet_dns(
+                neutron_client,
+                r['project_subnet'],
+                network_config["external_dns"])),
+        TopologyStep(
+            'secgroup_rules', (),
+            lambda r: openstack_utils.add_neutron_secgroup_rules(
+                neutron_client,
+                project_id,
+                ethertypes=(('IPv4', 'IPv6') if int(ip_version) == 6
+                            else ('IPv4',)))),
+    ]
+    # If a separate service subnet for FIPs is requested, create one. This is
+    # useful for testing dynamic routing scenarios to avoid relying on directly
+    # connected routes to the external network subnet.
+    if network_config.get('fip_service_subnet_name'):
+        ext_subnets += ('fip_service_subnet',)
+        steps.append(TopologyStep(
+            'fip_service_subnet', ('ext_network',),
+            lambda r: openstack_utils.create_provider_subnet(
+                neutron_client,
+                project_id,
+                r['ext_network'],
+                subnet_name=network_config["fip_service_subnet_name"],
+                cidr=network_config["fip_service_subnet_cidr"],
+                # Disable DHCP as we don't need a metadata port serving this
+                # subnet while Neutron would fail to allocate a fixed IP for
+                # it with a service subnet constraint below.
+                dhcp=False,
+                service_types=['network:floatingip']),
+            'subnets', network_config["fip_service_subnet_name"]))
+    if subnetpools:
+        steps.extend([
+            TopologyStep(
+                'address_scope', (),
+                lambda r: openstack_utils.create_address_scope(
+                    neutron_client,
+                    project_id,
+                    network_config.get("address_scope"),
+                    ip_version=ip_version),
+                'address_scopes', network_config.get("address_scope")),
+            TopologyStep(
+                'subnetpool', ('address_scope',),
+                lambda r: openstack_utils.create_subnetpool(
+                    neutron_client,
+                    project_id,
+                    network_config.get("subnetpool_name"),
+                    network_config.get("subnetpool_prefix"),
+                    r['address_scope']),
+                'subnetpools', network_config.get("subnetpool_name")),
+        ])
+    steps.extend([
+        # The gateway can only be set once the external subnets exist.
+        TopologyStep(
+            'router_gateway', ('provider_router', 'ext_network') + ext_subnets,
+            lambda r: _plug_extnet_into_router(
+                neutron_client,
+                r['provider_router'],
+                r['ext_network'])),
+        TopologyStep(
+            'router_interface',
+            ('provider_router', 'project_network', 'project_subnet'),
+            lambda r: openstack_utils.plug_subnet_into_router(
+                neutron_client,
+                network_config["router_name"],
+                r['project_network'],
+                r['project_subnet'])),
+    ])
+    return NetworkTopology(neutron_client, steps)
+
+
+def sdn_provider_vlan_topology(neutron_client, project_id, network_config):
+    """Describe the provider VLAN topology for a network configuration.
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param project_id: Project ID
+    :type project_id: string
+    :param network_config: Network configuration settings dictionary
+    :type network_config: dict
+    :returns: Network topology
+    :rtype: NetworkTopology
+    """
+    steps = [
+        TopologyStep(
+            'provider_vlan_network', (),
+            lambda r: openstack_utils.create_provider_network(
+                neutron_client,
+                project_id,
+                net_name=network_config["provider_vlan_net_name"],
+                external=False,
+                shared=True,
+                network_type='vlan',
+                vlan_id=network_config["provider_vlan_id"]),
+            'networks', network_config["provider_vlan_net_name"]),
+        TopologyStep(
+            'provider_vlan_subnet', ('provider_vlan_network',),
+            lambda r: openstack_utils.create_provider_subnet(
+                neutron_client,
+                project_id,
+                r['provider_vlan_network'],
+                network_config["provider_vlan_subnet_name"],
+                cidr=network_config["provider_vlan_cidr"],
+                dhcp=True),
+            'subnets', network_config["provider_vlan_subnet_name"]),
+        TopologyStep(
+            'router_interface',
+            ('provider_vlan_network', 'provider_vlan_subnet'),
+            lambda r: openstack_utils.plug_subnet_into_router(
+                neutron_client,
+                network_config["router_name"],
+                r['provider_vlan_network'],
+                r['provider_vlan_subnet'])),
+        TopologyStep(
+            'secgroup_rules', (),
+            lambda r: openstack_utils.add_neutron_secgroup_rules(
+                neutron_client, project_id)),
+    ]
+    return NetworkTopology(neutron_client, steps)
+
+
+def _get_admin_project_id(keystone_client):
+    """Resolve the admin project from the overcloud openrc into an id."""
+    admin_domain = None
+    if openstack_utils.get_keystone_api_version() > 2:
+        admin_domain = "admin_domain"
+    return openstack_utils.get_project_id(
+        keystone_client,
+        "admin",
+        domain_name=admin_domain,
+    )
+
+
 def setup_sdn(network_config, keystone_session=None):
     """Perform setup for Software Defined Network.
 
@@ -112,98 +444,10 @@ def setup_sdn(network_config, keystone_session=None):
     neutron_client = openstack_utils.get_neutron_session_client(
         keystone_session)
 
-    admin_domain = None
-    if openstack_utils.get_keystone_api_version() > 2:
-        admin_domain = "admin_domain"
-    # Resolve the project name from the overcloud openrc into a project id
-    project_id = openstack_utils.get_project_id(
-        keystone_client,
-        "admin",
-        domain_name=admin_domain,
-    )
-    # Network Setup
-    subnetpools = False
-    if network_config.get("subnetpool_prefix"):
-        subnetpools = True
+    project_id = _get_admin_project_id(keystone_client)
 
     logging.info("Configuring overcloud network")
-    # Create the external network
-    ext_network = openstack_utils.create_provider_network(
-        neutron_client,
-        project_id,
-        network_config["external_net_name"])
-
-    # If a separate service subnet for FIPs is requested, create one. This is
-    # useful for testing dynamic routing scenarios to avoid relying on directly
-    # connected routes to the external network subnet.
-    if network_config.get('fip_service_subnet_name'):
-        openstack_utils.create_provider_subnet(
-            neutron_client,
-            project_id,
-            ext_network,
-            subnet_name=network_config["fip_service_subnet_name"],
-            cidr=network_config["fip_service_subnet_cidr"],
-            # Disable DHCP as we don't need a metadata port serving this
-            # subnet while Neutron would fail to allocate a fixed IP for it
-            # with a service subnet constraint below.
-            dhcp=False,
-            service_types=['network:floatingip']
-        )
-    openstack_utils.create_provider_subnet(
-        neutron_client,
-        project_id,
-        ext_network,
-        network_config["external_subnet_name"],
-        network_config["default_gateway"],
-        network_config["external_net_cidr"],
-        network_config["start_floating_ip"],
-        network_config["end_floating_ip"],
-        dhcp=True)
-    provider_router = (
-        openstack_utils.create_provider_router(neutron_client, project_id))
-    openstack_utils.plug_extnet_into_router(
-        neutron_client,
-        provider_router,
-        ext_network)
-    ip_version = network_config.get("ip_version") or 4
-    subnetpool = None
-    if subnetpools:
-        address_scope = openstack_utils.create_address_scope(
-            neutron_client,
-            project_id,
-            network_config.get("address_scope"),
-            ip_version=ip_version)
-        subnetpool = openstack_utils.create_subnetpool(
-            neutron_client,
-            project_id,
-            network_config.get("subnetpool_name"),
-            network_config.get("subnetpool_prefix"),
-            address_scope)
-    project_network = openstack_utils.create_project_network(
-        neutron_client,
-        project_id,
-        shared=False,
-        network_type=network_config["network_type"],
-        net_name=network_config.get("project_net_name", "private"))
-    project_subnet = openstack_utils.create_project_subnet(
-        neutron_client,
-        project_id,
-        project_network,
-        network_config.get("private_net_cidr"),
-        subnetpool=subnetpool,
-        ip_version=ip_version,
-        subnet_name=network_config.get("project_subnet_name",
-                                       "private_subnet"))
-    openstack_utils.update_subnet_dns(
-        neutron_client,
-        project_subnet,
-        network_config["external_dns"])
-    openstack_utils.plug_subnet_into_router(
-        neutron_client,
-        network_config["router_name"],
-        project_network,
-        project_subnet)
-    openstack_utils.add_neutron_secgroup_rules(neutron_client, project_id)
+    sdn_topology(neutron_client, project_id, network_config).apply()
 
 
 def setup_sdn_provider_vlan(network_config, keystone_session=None):
@@ -227,39 +471,11 @@ def setup_sdn_provider_vlan(network_config, keystone_session=None):
     neutron_client = openstack_utils.get_neutron_session_client(
         keystone_session)
 
-    admin_domain = None
-    if openstack_utils.get_keystone_api_version() > 2:
-        admin_domain = "admin_domain"
-    # Resolve the project name from the overcloud openrc into a project id
-    project_id = openstack_utils.get_project_id(
-        keystone_client,
-        "admin",
-        domain_name=admin_domain,
-    )
+    project_id = _get_admin_project_id(keystone_client)
 
     logging.info("Configuring VLAN provider network")
-    # Create the external network
-    provider_vlan_network = openstack_utils.create_provider_network(
-        neutron_client,
-        project_id,
-        net_name=network_config["provider_vlan_net_name"],
-        external=False,
-        shared=True,
-        network_type='vlan',
-        vlan_id=network_config["provider_vlan_id"])
-    provider_vlan_subnet = openstack_utils.create_provider_subnet(
-        neutron_client,
-        project_id,
-        provider_vlan_network,
-        network_config["provider_vlan_subnet_name"],
-        cidr=network_config["provider_vlan_cidr"],
-        dhcp=True)
-    openstack_utils.plug_subnet_into_router(
-        neutron_client,
-        network_config["router_name"],
-        provider_vlan_network,
-        provider_vlan_subnet)
-    openstack_utils.add_neutron_secgroup_rules(neutron_client, project_id)
+    sdn_provider_vlan_topology(
+        neutron_client, project_id, network_config).apply()
 
 
 def setup_gateway_ext_port(network_config, keystone_session=None,
@@ -10,6 +10,20 @@ import zaza.openstack.utilities.cert
 ISSUER_NAME = 'OSCI'
 
 
+def get_cert_factory():
+    """Return the factory issuing the pre-deploy certs.
+
+    Certs are cached in the directory named by the TEST_CERT_CACHE_DIR
+    environment variable, if set. TEST_CERT_KEY_TYPE=ecdsa selects ECDSA
+    rather than RSA keys.
+
+    :rtype: zaza.openstack.utilities.cert.CertFactory
+    """
+    return zaza.openstack.utilities.cert.CertFactory(
+        cache_dir=os.environ.get('TEST_CERT_CACHE_DIR'),
+        key_type=os.environ.get('TEST_CERT_KEY_TYPE', 'rsa'))
+
+
 def set_cidr_certs():
     """Create certs and keys for deploy using IP SANS from CIDR.
 
@@ -22,9 +36,8 @@ def set_cidr_certs():
     The cert and key are then base 64 encoded and assigned to the TEST_KEY
     and TEST_CERT environment variables.
     """
-    (cakey, cacert) = zaza.openstack.utilities.cert.generate_cert(
-        ISSUER_NAME,
-        generate_ca=True)
+    factory = get_cert_factory()
+    (cakey, cacert) = factory.ca(ISSUER_NAME)
     os.environ['TEST_CAKEY'] = base64.b64encode(cakey).decode()
     os.environ['TEST_CACERT'] = base64.b64encode(cacert).decode()
     # We need to restrain the number of SubjectAlternativeNames we attempt to
@@ -36,7 +49,7 @@ def set_cidr_certs():
     for addr in itertools.islice(
             ipaddress.IPv4Network(os.environ.get('TEST_CIDR_EXT')), 2**11):
         alt_names.append(str(addr))
-    (key, cert) = zaza.openstack.utilities.cert.generate_cert(
+    (key, cert) = factory.issue(
         '*.serverstack',
         alternative_names=alt_names,
         issuer_name=ISSUER_NAME,
@@ -58,19 +71,18 @@ def set_certs_per_vips():
     The cert and key are then base 64 encoded and assigned to the
     TEST_VIP06_KEY and TEST_VIP06_CERT environment variables.
     """
-    (cakey, cacert) = zaza.openstack.utilities.cert.generate_cert(
-        ISSUER_NAME,
-        generate_ca=True)
+    factory = get_cert_factory()
+    (cakey, cacert) = factory.ca(ISSUER_NAME)
     os.environ['TEST_CAKEY'] = base64.b64encode(cakey).decode()
     os.environ['TEST_CACERT'] = base64.b64encode(cacert).decode()
-    for vip_name, vip_ip in os.environ.items():
-        if vip_name.startswith('TEST_VIP'):
-            (key, cert) = zaza.openstack.utilities.cert.generate_cert(
-                '*.serverstack',
-                alternative_names=[vip_ip],
-                issuer_name=ISSUER_NAME,
-                signing_key=cakey)
-            os.environ[
-                '{}_KEY'.format(vip_name)] = base64.b64encode(key).decode()
-            os.environ[
-                '{}_CERT'.format(vip_name)] = base64.b64encode(cert).decode()
+    vips = [(vip_name, vip_ip) for vip_name, vip_ip in os.environ.items()
+            if vip_name.startswith('TEST_VIP')]
+    certs = factory.issue_all(
+        [('*.serverstack', [vip_ip]) for _, vip_ip in vips],
+        issuer_name=ISSUER_NAME,
+        signing_key=cakey)
+    for (vip_name, _), (key, cert) in zip(vips, certs):
+        os.environ[
+            '{}_KEY'.format(vip_name)] = base64.b64encode(key).decode()
+        os.environ[
+            '{}_CERT'.format(vip_name)] = base64.b64encode(cert).decode()
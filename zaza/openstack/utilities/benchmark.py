@@ -0,0 +1,269 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in store of benchmark results, with a regression gate.
+
+The store is enabled by pointing the TEST_BENCHMARK_STORE environment
+variable at a JSON lines file, which results are appended to. Each result is
+recorded with the bundle, named by the TEST_BUNDLE environment variable, the
+charm revisions and a fingerprint of the hardware of the machines of the
+model.
+
+A result regresses when one of its metrics is worse, by more than a
+tolerance, than the latest result of the same benchmark recorded by an
+earlier run on the same bundle and hardware. The charm revisions may differ,
+catching the changes they bring is the point of the gate.
+"""
+
+import collections
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+
+import zaza.model
+from zaza import sync_wrapper
+
+STORE_ENV = 'TEST_BENCHMARK_STORE'
+BUNDLE_ENV = 'TEST_BUNDLE'
+TOLERANCE_ENV = 'TEST_BENCHMARK_TOLERANCE'
+DEFAULT_TOLERANCE = 0.1
+
+BenchmarkContext = collections.namedtuple(
+    'BenchmarkContext', ['run', 'bundle', 'charms', 'hardware'])
+
+Regression = collections.namedtuple(
+    'Regression', ['key', 'metric', 'baseline', 'value', 'change'])
+
+# Hardware characteristics that do not tell machines apart.
+_PLACEMENT_RE = re.compile(r'\s*\b(availability-zone|virt-type)=\S+')
+
+_lock = threading.Lock()
+_stores = {}
+
+
+def enabled():
+    """Return whether benchmark results are stored.
+
+    :rtype: bool
+    """
+    return bool(os.environ.get(STORE_ENV))
+
+
+def tolerance():
+    """Return the tolerance of the regression gate.
+
+    :returns: Fraction a metric may worsen by, from TEST_BENCHMARK_TOLERANCE
+    :rtype: float
+    """
+    return float(os.environ.get(TOLERANCE_ENV) or DEFAULT_TOLERANCE)
+
+
+def lower_is_better(metric):
+    """Return whether lower values of a metric are better.
+
+    Latencies, times and durations are better lower, throughputs higher.
+
+    :param metric: Name of the metric
+    :type metric: str
+    :rtype: bool
+    """
+    return (metric.startswith('latency') or
+            (metric.startswith('p') and metric[1:].isdigit()) or
+            metric.endswith(('_time', 'seconds')))
+
+
+def hardware_fingerprint(hardware):
+    """Return a fingerprint of the hardware of machines.
+
+    :param hardware: Hardware characteristics of each machine, as reported
+                     by juju, e.g. 'arch=amd64 cores=4 mem=8192M'
+    :type hardware: Iterable[str]
+    :rtype: str
+    """
+    machines = sorted(_PLACEMENT_RE.sub('', h or '').strip()
+                      for h in hardware)
+    return hashlib.sha256(
+        json.dumps(machines).encode()).hexdigest()[:16]
+
+
+async def async_get_context(model_name=None):
+    """Return the context results are recorded in, from one status call.
+
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :rtype: BenchmarkContext
+    """
+    status = await zaza.model.async_get_status(model_name=model_name)
+    charms = {name: '{}:{}'.format(application.charm, application.charm_rev)
+              for name, application in status.applications.items()}
+    return BenchmarkContext(
+        run=uuid.uuid4().hex,
+        bundle=(os.environ.get(BUNDLE_ENV) or
+                ','.join(sorted(status.applications))),
+        charms=charms,
+        hardware=hardware_fingerprint(
+            machine.hardware for machine in status.machines.values()))
+
+
+get_context = sync_wrapper(async_get_context)
+
+
+class BenchmarkStore(object):
+    """JSON lines store of benchmark results.
+
+    Example usage::
+
+        store = BenchmarkStore('results.jsonl', get_context())
+        store.record('rados_write/block_size=4096', {'iops': 1200.0})
+        assert not store.regressions(tolerance=0.1)
+    """
+
+    def __init__(self, path, context):
+        """Open a store.
+
+        :param path: Path of the JSON lines file, created if missing
+        :type path: str
+        :param context: Context of the results recorded
+        :type context: BenchmarkContext
+        """
+        self.path = path
+        self.context = context
+        self.recorded = []
+
+    def entries(self):
+        """Return the results in the store, oldest first.
+
+        :rtype: List[Dict[str, Any]]
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def record(self, key, metrics, test=None):
+        """Record the result of a benchmark.
+
+        :param key: Key identifying the benchmark across runs
+        :type key: str
+        :param metrics: Metrics of the result, by name
+        :type metrics: Dict[str, float]
+        :param test: Id of the test recording the result
+        :type test: Optional[str]
+        :returns: The entry recorded
+        :rtype: Dict[str, Any]
+        """
+        entry = dict(
+            self.context._asdict(),
+            key=key, test=test, metrics=dict(metrics),
+            time=datetime.datetime.utcnow().isoformat())
+        with _lock, open(self.path, 'a') as f:
+            f.write(json.dumps(entry, sort_keys=True) + '\n')
+        self.recorded.append(entry)
+        return entry
+
+    def baseline(self, key):
+        """Return the latest result of a benchmark from an earlier run.
+
+        Only results on the same bundle and hardware are considered.
+
+        :param key: Key identifying the benchmark across runs
+        :type key: str
+        :rtype: Optional[Dict[str, Any]]
+        """
+        for entry in reversed(self.entries()):
+            if (entry['key'] == key and
+                    entry['run'] != self.context.run and
+                    entry['bundle'] == self.context.bundle and
+                    entry['hardware'] == self.context.hardware):
+                return entry
+        return None
+
+    def compare(self, key, metrics):
+        """Compare metrics with the baseline of a benchmark.
+
+        :param key: Key identifying the benchmark across runs
+        :type key: str
+        :param metrics: Metrics of the result, by name
+        :type metrics: Dict[str, float]
+        :returns: Metrics in both, with their relative change, positive when
+                  better
+        :rtype: List[Regression]
+        """
+        baseline = self.baseline(key)
+        if baseline is None:
+            return []
+        comparison = []
+        for metric, value in sorted(metrics.items()):
+            base = baseline['metrics'].get(metric)
+            if not base or value is None:
+                continue
+            change = (value - base) / base
+            if lower_is_better(metric):
+                change = -change
+            comparison.append(Regression(key, metric, base, value, change))
+        return comparison
+
+    def regressions(self, tolerance=DEFAULT_TOLERANCE, test_prefix=None):
+        """Return the metrics recorded by this run worse than the baseline.
+
+        :param tolerance: Fraction a metric may worsen by
+        :type tolerance: float
+        :param test_prefix: Only check results of tests with this id prefix
+        :type test_prefix: Optional[str]
+        :rtype: List[Regression]
+        """
+        regressions = []
+        for entry in self.recorded:
+            if test_prefix and not (entry['test'] or '').startswith(
+                    test_prefix):
+                continue
+            regressions.extend(
+                c for c in self.compare(entry['key'], entry['metrics'])
+                if c.change < -tolerance)
+        return regressions
+
+
+def get_store(model_name=None):
+    """Return the store of this run, None unless TEST_BENCHMARK_STORE is set.
+
+    The context of the run is gathered once per model.
+
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :rtype: Optional[BenchmarkStore]
+    """
+    if not enabled():
+        return None
+    path = os.environ[STORE_ENV]
+    if (path, model_name) not in _stores:
+        _stores[(path, model_name)] = BenchmarkStore(
+            path, get_context(model_name=model_name))
+    return _stores[(path, model_name)]
+
+
+def format_regressions(regressions):
+    """Return a readable summary of regressions.
+
+    :param regressions: Regressions to summarise
+    :type regressions: List[Regression]
+    :rtype: str
+    """
+    return '\n'.join(
+        '{} {}: {} -> {} ({:+.1%})'.format(
+            r.key, r.metric, r.baseline, r.value, r.change)
+        for r in regressions)
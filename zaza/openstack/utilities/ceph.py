@@ -1,6 +1,9 @@
 """Module containing Ceph related utilities."""
+import collections
 import json
 import logging
+import shlex
+import time
 
 import zaza.model as zaza_model
 import zaza.utilities.juju as juju_utils
@@ -12,6 +15,14 @@ ERASURE_POOL_TYPE = 'erasure-coded'
 REPLICATED_POOL_CODE = 1
 ERASURE_POOL_CODE = 3
 
+# Outputs gathered in a CephClusterSnapshot, by key.
+SNAPSHOT_COMMANDS = collections.OrderedDict([
+    ('df', 'ceph df --format=json'),
+    ('pools', 'ceph osd pool ls detail --format=json'),
+    ('tree', 'ceph osd tree --format=json'),
+    ('status', 'ceph status --format=json'),
+])
+
 
 def get_expected_pools(radosgw=False):
     """Get expected ceph pools.
@@ -63,7 +74,179 @@ def get_expected_pools(radosgw=False):
     return pools
 
 
-def get_ceph_pools(unit_name, model_name=None):
+class CephClusterSnapshot(object):
+    """State of a ceph cluster at one point in time.
+
+    Gathers the output of ``ceph df``, ``ceph osd pool ls detail``,
+    ``ceph osd tree`` and ``ceph status``, fetched in one round-trip by
+    get_ceph_snapshot(), and indexes the pools and OSDs.
+
+    Example usage::
+
+        before = get_ceph_snapshot()
+        ...
+        after = get_ceph_snapshot()
+        after.pool_sample(after.pools['cinder-ceph'])
+        before.diff(after)
+    """
+
+    def __init__(self, df, pools, tree, status, taken_at=None):
+        """Index the outputs of the ceph commands.
+
+        :param df: Output of ceph df
+        :type df: dict
+        :param pools: Output of ceph osd pool ls detail
+        :type pools: List[dict]
+        :param tree: Output of ceph osd tree
+        :type tree: dict
+        :param status: Output of ceph status
+        :type status: dict
+        :param taken_at: time.time() the snapshot was taken at
+        :type taken_at: Optional[float]
+        """
+        self.df = df
+        self.pool_details = pools
+        self.tree = tree
+        self.status = status
+        self.taken_at = time.time() if taken_at is None else taken_at
+        self._details = {pool['pool_name']: pool for pool in pools}
+        self._stats = {pool['id']: pool for pool in df.get('pools', [])}
+        # Pools created after ceph df ran are only in the details.
+        self.pools = {pool['name']: pool['id']
+                      for pool in df.get('pools', [])}
+        self.pools.update({name: pool['pool']
+                           for name, pool in self._details.items()})
+        self._names = {pool_id: name for name, pool_id in self.pools.items()}
+        self.osds = {node['id']: node for node in tree.get('nodes', [])
+                     if node.get('type') == 'osd'}
+
+    def pool_name(self, pool_id):
+        """Return the name of a pool.
+
+        :param pool_id: Ceph pool ID
+        :type pool_id: int
+        :rtype: str
+        :raises: KeyError
+        """
+        return self._names[pool_id]
+
+    def pool_detail(self, pool):
+        """Return the details of a pool, as in ceph osd pool ls detail.
+
+        :param pool: Name or ID of the pool
+        :type pool: Union[str, int]
+        :rtype: dict
+        :raises: KeyError
+        """
+        if isinstance(pool, int):
+            pool = self.pool_name(pool)
+        return self._details[pool]
+
+    def pool_stats(self, pool):
+        """Return the usage of a pool, as in ceph df.
+
+        :param pool: Name or ID of the pool
+        :type pool: Union[str, int]
+        :rtype: dict
+        :raises: KeyError
+        """
+        if not isinstance(pool, int):
+            pool = self.pools[pool]
+        return self._stats[pool]['stats']
+
+    def pool_sample(self, pool_id):
+        """Return the name, object count and kb used of a pool.
+
+        :param pool_id: Ceph pool ID
+        :type pool_id: int
+        :rtype: Tuple[str, int, int]
+        :raises: KeyError
+        """
+        stats = self.pool_stats(pool_id)
+        return self.pool_name(pool_id), stats['objects'], stats['kb_used']
+
+    @property
+    def health(self):
+        """Return the health of the cluster, e.g. HEALTH_OK.
+
+        :rtype: Optional[str]
+        """
+        health = self.status.get('health', {})
+        return health.get('status', health.get('overall_status'))
+
+    def diff(self, other):
+        """Return what changed from this snapshot to a later one.
+
+        :param other: Later snapshot
+        :type other: CephClusterSnapshot
+        :returns: Pools added and removed, changes of the object count and
+                  kb used of the other pools, changes of the status of the
+                  OSDs and of the health of the cluster, e.g.
+                  {'pools_added': ['glance'], 'pools_removed': [],
+                   'pools': {'cinder-ceph': {'objects': 12, 'kb_used': 96}},
+                   'osds': {3: ('up', 'down')},
+                   'health': ('HEALTH_OK', 'HEALTH_WARN')}
+        :rtype: dict
+        """
+        pools = {}
+        for name in sorted(set(self.pools) & set(other.pools)):
+            try:
+                before = self.pool_stats(name)
+                after = other.pool_stats(name)
+            except KeyError:
+                continue
+            changes = {key: after[key] - before[key]
+                       for key in ('objects', 'kb_used')
+                       if after.get(key, 0) != before.get(key, 0)}
+            if changes:
+                pools[name] = changes
+        osds = {}
+        for osd_id in sorted(set(self.osds) | set(other.osds)):
+            before = self.osds.get(osd_id, {}).get('status')
+            after = other.osds.get(osd_id, {}).get('status')
+            if before != after:
+                osds[osd_id] = (before, after)
+        return {
+            'pools_added': sorted(set(other.pools) - set(self.pools)),
+            'pools_removed': sorted(set(self.pools) - set(other.pools)),
+            'pools': pools,
+            'osds': osds,
+            'health': (None if self.health == other.health
+                       else (self.health, other.health)),
+        }
+
+
+def get_ceph_snapshot(unit_name=None, model_name=None):
+    """Return a snapshot of the cluster, fetched in one round-trip.
+
+    :param unit_name: Name of the unit to query, defaults to the ceph-mon
+                      leader
+    :type unit_name: Optional[str]
+    :param model_name: Name of model to operate in
+    :type model_name: str
+    :returns: Snapshot of the cluster
+    :rtype: CephClusterSnapshot
+    :raise: zaza_model.CommandRunFailed
+    """
+    # Print the JSON outputs as the values of one JSON object
+    script = "printf '{'; "
+    for index, (key, command) in enumerate(SNAPSHOT_COMMANDS.items()):
+        script += "printf '{}\"{}\": '; {}; ".format(
+            ',' if index else '', key, command)
+    script += "printf '}'"
+    cmd = 'sudo sh -ec {}'.format(shlex.quote(script))
+    if unit_name is None:
+        result = zaza_model.run_on_leader(
+            'ceph-mon', cmd, model_name=model_name)
+    else:
+        result = zaza_model.run_on_unit(
+            unit_name, cmd, model_name=model_name)
+    if int(result.get('Code')) != 0:
+        raise zaza_model.CommandRunFailed(cmd, result)
+    return CephClusterSnapshot(**json.loads(result.get('Stdout')))
+
+
+def get_ceph_pools(unit_name, model_name=None, snapshot=None):
     """Get ceph pools.
 
     Return a dict of ceph pools from a single ceph unit, with
@@ -73,10 +256,14 @@ def get_ceph_pools(unit_name, model_name=None):
     :type unit_name: string
     :param model_name: Name of model to operate in
     :type model_name: str
+    :param snapshot: Snapshot to read the pools from, rather than the unit
+    :type snapshot: Optional[CephClusterSnapshot]
     :returns: Dict of ceph pools
     :rtype: dict
     :raise: zaza_model.CommandRunFailed
     """
+    if snapshot is not None:
+        return dict(snapshot.pools)
     pools = {}
     cmd = 'sudo ceph osd lspools'
     result = zaza_model.run_on_unit(unit_name, cmd, model_name=model_name)
@@ -104,7 +291,8 @@ def get_ceph_pools(unit_name, model_name=None):
     return pools
 
 
-def get_ceph_pool_details(query_leader=True, unit_name=None, model_name=None):
+def get_ceph_pool_details(query_leader=True, unit_name=None, model_name=None,
+                          snapshot=None):
     """Get ceph pool details.
 
     Return a list of ceph pools details dicts.
@@ -115,10 +303,14 @@ def get_ceph_pool_details(query_leader=True, unit_name=None, model_name=None):
     :type unit_name: string
     :param model_name: Name of model to operate in
     :type model_name: str
+    :param snapshot: Snapshot to read the details from, rather than a unit
+    :type snapshot: Optional[CephClusterSnapshot]
     :returns: Dict of ceph pools
     :rtype: List[Dict,]
     :raise: zaza_model.CommandRunFailed
     """
+    if snapshot is not None:
+        return snapshot.pool_details
     cmd = 'sudo ceph osd pool ls detail -f json'
     if query_leader and unit_name:
         raise ValueError("Cannot set query_leader and unit_name")
@@ -155,7 +347,8 @@ def get_ceph_df(unit_name, model_name=None):
     return json.loads(result.get('Stdout'))
 
 
-def get_ceph_pool_sample(unit_name, pool_id=0, model_name=None):
+def get_ceph_pool_sample(unit_name, pool_id=0, model_name=None,
+                         snapshot=None):
     """Return list of ceph pool attributes.
 
     Take a sample of attributes of a ceph pool, returning ceph
@@ -168,16 +361,16 @@ def get_ceph_pool_sample(unit_name, pool_id=0, model_name=None):
     :type pool_id: int
     :param model_name: Name of model to operate in
     :type model_name: str
+    :param snapshot: Snapshot to take the sample from, rather than the unit
+    :type snapshot: Optional[CephClusterSnapshot]
     :returns: List of pool name, object count, kb disk space used
     :rtype: list
     :raises: zaza.model.CommandRunFailed
     """
-    df = get_ceph_df(unit_name, model_name)
-    for pool in df['pools']:
-        if pool['id'] == pool_id:
-            pool_name = pool['name']
-            obj_count = pool['stats']['objects']
-            kb_used = pool['stats']['kb_used']
+    if snapshot is None:
+        snapshot = CephClusterSnapshot(
+            get_ceph_df(unit_name, model_name), [], {}, {})
+    pool_name, obj_count, kb_used = snapshot.pool_sample(pool_id)
 
     logging.debug('Ceph {} pool (ID {}): {} objects, '
                   '{} kb used'.format(pool_name, pool_id,
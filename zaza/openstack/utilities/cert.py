@@ -13,12 +13,56 @@
 # limitations under the License.
 """Module for working with x.509 certificates."""
 
+import concurrent.futures
 import cryptography
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
 import cryptography.hazmat.primitives.hashes as hashes
 import cryptography.hazmat.primitives.serialization as serialization
 import datetime
+import hashlib
 import ipaddress
+import json
+import logging
+import os
+
+KEY_TYPES = ('rsa', 'ecdsa')
+
+
+def _generate_private_key(key_type='rsa'):
+    """Generate a private key.
+
+    :param key_type: One of KEY_TYPES
+    :type key_type: str
+    :returns: The private key
+    :raises: ValueError if the key type is unknown
+    """
+    if key_type == 'rsa':
+        return rsa.generate_private_key(
+            public_exponent=65537,  # per RFC 5280 Appendix C
+            key_size=2048,
+            backend=cryptography.hazmat.backends.default_backend()
+        )
+    if key_type == 'ecdsa':
+        return ec.generate_private_key(
+            ec.SECP256R1(),
+            backend=cryptography.hazmat.backends.default_backend()
+        )
+    raise ValueError('Unknown key type {}'.format(key_type))
+
+
+def generate_private_key(key_type='rsa'):
+    """Generate a private key, for use with generate_cert.
+
+    :param key_type: One of KEY_TYPES
+    :type key_type: str
+    :returns: PEM encoded PKCS8 formatted private key
+    :rtype: bytes
+    :raises: ValueError if the key type is unknown
+    """
+    return _generate_private_key(key_type).private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption())
 
 
 def generate_cert(common_name,
@@ -27,7 +71,9 @@ def generate_cert(common_name,
                   issuer_name=None,
                   signing_key=None,
                   signing_key_password=None,
-                  generate_ca=False):
+                  generate_ca=False,
+                  key_type='rsa',
+                  private_key=None):
     """Generate x.509 certificate.
 
     Example of how to create a certificate chain::
@@ -54,6 +100,11 @@ def generate_cert(common_name,
     :type signing_key_password: Optional[str]
     :param generate_ca: Generate a certificate usable as a CA certificate
     :type generate_ca: bool
+    :param key_type: Type of the private key to generate, one of KEY_TYPES
+    :type key_type: str
+    :param private_key: PEM encoded unencrypted private key to use rather
+                        than generating one, see generate_private_key
+    :type private_key: Optional[bytes]
     :returns: x.509 certificate
     :rtype: cryptography.x509.Certificate
     """
@@ -72,11 +123,14 @@ def generate_cert(common_name,
             backend=cryptography.hazmat.backends.default_backend(),
         )
 
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,  # per RFC 5280 Appendix C
-        key_size=2048,
-        backend=cryptography.hazmat.backends.default_backend()
-    )
+    if private_key:
+        private_key = serialization.load_pem_private_key(
+            private_key,
+            password=None,
+            backend=cryptography.hazmat.backends.default_backend(),
+        )
+    else:
+        private_key = _generate_private_key(key_type)
 
     public_key = private_key.public_key()
 
@@ -244,3 +298,188 @@ def is_keys_valid(public_key_string, private_key_string):
     except ValueError:
         plaintext = ''
     return plaintext == message
+
+
+class CertFactory(object):
+    """Issue certificates, generating keys in parallel and caching results.
+
+    The private keys of certificates that are not cached are generated in a
+    pool of processes. When a cache directory is given, CA and issued
+    certificates are stored in it and reused, by later runs too, for as long
+    as they stay valid for `min_validity` more days. Cached private keys are
+    stored unencrypted, so the directory must only be readable by the user.
+
+    Example usage::
+
+        factory = CertFactory(cache_dir='~/.cache/zaza-certs')
+        (cakey, cacert) = factory.ca('DivineAuthority')
+        certs = factory.issue_all(
+            [('test.com', ['10.0.0.1']), ('test.com', ['10.0.0.2'])],
+            issuer_name='DivineAuthority',
+            signing_key=cakey)
+    """
+
+    # Cached certificates valid for fewer days than this are issued again.
+    min_validity = 7
+
+    def __init__(self, cache_dir=None, key_type='rsa', processes=None):
+        """Create a factory.
+
+        :param cache_dir: Directory to cache certificates in, None to not
+                          cache them
+        :type cache_dir: Optional[str]
+        :param key_type: Type of the private keys, one of KEY_TYPES
+        :type key_type: str
+        :param processes: Number of processes generating keys, defaults to
+                          the number of CPUs
+        :type processes: Optional[int]
+        :raises: ValueError if the key type is unknown
+        """
+        if key_type not in KEY_TYPES:
+            raise ValueError('Unknown key type {}'.format(key_type))
+        self.cache_dir = cache_dir and os.path.expanduser(cache_dir)
+        self.key_type = key_type
+        self.processes = processes
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+    def _cache_path(self, common_name, alternative_names, issuer_name,
+                    signing_key, generate_ca):
+        """Return the path caching a certificate, None if not caching."""
+        if not self.cache_dir:
+            return None
+        if isinstance(signing_key, str):
+            signing_key = signing_key.encode()
+        cache_key = json.dumps([
+            common_name, list(alternative_names or []), issuer_name,
+            hashlib.sha256(signing_key or b'').hexdigest(), generate_ca,
+            self.key_type])
+        return os.path.join(
+            self.cache_dir,
+            '{}.json'.format(hashlib.sha256(cache_key.encode()).hexdigest()))
+
+    def _load(self, path):
+        """Return a cached key and certificate, None if missing or expiring.
+
+        :param path: Path of the cache entry
+        :type path: Optional[str]
+        :rtype: Optional[Tuple[bytes, bytes]]
+        """
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            key, cert = entry['key'].encode(), entry['cert'].encode()
+            not_valid_after = cryptography.x509.load_pem_x509_certificate(
+                cert, cryptography.hazmat.backends.default_backend()
+            ).not_valid_after
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning('Ignoring cached certificate {}: {}'.format(
+                path, e))
+            return None
+        if not_valid_after - datetime.datetime.utcnow() < datetime.timedelta(
+                self.min_validity):
+            return None
+        return key, cert
+
+    def _store(self, path, key, cert):
+        """Cache a key and certificate.
+
+        :param path: Path of the cache entry
+        :type path: Optional[str]
+        :param key: PEM encoded private key
+        :type key: bytes
+        :param cert: PEM encoded certificate
+        :type cert: bytes
+        """
+        if not path:
+            return
+        tmp_path = '{}.tmp'.format(path)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'key': key.decode(), 'cert': cert.decode()}, f)
+        os.replace(tmp_path, path)
+
+    def generate_keys(self, count):
+        """Generate private keys, in parallel when there are several.
+
+        :param count: Number of keys
+        :type count: int
+        :returns: PEM encoded PKCS8 formatted private keys
+        :rtype: List[bytes]
+        """
+        if count < 2:
+            return [generate_private_key(self.key_type)
+                    for _ in range(count)]
+        with concurrent.futures.ProcessPoolExecutor(
+                self.processes) as executor:
+            return list(executor.map(generate_private_key,
+                                     [self.key_type] * count))
+
+    def issue_all(self, requests, issuer_name=None, signing_key=None,
+                  generate_ca=False):
+        """Issue certificates, reusing cached ones.
+
+        :param requests: Common name and alternative names of each
+                         certificate
+        :type requests: List[Tuple[str, Optional[List[str]]]]
+        :param issuer_name: Issuer name, must match signing_key issuer
+        :type issuer_name: Optional[str]
+        :param signing_key: PEM encoded PKCS8 formatted private key, None for
+                            self signed certificates
+        :type signing_key: Optional[bytes]
+        :param generate_ca: Issue certificates usable as CA certificates
+        :type generate_ca: bool
+        :returns: PEM encoded private key and certificate of each request
+        :rtype: List[Tuple[bytes, bytes]]
+        """
+        paths = [self._cache_path(common_name, alternative_names,
+                                  issuer_name, signing_key, generate_ca)
+                 for common_name, alternative_names in requests]
+        results = [self._load(path) for path in paths]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        logging.debug('Issuing {} certificates, {} cached'.format(
+            len(missing), len(results) - len(missing)))
+        for i, private_key in zip(missing, self.generate_keys(len(missing))):
+            common_name, alternative_names = requests[i]
+            results[i] = generate_cert(
+                common_name,
+                alternative_names=alternative_names,
+                issuer_name=issuer_name,
+                signing_key=signing_key,
+                generate_ca=generate_ca,
+                private_key=private_key)
+            self._store(paths[i], *results[i])
+        return results
+
+    def issue(self, common_name, alternative_names=None, issuer_name=None,
+              signing_key=None):
+        """Issue a certificate, reusing a cached one.
+
+        :param common_name: Common Name to use in the certificate
+        :type common_name: str
+        :param alternative_names: Names to add as SubjectAlternativeName
+        :type alternative_names: Optional[List[str]]
+        :param issuer_name: Issuer name, must match signing_key issuer
+        :type issuer_name: Optional[str]
+        :param signing_key: PEM encoded PKCS8 formatted private key
+        :type signing_key: Optional[bytes]
+        :returns: PEM encoded private key and certificate
+        :rtype: Tuple[bytes, bytes]
+        """
+        return self.issue_all([(common_name, alternative_names)],
+                              issuer_name=issuer_name,
+                              signing_key=signing_key)[0]
+
+    def ca(self, common_name):
+        """Issue a CA certificate, reusing a cached one.
+
+        :param common_name: Common Name to use in the certificate
+        :type common_name: str
+        :returns: PEM encoded private key and certificate
+        :rtype: Tuple[bytes, bytes]
+        """
+        return self.issue_all([(common_name, None)], generate_ca=True)[0]
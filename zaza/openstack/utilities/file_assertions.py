@@ -14,7 +14,14 @@
 
 """Module of helpers for Zaza file assertions."""
 
+import asyncio
+import collections
+import shlex
+
 import zaza.model as model
+from zaza import sync_wrapper
+
+_GLOB_CHARS = set('*?[')
 
 
 def assert_path_glob(test_case, unit, file_details, paths=None):
@@ -69,6 +76,146 @@ def assert_single_file(test_case, unit, file_details):
     _verify_file(test_case, unit, file_details, owner, group, mode)
 
 
+def _is_glob(path):
+    """Return whether a path is a glob pattern."""
+    return bool(_GLOB_CHARS.intersection(path))
+
+
+def _stat_script(paths):
+    """Return a shell script that stats every path and glob at once.
+
+    Each output line is the index of the path followed by the name, owner,
+    group and mode of a file it matched, or by "!missing" when it matched
+    nothing.
+    """
+    lines = ['shopt -s -q globstar']
+    for index, path in enumerate(paths):
+        # Globs are left unquoted for the shell to expand.
+        lines.append('stat -c "{index} %n %U %G %a" {path} 2>/dev/null || '
+                     'echo "{index} !missing"'.format(
+                         index=index,
+                         path=path if _is_glob(path) else shlex.quote(path)))
+    return 'bash -c {}'.format(shlex.quote('\n'.join(lines)))
+
+
+def _parse_stat_output(output):
+    """Parse the output of _stat_script.
+
+    :returns: Map of path index to a list of (name, owner, group, mode), an
+              empty list for paths that matched nothing
+    :rtype: Dict[int, List[Tuple[str, str, str, str]]]
+    """
+    stats = collections.defaultdict(list)
+    for line in output.splitlines():
+        index, _, rest = line.partition(' ')
+        if rest == '!missing':
+            stats[int(index)]
+            continue
+        name, owner, group, mode = rest.rsplit(None, 3)
+        stats[int(index)].append((name, owner, group, mode))
+    return stats
+
+
+async def async_get_file_mismatches(specs, model_name=None):
+    """Return every file whose ownership or mode differs from the specs.
+
+    The files of each unit are checked with a single command, run on all the
+    units concurrently.
+
+    Specs whose path is a glob check every file the glob matches, except the
+    files that another spec for the same unit names explicitly, so that
+    those can be given different details.
+
+    :param specs: Pairs of unit name and file details. File details are a
+                  dict with the path or glob and the expected owner, group and
+                  mode, which default to root, root and 600. Details set to
+                  None are not checked.
+    :type specs: List[Tuple[str, dict]]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :returns: Mismatch messages
+    :rtype: List[str]
+    """
+    by_unit = collections.OrderedDict()
+    for unit, file_details in specs:
+        by_unit.setdefault(unit, []).append(file_details)
+
+    async def _check_unit(unit, unit_specs):
+        paths = [file_details['path'] for file_details in unit_specs]
+        explicit = set(path for path in paths if not _is_glob(path))
+        result = await model.async_run_on_unit(
+            unit, _stat_script(paths), model_name=model_name)
+        stats = _parse_stat_output(result.get('Stdout', ''))
+        mismatches = []
+        for index, file_details in enumerate(unit_specs):
+            path = file_details['path']
+            glob = _is_glob(path)
+            if not stats[index]:
+                mismatches.append(
+                    'No file matches {} on {}'.format(path, unit))
+                continue
+            for name, owner, group, mode in stats[index]:
+                if glob and (name in explicit or name in ['.', '..']):
+                    continue
+                mismatches.extend(_file_mismatches(
+                    unit, file_details, owner, group, mode, path=name))
+        return mismatches
+
+    results = await asyncio.gather(*[
+        _check_unit(unit, unit_specs)
+        for unit, unit_specs in by_unit.items()])
+    return [mismatch for mismatches in results for mismatch in mismatches]
+
+get_file_mismatches = sync_wrapper(async_get_file_mismatches)
+
+
+def assert_files(test_case, specs, model_name=None):
+    """Verify the ownership and mode of files and globs on many units.
+
+    Unlike assert_path_glob and assert_single_file, every mismatch is
+    reported at once rather than only the first one.
+
+    Example usage::
+
+        file_assertions.assert_files(self, [
+            ('keystone/0', {'path': '/etc/keystone/*', 'owner': 'keystone',
+                            'group': 'keystone', 'mode': '640'}),
+            ('keystone/0', {'path': '/etc/keystone/keystone.conf',
+                            'group': 'keystone', 'mode': '640'})])
+
+    :param test_case: Test case that we are asserting in
+    :type test_case: unittest.TestCase
+    :param specs: Pairs of unit name and file details, see
+                  async_get_file_mismatches
+    :type specs: List[Tuple[str, dict]]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :returns: Nothing
+    :rtype: None
+    """
+    mismatches = get_file_mismatches(specs, model_name=model_name)
+    if mismatches:
+        test_case.fail('\n'.join(mismatches))
+
+
+def _file_mismatches(unit, file_details, actual_owner, actual_group,
+                     actual_mode, path=None):
+    """Return the ways in which a file differs from its details.
+
+    :returns: Mismatch messages
+    :rtype: List[str]
+    """
+    mismatches = []
+    for thing, key, default, actual in (
+            ('Owner', 'owner', 'root', actual_owner),
+            ('Group', 'group', 'root', actual_group),
+            ('Mode', 'mode', '600', actual_mode)):
+        expected = file_details.get(key, default)
+        if expected is not None and expected != actual:
+            mismatches.append(_error_message(thing, unit, actual, path))
+    return mismatches
+
+
 def _verify_file(test_case, unit, file_details,
                  actual_owner, actual_group, actual_mode, path=None):
     """Assert file has correct permissions.
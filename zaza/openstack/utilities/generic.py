@@ -15,11 +15,16 @@
 """Collection of functions that did not fit anywhere else."""
 
 import asyncio
+import base64
+import datetime
+import json
 import logging
 import os
+import re
 import socket
 import subprocess
 import tempfile
+import time
 import yaml
 
 from zaza import model, sync_wrapper
@@ -267,6 +272,620 @@ async def async_set_origin(application, origin='openstack-origin',
 set_origin = sync_wrapper(async_set_origin)
 
 
+def get_settle_scope(juju_model, application_name):
+    """Return the applications that may run hooks after changing one.
+
+    This is the application itself and every application related to it,
+    which includes its subordinates.
+
+    :param juju_model: Connected model
+    :type juju_model: juju.model.Model
+    :param application_name: Name of the changed application
+    :type application_name: str
+    :returns: Names of the applications in scope
+    :rtype: Set[str]
+    """
+    scope = {application_name}
+    for relation in juju_model.applications[application_name].relations:
+        for endpoint in relation.endpoints:
+            scope.add(endpoint.application_name)
+    return scope
+
+
+def _units_of(juju_model, application_names):
+    """Return the units of the applications present in the model."""
+    return [unit
+            for application_name in application_names
+            if application_name in juju_model.applications
+            for unit in juju_model.applications[application_name].units]
+
+
+def _application_settled(juju_model, application_name, states):
+    """Check whether the units of an application are idle and ready.
+
+    Status checks follow those of ``zaza.model.wait_for_application_states``.
+
+    :raises: zaza.model.UnitError if a unit is in error
+    """
+    check_info = states.get(application_name, {})
+    statuses = ['active']
+    if check_info.get('workload-status'):
+        statuses.append(check_info['workload-status'])
+    prefixes = ['ready', 'Ready', 'Unit is ready']
+    check_msg = check_info.get(
+        'workload-status-message-prefix',
+        check_info.get('workload-status-message'))
+    if check_msg is not None:
+        prefixes.append(check_msg)
+    regex = check_info.get('workload-status-message-regex')
+    for unit in _units_of(juju_model, [application_name]):
+        if unit.workload_status == 'error':
+            raise model.UnitError([unit])
+        if not model.is_unit_idle(unit):
+            return False
+        if unit.workload_status not in statuses:
+            return False
+        message = unit.workload_status_message or ''
+        if regex is not None:
+            if re.search(regex, message) is None:
+                return False
+        elif not message.startswith(tuple(prefixes)):
+            return False
+    return True
+
+
+async def async_block_until_applications_settled(application_names,
+                                                 model_name=None, states=None,
+                                                 timeout=2700,
+                                                 wait_for_hooks=True,
+                                                 hook_timeout=60):
+    """Block until some applications and the applications around them settle.
+
+    Only the changed applications, their subordinates and the applications
+    related to them are waited on, rather than the whole model. The state is
+    read from the model connection, which is kept up to date by the Juju
+    watcher, so no status is polled from the controller.
+
+    If wait_for_hooks is set, first wait for any unit in scope to start
+    executing a hook, as a change is not picked up by the units at once.
+    Then wait for every unit in scope to be idle and reach its target
+    workload status.
+
+    :param application_names: Names of the changed applications
+    :type application_names: Iterable[str]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param states: Target states, as for wait_for_application_states
+    :type states: Optional[dict]
+    :param timeout: Time to wait for the applications to settle
+    :type timeout: int
+    :param wait_for_hooks: Whether to wait for a unit to execute a hook first
+    :type wait_for_hooks: bool
+    :param hook_timeout: Time to wait for a unit to execute a hook
+    :type hook_timeout: int
+    :raises: zaza.model.ModelTimeout, zaza.model.UnitError
+    """
+    states = states or {}
+    juju_model = await model.get_model(model_name)
+    scope = set()
+    for application_name in application_names:
+        scope |= get_settle_scope(juju_model, application_name)
+    logging.info('Waiting for {} to settle'.format(', '.join(sorted(scope))))
+
+    def _executing():
+        return any(
+            unit.data.get('agent-status', {}).get('current') == 'executing'
+            for unit in _units_of(juju_model, scope))
+
+    if wait_for_hooks:
+        try:
+            await model.block_until_auto_reconnect_model(
+                _executing, model=juju_model, timeout=hook_timeout)
+        except asyncio.TimeoutError:
+            raise model.ModelTimeout(
+                'Timed out waiting for a unit of {} to execute a hook'
+                .format(', '.join(sorted(scope))))
+
+    try:
+        await model.block_until_auto_reconnect_model(
+            lambda: all(_application_settled(juju_model, name, states)
+                        for name in scope),
+            model=juju_model,
+            timeout=timeout)
+    except asyncio.TimeoutError:
+        raise model.ModelTimeout(
+            'Timed out waiting for {} to settle'
+            .format(', '.join(sorted(scope))))
+
+block_until_applications_settled = sync_wrapper(
+    async_block_until_applications_settled)
+
+
+async def async_block_until_application_settled(application_name,
+                                                model_name=None, states=None,
+                                                timeout=2700,
+                                                wait_for_hooks=True,
+                                                hook_timeout=60):
+    """Block until an application and the applications around it settle.
+
+    See async_block_until_applications_settled.
+
+    :param application_name: Name of the changed application
+    :type application_name: str
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param states: Target states, as for wait_for_application_states
+    :type states: Optional[dict]
+    :param timeout: Time to wait for the applications to settle
+    :type timeout: int
+    :param wait_for_hooks: Whether to wait for a unit to execute a hook first
+    :type wait_for_hooks: bool
+    :param hook_timeout: Time to wait for a unit to execute a hook
+    :type hook_timeout: int
+    :raises: zaza.model.ModelTimeout, zaza.model.UnitError
+    """
+    await async_block_until_applications_settled(
+        [application_name], model_name=model_name, states=states,
+        timeout=timeout, wait_for_hooks=wait_for_hooks,
+        hook_timeout=hook_timeout)
+
+block_until_application_settled = sync_wrapper(
+    async_block_until_application_settled)
+
+
+def _service_probe_command(services, pgrep_full=False):
+    """Return a command reporting which of the services are running.
+
+    The command prints one ``<service> running|stopped`` line per service.
+
+    :param services: Services to check
+    :type services: List[str]
+    :param pgrep_full: Should pgrep be used rather than pidof to identify
+                       a service.
+    :type  pgrep_full: bool
+    :returns: Shell command
+    :rtype: str
+    """
+    if pgrep_full:
+        check = "pgrep -f \"$s\""
+    else:
+        check = "pidof -x \"$s\""
+    return (
+        "for s in {}; do if {} > /dev/null; then echo \"$s running\"; "
+        "else echo \"$s stopped\"; fi; done".format(
+            ' '.join("'{}'".format(service) for service in services), check))
+
+
+async def async_get_service_status_on_units(unit_names, services,
+                                            model_name=None, pgrep_full=False,
+                                            timeout=None):
+    """Get the state of several services on several units at once.
+
+    A single command checks every service on a unit, and the units are
+    probed concurrently.
+
+    :param unit_names: Units to probe
+    :type unit_names: List[str]
+    :param services: Services to check
+    :type services: List[str]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param pgrep_full: Should pgrep be used rather than pidof to identify
+                       a service.
+    :type  pgrep_full: bool
+    :param timeout: Time to wait for each command to complete
+    :type timeout: Optional[int]
+    :returns: Map of unit name to a map of service to 'running' or 'stopped'
+    :rtype: Dict[str, Dict[str, str]]
+    """
+    command = _service_probe_command(services, pgrep_full=pgrep_full)
+    results = await asyncio.gather(*[
+        model.async_run_on_unit(
+            unit_name, command, model_name=model_name, timeout=timeout)
+        for unit_name in unit_names])
+    status = {}
+    for unit_name, result in zip(unit_names, results):
+        status[unit_name] = dict(
+            line.rsplit(' ', 1)
+            for line in result.get('Stdout', '').splitlines()
+            if line.strip())
+    return status
+
+get_service_status_on_units = sync_wrapper(async_get_service_status_on_units)
+
+
+async def async_block_until_service_status_on_units(unit_names, services,
+                                                    target_status,
+                                                    model_name=None,
+                                                    timeout=2700,
+                                                    pgrep_full=False):
+    """Block until all services on all the units are in the desired state.
+
+    Batched form of zaza.model.block_until_service_status.
+
+    :param unit_names: Units to check
+    :type unit_names: List[str]
+    :param services: Services to check
+    :type services: List[str]
+    :param target_status: State services should be in (stopped or running)
+    :type target_status: str
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param timeout: Time to wait for status to be achieved
+    :type timeout: int
+    :param pgrep_full: Should pgrep be used rather than pidof to identify
+                       a service.
+    :type  pgrep_full: bool
+    """
+    async def _check_services():
+        status = await async_get_service_status_on_units(
+            unit_names, services, model_name=model_name,
+            pgrep_full=pgrep_full, timeout=timeout)
+        return all(
+            status[unit_name].get(service) == target_status
+            for unit_name in unit_names
+            for service in services)
+
+    await model.async_block_until(_check_services, timeout=timeout)
+
+block_until_service_status_on_units = sync_wrapper(
+    async_block_until_service_status_on_units)
+
+
+async def async_run_action_on_all_units(unit_names, action_name,
+                                        workload_status, model_name=None,
+                                        action_params=None, timeout=2700):
+    """Run an action on several units concurrently and time each of them.
+
+    The time recorded for a unit runs from the start of the action until the
+    unit reports the expected workload status.
+
+    :param unit_names: Units to run the action on
+    :type unit_names: List[str]
+    :param action_name: Name of the action to run
+    :type action_name: str
+    :param workload_status: Workload status the units should reach
+    :type workload_status: str
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param action_params: Parameters to pass to the action
+    :type action_params: Optional[dict]
+    :param timeout: Time to wait for the workload status
+    :type timeout: int
+    :returns: Map of unit name to seconds taken
+    :rtype: Dict[str, float]
+    :raises: AssertionError if an action fails
+    """
+    async def _run(unit_name):
+        start = time.monotonic()
+        action = await model.async_run_action(
+            unit_name, action_name, model_name=model_name,
+            action_params=action_params)
+        assertActionRanOK(action)
+        await model.async_block_until_unit_wl_status(
+            unit_name, workload_status, model_name=model_name,
+            timeout=timeout)
+        return time.monotonic() - start
+
+    latencies = await asyncio.gather(*[
+        _run(unit_name) for unit_name in unit_names])
+    return dict(zip(unit_names, latencies))
+
+run_action_on_all_units = sync_wrapper(async_run_action_on_all_units)
+
+
+async def async_collect_action_results(unit_names, action_name,
+                                       model_name=None, action_params=None):
+    """Run an action on several units concurrently and collect the results.
+
+    Unlike async_run_action_on_all_units, failed actions are returned rather
+    than raised, so that the caller can inspect the results of every unit.
+
+    :param unit_names: Units to run the action on
+    :type unit_names: List[str]
+    :param action_name: Name of the action to run
+    :type action_name: str
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param action_params: Parameters to pass to the action
+    :type action_params: Optional[dict]
+    :returns: Map of unit name to the action object and the seconds it took
+    :rtype: Dict[str, Tuple[juju.action.Action, float]]
+    """
+    async def _run(unit_name):
+        start = time.monotonic()
+        action = await model.async_run_action(
+            unit_name, action_name, model_name=model_name,
+            action_params=action_params)
+        return action, time.monotonic() - start
+
+    results = await asyncio.gather(*[
+        _run(unit_name) for unit_name in unit_names])
+    return dict(zip(unit_names, results))
+
+collect_action_results = sync_wrapper(async_collect_action_results)
+
+
+# Run on a unit by python3. With a baseline it waits until the file content
+# has changed and every service known to systemd has been (re)started since
+# the baseline, then prints the state reached. Without one it prints the
+# current state straight away.
+_RESTART_WATCHER = """
+import hashlib, json, subprocess, sys, time
+
+path, services = sys.argv[1], json.loads(sys.argv[2])
+timeout = float(sys.argv[3])
+baseline = json.loads(sys.argv[4]) if len(sys.argv) > 4 else None
+
+
+def file_hash():
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def active_since(service):
+    try:
+        out = subprocess.check_output(
+            ['systemctl', 'show', '-p', 'ActiveEnterTimestampMonotonic',
+             service], stderr=subprocess.DEVNULL, universal_newlines=True)
+        return int(out.strip().split('=', 1)[1]) or None
+    except (subprocess.CalledProcessError, IndexError, ValueError):
+        return None
+
+
+def state():
+    return {'hash': file_hash(),
+            'services': {s: active_since(s) for s in services}}
+
+
+def done(current):
+    if current['hash'] == baseline['hash']:
+        return False
+    for service, since in current['services'].items():
+        before = baseline['services'].get(service)
+        if before is not None and (since is None or since <= before):
+            return False
+    return True
+
+
+start = time.time()
+current = state()
+while baseline is not None and not done(current):
+    if time.time() - start > timeout:
+        break
+    time.sleep(1)
+    current = state()
+current['elapsed'] = time.time() - start
+current['done'] = baseline is None or done(current)
+print(json.dumps(current))
+"""
+
+
+async def _async_run_restart_watcher(unit_name, config_file, services,
+                                     baseline=None, model_name=None,
+                                     timeout=600):
+    """Run the restart watcher on a unit and return the state it reports."""
+    args = [config_file, json.dumps(services), str(timeout)]
+    if baseline is not None:
+        args.append(json.dumps(baseline))
+    command = "echo {} | base64 -d > /tmp/zaza-restart-watcher.py && " \
+        "python3 /tmp/zaza-restart-watcher.py {}".format(
+            base64.b64encode(_RESTART_WATCHER.encode()).decode(),
+            ' '.join("'{}'".format(arg) for arg in args))
+    result = await model.async_run_on_unit(
+        unit_name, command, model_name=model_name, timeout=timeout + 60)
+    return json.loads(result['Stdout'])
+
+
+async def async_get_restart_baseline(unit_names, config_file, services,
+                                     model_name=None):
+    """Record the config file hash and service start times on some units.
+
+    :param unit_names: Units to query
+    :type unit_names: List[str]
+    :param config_file: Config file to hash
+    :type config_file: str
+    :param services: systemd services to query
+    :type services: List[str]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :returns: Map of unit name to its baseline, for wait_for_restart
+    :rtype: Dict[str, dict]
+    """
+    results = await asyncio.gather(*[
+        _async_run_restart_watcher(
+            unit_name, config_file, services, model_name=model_name)
+        for unit_name in unit_names])
+    return dict(zip(unit_names, results))
+
+get_restart_baseline = sync_wrapper(async_get_restart_baseline)
+
+
+async def async_wait_for_restart(baseline, config_file, services,
+                                 model_name=None, timeout=600):
+    """Wait for a config file to change and its services to restart.
+
+    A watcher is run once on each unit, concurrently, which waits on the
+    unit until the content of the file differs from the baseline and the
+    systemd ActiveEnterTimestamp of each service has advanced. Services that
+    systemd does not know about are not waited on and are reported with a
+    start time of None.
+
+    :param baseline: Map of unit name to baseline from get_restart_baseline
+    :type baseline: Dict[str, dict]
+    :param config_file: Config file to watch
+    :type config_file: str
+    :param services: systemd services to watch
+    :type services: List[str]
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param timeout: Time to wait on each unit
+    :type timeout: int
+    :returns: Map of unit name to the state reached, with 'hash',
+              'services', 'elapsed' and 'done' keys
+    :rtype: Dict[str, dict]
+    """
+    unit_names = list(baseline.keys())
+    results = await asyncio.gather(*[
+        _async_run_restart_watcher(
+            unit_name, config_file, services, baseline=baseline[unit_name],
+            model_name=model_name, timeout=timeout)
+        for unit_name in unit_names])
+    return dict(zip(unit_names, results))
+
+wait_for_restart = sync_wrapper(async_wait_for_restart)
+
+
+def _parse_service_active_times(output):
+    """Parse the service start times read by get_deferred_events_state.
+
+    :param output: Lines of ``<service> <ActiveEnterTimestamp>``
+    :type output: str
+    :returns: Map of service to the time it last became active, None if it
+              never did.
+    :rtype: Dict[str, Optional[datetime.datetime]]
+    """
+    timestamps = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        service, _, str_time = line.strip().partition(' ')
+        timestamps[service] = None
+        if str_time:
+            timestamps[service] = datetime.datetime.strptime(
+                str_time, '%a %Y-%m-%d %H:%M:%S %Z')
+    return timestamps
+
+
+async def async_get_deferred_events_state(application_name, unit_names=None,
+                                          services=None, show_events=True,
+                                          model_name=None):
+    """Collect the deferred restart state of the units of an application.
+
+    The units are probed concurrently. For each unit the show-deferred-events
+    action and a single command reading the start time of every service are
+    run together, and the workload status is read from the model connection.
+
+    :param application_name: Name of application
+    :type application_name: str
+    :param unit_names: Units to probe, defaults to all units of the
+                       application.
+    :type unit_names: Optional[List[str]]
+    :param services: systemd services to get the last start time of
+    :type services: Optional[List[str]]
+    :param show_events: Whether to run the show-deferred-events action
+    :type show_events: bool
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :returns: Map of unit name to a dict with 'restarts', 'hooks',
+              'timestamps', 'workload-status' and 'workload-status-message'
+              keys.
+    :rtype: Dict[str, dict]
+    """
+    juju_model = await model.get_model(model_name)
+    units = [unit
+             for unit in juju_model.applications[application_name].units
+             if unit_names is None or unit.entity_id in unit_names]
+    services = services or []
+    command = ' '.join(
+        'echo "{0} $(systemctl show -p ActiveEnterTimestamp {0} | '
+        'cut -d= -f2)";'.format(service) for service in services)
+
+    async def _probe(unit):
+        state = {'restarts': [], 'hooks': [], 'timestamps': {}}
+        events, times = await asyncio.gather(
+            model.async_run_action(
+                unit.entity_id, 'show-deferred-events',
+                model_name=model_name, raise_on_failure=True)
+            if show_events else asyncio.sleep(0),
+            model.async_run_on_unit(
+                unit.entity_id, command, model_name=model_name)
+            if services else asyncio.sleep(0))
+        if events is not None:
+            output = yaml.safe_load(events.data['results']['output']) or {}
+            state['restarts'] = output.get('restarts') or []
+            state['hooks'] = output.get('hooks') or []
+        if times is not None:
+            state['timestamps'] = _parse_service_active_times(
+                times['Stdout'])
+        state['workload-status'] = unit.workload_status
+        state['workload-status-message'] = unit.workload_status_message
+        return state
+
+    states = await asyncio.gather(*[_probe(unit) for unit in units])
+    return {unit.entity_id: state for unit, state in zip(units, states)}
+
+get_deferred_events_state = sync_wrapper(async_get_deferred_events_state)
+
+
+async def async_block_until_deferred_events_state(application_name, check,
+                                                  services=None,
+                                                  show_events=False,
+                                                  model_name=None,
+                                                  timeout=2700,
+                                                  wait_period=5):
+    """Block until the deferred restart state of every unit passes a check.
+
+    Units are probed with async_get_deferred_events_state, and units that
+    have passed the check are not probed again.
+
+    Example usage::
+
+        block_until_deferred_events_state(
+            'neutron-gateway',
+            lambda state: state['workload-status-message'].startswith(
+                'Unit is ready'))
+
+    :param application_name: Name of application
+    :type application_name: str
+    :param check: Called with the state of a unit, returns True once the
+                  unit is as expected.
+    :type check: Callable[[dict], bool]
+    :param services: systemd services to get the last start time of
+    :type services: Optional[List[str]]
+    :param show_events: Whether to run the show-deferred-events action
+    :type show_events: bool
+    :param model_name: Name of model to query.
+    :type model_name: Optional[str]
+    :param timeout: Time to wait for the units to pass the check
+    :type timeout: int
+    :param wait_period: Time to wait between probes
+    :type wait_period: int
+    :returns: Map of unit name to the state that passed the check
+    :rtype: Dict[str, dict]
+    :raises: zaza.model.ModelTimeout
+    """
+    passed = {}
+    pending = None
+
+    async def _check():
+        nonlocal pending
+        states = await async_get_deferred_events_state(
+            application_name, unit_names=pending, services=services,
+            show_events=show_events, model_name=model_name)
+        for unit_name, state in states.items():
+            if check(state):
+                passed[unit_name] = state
+        pending = [unit_name for unit_name in states
+                   if unit_name not in passed]
+        return not pending
+
+    try:
+        await model.async_block_until(
+            _check, timeout=timeout, wait_period=wait_period)
+    except asyncio.TimeoutError:
+        raise model.ModelTimeout(
+            'Timed out waiting on deferred events state of {}'
+            .format(', '.join(pending or [])))
+    return passed
+
+block_until_deferred_events_state = sync_wrapper(
+    async_block_until_deferred_events_state)
+
+
 def run_via_ssh(unit_name, cmd):
     """Run command on unit via ssh.
 
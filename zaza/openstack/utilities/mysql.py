@@ -0,0 +1,931 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Module for probing and loading a mysql-innodb-cluster application.
+
+The state of the cluster is gathered in one pass, from all units at once:
+the cluster-status action, the group replication members as seen by each
+unit, and the workload status of the units and of the mysql-router
+subordinates.
+
+A background load, recording the availability of reads and writes, can be
+run against the cluster while it is disrupted, and the mysqldump action can
+be benchmarked against a seeded dataset.
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+import shlex
+import threading
+import time
+
+import pymysql
+
+import zaza.model
+from zaza import sync_wrapper
+
+MEMBERS_QUERY = ("SELECT MEMBER_HOST, MEMBER_STATE, MEMBER_ROLE "
+                 "FROM performance_schema.replication_group_members")
+
+ClusterMember = collections.namedtuple(
+    'ClusterMember', ['host', 'state', 'role'])
+
+# Table of the dataset seeded by seed_sql().
+SEED_TABLE = 'seed'
+
+# Optional parts of a probe, the status of the model is always probed.
+PROBES = frozenset(['cluster_status', 'members'])
+
+
+class MySQLClusterState(collections.namedtuple(
+        'MySQLClusterState',
+        ['cluster_status', 'members', 'addresses', 'messages', 'routers',
+         'taken_at'])):
+    """State of a mysql-innodb-cluster at one point in time.
+
+    `cluster_status` is the output of the cluster-status action, None if it
+    failed or was not probed. `members` maps each unit to the group
+    replication members it sees, None for units that could not be queried,
+    and is empty if the members were not probed. `addresses` and
+    `messages` map each unit to its public address and workload status
+    message. `routers` maps each mysql-router unit to its workload status.
+    `taken_at` is the time.monotonic() time the state was probed at.
+    """
+
+    def unit_for_host(self, host):
+        """Return the unit with the given address.
+
+        :param host: Address, optionally followed by ':<port>'
+        :type host: str
+        :rtype: Optional[str]
+        """
+        host = host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+        for unit, address in self.addresses.items():
+            if address == host:
+                return unit
+        return None
+
+    def online_members(self):
+        """Return the hosts of the ONLINE members.
+
+        Units may disagree while the group reconfigures, the largest view is
+        returned.
+
+        :rtype: Set[str]
+        """
+        views = [{m.host for m in members if m.state == 'ONLINE'}
+                 for members in self.members.values() if members]
+        return max(views, key=len, default=set())
+
+    def rw_primary(self):
+        """Return the unit of the ONLINE primary member.
+
+        The status message of the units, which the charm marks 'R/W' on the
+        primary, is used when no unit could be queried.
+
+        :rtype: Optional[str]
+        """
+        for members in self.members.values():
+            for member in members or []:
+                if member.state == 'ONLINE' and member.role == 'PRIMARY':
+                    unit = self.unit_for_host(member.host)
+                    if unit:
+                        return unit
+        for unit, message in sorted(self.messages.items()):
+            if 'R/W' in message:
+                return unit
+        return None
+
+    def blocked_routers(self):
+        """Return the mysql-router units in blocked state.
+
+        :rtype: List[str]
+        """
+        return sorted(unit for unit, status in self.routers.items()
+                      if status == 'blocked')
+
+
+def has_rw_primary(state):
+    """Return whether the cluster has a R/W primary.
+
+    :param state: State of the cluster
+    :type state: MySQLClusterState
+    :rtype: bool
+    """
+    return state.rw_primary() is not None
+
+
+has_rw_primary.probes = frozenset(['members'])
+
+
+def members_online(count):
+    """Return a predicate checking that members are ONLINE.
+
+    :param count: Minimum number of ONLINE members
+    :type count: int
+    :rtype: Callable[[MySQLClusterState], bool]
+    """
+    def _members_online(state):
+        return len(state.online_members()) >= count
+    _members_online.__name__ = '{} members ONLINE'.format(count)
+    _members_online.probes = frozenset(['members'])
+    return _members_online
+
+
+async def _none():
+    """Return None, in place of a probe that is not run."""
+    return None
+
+
+def _mysql_command(password, sql):
+    """Return the command running SQL as root with the mysql client.
+
+    :param password: Password of the root user
+    :type password: str
+    :param sql: Statements to run
+    :type sql: str
+    :rtype: str
+    """
+    return 'mysql -uroot -p{} --batch --skip-column-names -e {}'.format(
+        shlex.quote(password), shlex.quote(sql))
+
+
+def _parse_members(output):
+    """Parse the output of MEMBERS_QUERY.
+
+    :param output: Tab separated output of the mysql client in batch mode
+    :type output: str
+    :rtype: List[ClusterMember]
+    """
+    members = []
+    for line in output.splitlines():
+        fields = line.split('\t')
+        if len(fields) == 3:
+            members.append(ClusterMember(*fields))
+    return members
+
+
+class MySQLClusterProbe(object):
+    """Probe, cache and wait on the state of a mysql-innodb-cluster.
+
+    Predicates waited on may set a `probes` attribute, the subset of PROBES
+    they need, so that the cluster-status action or the members queries are
+    only run when needed.
+
+    Example usage::
+
+        probe = MySQLClusterProbe()
+        primary = probe.get_state().rw_primary()
+        probe.wait_for(members_online(3), timeout=600)
+    """
+
+    def __init__(self, application_name='mysql-innodb-cluster',
+                 model_name=None, max_age=5):
+        """Create a probe.
+
+        :param application_name: Name of the mysql-innodb-cluster application
+        :type application_name: str
+        :param model_name: Name of the model, defaults to the current one
+        :type model_name: Optional[str]
+        :param max_age: Seconds a probed state is reused for
+        :type max_age: float
+        """
+        self.application_name = application_name
+        self.model_name = model_name
+        self.max_age = max_age
+        self._state = None
+        self._state_probes = frozenset()
+        self._root_password = None
+
+    def invalidate(self):
+        """Forget the cached state."""
+        self._state = None
+        self._state_probes = frozenset()
+
+    async def _async_root_password(self):
+        if self._root_password is None:
+            result = await zaza.model.async_run_on_leader(
+                self.application_name, 'leader-get mysql.passwd',
+                model_name=self.model_name)
+            self._root_password = result['Stdout'].strip()
+        return self._root_password
+
+    async def _async_cluster_status(self):
+        """Return the output of the cluster-status action, None on failure."""
+        try:
+            action = await zaza.model.async_run_action_on_leader(
+                self.application_name, 'cluster-status',
+                model_name=self.model_name, action_params={})
+            return json.loads(action.data['results']['cluster-status'])
+        except (KeyError, ValueError, zaza.model.ActionFailed) as e:
+            logging.debug('cluster-status failed: {}'.format(e))
+            return None
+
+    async def _async_members(self, unit_name, password):
+        """Return the members seen by a unit, None on failure."""
+        cmd = _mysql_command(password, MEMBERS_QUERY)
+        try:
+            result = await zaza.model.async_run_on_unit(
+                unit_name, cmd, model_name=self.model_name)
+        except zaza.model.UnitError as e:
+            logging.debug('Querying members on {} failed: {}'.format(
+                unit_name, e))
+            return None
+        if str(result.get('Code', '0')) != '0':
+            return None
+        return _parse_members(result.get('Stdout', ''))
+
+    async def async_get_state(self, refresh=False, probes=PROBES):
+        """Return the state of the cluster.
+
+        :param refresh: Probe again even if the cached state is recent
+        :type refresh: bool
+        :param probes: Optional parts of the state to probe
+        :type probes: Iterable[str]
+        :rtype: MySQLClusterState
+        """
+        probes = frozenset(probes)
+        if (not refresh and self._state is not None and
+                probes <= self._state_probes and
+                time.monotonic() - self._state.taken_at < self.max_age):
+            return self._state
+        if 'members' in probes:
+            status, password = await asyncio.gather(
+                zaza.model.async_get_status(model_name=self.model_name),
+                self._async_root_password())
+        else:
+            status = await zaza.model.async_get_status(
+                model_name=self.model_name)
+        units = status.applications[self.application_name].units
+        unit_names = sorted(units)
+        cluster_status = members = None
+        if 'cluster_status' in probes:
+            cluster_status = self._async_cluster_status()
+        if 'members' in probes:
+            members = asyncio.gather(*[
+                self._async_members(unit, password) for unit in unit_names])
+        cluster_status, members = await asyncio.gather(
+            cluster_status or _none(), members or _none())
+        routers = {}
+        for application in status.applications.values():
+            for unit in (application.units or {}).values():
+                for name, subordinate in (unit.subordinates or {}).items():
+                    if 'mysql-router' in name:
+                        routers[name] = subordinate.workload_status.status
+        self._state = MySQLClusterState(
+            cluster_status=cluster_status,
+            members=dict(zip(unit_names, members or [])),
+            addresses={name: units[name].public_address
+                       for name in unit_names},
+            messages={name: units[name].workload_status.info or ''
+                      for name in unit_names},
+            routers=routers,
+            taken_at=time.monotonic())
+        self._state_probes = probes
+        return self._state
+
+    def get_state(self, refresh=False, probes=PROBES):
+        """Return the state of the cluster.
+
+        :param refresh: Probe again even if the cached state is recent
+        :type refresh: bool
+        :param probes: Optional parts of the state to probe
+        :type probes: Iterable[str]
+        :rtype: MySQLClusterState
+        """
+        return sync_wrapper(self.async_get_state)(
+            refresh=refresh, probes=probes)
+
+    async def async_run_sql(self, sql, unit_name=None):
+        """Run SQL as root on a unit.
+
+        :param sql: Statements to run
+        :type sql: str
+        :param unit_name: Unit to run on, defaults to the R/W primary
+        :type unit_name: Optional[str]
+        :returns: Output of the mysql client in batch mode
+        :rtype: str
+        :raises: zaza.model.CommandRunFailed
+        """
+        if unit_name is None:
+            state = await self.async_get_state(
+                refresh=True, probes=has_rw_primary.probes)
+            unit_name = state.rw_primary()
+            assert unit_name, 'No R/W primary in {}'.format(
+                self.application_name)
+        cmd = _mysql_command(await self._async_root_password(), sql)
+        result = await zaza.model.async_run_on_unit(
+            unit_name, cmd, model_name=self.model_name)
+        if str(result.get('Code', '0')) != '0':
+            raise zaza.model.CommandRunFailed(
+                'mysql on {}'.format(unit_name), result)
+        return result.get('Stdout', '')
+
+    def run_sql(self, sql, unit_name=None):
+        """Run SQL as root on a unit.
+
+        :param sql: Statements to run
+        :type sql: str
+        :param unit_name: Unit to run on, defaults to the R/W primary
+        :type unit_name: Optional[str]
+        :returns: Output of the mysql client in batch mode
+        :rtype: str
+        :raises: zaza.model.CommandRunFailed
+        """
+        return sync_wrapper(self.async_run_sql)(sql, unit_name=unit_name)
+
+    async def async_wait_for_rows(self, databases, rows, table=SEED_TABLE,
+                                  unit_names=None, timeout=300, interval=2):
+        """Wait until a table holds some rows in databases on every unit.
+
+        Group replication applies writes on the secondaries asynchronously,
+        so rows written on the primary may not be readable on them yet.
+
+        :param databases: Names of the databases
+        :type databases: List[str]
+        :param rows: Number of rows expected in each table
+        :type rows: int
+        :param table: Name of the table in each database
+        :type table: str
+        :param unit_names: Units to check, defaults to every unit
+        :type unit_names: Optional[List[str]]
+        :param timeout: Seconds to wait
+        :type timeout: float
+        :param interval: Seconds between checks
+        :type interval: float
+        :raises: zaza.model.ModelTimeout
+        """
+        if not databases:
+            return
+        if unit_names is None:
+            unit_names = [unit.entity_id
+                          for unit in await zaza.model.async_get_units(
+                              self.application_name,
+                              model_name=self.model_name)]
+        sql = 'SELECT {};'.format(', '.join(
+            '(SELECT COUNT(*) FROM {}.{})'.format(database, table)
+            for database in databases))
+        expected = [str(rows)] * len(databases)
+
+        async def _counts(unit_name):
+            try:
+                return (await self.async_run_sql(
+                    sql, unit_name=unit_name)).split()
+            except zaza.model.CommandRunFailed as e:
+                logging.debug('Counting rows on {} failed: {}'.format(
+                    unit_name, e))
+                return None
+
+        pending = list(unit_names)
+        start = time.monotonic()
+        while True:
+            counts = await asyncio.gather(*[
+                _counts(unit_name) for unit_name in pending])
+            pending = [unit_name for unit_name, count in zip(pending, counts)
+                       if count != expected]
+            if not pending:
+                return
+            if time.monotonic() - start + interval > timeout:
+                raise zaza.model.ModelTimeout(
+                    'Timed out waiting for {} rows in {} on {}'.format(
+                        rows, ', '.join(databases), ', '.join(pending)))
+            await asyncio.sleep(interval)
+
+    def wait_for_rows(self, databases, rows, table=SEED_TABLE,
+                      unit_names=None, timeout=300, interval=2):
+        """Wait until a table holds some rows in databases on every unit.
+
+        :param databases: Names of the databases
+        :type databases: List[str]
+        :param rows: Number of rows expected in each table
+        :type rows: int
+        :param table: Name of the table in each database
+        :type table: str
+        :param unit_names: Units to check, defaults to every unit
+        :type unit_names: Optional[List[str]]
+        :param timeout: Seconds to wait
+        :type timeout: float
+        :param interval: Seconds between checks
+        :type interval: float
+        :raises: zaza.model.ModelTimeout
+        """
+        return sync_wrapper(self.async_wait_for_rows)(
+            databases, rows, table=table, unit_names=unit_names,
+            timeout=timeout, interval=interval)
+
+    async def async_wait_for(self, predicate, timeout=600, interval=10,
+                             probes=None):
+        """Wait until the state of the cluster satisfies a predicate.
+
+        Each probe is given the time left, so that a hung leader or unit
+        cannot make the wait outlast the timeout.
+
+        :param predicate: Function of a MySQLClusterState
+        :type predicate: Callable[[MySQLClusterState], bool]
+        :param timeout: Seconds to wait, None to wait forever
+        :type timeout: Optional[float]
+        :param interval: Seconds between probes
+        :type interval: float
+        :param probes: Optional parts of the state to probe, defaults to the
+                       `probes` attribute of the predicate, or all of them
+        :type probes: Optional[Iterable[str]]
+        :returns: The state satisfying the predicate
+        :rtype: MySQLClusterState
+        :raises: zaza.model.ModelTimeout
+        """
+        if probes is None:
+            probes = getattr(predicate, 'probes', PROBES)
+        name = getattr(predicate, '__name__', predicate)
+        start = time.monotonic()
+        state = None
+        while True:
+            remaining = None
+            if timeout is not None:
+                remaining = max(timeout - (time.monotonic() - start), 0)
+            try:
+                state = await asyncio.wait_for(
+                    self.async_get_state(refresh=True, probes=probes),
+                    remaining)
+            except asyncio.TimeoutError:
+                raise zaza.model.ModelTimeout(
+                    'Timed out probing {} for {}: {}'.format(
+                        self.application_name, name, state))
+            if predicate(state):
+                return state
+            if timeout is not None and (
+                    time.monotonic() - start + interval > timeout):
+                raise zaza.model.ModelTimeout(
+                    'Timed out waiting for {} on {}: {}'.format(
+                        name, self.application_name, state))
+            await asyncio.sleep(interval)
+
+    def wait_for(self, predicate, timeout=600, interval=10, probes=None):
+        """Wait until the state of the cluster satisfies a predicate.
+
+        :param predicate: Function of a MySQLClusterState
+        :type predicate: Callable[[MySQLClusterState], bool]
+        :param timeout: Seconds to wait, None to wait forever
+        :type timeout: Optional[float]
+        :param interval: Seconds between probes
+        :type interval: float
+        :param probes: Optional parts of the state to probe, defaults to the
+                       `probes` attribute of the predicate, or all of them
+        :type probes: Optional[Iterable[str]]
+        :returns: The state satisfying the predicate
+        :rtype: MySQLClusterState
+        :raises: zaza.model.ModelTimeout
+        """
+        return sync_wrapper(self.async_wait_for)(
+            predicate, timeout=timeout, interval=interval, probes=probes)
+
+
+LOAD_DATABASE = 'zaza_load'
+LOAD_INSERT = ("INSERT INTO samples (writer, written_at) "
+               "VALUES (%s, %s)")
+LOAD_SELECT = ("SELECT id, writer, written_at FROM samples "
+               "ORDER BY id DESC LIMIT 10")
+
+LoadSample = collections.namedtuple(
+    'LoadSample', ['kind', 'started', 'latency', 'ok', 'endpoint'])
+
+
+def load_user_sql(user, password, database=LOAD_DATABASE):
+    """Return the SQL creating the database and the user of a load.
+
+    :param user: Name of the user, allowed to connect from any host
+    :type user: str
+    :param password: Password of the user, made of word characters
+    :type password: str
+    :param database: Name of the database the user owns
+    :type database: str
+    :rtype: str
+    """
+    account = "'{}'@'%'".format(user)
+    return ("CREATE DATABASE IF NOT EXISTS {database}; "
+            "CREATE USER IF NOT EXISTS {account} IDENTIFIED BY '{password}'; "
+            "ALTER USER {account} IDENTIFIED BY '{password}'; "
+            "GRANT ALL PRIVILEGES ON {database}.* TO {account};").format(
+                database=database, account=account, password=password)
+
+
+def _outages(samples):
+    """Return the windows during which writes failed.
+
+    A window opens at the end of the last successful write before a failure
+    and closes at the end of the next successful write, it is left open,
+    with an end of None, if writes never recovered.
+
+    :param samples: Samples of the writes
+    :type samples: Iterable[LoadSample]
+    :rtype: List[Tuple[float, Optional[float]]]
+    """
+    windows = []
+    last_ok = opened = None
+    for sample in sorted(samples, key=lambda s: s.started):
+        end = sample.started + sample.latency
+        if sample.ok:
+            if opened is not None:
+                windows.append((opened, end))
+                opened = None
+            last_ok = end
+        elif opened is None:
+            opened = sample.started if last_ok is None else last_ok
+    if opened is not None:
+        windows.append((opened, None))
+    return windows
+
+
+class MySQLLoadGenerator(object):
+    """Background reads and writes against MySQL endpoints.
+
+    Writer threads insert rows through an endpoint accepting writes, moving
+    to another one when it fails or turns read only, reader threads select
+    the latest rows through any endpoint. Every operation is recorded, so
+    that the windows during which writes were unavailable, and the
+    throughput of each phase delimited with mark(), can be reported.
+
+    Example usage::
+
+        with MySQLLoadGenerator(endpoints, user, password) as load:
+            load.mark('during')
+            ...  # disrupt the cluster
+            load.mark('after')
+        logging.info(load.report())
+    """
+
+    def __init__(self, endpoints, user, password, database=LOAD_DATABASE,
+                 writers=2, readers=2, interval=0.05, timeout=2):
+        """Create a load generator.
+
+        :param endpoints: Addresses and ports of the MySQL endpoints
+        :type endpoints: List[Tuple[str, int]]
+        :param user: Name of the user
+        :type user: str
+        :param password: Password of the user
+        :type password: str
+        :param database: Name of the database
+        :type database: str
+        :param writers: Number of writer threads
+        :type writers: int
+        :param readers: Number of reader threads
+        :type readers: int
+        :param interval: Seconds each thread waits between operations
+        :type interval: float
+        :param timeout: Seconds to connect, read or write before failing
+        :type timeout: float
+        """
+        self.endpoints = list(endpoints)
+        self.user = user
+        self.password = password
+        self.database = database
+        self.writers = writers
+        self.readers = readers
+        self.interval = interval
+        self.timeout = timeout
+        self.samples = []
+        self.marks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._writable = 0
+
+    def _connect(self, writable, offset=0):
+        """Connect to the first endpoint available.
+
+        Writers start from the endpoint that last accepted writes, readers
+        from their own offset.
+
+        :param writable: Whether the endpoint must accept writes
+        :type writable: bool
+        :param offset: Index of the first endpoint tried by readers
+        :type offset: int
+        :returns: Connection and the endpoint connected to
+        :rtype: Tuple[pymysql.connections.Connection, Tuple[str, int]]
+        :raises: pymysql.MySQLError
+        """
+        start = self._writable if writable else offset
+        count = len(self.endpoints)
+        for index in range(start, start + count):
+            host, port = self.endpoints[index % count]
+            try:
+                connection = pymysql.connect(
+                    host=host, port=port, user=self.user,
+                    password=self.password, database=self.database,
+                    connect_timeout=self.timeout, read_timeout=self.timeout,
+                    write_timeout=self.timeout, autocommit=True)
+            except pymysql.MySQLError:
+                continue
+            if writable:
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT @@super_read_only')
+                        read_only = cursor.fetchone()[0]
+                except pymysql.MySQLError:
+                    read_only = True
+                if read_only:
+                    connection.close()
+                    continue
+                self._writable = index % count
+            return connection, (host, port)
+        raise pymysql.err.OperationalError(
+            'No {} endpoint available'.format(
+                'writable' if writable else 'readable'))
+
+    def setup(self):
+        """Create the table of the load.
+
+        :raises: pymysql.MySQLError
+        """
+        connection, _ = self._connect(writable=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'CREATE TABLE IF NOT EXISTS samples ('
+                    'id BIGINT AUTO_INCREMENT PRIMARY KEY, '
+                    'writer VARCHAR(64) NOT NULL, '
+                    'written_at DOUBLE NOT NULL)')
+        finally:
+            connection.close()
+
+    def _work(self, name, writable, offset):
+        """Run operations until stopped, recording each of them."""
+        connection = endpoint = None
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if connection is None:
+                    connection, endpoint = self._connect(writable, offset)
+                with connection.cursor() as cursor:
+                    if writable:
+                        cursor.execute(LOAD_INSERT, (name, time.time()))
+                    else:
+                        cursor.execute(LOAD_SELECT)
+                        cursor.fetchall()
+                ok = True
+            except pymysql.MySQLError as e:
+                logging.debug('{} failed on {}: {}'.format(name, endpoint, e))
+                ok = False
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except pymysql.MySQLError:
+                        pass
+                connection = None
+            with self._lock:
+                self.samples.append(LoadSample(
+                    'write' if writable else 'read', started,
+                    time.monotonic() - started, ok, endpoint))
+            self._stop.wait(self.interval)
+        if connection is not None:
+            connection.close()
+
+    def mark(self, phase):
+        """Start a phase of the load.
+
+        :param phase: Name of the phase, e.g. 'during' a disruption
+        :type phase: str
+        """
+        logging.info('MySQL load phase: {}'.format(phase))
+        self.marks.append((time.monotonic(), phase))
+
+    def start(self, phase='before'):
+        """Start the threads of the load.
+
+        :param phase: Name of the first phase
+        :type phase: str
+        """
+        self._stop.clear()
+        self.mark(phase)
+        workers = ([('writer-{}'.format(i), True, 0)
+                    for i in range(self.writers)] +
+                   [('reader-{}'.format(i), False, i)
+                    for i in range(self.readers)])
+        for name, writable, offset in workers:
+            thread = threading.Thread(
+                target=self._work, args=(name, writable, offset),
+                name='mysql-load-{}'.format(name), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop the threads of the load and return its report.
+
+        :rtype: Dict[str, Any]
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.mark('stopped')
+        return self.report()
+
+    def __enter__(self):
+        """Start the load."""
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        """Stop the load."""
+        self.stop()
+
+    def report(self):
+        """Report the throughput of each phase and the write outages.
+
+        Times are seconds since the load started. `failover_time` is the
+        longest write outage that recovered, None if there was none.
+
+        :rtype: Dict[str, Any]
+        """
+        with self._lock:
+            samples = list(self.samples)
+        marks = list(self.marks)
+        origin = marks[0][0] if marks else 0
+        if not marks or marks[-1][1] != 'stopped':
+            marks.append((time.monotonic(), None))
+        phases = collections.OrderedDict()
+        for (start, phase), (end, _) in zip(marks, marks[1:]):
+            during = [s for s in samples if start <= s.started < end]
+            seconds = end - start
+            stats = {'start': start - origin, 'seconds': seconds}
+            for kind in ('write', 'read'):
+                ok = [s for s in during if s.kind == kind and s.ok]
+                failed = [s for s in during if s.kind == kind and not s.ok]
+                stats['{}s'.format(kind)] = len(ok)
+                stats['{}_errors'.format(kind)] = len(failed)
+                stats['{}s_per_second'.format(kind)] = (
+                    len(ok) / seconds if seconds > 0 else 0.0)
+            phases[phase] = stats
+        outages = [(start - origin, None if end is None else end - origin)
+                   for start, end in _outages(
+                       s for s in samples if s.kind == 'write')]
+        recovered = [end - start for start, end in outages if end is not None]
+        return {
+            'phases': phases,
+            'write_outages': outages,
+            'failover_time': max(recovered) if recovered else None,
+            'recovered': all(end is not None for _, end in outages),
+        }
+
+
+# Digest a gzipped dump where it was written, in one pass: the size and
+# sha256 of the whole dump, and the rows of a table as mysqldump writes them
+# in extended inserts, one per line.
+DUMP_DIGEST_SCRIPT = """
+import gzip, hashlib, json, os, sys
+path, table = sys.argv[1], sys.argv[2].encode()
+prefix = b'INSERT INTO `' + table + b'` VALUES ('
+digest, rows_digest = hashlib.sha256(), hashlib.sha256()
+size = rows = 0
+with gzip.open(path, 'rb') as dump:
+    for line in dump:
+        digest.update(line)
+        size += len(line)
+        if line.startswith(prefix):
+            values = line[len(prefix):].rstrip().rstrip(b';')[:-1]
+            for row in values.split(b'),('):
+                rows_digest.update(row + b'\\n')
+                rows += 1
+print(json.dumps({
+    'size': size, 'compressed_size': os.path.getsize(path),
+    'sha256': digest.hexdigest(), 'rows': rows,
+    'rows_sha256': rows_digest.hexdigest()}))
+"""
+
+DumpResult = collections.namedtuple(
+    'DumpResult',
+    ['database', 'unit', 'file', 'seconds', 'size', 'compressed_size',
+     'sha256', 'rows', 'rows_sha256'])
+
+
+def seed_sql(database, rows):
+    """Return the SQL seeding a database with a known dataset.
+
+    The seed table holds the rows (n, SHA2(n, 256)) for n from 1 to rows, it
+    is filled by doubling so that it works without recursive CTEs.
+
+    :param database: Name of the database, dropped first if it exists
+    :type database: str
+    :param rows: Number of rows
+    :type rows: int
+    :rtype: str
+    """
+    statements = [
+        'DROP DATABASE IF EXISTS {}'.format(database),
+        'CREATE DATABASE {}'.format(database),
+        'CREATE TABLE {}.{} (id BIGINT PRIMARY KEY, '
+        'payload CHAR(64) NOT NULL)'.format(database, SEED_TABLE),
+        "INSERT INTO {}.{} VALUES (1, SHA2('1', 256))".format(
+            database, SEED_TABLE)]
+    count = 1
+    while count < rows:
+        statements.append(
+            'INSERT INTO {0}.{1} SELECT id + {2}, SHA2(id + {2}, 256) '
+            'FROM {0}.{1} WHERE id + {2} <= {3}'.format(
+                database, SEED_TABLE, count, rows))
+        count *= 2
+    return ' '.join('{};'.format(statement) for statement in statements)
+
+
+def seed_checksum(rows):
+    """Return the sha256 of the seeded rows, as digested in a dump.
+
+    :param rows: Number of rows seeded by seed_sql()
+    :type rows: int
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for n in range(1, rows + 1):
+        digest.update("{},'{}'\n".format(
+            n, hashlib.sha256(str(n).encode()).hexdigest()).encode())
+    return digest.hexdigest()
+
+
+def dump_throughput(result):
+    """Return the throughput of a dump in MB/s of uncompressed output.
+
+    :param result: Result of a dump
+    :type result: DumpResult
+    :rtype: float
+    """
+    if not result.seconds:
+        return 0.0
+    return result.size / result.seconds / 1e6
+
+
+async def async_digest_dump(unit_name, path, table=SEED_TABLE,
+                            model_name=None):
+    """Digest a gzipped dump on the unit it was written on.
+
+    :param unit_name: Name of the unit
+    :type unit_name: str
+    :param path: Path of the dump on the unit
+    :type path: str
+    :param table: Table whose rows are digested
+    :type table: str
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :returns: size, compressed_size, sha256, rows and rows_sha256 of the dump
+    :rtype: Dict[str, Any]
+    :raises: zaza.model.CommandRunFailed
+    """
+    cmd = 'python3 -c {} {} {}'.format(
+        shlex.quote(DUMP_DIGEST_SCRIPT), shlex.quote(path),
+        shlex.quote(table))
+    result = await zaza.model.async_run_on_unit(
+        unit_name, cmd, model_name=model_name)
+    if str(result.get('Code', '0')) != '0':
+        raise zaza.model.CommandRunFailed(
+            'digest of {} on {}'.format(path, unit_name), result)
+    return json.loads(result['Stdout'])
+
+
+async def async_benchmark_mysqldump(unit_names, databases, table=SEED_TABLE,
+                                    model_name=None):
+    """Dump databases concurrently with the mysqldump action.
+
+    Actions queue on a unit, so each database is dumped from its own unit,
+    round robin, and digested where it was written.
+
+    :param unit_names: Units of the mysql application
+    :type unit_names: List[str]
+    :param databases: Names of the databases, dumped one per action
+    :type databases: List[str]
+    :param table: Table whose rows are digested
+    :type table: str
+    :param model_name: Name of the model, defaults to the current one
+    :type model_name: Optional[str]
+    :rtype: List[DumpResult]
+    :raises: zaza.model.ActionFailed, zaza.model.CommandRunFailed
+    """
+    async def _dump(unit_name, database):
+        start = time.monotonic()
+        action = await zaza.model.async_run_action(
+            unit_name, 'mysqldump', model_name=model_name,
+            action_params={'databases': database}, raise_on_failure=True)
+        seconds = time.monotonic() - start
+        path = action.data['results']['mysqldump-file']
+        digest = await async_digest_dump(
+            unit_name, path, table=table, model_name=model_name)
+        return DumpResult(database=database, unit=unit_name, file=path,
+                          seconds=seconds, **digest)
+
+    return list(await asyncio.gather(*[
+        _dump(unit_names[i % len(unit_names)], database)
+        for i, database in enumerate(databases)]))
+
+
+benchmark_mysqldump = sync_wrapper(async_benchmark_mysqldump)
@@ -17,6 +17,7 @@
 This module contains a number of functions for interacting with OpenStack.
 """
 import collections
+import concurrent.futures
 import copy
 import datetime
 import enum
@@ -63,6 +64,7 @@ from designateclient.client import Client as DesignateClient
 
 from keystoneclient.v2_0 import client as keystoneclient_v2
 from keystoneclient.v3 import client as keystoneclient_v3
+from keystoneauth1 import exceptions as ksa_exceptions
 from keystoneauth1 import session
 from keystoneauth1.identity import (
     v3,
@@ -88,6 +90,7 @@ from zaza import model
 from zaza.openstack.utilities import (
     exceptions,
     generic as generic_utils,
+    retry_policy,
     ObjectRetrierWraps,
 )
 import zaza.utilities.networking as network_utils
@@ -1005,6 +1008,7 @@ def create_additional_port_for_machines(novaclient, neutronclient, net_id,
     :raises: RuntimeError
     """
     eligible_machines = 0
+    servers = []
     for uuid in unit_machine_ids:
         eligible_machines += 1
         server = novaclient.servers.get(uuid)
@@ -1019,20 +1023,22 @@ def create_additional_port_for_machines(novaclient, neutronclient, net_id,
             logging.info('Attaching additional port to instance ("{}"), '
                          'connected to net id: {}'
                          .format(uuid, net_id))
-            body_value = {
-                "port": {
-                    "admin_state_up": True,
-                    "name": ext_port_name,
-                    "network_id": net_id,
-                    "port_security_enabled": False,
-                    "fixed_ips": [],
-                }
-            }
-            port = neutronclient.create_port(body=body_value)
-            server.interface_attach(port_id=port['port']['id'],
+            servers.append((server, ext_port_name))
+    if servers:
+        ports = create_ports(
+            neutronclient, [name for _, name in servers],
+            network_id=net_id,
+            attributes={
+                "admin_state_up": True,
+                "port_security_enabled": False,
+                "fixed_ips": [],
+            })
+        for (server, _), port in zip(servers, ports):
+            server.interface_attach(port_id=port['id'],
                                     net_id=None, fixed_ip=None)
             if add_dataport_to_netplan:
-                mac_address = get_mac_from_port(port, neutronclient)
+                mac_address = get_mac_from_port({'port': port},
+                                                neutronclient)
                 add_interface_to_netplan(server.name,
                                          mac_address=mac_address)
     if not eligible_machines:
@@ -1299,6 +1305,7 @@ def create_project_network(neutron_client, project_id, net_name=PRIVATE_NET,
             network_msg['network']['provider:segmentation_id'] = 1233
             network_msg['network']['provider:network_type'] = network_type
         network = neutron_client.create_network(network_msg)['network']
+        invalidate_network(net_name)
     else:
         logging.warning('Network %s already exists.', net_name)
         network = networks['networks'][0]
@@ -1344,6 +1351,7 @@ def create_provider_network(neutron_client, project_id, net_name=EXT_NET,
             network_msg['provider:segmentation_id'] = int(vlan_id)
         network = neutron_client.create_network(
             {'network': network_msg})['network']
+        invalidate_network(net_name)
         logging.info('Network %s created: %s', net_name, network['id'])
     else:
         logging.warning('Network %s already exists.', net_name)
@@ -1775,67 +1783,130 @@ def add_peer_to_bgp_speaker(neutron_client, bgp_speaker, bgp_peer):
                         .format(bgp_peer['name']))
 
 
-def add_neutron_secgroup_rules(neutron_client, project_id, custom_rules=[]):
+def _secgroup_rule_key(rule):
+    """Return a key identifying what traffic a security group rule allows.
+
+    :param rule: ``security_group_rule`` dict
+    :type rule: dict
+    :returns: Comparable key for the rule
+    :rtype: tuple
+    """
+    port_range = tuple(
+        int(rule[port]) if rule.get(port) is not None else None
+        for port in ('port_range_min', 'port_range_max'))
+    remote_ip_prefix = rule.get('remote_ip_prefix')
+    if remote_ip_prefix in ('0.0.0.0/0', '::/0'):
+        remote_ip_prefix = None
+    return (rule.get('direction') or 'ingress',
+            rule.get('ethertype') or 'IPv4',
+            rule.get('protocol'),
+            remote_ip_prefix,
+            rule.get('remote_group_id')) + port_range
+
+
+def get_secgroup_rules(custom_rules=None, ethertypes=('IPv4',)):
+    """Return the security group rules for ssh, ping and any custom rules.
+
+    Custom rules without an ethertype are returned for each of ethertypes,
+    unless they have a ``remote_ip_prefix`` whose IP version sets it.
+
+    :param custom_rules: List of ``security_group_rule`` dicts to add
+    :type custom_rules: Optional[list]
+    :param ethertypes: Ethertypes to return rules for, IPv4 and/or IPv6
+    :type ethertypes: Iterable[str]
+    :returns: List of ``security_group_rule`` dicts
+    :rtype: list
+    """
+    ethertypes = list(ethertypes)
+    custom_rules = [copy.deepcopy(rule) for rule in custom_rules or []]
+    for rule in custom_rules:
+        if rule.get('remote_ip_prefix') and 'ethertype' not in rule:
+            rule['ethertype'] = 'IPv{}'.format(
+                netaddr.IPNetwork(rule['remote_ip_prefix']).version)
+    rules = []
+    for ethertype in ethertypes:
+        rules.append({
+            'protocol': 'tcp',
+            'port_range_min': 22,
+            'port_range_max': 22,
+            'direction': 'ingress',
+            'ethertype': ethertype,
+        })
+        rules.append({
+            'protocol': 'icmp' if ethertype == 'IPv4' else 'ipv6-icmp',
+            'direction': 'ingress',
+            'ethertype': ethertype,
+        })
+        for rule in custom_rules:
+            if 'ethertype' not in rule:
+                rules.append(dict(rule, ethertype=ethertype))
+            elif rule['ethertype'] == ethertype:
+                rules.append(rule)
+    rules.extend(rule for rule in custom_rules
+                 if rule.get('ethertype', ethertypes[0]) not in ethertypes)
+    return rules
+
+
+def create_secgroup_rules(neutron_client, secgroup, rules):
+    """Create the missing rules of a security group in a single request.
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param secgroup: Security group object, including its rules
+    :type secgroup: dict
+    :param rules: List of ``security_group_rule`` dicts the group should have
+    :type rules: list
+    :returns: The rules that were created
+    :rtype: list
+    """
+    present = set(_secgroup_rule_key(rule)
+                  for rule in secgroup.get('security_group_rules', []))
+    missing = []
+    for rule in rules:
+        key = _secgroup_rule_key(rule)
+        if key in present:
+            logging.warning('Security group rule {} already added'
+                            .format(key))
+            continue
+        present.add(key)
+        rule = dict(rule, security_group_id=secgroup['id'])
+        missing.append(rule)
+    if not missing:
+        return []
+    logging.info('Adding {} security group rules'.format(len(missing)))
+    return neutron_client.create_security_group_rule(
+        {'security_group_rules': missing})['security_group_rules']
+
+
+def add_neutron_secgroup_rules(neutron_client, project_id, custom_rules=[],
+                               ethertypes=('IPv4',)):
     """Add neutron security group rules.
 
+    Rules for ssh and ping plus any custom rules are added to the default
+    security group of the project, creating all missing rules at once.
+
     :param neutron_client: Authenticated neutronclient
     :type neutron_client: neutronclient.Client object
     :param project_id: Project ID
     :type project_id: string
     :param custom_rules: List of ``security_group_rule`` dicts to create
     :type custom_rules: list
+    :param ethertypes: Ethertypes to add rules for, IPv4 and/or IPv6
+    :type ethertypes: Iterable[str]
     """
     secgroup = None
-    for group in neutron_client.list_security_groups().get('security_groups'):
+    for group in neutron_client.list_security_groups(
+            name='default').get('security_groups'):
         if (group.get('name') == 'default' and
             (group.get('project_id') == project_id or
                 (group.get('tenant_id') == project_id))):
             secgroup = group
     if not secgroup:
         raise Exception("Failed to find default security group")
-    # Using presence of a 22 rule to indicate whether secgroup rules
-    # have been added
-    port_rules = [rule['port_range_min'] for rule in
-                  secgroup.get('security_group_rules')]
-    protocol_rules = [rule['protocol'] for rule in
-                      secgroup.get('security_group_rules')]
-    if 22 in port_rules:
-        logging.warn('Security group rules for ssh already added')
-    else:
-        logging.info('Adding ssh security group rule')
-        neutron_client.create_security_group_rule(
-            {'security_group_rule':
-                {'security_group_id': secgroup.get('id'),
-                 'protocol': 'tcp',
-                 'port_range_min': 22,
-                 'port_range_max': 22,
-                 'direction': 'ingress',
-                 }
-             })
-
-    if 'icmp' in protocol_rules:
-        logging.warn('Security group rules for ping already added')
-    else:
-        logging.info('Adding ping security group rule')
-        neutron_client.create_security_group_rule(
-            {'security_group_rule':
-                {'security_group_id': secgroup.get('id'),
-                 'protocol': 'icmp',
-                 'direction': 'ingress',
-                 }
-             })
-
-    for rule in custom_rules:
-        rule_port = rule.get('port_range_min')
-        if rule_port and int(rule_port) in port_rules:
-            logging.warn('Custom security group for port {} appears to '
-                         'already exist, skipping.'.format(rule_port))
-        else:
-            logging.info('Adding custom port {} security group rule'
-                         .format(rule_port))
-            rule.update({'security_group_id': secgroup.get('id')})
-            neutron_client.create_security_group_rule(
-                {'security_group_rule': rule})
+    create_secgroup_rules(
+        neutron_client,
+        secgroup,
+        get_secgroup_rules(custom_rules, ethertypes=ethertypes))
 
 
 def create_port(neutron_client, name, network_name):
@@ -1905,6 +1976,167 @@ def create_floating_ip(neutron_client, network_name, port=None):
     return floatingip
 
 
+def create_ports(neutron_client, names, network_name=None, network_id=None,
+                 attributes=None, port_attributes=None):
+    """Create ports on network using a single bulk request.
+
+    Ports that already exist are reused rather than created again.
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param names: Port names
+    :type names: List[str]
+    :param network_name: Network name the ports are on
+    :type network_name: Optional[str]
+    :param network_id: Network ID the ports are on, saves looking up
+                       network_name
+    :type network_id: Optional[str]
+    :param attributes: Further attributes of all the ports created
+    :type attributes: Optional[Dict[str, Any]]
+    :param port_attributes: Further attributes of each port, by port name
+    :type port_attributes: Optional[Dict[str, Dict[str, Any]]]
+    :returns: Port objects, in the same order as names
+    :rtype: List[dict]
+    """
+    if network_id is None:
+        network_id = get_net_uuid(neutron_client, network_name)
+    ports = {port['name']: port
+             for port in iter_ports(neutron_client, name=list(names),
+                                    network_id=network_id)}
+    missing = [name for name in names if name not in ports]
+    if missing:
+        logging.info('Creating ports: {}'.format(', '.join(missing)))
+        ports_msg = {'ports': []}
+        for name in missing:
+            port_msg = dict(attributes or {})
+            port_msg.update((port_attributes or {}).get(name, {}))
+            port_msg.update(name=name, network_id=network_id)
+            ports_msg['ports'].append(port_msg)
+        for port in neutron_client.create_port(ports_msg)['ports']:
+            ports[port['name']] = port
+    else:
+        logging.debug('Ports {} already exist.'.format(', '.join(names)))
+    return [ports[name] for name in names]
+
+
+class FloatingIPPool(object):
+    """A pool of pre-allocated floating IPs on an external network.
+
+    Floating IPs are allocated concurrently up front and handed out to ports
+    as they appear, instead of being created one at a time per guest. Neutron
+    does not support bulk creation of floating IPs, so each is allocated with
+    its own request.
+
+    Usage:
+
+        pool = FloatingIPPool(neutron_client, EXT_NET)
+        pool.fill(2)
+        fip = pool.assign(port)
+    """
+
+    def __init__(self, neutron_client, network_name=EXT_NET):
+        """Initialise the pool.
+
+        :param neutron_client: Authenticated neutronclient
+        :type neutron_client: neutronclient.Client object
+        :param network_name: Name of external network for FIPs
+        :type network_name: str
+        """
+        self._neutron_client = neutron_client
+        self._network_name = network_name
+        self._free = collections.deque()
+        self._assigned = {}
+
+    def __len__(self):
+        """Return the number of unassigned floating IPs in the pool."""
+        return len(self._free)
+
+    def fill(self, size):
+        """Ensure the pool holds at least size unassigned floating IPs.
+
+        Any shortfall is allocated with concurrent requests.
+
+        :param size: Number of floating IPs the pool should hold
+        :type size: int
+        :returns: The newly allocated floating IP objects
+        :rtype: List[dict]
+        """
+        shortfall = size - len(self._free)
+        if shortfall <= 0:
+            return []
+        logging.info('Allocating {} floating IPs on {}'
+                     .format(shortfall, self._network_name))
+        network_id = get_net_uuid(self._neutron_client, self._network_name)
+        floatingip_msg = {'floatingip': {'floating_network_id': network_id}}
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=shortfall) as executor:
+            futures = [
+                executor.submit(self._neutron_client.create_floatingip,
+                                floatingip_msg)
+                for _ in range(shortfall)]
+        floatingips = [future.result()['floatingip'] for future in futures]
+        self._free.extend(floatingips)
+        return floatingips
+
+    def assign(self, port):
+        """Associate a floating IP from the pool with a port.
+
+        The pool is topped up with one floating IP if it is empty.
+
+        :param port: Port object
+        :type port: dict
+        :returns: Floating IP object
+        :rtype: dict
+        """
+        if not self._free:
+            self.fill(1)
+        floatingip = self._free.popleft()
+        logging.info('Assigning floating IP {} to port {}'
+                     .format(floatingip['floating_ip_address'], port['id']))
+        try:
+            floatingip = self._neutron_client.update_floatingip(
+                floatingip['id'],
+                {'floatingip': {'port_id': port['id']}})['floatingip']
+        except Exception:
+            self._free.appendleft(floatingip)
+            raise
+        self._assigned[floatingip['id']] = (floatingip, port.get('device_id'))
+        return floatingip
+
+    def reclaim(self, device_id):
+        """Return the floating IPs assigned to the ports of a device.
+
+        For example when a guest that failed to launch is about to be
+        deleted, so that its floating IP can be given to the next attempt.
+
+        :param device_id: ID of the device, e.g. a Nova instance
+        :type device_id: str
+        :returns: The reclaimed floating IP objects
+        :rtype: List[dict]
+        """
+        reclaimed = []
+        for fip_id, (floatingip, fip_device_id) in list(
+                self._assigned.items()):
+            if fip_device_id != device_id:
+                continue
+            logging.info('Reclaiming floating IP {}'
+                         .format(floatingip['floating_ip_address']))
+            floatingip = self._neutron_client.update_floatingip(
+                fip_id, {'floatingip': {'port_id': None}})['floatingip']
+            del self._assigned[fip_id]
+            self._free.append(floatingip)
+            reclaimed.append(floatingip)
+        return reclaimed
+
+    def release(self):
+        """Delete the floating IPs that are still unassigned."""
+        while self._free:
+            floatingip = self._free.popleft()
+            logging.info('Releasing floating IP {}'
+                         .format(floatingip['floating_ip_address']))
+            self._neutron_client.delete_floatingip(floatingip['id'])
+
+
 # Codename and package versions
 def get_swift_codename(version):
     """Determine OpenStack codename that corresponds to swift version.
@@ -2461,6 +2693,199 @@ def get_urllib_opener():
     return urllib.request.build_opener(handler)
 
 
+class LookupIndex(object):
+    """Memoize the results of a lookup helper for the duration of a test.
+
+    Wraps one of the ``get_*`` lookup helpers whose first argument is an API
+    client. Results are keyed on the project and endpoint the client acts for
+    and on the remaining arguments, so repeated lookups of the same name in
+    the same project do not go back to the API, while a client scoped to
+    another project, which may see a different resource of that name, does.
+
+    Lookups through a client whose project cannot be determined are not
+    memoized.
+
+    Usage:
+
+        images = LookupIndex(get_images_by_name)
+        images(glance, 'cirros')  # queries glance
+        images(glance, 'cirros')  # served from the index
+        images.invalidate('cirros')
+    """
+
+    def __init__(self, lookup):
+        """Initialise the index.
+
+        :param lookup: Lookup helper to memoize.
+        :type lookup: Callable[[Any, ...], Any]
+        """
+        self._lookup = lookup
+        self._index = {}
+
+    def __call__(self, client, *args):
+        """Return the (possibly indexed) result of the lookup.
+
+        :param client: Authenticated client passed through to the lookup.
+        :type client: Any
+        :returns: Result of the lookup helper
+        :rtype: Any
+        """
+        scope = _client_scope(client)
+        if scope is None:
+            return self._lookup(client, *args)
+        key = (scope, args)
+        if key not in self._index:
+            self._index[key] = self._lookup(client, *args)
+        return self._index[key]
+
+    def invalidate(self, *args):
+        """Drop an entry from the index, or every entry if args are omitted.
+
+        Entries are dropped for clients of every project.
+
+        :param args: The arguments the entry was looked up with.
+        :type args: Any
+        """
+        if args:
+            for key in [key for key in self._index if key[1] == args]:
+                del self._index[key]
+        else:
+            self._index.clear()
+
+
+def _client_scope(client):
+    """Return the project and endpoint an API client acts for.
+
+    :param client: Authenticated client
+    :type client: Any
+    :returns: Project ID and endpoint, None if the client has no keystoneauth
+              adapter to ask or the adapter cannot tell
+    :rtype: Optional[Tuple[str, str]]
+    """
+    # neutronclient keeps its keystoneauth adapter in httpclient, novaclient
+    # in client.
+    adapter = (getattr(client, 'httpclient', None) or
+               getattr(client, 'client', None))
+    try:
+        scope = (adapter.get_project_id(), adapter.get_endpoint())
+    except (AttributeError, ksa_exceptions.ClientException) as e:
+        logging.debug('Not memoizing lookups through {}: {}'.format(
+            client, e))
+        return None
+    if None in scope:
+        return None
+    return scope
+
+
+_image_index = LookupIndex(
+    lambda nova_client, image_name: nova_client.glance.find_image(image_name))
+_flavor_index = LookupIndex(
+    lambda nova_client, flavor_name: nova_client.flavors.find(
+        name=flavor_name))
+_network_index = LookupIndex(
+    lambda neutron_client, net_name: neutron_client.find_resource(
+        "network", net_name))
+
+
+def resolve_image(nova_client, image_name):
+    """Resolve an image name to a glance image, memoized for the test run.
+
+    The index is invalidated whenever an image is uploaded or deleted through
+    this module.
+
+    :param nova_client: Authenticated nova client
+    :type nova_client: novaclient.v2.client.Client
+    :param image_name: Name of image
+    :type image_name: str
+    :returns: Image object
+    :rtype: novaclient.v2.images.Image
+    """
+    return _image_index(nova_client, image_name)
+
+
+def resolve_flavor(nova_client, flavor_name):
+    """Resolve a flavor name to a nova flavor, memoized for the test run.
+
+    Callers creating or deleting flavors must call invalidate_flavor().
+
+    :param nova_client: Authenticated nova client
+    :type nova_client: novaclient.v2.client.Client
+    :param flavor_name: Name of flavor
+    :type flavor_name: str
+    :returns: Flavor object
+    :rtype: novaclient.v2.flavors.Flavor
+    """
+    return _flavor_index(nova_client, flavor_name)
+
+
+def resolve_network(neutron_client, net_name):
+    """Resolve a network name to a neutron network, memoized for the test run.
+
+    The index is invalidated whenever a network is created through this
+    module, callers creating or deleting networks otherwise must call
+    invalidate_network().
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param net_name: Name of network
+    :type net_name: str
+    :returns: Network object
+    :rtype: dict
+    """
+    return _network_index(neutron_client, net_name)
+
+
+def invalidate_flavor(flavor_name=None):
+    """Drop the memoized resolution of a flavor, or of all flavors.
+
+    :param flavor_name: Name of the flavor created or deleted, all flavors
+                        are dropped if omitted
+    :type flavor_name: Optional[str]
+    """
+    if flavor_name is None:
+        _flavor_index.invalidate()
+    else:
+        _flavor_index.invalidate(flavor_name)
+
+
+def invalidate_network(net_name=None):
+    """Drop the memoized resolution of a network, or of all networks.
+
+    :param net_name: Name of the network created or deleted, all networks
+                     are dropped if omitted
+    :type net_name: Optional[str]
+    """
+    if net_name is None:
+        _network_index.invalidate()
+    else:
+        _network_index.invalidate(net_name)
+
+
+def invalidate_resolved_resources():
+    """Drop all memoized image, flavor and network resolutions."""
+    _image_index.invalidate()
+    _flavor_index.invalidate()
+    _network_index.invalidate()
+
+
+def iter_images_by_name(glance, image_name):
+    """Iterate over glance image objects with the given name.
+
+    The name filter is applied by glance and further pages are only requested
+    as the iterator is consumed.
+
+    :param glance: Authenticated glanceclient
+    :type glance: glanceclient.Client
+    :param image_name: Name of image
+    :type image_name: str
+    :returns: Iterator of glance images
+    :rtype: Iterator[glanceclient.v2.image]
+    """
+    for image in glance.images.list(filters={'name': image_name}):
+        if image_name == image.name:
+            yield image
+
+
 @tenacity.retry(wait=tenacity.wait_exponential(multiplier=1, max=60),
                 reraise=True,
                 retry=tenacity.retry_if_exception_type(CommunicationError))
@@ -2475,7 +2900,22 @@ def get_images_by_name(glance, image_name):
     :returns: List of glance images
     :rtype: [glanceclient.v2.image, ...]
     """
-    return [i for i in glance.images.list() if image_name == i.name]
+    return list(iter_images_by_name(glance, image_name))
+
+
+def iter_volumes_by_name(cinder, volume_name):
+    """Iterate over cinder volume objects with the given name.
+
+    :param cinder: Authenticated cinderclient
+    :type cinder: cinderclient.Client
+    :param volume_name: Name of volume
+    :type volume_name: str
+    :returns: Iterator of cinder volumes
+    :rtype: Iterator[cinderclient.v3.volume]
+    """
+    for volume in cinder.volumes.list(search_opts={'name': volume_name}):
+        if volume_name == volume.name:
+            yield volume
 
 
 def get_volumes_by_name(cinder, volume_name):
@@ -2483,12 +2923,12 @@ def get_volumes_by_name(cinder, volume_name):
 
     :param cinder: Authenticated cinderclient
     :type cinder: cinderclient.Client
-    :param image_name: Name of volume
-    :type image_name: str
+    :param volume_name: Name of volume
+    :type volume_name: str
     :returns: List of cinder volumes
     :rtype: List[cinderclient.v3.volume, ...]
     """
-    return [i for i in cinder.volumes.list() if volume_name == i.name]
+    return list(iter_volumes_by_name(cinder, volume_name))
 
 
 @tenacity.retry(wait=tenacity.wait_exponential(multiplier=1, max=60),
@@ -2618,12 +3058,13 @@ def resource_reaches_status(resource,
     :raises: AssertionError
     :raises: StatusError
     """
-    retryer = tenacity.Retrying(
-        wait=tenacity.wait_exponential(
-            multiplier=wait_exponential_multiplier,
-            max=wait_iteration_max_time),
+    retryer = retry_policy.retrying(
+        'resource-status',
+        attempts=stop_after_attempt,
+        multiplier=wait_exponential_multiplier,
+        wait_max=wait_iteration_max_time,
+        key='{} {}'.format(msg, expected_status),
         reraise=True,
-        stop=tenacity.stop_after_attempt(stop_after_attempt),
         retry=tenacity.retry_if_exception_type(AssertionError),
     )
     retryer(
@@ -2724,6 +3165,7 @@ def delete_image(glance, img_id):
     :type img_id: str
     """
     delete_resource(glance.images, img_id, msg="glance image")
+    _image_index.invalidate()
 
 
 def delete_volume(cinder, vol_id):
@@ -2780,6 +3222,7 @@ def upload_image_to_glance(glance, local_path, image_name, disk_format='qcow2',
         disk_format=disk_format,
         visibility=visibility,
         container_format=container_format)
+    _image_index.invalidate(image_name)
 
     if force_import:
         logging.info('Forcing image import')
@@ -3179,6 +3622,24 @@ def valid_key_exists(nova_client, keypair_name):
     return cert.is_keys_valid(pub_key, priv_key)
 
 
+def iter_ports(neutron_client, **filters):
+    """Iterate over the ports matching the given filters.
+
+    The filters are passed to neutron and further pages are only requested as
+    the iterator is consumed.
+
+    :param neutron_client: Authenticated neutronclient
+    :type neutron_client: neutronclient.Client object
+    :param filters: Port attributes to filter on, e.g. ``device_id``
+    :type filters: Dict[str, Any]
+    :returns: Iterator of port objects
+    :rtype: Iterator[dict]
+    """
+    for page in neutron_client.list_ports(retrieve_all=False, **filters):
+        for port in page.get('ports', []):
+            yield port
+
+
 def get_ports_from_device_id(neutron_client, device_id):
     """Return the ports associated with a given device.
 
@@ -3189,15 +3650,10 @@ def get_ports_from_device_id(neutron_client, device_id):
     :returns: List of port objects
     :rtype: []
     """
-    ports = []
-    for _port in neutron_client.list_ports().get('ports'):
-        if device_id in _port.get('device_id'):
-            ports.append(_port)
-    return ports
+    return list(iter_ports(neutron_client, device_id=device_id))
 
 
-@tenacity.retry(wait=tenacity.wait_exponential(multiplier=1, max=120),
-                reraise=True, stop=tenacity.stop_after_delay(1800))
+@retry_policy.retry('cloud-init', reraise=True)
 def cloud_init_complete(nova_client, vm_id, bootstring):
     """Wait for cloud init to complete on the given vm.
 
@@ -3221,8 +3677,7 @@ def cloud_init_complete(nova_client, vm_id, bootstring):
             .format(bootstring, console_log))
 
 
-@tenacity.retry(wait=tenacity.wait_exponential(multiplier=1, max=60),
-                reraise=True, stop=tenacity.stop_after_attempt(16))
+@retry_policy.retry('ping', reraise=True)
 def ping_response(ip):
     """Wait for ping to respond on the given IP.
 
@@ -3326,9 +3781,7 @@ def ssh_command(username,
             ssh.close()
 
 
-@tenacity.retry(wait=tenacity.wait_exponential(multiplier=0.01),
-                reraise=True, stop=tenacity.stop_after_delay(60) |
-                tenacity.stop_after_attempt(100))
+@retry_policy.retry('neutron-agent', reraise=True)
 def neutron_agent_appears(neutron_client, binary):
     """Wait for Neutron agent to appear and return agent_id.
 
@@ -3566,10 +4019,7 @@ def wait_for_url(url, ok_codes=None):
     """
     if not ok_codes:
         ok_codes = [requests.codes.ok]
-    for attempt in tenacity.Retrying(
-            stop=tenacity.stop_after_attempt(10),
-            wait=tenacity.wait_exponential(
-                multiplier=1, min=2, max=60)):
+    for attempt in retry_policy.retrying('url'):
         with attempt:
             r = requests.get(url)
             logging.info("{} returned {}".format(url, r.status_code))
@@ -21,6 +21,7 @@ import zaza.utilities.juju as juju_utils
 
 import zaza.model
 from zaza import sync_wrapper
+import zaza.openstack.utilities.mysql as mysql_utils
 from zaza.openstack.utilities.upgrade_utils import (
     get_upgrade_groups,
 )
@@ -175,18 +176,18 @@ async def async_block_until_mysql_innodb_cluster_has_rw(model=None,
 
     This function blocks until that happens so that no charm attempts to have a
     chat with the mysql server before it has settled, thus breaking the whole
-    test.
+    test. Only the model status is probed, neither the cluster-status action
+    nor the mysql servers.
+
+    :param model: Name of model to query.
+    :type model: Optional[str]
+    :param timeout: Seconds to wait, None to wait forever
+    :type timeout: Optional[float]
+    :raises: zaza.model.ModelTimeout
     """
-    async def async_check_workload_messages_for_rw(model=None):
-        """Return True if a least one work message contains R/W."""
-        status = await zaza.model.async_get_status()
-        app_status = status.applications.get("mysql-innodb-cluster")
-        units_data = app_status.units.values()
-        workload_statuses = [d.workload_status.info for d in units_data]
-        return any("R/W" in s for s in workload_statuses)
-
-    await zaza.model.async_block_until(async_check_workload_messages_for_rw,
-                                       timeout=timeout)
+    probe = mysql_utils.MySQLClusterProbe(model_name=model)
+    await probe.async_wait_for(
+        mysql_utils.has_rw_primary, timeout=timeout, probes=())
 
 
 block_until_mysql_innodb_cluster_has_rw = sync_wrapper(
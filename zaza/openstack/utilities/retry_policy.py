@@ -0,0 +1,354 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Named retry policies shared by the helpers.
+
+Helpers that wait on something to become ready retry through a named policy
+rather than their own tenacity settings, so that:
+
+ - the wait between attempts adapts to how long readiness usually takes, as
+   observed earlier in the run, rather than growing well past it;
+ - every retry made while a deadline is set stops at that deadline, however
+   deeply retries are nested;
+ - retries and time spent sleeping are counted per policy.
+"""
+
+import collections
+import contextlib
+import contextvars
+import statistics
+import threading
+import time
+
+import tenacity
+
+_lock = threading.Lock()
+_policies = {}
+_stats = {}
+# Monotonic time after which retries stop, per thread and asyncio task, so
+# that concurrent deadline scopes do not clobber each other.
+_deadline = contextvars.ContextVar('retry_deadline', default=None)
+
+# Number of observed readiness latencies kept per policy.
+LATENCY_SAMPLES = 20
+# Adaptive waits are not shortened below this many seconds.
+ADAPTIVE_WAIT_FLOOR = 1
+
+
+class RetryPolicy(collections.namedtuple(
+        'RetryPolicy',
+        ['name', 'attempts', 'delay', 'multiplier', 'wait_min', 'wait_max',
+         'adaptive'])):
+    """How a helper retries.
+
+    `attempts` and `delay` bound the number of attempts and the seconds since
+    the first attempt, either may be None. The wait between attempts grows
+    exponentially with `multiplier` between `wait_min` and `wait_max`. When
+    `adaptive` is set it is also capped at a quarter of the median time the
+    policy took to succeed so far, so that the attempts are spent around the
+    time the helper usually becomes ready rather than well past it.
+    """
+
+    def wait(self, attempt_number):
+        """Return the exponential wait after an attempt.
+
+        :param attempt_number: Number of the attempt, from 1
+        :type attempt_number: int
+        :rtype: float
+        """
+        wait = self.multiplier * 2 ** (attempt_number - 1)
+        return max(self.wait_min, min(wait, self.wait_max))
+
+    def stop(self):
+        """Return the tenacity stop condition of the policy.
+
+        :rtype: tenacity.stop.stop_base
+        """
+        stop = stop_at_deadline()
+        if self.attempts is not None:
+            stop = stop | tenacity.stop_after_attempt(self.attempts)
+        if self.delay is not None:
+            stop = stop | tenacity.stop_after_delay(self.delay)
+        return stop
+
+
+class stop_at_deadline(tenacity.stop.stop_base):
+    """Stop once the deadline set with `deadline` has passed."""
+
+    def __call__(self, retry_state):
+        """Return whether to stop."""
+        stop_at = _deadline.get()
+        return stop_at is not None and time.monotonic() >= stop_at
+
+
+class wait_adaptive(tenacity.wait.wait_base):
+    """Wait exponentially, capped by observed readiness and the deadline."""
+
+    def __init__(self, policy, key=None):
+        """Create the wait strategy for a policy.
+
+        :param policy: Policy to wait for
+        :type policy: RetryPolicy
+        :param key: Key of the observed latencies, defaults to the policy name
+        :type key: Optional[str]
+        """
+        self.policy = policy
+        self.key = key or policy.name
+
+    def __call__(self, retry_state):
+        """Return the seconds to wait before the next attempt."""
+        policy = self.policy
+        wait = policy.wait(retry_state.attempt_number)
+        latency = readiness_latency(self.key)
+        if policy.adaptive and latency is not None:
+            wait = min(wait, max(policy.wait_min, ADAPTIVE_WAIT_FLOOR,
+                                 latency / 4))
+        stop_at = _deadline.get()
+        if stop_at is not None:
+            wait = min(wait, max(stop_at - time.monotonic(), 0))
+        return wait
+
+
+class PolicyRetrying(tenacity.Retrying):
+    """tenacity.Retrying that accounts its retries to a policy."""
+
+    policy_name = None
+
+    def copy(self, *args, **kwargs):
+        """Copy, keeping the policy."""
+        copy = super().copy(*args, **kwargs)
+        copy.policy_name = self.policy_name
+        return copy
+
+    def iter(self, retry_state):
+        """Run the next step of the retry loop, recording what it did."""
+        action = super().iter(retry_state)
+        if isinstance(action, tenacity.DoSleep):
+            with _lock:
+                stats = _get_stats(self.policy_name)
+                stats['retries'] += 1
+                stats['slept'] += float(action)
+        elif not isinstance(action, tenacity.DoAttempt):
+            # Done, and did not raise, so the last attempt succeeded.
+            with _lock:
+                stats = _get_stats(self.policy_name)
+                stats['calls'] += 1
+                stats['latencies'].append(
+                    time.monotonic() - retry_state.start_time)
+        return action
+
+
+def _get_stats(name):
+    """Return the statistics of a policy, creating them if needed."""
+    if name not in _stats:
+        _stats[name] = {
+            'calls': 0,
+            'retries': 0,
+            'slept': 0.0,
+            'latencies': collections.deque(maxlen=LATENCY_SAMPLES)}
+    return _stats[name]
+
+
+def register_policy(name, attempts=None, delay=None, multiplier=1,
+                    wait_min=0, wait_max=60, adaptive=True):
+    """Register a named retry policy, replacing any of the same name.
+
+    :param name: Name of the policy
+    :type name: str
+    :param attempts: Maximum number of attempts
+    :type attempts: Optional[int]
+    :param delay: Maximum seconds since the first attempt
+    :type delay: Optional[float]
+    :param multiplier: Wait multiplier * 2^(attempt - 1) between attempts
+    :type multiplier: float
+    :param wait_min: Minimum seconds between attempts
+    :type wait_min: float
+    :param wait_max: Maximum seconds between attempts
+    :type wait_max: float
+    :param adaptive: Whether to cap waits by the observed readiness latency
+    :type adaptive: bool
+    :returns: The policy
+    :rtype: RetryPolicy
+    """
+    if attempts is None and delay is None:
+        raise ValueError('Retry policy {} never stops'.format(name))
+    policy = RetryPolicy(name, attempts, delay, multiplier, wait_min,
+                         wait_max, adaptive)
+    _policies[name] = policy
+    return policy
+
+
+def get_policy(name):
+    """Return a registered retry policy.
+
+    :param name: Name of the policy
+    :type name: str
+    :rtype: RetryPolicy
+    :raises: KeyError if there is no such policy
+    """
+    return _policies[name]
+
+
+def retrying(name, attempts=None, delay=None, multiplier=None,
+             wait_min=None, wait_max=None, key=None, **kwargs):
+    """Return a tenacity.Retrying for a named policy.
+
+    Example usage::
+
+        for attempt in retry_policy.retrying('url'):
+            with attempt:
+                check_url()
+
+    :param name: Name of the policy
+    :type name: str
+    :param attempts: Override the maximum number of attempts
+    :type attempts: Optional[int]
+    :param delay: Override the maximum seconds since the first attempt
+    :type delay: Optional[float]
+    :param multiplier: Override the wait multiplier
+    :type multiplier: Optional[float]
+    :param wait_min: Override the minimum seconds between attempts
+    :type wait_min: Optional[float]
+    :param wait_max: Override the maximum seconds between attempts
+    :type wait_max: Optional[float]
+    :param key: Account retries and readiness latency under
+                `<name>:<key>` instead of `<name>`, for uses of a policy
+                that are ready after very different times.
+    :type key: Optional[str]
+    :param kwargs: Passed to tenacity.Retrying, e.g. retry or reraise
+    :type kwargs: Dict[str, Any]
+    :rtype: PolicyRetrying
+    """
+    overrides = {field: value for field, value in (
+        ('attempts', attempts), ('delay', delay), ('multiplier', multiplier),
+        ('wait_min', wait_min), ('wait_max', wait_max))
+        if value is not None}
+    policy = get_policy(name)._replace(**overrides)
+    if key is not None:
+        key = '{}:{}'.format(name, key)
+    kwargs.setdefault('stop', policy.stop())
+    kwargs.setdefault('wait', wait_adaptive(policy, key=key))
+    retryer = PolicyRetrying(**kwargs)
+    retryer.policy_name = key or name
+    return retryer
+
+
+def retry(name, **kwargs):
+    """Decorate a function to retry it with a named policy.
+
+    As with tenacity.retry, the Retrying object is available as the `retry`
+    attribute of the decorated function.
+
+    :param name: Name of the policy
+    :type name: str
+    :param kwargs: Passed to retrying
+    :type kwargs: Dict[str, Any]
+    """
+    def _decorator(f):
+        return retrying(name, **kwargs).wraps(f)
+    return _decorator
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """Stop all retries made within the block after some seconds.
+
+    Nested deadlines can only make the deadline earlier. The deadline applies
+    to the current thread or asyncio task, and to tasks it creates, but not
+    to other threads.
+
+    :param seconds: Seconds from now, None for no deadline
+    :type seconds: Optional[float]
+    """
+    previous = _deadline.get()
+    new = previous
+    if seconds is not None:
+        new = time.monotonic() + seconds
+        if previous is not None:
+            new = min(previous, new)
+    token = _deadline.set(new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def budget(name):
+    """Stop all retries made within the block at the delay of a policy.
+
+    For helpers that retry around code which retries itself, so that the
+    nested retries share the time given to the outer one rather than
+    multiplying it.
+
+    Example usage::
+
+        with retry_policy.budget('launch-guest'):
+            for attempt in retry_policy.retrying('launch-guest'):
+                with attempt:
+                    launch_instance()
+
+    :param name: Name of the policy
+    :type name: str
+    """
+    return deadline(get_policy(name).delay)
+
+
+def readiness_latency(name):
+    """Return the median seconds the policy took to succeed so far.
+
+    :param name: Name of the policy, or `<name>:<key>`
+    :type name: str
+    :returns: Median latency, None if the policy has not succeeded yet
+    :rtype: Optional[float]
+    """
+    with _lock:
+        latencies = list(_stats.get(name, {}).get('latencies', []))
+    if not latencies:
+        return None
+    return statistics.median(latencies)
+
+
+def report(reset=False):
+    """Return the retry statistics of every policy used so far.
+
+    :param reset: Whether to forget the counts afterwards. Observed
+                  latencies are kept for adaptive waits.
+    :type reset: bool
+    :returns: Map of policy name, or `<name>:<key>`, to 'calls', 'retries',
+              'slept' and
+              'latency' (the median readiness latency)
+    :rtype: Dict[str, dict]
+    """
+    result = {}
+    with _lock:
+        for name, stats in _stats.items():
+            result[name] = {
+                'calls': stats['calls'],
+                'retries': stats['retries'],
+                'slept': stats['slept'],
+                'latency': (statistics.median(stats['latencies'])
+                            if stats['latencies'] else None)}
+            if reset:
+                stats.update(calls=0, retries=0, slept=0.0)
+    return result
+
+
+register_policy('resource-status', attempts=8, wait_max=60)
+register_policy('ping', attempts=16, wait_max=60)
+register_policy('cloud-init', delay=1800, wait_max=120)
+register_policy('neutron-agent', attempts=100, delay=60, multiplier=0.01)
+register_policy('url', attempts=10, wait_min=2, wait_max=60)
+register_policy('connectivity', attempts=8, wait_min=2, wait_max=60)
+register_policy('launch-guest', attempts=3, delay=3600, wait_min=2,
+                wait_max=10, adaptive=False)
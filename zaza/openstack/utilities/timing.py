@@ -0,0 +1,350 @@
+# Copyright 2026 Canonical Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in timing of charm tests.
+
+Timing is enabled by pointing the TEST_TIMING_DIR environment variable at a
+directory. Test code is then recorded as nested spans, as are zaza model
+calls, OpenStack API requests and tenacity retries once `instrument` has been
+called. For each test class a JSON report and a profile in the folded stack
+format read by flamegraph.pl are written to that directory.
+"""
+
+import collections
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+
+import tenacity
+from keystoneauth1 import session as ks_session
+
+from zaza import model
+
+TIMING_DIR_ENV = 'TEST_TIMING_DIR'
+
+_stack = contextvars.ContextVar('zaza_openstack_timing_stack', default=())
+_lock = threading.Lock()
+_spans = []
+_retries = collections.Counter()
+_originals = {}
+
+_ID_RE = re.compile(r'^([0-9a-f-]{32,36}|[0-9]+)$')
+
+
+class Span(object):
+    """A timed section of a test."""
+
+    def __init__(self, name, parent=None, start=None):
+        """Create a span.
+
+        :param name: Name of the span
+        :type name: str
+        :param parent: Span this span is nested in
+        :type parent: Optional[Span]
+        :param start: Start time, as returned by time.monotonic
+        :type start: Optional[float]
+        """
+        self.name = name
+        self.parent = parent
+        self.start = time.monotonic() if start is None else start
+        self.duration = None
+        self.retries = 0
+        self.bytes = 0
+
+    @property
+    def path(self):
+        """Return the names of the enclosing spans and of this span.
+
+        :rtype: Tuple[str]
+        """
+        if self.parent is None:
+            return (self.name,)
+        return self.parent.path + (self.name,)
+
+    def finish(self):
+        """Record the duration of the span."""
+        self.duration = time.monotonic() - self.start
+        with _lock:
+            _spans.append(self)
+
+    def as_dict(self):
+        """Return the span as a JSON serialisable dict.
+
+        :rtype: dict
+        """
+        return {
+            'name': self.name,
+            'path': list(self.path),
+            'duration': self.duration,
+            'retries': self.retries,
+            'bytes': self.bytes,
+        }
+
+
+def enabled():
+    """Return whether timing is enabled.
+
+    :rtype: bool
+    """
+    return bool(os.environ.get(TIMING_DIR_ENV))
+
+
+def current_span():
+    """Return the innermost open span, if any.
+
+    :rtype: Optional[Span]
+    """
+    stack = _stack.get()
+    return stack[-1] if stack else None
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time the enclosed code as a span nested in the current one.
+
+    Does nothing unless timing is enabled.
+
+    Example usage::
+
+        with timing.span('boot'):
+            boot_instance()
+
+    :param name: Name of the span
+    :type name: str
+    :returns: The new span, or None if timing is not enabled
+    :rtype: Optional[Span]
+    """
+    if not enabled():
+        yield None
+        return
+    current = Span(name, parent=current_span())
+    token = _stack.set(_stack.get() + (current,))
+    try:
+        yield current
+    finally:
+        _stack.reset(token)
+        current.finish()
+
+
+def record(name, start):
+    """Record a span that started earlier and ends now.
+
+    :param name: Name of the span
+    :type name: str
+    :param start: Start time, as returned by time.monotonic
+    :type start: float
+    """
+    if enabled():
+        Span(name, parent=current_span(), start=start).finish()
+
+
+def add_bytes(count):
+    """Add to the bytes transferred within the current span.
+
+    :param count: Number of bytes
+    :type count: int
+    """
+    current = current_span()
+    if current is not None:
+        current.bytes += count
+
+
+def add_retry(name):
+    """Count a retry within the current span.
+
+    :param name: Name of the function being retried
+    :type name: str
+    """
+    current = current_span()
+    if current is not None:
+        current.retries += 1
+    with _lock:
+        _retries[name] += 1
+
+
+def _wrap(name, func):
+    """Return func wrapped so that each call is recorded as a span."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def _async_wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return _async_wrapper
+
+    @functools.wraps(func)
+    def _wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return _wrapper
+
+
+def _patch(owner, attr, replacement):
+    """Replace an attribute, keeping the original for uninstrument."""
+    if (owner, attr) not in _originals:
+        _originals[(owner, attr)] = getattr(owner, attr)
+        setattr(owner, attr, replacement)
+
+
+def _request_name(url, kwargs):
+    """Return a span name for a keystoneauth request.
+
+    IDs in the path are replaced so that requests for different resources of
+    the same kind share a name.
+    """
+    path = url.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].partition('/')[2]
+    path = '/'.join(
+        '{id}' if _ID_RE.match(segment) else segment
+        for segment in path.split('/'))
+    service_type = (kwargs.get('endpoint_filter') or {}).get(
+        'service_type', 'openstack')
+    return '{} {} {}'.format(service_type, kwargs.get('method', ''), path)
+
+
+def instrument():
+    """Record zaza model calls, OpenStack requests and tenacity retries.
+
+    Calls to the Juju backed functions of zaza.model and requests made
+    through keystoneauth sessions, which all the OpenStack clients use, are
+    recorded as spans. The bytes received by each request are added to its
+    span. Retries made by tenacity are counted against the current span.
+
+    Does nothing unless timing is enabled, and is safe to call repeatedly.
+    """
+    if not enabled():
+        return
+    for attr, value in list(vars(model).items()):
+        if attr.startswith('_') or not inspect.isfunction(value):
+            continue
+        if ((value.__module__ == model.__name__ and
+                inspect.iscoroutinefunction(value)) or
+                value.__qualname__.startswith('sync_wrapper.')):
+            _patch(model, attr, _wrap('zaza.model.' + attr, value))
+
+    request = ks_session.Session.request
+
+    @functools.wraps(request)
+    def _request(self, url, method, **kwargs):
+        with span(_request_name(url, dict(kwargs, method=method))):
+            response = request(self, url, method, **kwargs)
+            add_bytes(int(response.headers.get('Content-Length') or 0))
+            return response
+
+    _patch(ks_session.Session, 'request', _request)
+
+    retrying_iter = tenacity.BaseRetrying.iter
+
+    @functools.wraps(retrying_iter)
+    def _iter(self, retry_state):
+        action = retrying_iter(self, retry_state)
+        if isinstance(action, tenacity.DoSleep):
+            add_retry(getattr(retry_state.fn, '__qualname__', repr(
+                retry_state.fn)))
+        return action
+
+    _patch(tenacity.BaseRetrying, 'iter', _iter)
+
+
+def uninstrument():
+    """Undo instrument."""
+    while _originals:
+        (owner, attr), original = _originals.popitem()
+        setattr(owner, attr, original)
+
+
+def collect():
+    """Return and forget the spans and retries recorded so far.
+
+    :returns: The finished spans and the number of retries per function
+    :rtype: Tuple[List[Span], Dict[str, int]]
+    """
+    with _lock:
+        spans = list(_spans)
+        retries = dict(_retries)
+        del _spans[:]
+        _retries.clear()
+    return spans, retries
+
+
+def folded_stacks(spans):
+    """Return the time spent in each stack of spans, excluding children.
+
+    :param spans: Finished spans
+    :type spans: List[Span]
+    :returns: Map of ';' joined span names to microseconds
+    :rtype: Dict[str, int]
+    """
+    child_time = collections.Counter()
+    for span_ in spans:
+        if span_.parent is not None:
+            child_time[id(span_.parent)] += span_.duration
+    stacks = collections.Counter()
+    for span_ in spans:
+        own_time = max(span_.duration - child_time[id(span_)], 0)
+        stack = ';'.join(name.replace(';', ',') for name in span_.path)
+        stacks[stack] += int(own_time * 1000000)
+    return dict(stacks)
+
+
+def write_report(name, extra=None):
+    """Write the spans recorded so far to the timing directory.
+
+    Writes `<name>.json`, with every span and totals per span name, and
+    `<name>.folded`, a profile for flamegraph.pl. The recorded spans are then
+    forgotten. Does nothing unless timing is enabled.
+
+    :param name: Name of the report, usually the test class
+    :type name: str
+    :param extra: Further JSON serialisable items of the report
+    :type extra: Optional[Dict[str, Any]]
+    :returns: Paths of the files written
+    :rtype: List[str]
+    """
+    if not enabled():
+        return []
+    spans, retries = collect()
+    totals = collections.OrderedDict()
+    for span_ in sorted(spans, key=lambda s: s.duration, reverse=True):
+        total = totals.setdefault(
+            span_.name,
+            {'count': 0, 'duration': 0.0, 'retries': 0, 'bytes': 0})
+        total['count'] += 1
+        total['duration'] += span_.duration
+        total['retries'] += span_.retries
+        total['bytes'] += span_.bytes
+    directory = os.environ[TIMING_DIR_ENV]
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, '{}.json'.format(name))
+    report = {
+        'name': name,
+        'totals': totals,
+        'retries': retries,
+        'spans': [span_.as_dict()
+                  for span_ in sorted(spans, key=lambda s: s.start)],
+    }
+    report.update(extra or {})
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    folded_path = os.path.join(directory, '{}.folded'.format(name))
+    with open(folded_path, 'w') as f:
+        for stack, micros in sorted(folded_stacks(spans).items()):
+            f.write('{} {}\n'.format(stack, micros))
+    return [json_path, folded_path]